@@ -0,0 +1,15 @@
+"""Benchmarks del motor y del arranque de la app (`python -m benchmarks`, `python -m benchmarks.arranque`)."""
+import os
+import subprocess
+
+DIRECTORIO_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resultados')
+
+
+def commit_actual():
+    """Commit corto del árbol medido (None fuera de un repositorio git)"""
+    try:
+        salida = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=10,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return salida.stdout.strip() or None
@@ -0,0 +1,207 @@
+"""Mide las rutas de análisis con 10, 1k, 10k y 100k socios sintéticos.
+
+Cada caso llama a las mismas funciones del motor que usan las secciones de
+la app (tablas, análisis de equity, dilución, simulación pro-rata e
+importación/exportación). Los resultados se guardan en un JSON con la
+versión del código y de las librerías, para compararlos entre corridas:
+
+    python -m benchmarks
+    python -m benchmarks --tamanos 10 1000 --comparar benchmarks/resultados/bench_20250101_120000.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import DIRECTORIO_RESULTADOS, commit_actual
+from equity_engine import (
+    calcular_cap_table,
+    calcular_dilucion_df,
+    calcular_matriz_vesting,
+    construir_analisis_categorias,
+    construir_analisis_categorias_resumen,
+    construir_tabla_completa,
+    construir_tabla_ejecutiva,
+    construir_tabla_resumida,
+    construir_tabla_simulacion_prorata,
+    evaluar_elegibilidad_prorata,
+    importar_json,
+    simular_montecarlo_prorata,
+)
+from equity_engine.sintetico import generar_company_info, generar_socios
+from equity_engine.snapshot import ARROW_DISPONIBLE, cargar_snapshot, snapshot_en_bytes
+
+TAMANOS_POR_DEFECTO = [10, 1_000, 10_000, 100_000]
+
+SEMILLA = 42
+
+# Parámetros de los simuladores (los valores por defecto de la app)
+NUEVA_EMISION = 20.0
+MONTO_RECAUDAR = 500_000
+VALORACION_PRE_MONEY = 2_000_000
+PROBABILIDAD_EJERCICIO = 0.8
+
+
+class Datos:
+    """Empresa sintética y sus derivados, preparados antes de medir"""
+
+    def __init__(self, n, semilla, simulaciones):
+        self.n = n
+        self.simulaciones = simulaciones
+        self.socios = generar_socios(n, semilla)
+        self.company_info = generar_company_info(semilla)
+        self.cap = calcular_cap_table(self.socios)
+        self.df = self.cap.df
+        self.matriz = calcular_matriz_vesting(self.df)
+        self.exportacion = {
+            'company_info': self.company_info,
+            'socios': self.socios.to_records(),
+            'export_date': datetime.now().isoformat(),
+        }
+        self.json = json.dumps(self.exportacion, indent=2, ensure_ascii=False).encode('utf-8')
+        self.snapshot = snapshot_en_bytes(self.exportacion) if ARROW_DISPONIBLE else None
+
+
+def _simulacion_prorata(d):
+    con_derechos = d.df[d.df['derechos_prorata']]
+    elegibles = con_derechos[evaluar_elegibilidad_prorata(con_derechos, [])['elegible']]
+    porcentaje = MONTO_RECAUDAR / (VALORACION_PRE_MONEY + MONTO_RECAUDAR) * 100
+    simulacion = simular_montecarlo_prorata(
+        elegibles['equity_acciones'].to_numpy(), PROBABILIDAD_EJERCICIO, MONTO_RECAUDAR, porcentaje,
+        n_simulaciones=d.simulaciones, semilla=SEMILLA
+    )
+    construir_tabla_simulacion_prorata(elegibles, simulacion)
+    simulacion.resumen()
+
+
+def _exportar_json(d):
+    exportacion = dict(d.exportacion, socios=d.socios.to_records())
+    json.dumps(exportacion, indent=2, ensure_ascii=False)
+
+
+# (grupo, nombre, función) en el orden en que se reportan
+CASOS = [
+    ('tablas', 'tabla_ejecutiva', lambda d: construir_tabla_ejecutiva(d.df, True)),
+    ('tablas', 'tabla_resumida', lambda d: construir_tabla_resumida(d.df, True)),
+    ('tablas', 'tabla_completa', lambda d: construir_tabla_completa(d.df, True, d.matriz.consolidado_hoy)),
+    ('tablas', 'analisis_categorias_resumen', lambda d: construir_analisis_categorias_resumen(d.cap)),
+    ('analisis', 'calcular_cap_table', lambda d: calcular_cap_table(d.socios)),
+    ('analisis', 'analisis_categorias', lambda d: construir_analisis_categorias(d.cap)),
+    ('analisis', 'matriz_vesting', lambda d: calcular_matriz_vesting(d.df)),
+    ('analisis', 'curvas_vesting_categoria', lambda d: d.matriz.curvas_por_categoria()),
+    ('simuladores', 'calcular_dilucion', lambda d: calcular_dilucion_df(d.df, NUEVA_EMISION)),
+    ('simuladores', 'simulacion_prorata', _simulacion_prorata),
+    ('datos', 'exportar_json', _exportar_json),
+    ('datos', 'importar_json', lambda d: importar_json(io.BytesIO(d.json))),
+    ('datos', 'exportar_snapshot', lambda d: snapshot_en_bytes(d.exportacion)),
+    ('datos', 'importar_snapshot', lambda d: cargar_snapshot(d.snapshot).a_importacion()),
+]
+
+
+def medir(funcion, repeticiones, presupuesto):
+    """Tiempos de hasta 'repeticiones' llamadas, cortando cuando se agota el presupuesto (s)"""
+    tiempos = []
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        t = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - t)
+        if time.perf_counter() - inicio > presupuesto:
+            break
+    return tiempos
+
+
+def _version(modulo):
+    try:
+        return __import__(modulo).__version__
+    except ImportError:
+        return None
+
+
+def ejecutar(tamanos, repeticiones, presupuesto, simulaciones, filtro=None, semilla=SEMILLA):
+    """Correr los casos para cada tamaño; devuelve el documento de resultados"""
+    casos = [c for c in CASOS if not filtro or filtro in c[0] or filtro in c[1]]
+    if not ARROW_DISPONIBLE:
+        casos = [c for c in casos if 'snapshot' not in c[1]]
+
+    resultados = []
+    for n in tamanos:
+        datos = Datos(n, semilla, simulaciones)
+        print(f"\n{n:,} socios (JSON {len(datos.json) / 1e6:.1f} MB)")
+        for grupo, nombre, funcion in casos:
+            tiempos = medir(lambda: funcion(datos), repeticiones, presupuesto)
+            fila = {
+                'grupo': grupo,
+                'caso': nombre,
+                'socios': n,
+                'min_ms': min(tiempos) * 1000,
+                'mediana_ms': statistics.median(tiempos) * 1000,
+                'repeticiones': len(tiempos),
+            }
+            resultados.append(fila)
+            print(f"  {grupo:<12} {nombre:<28} {fila['min_ms']:>10.2f} ms  (mediana {fila['mediana_ms']:.2f}, "
+                  f"{fila['repeticiones']} rep.)")
+
+    return {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit_actual(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'pyarrow': _version('pyarrow'),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'semilla': semilla,
+        'simulaciones_prorata': simulaciones,
+        'resultados': resultados,
+    }
+
+
+def comparar(actual, anterior):
+    """Tabla con la razón entre los mínimos de dos corridas (>1 es más lento ahora)"""
+    clave = ['grupo', 'caso', 'socios']
+    antes = pd.DataFrame(anterior['resultados'])[clave + ['min_ms']]
+    ahora = pd.DataFrame(actual['resultados'])[clave + ['min_ms']]
+    tabla = ahora.merge(antes, on=clave, suffixes=('', '_anterior'))
+    tabla['razon'] = tabla['min_ms'] / tabla['min_ms_anterior']
+    return tabla[clave + ['min_ms_anterior', 'min_ms', 'razon']]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.splitlines()[0])
+    parser.add_argument('--tamanos', type=int, nargs='+', default=TAMANOS_POR_DEFECTO, help="Socios por empresa")
+    parser.add_argument('--repeticiones', type=int, default=5, help="Repeticiones máximas por caso")
+    parser.add_argument('--presupuesto', type=float, default=2.0, help="Segundos máximos por caso y tamaño")
+    parser.add_argument('--simulaciones', type=int, default=10_000, help="Simulaciones Monte Carlo pro-rata")
+    parser.add_argument('--filtro', help="Solo los casos cuyo grupo o nombre contiene este texto")
+    parser.add_argument('--salida', default=DIRECTORIO_RESULTADOS, help="Directorio de resultados")
+    parser.add_argument('--comparar', help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args(argv)
+
+    documento = ejecutar(args.tamanos, args.repeticiones, args.presupuesto, args.simulaciones, args.filtro)
+
+    os.makedirs(args.salida, exist_ok=True)
+    ruta = os.path.join(args.salida, f"bench_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(documento, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados guardados en {ruta}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            anterior = json.load(f)
+        tabla = comparar(documento, anterior)
+        print(f"\nComparación con {args.comparar} (commit {anterior.get('commit')}):")
+        print(tabla.to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""Arranque en frío: tiempo de importación y tiempo hasta el primer render.
+
+Cada medición corre en un proceso nuevo, como el primer request de un
+servidor recién levantado:
+
+- importación de cada módulo pesado por separado (``import X``);
+- primer render de la app con la pestaña inicial (AppTest de Streamlit), y
+  qué librerías de gráficos quedaron cargadas después de ese render.
+
+    python -m benchmarks.arranque
+    python -m benchmarks.arranque --comparar benchmarks/resultados/arranque_20250101_120000.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+from benchmarks import DIRECTORIO_RESULTADOS, commit_actual
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RUTA_APP = os.path.join(RAIZ, 'startup_equity_manager.py')
+
+MODULOS_POR_DEFECTO = ['streamlit', 'numpy', 'pandas', 'plotly.express', 'equity_engine']
+
+# Librerías que no deberían cargarse para renderizar la pestaña inicial
+DIFERIDOS = ['plotly.express', 'plotly.graph_objects']
+
+_CODIGO_IMPORTACION = """
+import time
+inicio = time.perf_counter()
+import {modulo}
+print(time.perf_counter() - inicio)
+"""
+
+_CODIGO_PRIMER_RENDER = """
+import json, sys, time
+inicio = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+listo = time.perf_counter()
+# AppTest ya trae algunas librerías; solo cuentan las que carga la app
+previos = set(sys.modules)
+at = AppTest.from_file({ruta!r}, default_timeout=300)
+at.run()
+fin = time.perf_counter()
+print(json.dumps({{
+    'streamlit_s': listo - inicio,
+    'primer_render_s': fin - listo,
+    'excepciones': [e.message for e in at.exception],
+    'cargados': [m for m in {diferidos!r} if m in sys.modules and m not in previos],
+}}))
+"""
+
+
+def _ejecutar(codigo):
+    salida = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, cwd=RAIZ, check=True)
+    return salida.stdout.strip().splitlines()[-1]
+
+
+def medir_importacion(modulo, repeticiones):
+    """Segundos de 'import modulo' en procesos nuevos"""
+    return [float(_ejecutar(_CODIGO_IMPORTACION.format(modulo=modulo))) for _ in range(repeticiones)]
+
+
+def medir_primer_render(repeticiones, ruta=RUTA_APP):
+    """Primer render de la pestaña inicial en procesos nuevos"""
+    codigo = _CODIGO_PRIMER_RENDER.format(ruta=ruta, diferidos=DIFERIDOS)
+    return [json.loads(_ejecutar(codigo)) for _ in range(repeticiones)]
+
+
+def _fila(nombre, tiempos):
+    return {
+        'medicion': nombre,
+        'min_ms': min(tiempos) * 1000,
+        'mediana_ms': statistics.median(tiempos) * 1000,
+        'repeticiones': len(tiempos),
+    }
+
+
+def ejecutar(modulos, repeticiones):
+    resultados = []
+    for modulo in modulos:
+        fila = _fila(f"import {modulo}", medir_importacion(modulo, repeticiones))
+        resultados.append(fila)
+        print(f"  {fila['medicion']:<32} {fila['min_ms']:>9.1f} ms  (mediana {fila['mediana_ms']:.1f})")
+
+    renders = medir_primer_render(repeticiones)
+    fila = _fila('primer render (pestaña inicial)', [r['primer_render_s'] for r in renders])
+    fila['excepciones'] = renders[-1]['excepciones']
+    fila['librerias_cargadas'] = renders[-1]['cargados']
+    resultados.append(fila)
+    print(f"  {fila['medicion']:<32} {fila['min_ms']:>9.1f} ms  (mediana {fila['mediana_ms']:.1f})")
+    if fila['librerias_cargadas']:
+        print(f"  ⚠️ cargadas en el primer render: {', '.join(fila['librerias_cargadas'])}")
+    for mensaje in fila['excepciones']:
+        print(f"  ✗ excepción en el primer render: {mensaje}")
+
+    return {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit_actual(),
+        'python': sys.version.split()[0],
+        'repeticiones': repeticiones,
+        'resultados': resultados,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.arranque', description=__doc__.splitlines()[0])
+    parser.add_argument('--modulos', nargs='+', default=MODULOS_POR_DEFECTO, help="Módulos a importar por separado")
+    parser.add_argument('--repeticiones', type=int, default=3, help="Procesos nuevos por medición")
+    parser.add_argument('--salida', default=DIRECTORIO_RESULTADOS, help="Directorio de resultados")
+    parser.add_argument('--comparar', help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args(argv)
+
+    documento = ejecutar(args.modulos, args.repeticiones)
+
+    os.makedirs(args.salida, exist_ok=True)
+    ruta = os.path.join(args.salida, f"arranque_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(documento, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados guardados en {ruta}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            anterior = {r['medicion']: r['min_ms'] for r in json.load(f)['resultados']}
+        print(f"\nComparación con {args.comparar}:")
+        for fila in documento['resultados']:
+            if fila['medicion'] in anterior:
+                antes = anterior[fila['medicion']]
+                print(f"  {fila['medicion']:<32} {antes:>9.1f} → {fila['min_ms']:>9.1f} ms  "
+                      f"({fila['min_ms'] / antes:.2f}x)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""Motor de cálculo del Startup Equity Manager.
+
+Este paquete no depende de Streamlit: se puede importar desde scripts,
+trabajos batch o notebooks para calcular el cap table sin levantar la app.
+"""
+from equity_engine.cap_table import (
+    COLUMNAS_ACCIONES,
+    COLUMNAS_DERIVADAS,
+    COLUMNAS_EQUITY,
+    COLUMNAS_EQUITY_COMPLETA,
+    ETIQUETA_OTROS,
+    MAXIMO_PORCIONES,
+    ORDENES_SOCIOS,
+    VALORES_POR_DEFECTO,
+    CapTable,
+    calcular_cap_table,
+    agrupar_porciones,
+    calcular_dilucion_df,
+    construir_analisis_categorias,
+    construir_analisis_categorias_resumen,
+    construir_tabla_completa,
+    construir_tabla_ejecutiva,
+    construir_tabla_resumida,
+    distribucion_por_socio,
+    distribucion_por_tipo,
+    filtrar_socios,
+    normalizar_socios,
+)
+from equity_engine.antidilucion import (
+    ResultadoAntidilucion,
+    aplicar_rondas_antidilucion,
+    duracion_en_meses,
+    tipo_proteccion_normalizado,
+)
+from equity_engine.cache import (
+    CacheLRU,
+    huella_company_info,
+    huella_datos,
+    huella_serie,
+    huella_socios,
+)
+from equity_engine.edicion import COLUMNAS_EDITABLES, ResultadoEdicion, cambios_en_lote, preparar_edicion
+from equity_engine.escenarios import (
+    COLUMNAS_ESCENARIOS,
+    ESCENARIOS_INICIALES,
+    ResultadoEscenario,
+    agrupar_escenarios,
+    evaluar_escenarios,
+    tabla_deltas_escenarios,
+    tabla_resumen_escenarios,
+)
+from equity_engine.esquema import (
+    CATEGORIAS,
+    CATEGORIAS_FUNDADORES,
+    DEDICACIONES,
+    ESQUEMA_SOCIO,
+    PRESETS_PROTECCION,
+    PRESETS_PRORATA,
+    ROLES,
+    TIPOS_DERECHOS_PRORATA,
+    TIPOS_PROTECCION,
+    VALORES_SUGERIDOS,
+    ErrorCampo,
+    preset_prorata,
+    preset_proteccion,
+    validar_socio,
+    valores_sugeridos,
+)
+from equity_engine.importador import ErrorImportacion, ResultadoImportacion, importar_json, iterar_json
+from equity_engine.instrumentacion import HISTORIAL_POR_DEFECTO, Perfil, RegistroTiempos, perfilar
+from equity_engine.ledger import TIPOS_EVENTO, Evento, LibroEventos
+from equity_engine.persistencia import RUTA_POR_DEFECTO, ErrorConflicto, RepositorioSQLite, SesionPersistente
+from equity_engine.portafolio import (
+    PATRON_POR_DEFECTO,
+    ErrorPortafolio,
+    Portafolio,
+    ResumenEmpresa,
+    cargar_portafolio,
+    resolver_directorio,
+)
+from equity_engine.prompt import (
+    MAXIMO_SOCIOS_DETALLE,
+    PRESUPUESTO_TOKENS,
+    ResultadoPrompt,
+    estimar_tokens,
+    generar_prompt,
+    socios_prompt,
+)
+from equity_engine.prorata import (
+    DESCRIPCION_MOTIVOS,
+    TIPOS_EMISION_PRORATA,
+    SimulacionProrata,
+    construir_tabla_simulacion_prorata,
+    evaluar_elegibilidad_prorata,
+    mascara_exclusiones,
+    simular_montecarlo_prorata,
+)
+from equity_engine.rondas import ProyeccionRondas, proyectar_rondas
+from equity_engine.snapshot import (
+    EXTENSION_SNAPSHOT,
+    ErrorSnapshot,
+    Snapshot,
+    cargar_snapshot,
+    guardar_snapshot,
+    snapshot_en_bytes,
+)
+from equity_engine.store import SociosStore
+from equity_engine.tabular import (
+    EXCEL_DISPONIBLE,
+    FORMATOS_TABULARES,
+    formato_tabular,
+    importar_tabla,
+    leer_encabezados,
+    sugerir_mapeo,
+)
+from equity_engine.vesting import (
+    COLUMNAS_CON_VESTING,
+    MESES_POR_PERIODO,
+    MatrizVesting,
+    calcular_matriz_vesting,
+    equity_consolidado_en,
+    fraccion_consolidada,
+)
+from equity_engine.waterfall import PUNTOS_POR_DEFECTO, ResultadoWaterfall, calcular_waterfall
@@ -0,0 +1,229 @@
+"""Ajustes antidilución (Full Ratchet y Weighted Average Broad) a lo largo de varias rondas.
+
+Las rondas se procesan en orden; dentro de cada ronda todos los socios
+protegidos se ajustan a la vez con operaciones vectorizadas. El cap table
+de la app está en porcentajes, así que se traduce a acciones sobre una base
+fija (acciones_base) y todos los socios parten del mismo precio de conversión:
+la valoración de referencia dividida por esa base.
+"""
+import re
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from equity_engine.cap_table import (
+    COLUMNAS_ACCIONES,
+    COLUMNAS_DERIVADAS,
+    COLUMNAS_EQUITY_COMPLETA,
+    VALORES_POR_DEFECTO,
+    calcular_cap_table,
+)
+
+# Acciones totales con las que se traduce el cap table porcentual si la empresa no define otra base
+ACCIONES_BASE_POR_DEFECTO = 1_000_000
+
+TIPO_FULL_RATCHET = 'full_ratchet'
+TIPO_WEIGHTED_AVERAGE = 'weighted_average_broad'
+TIPO_SIN_PROTECCION = 'sin_proteccion'
+
+CATEGORIA_INVERSOR = 'Inversor'
+
+
+def tipo_proteccion_normalizado(tipo_proteccion):
+    """Mecanismo de ajuste a partir del texto guardado en el formulario"""
+    texto = str(tipo_proteccion).lower()
+    if 'ratchet' in texto:
+        return TIPO_FULL_RATCHET
+    if 'weighted' in texto or 'promedio' in texto:
+        return TIPO_WEIGHTED_AVERAGE
+    return TIPO_SIN_PROTECCION
+
+
+def duracion_en_meses(duracion_proteccion):
+    """Duración de la protección en meses ('3 años' -> 36); None si no vence"""
+    texto = str(duracion_proteccion).lower()
+    coincidencia = re.search(r'(\d+)\s*(año|ano|mes)', texto)
+    if coincidencia is None:
+        return 0 if 'sin' in texto else None
+    cantidad = int(coincidencia.group(1))
+    return cantidad * 12 if coincidencia.group(2) != 'mes' else cantidad
+
+
+def _a_fecha(valor, defecto):
+    """Convertir texto 'YYYY-MM-DD' o date a date"""
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    try:
+        return datetime.strptime(str(valor), "%Y-%m-%d").date()
+    except ValueError:
+        return defecto
+
+
+def _mes_ordinal(anios, meses, dias):
+    """Fecha como número de meses; la diferencia truncada son los meses completos transcurridos"""
+    return anios * 12 + meses + dias / 32
+
+
+def _por_valor_unico(serie, funcion):
+    """Aplicar una función una vez por valor distinto de la columna"""
+    codigos, unicos = pd.factorize(serie.astype(str))
+    return np.array([funcion(u) for u in unicos], dtype=object)[codigos] if len(unicos) else np.empty(0, dtype=object)
+
+
+def _protecciones(df, fecha_por_defecto):
+    """Vectores de mecanismo, porcentaje protegido, umbral, inicio y duración de cada socio"""
+    activa = df['proteccion_antidilucion'].to_numpy(dtype=bool)
+    tipos = _por_valor_unico(df['tipo_proteccion'], tipo_proteccion_normalizado)
+    tipos = np.where(activa, tipos, TIPO_SIN_PROTECCION)
+    porcentaje = np.clip(df['porcentaje_proteccion'].to_numpy(dtype=np.float64), 0, 100) / 100
+    umbral = df['umbral_activacion'].to_numpy(dtype=np.float64)
+
+    duraciones = _por_valor_unico(df['duracion_proteccion'], duracion_en_meses)
+    duraciones = np.array([np.inf if d is None else d for d in duraciones], dtype=np.float64)
+
+    fechas = pd.to_datetime(pd.Series(df['fecha_ingreso'], dtype=object), format="%Y-%m-%d", errors='coerce')
+    fechas = fechas.fillna(pd.Timestamp(fecha_por_defecto))
+    inicio = _mes_ordinal(
+        fechas.dt.year.to_numpy(dtype=np.float64),
+        fechas.dt.month.to_numpy(dtype=np.float64),
+        fechas.dt.day.to_numpy(dtype=np.float64),
+    )
+    return tipos, porcentaje, umbral, duraciones, inicio
+
+
+class ResultadoAntidilucion:
+    """Cap table después de las rondas, ajustes por socio y resumen por ronda"""
+
+    def __init__(self, socios, ajustes, rondas):
+        self.socios = socios
+        self.ajustes = ajustes
+        self.rondas = rondas
+        self._cap_table = None
+
+    @property
+    def cap_table(self):
+        """CapTable post-rondas, listo para las vistas de análisis"""
+        if self._cap_table is None:
+            self._cap_table = calcular_cap_table(self.socios)
+        return self._cap_table
+
+
+def aplicar_rondas_antidilucion(df, rondas, valoracion_referencia, acciones_base=None, fecha_referencia=None):
+    """Aplicar una secuencia de rondas con precio y los ajustes antidilución de los socios protegidos
+
+    Cada ronda es un dict con 'nombre', 'monto' y 'valoracion_pre_money' (y opcionalmente 'fecha').
+    """
+    if valoracion_referencia <= 0:
+        raise ValueError("La valoración de referencia debe ser mayor que cero")
+    acciones_base = acciones_base or ACCIONES_BASE_POR_DEFECTO
+    hoy = fecha_referencia or date.today()
+
+    df = df.reset_index(drop=True)
+    tipos, porcentaje, umbral, duraciones, inicio = _protecciones(df, hoy)
+
+    # Acciones de cada socio en la base fija (los % sin asignar quedan fuera de los socios)
+    acciones_socios = df[COLUMNAS_EQUITY_COMPLETA].to_numpy(dtype=np.float64) / 100 * acciones_base
+    acciones_protegibles = df[COLUMNAS_ACCIONES].to_numpy(dtype=np.float64).sum(axis=1) / 100 * acciones_base
+    protegidas = acciones_protegibles * porcentaje
+
+    precio_original = valoracion_referencia / acciones_base
+    precio_conversion = np.full(len(df), precio_original, dtype=np.float64)
+    acciones_ajuste = np.zeros(len(df), dtype=np.float64)
+    es_full_ratchet = tipos == TIPO_FULL_RATCHET
+    es_weighted = tipos == TIPO_WEIGHTED_AVERAGE
+
+    acciones_totales = float(acciones_base)
+    inversores = []
+    filas_ajustes = []
+    filas_rondas = []
+
+    for numero, ronda in enumerate(rondas, start=1):
+        nombre_ronda = ronda.get('nombre') or f"Ronda {numero}"
+        monto = float(ronda.get('monto', 0))
+        pre_money = float(ronda.get('valoracion_pre_money', 0))
+        if monto <= 0 or pre_money <= 0:
+            continue
+        fecha_ronda = _a_fecha(ronda.get('fecha'), hoy)
+
+        precio_ronda = pre_money / acciones_totales
+        acciones_nuevas = monto / precio_ronda
+
+        # Ronda a la baja respecto al precio de conversión vigente, umbral y vigencia
+        descuento = (precio_conversion - precio_ronda) / precio_conversion * 100
+        meses_transcurridos = np.floor(_mes_ordinal(fecha_ronda.year, fecha_ronda.month, fecha_ronda.day) - inicio)
+        vigente = meses_transcurridos < duraciones
+        activada = (es_full_ratchet | es_weighted) & (precio_ronda < precio_conversion) & (descuento >= umbral) & vigente
+
+        # Full Ratchet: el precio baja al de la ronda
+        # Weighted Average Broad: CP2 = CP1 * (A + B) / (A + C)
+        acciones_al_precio_anterior = monto / precio_conversion
+        nuevo_precio = np.where(
+            es_full_ratchet,
+            precio_ronda,
+            precio_conversion * (acciones_totales + acciones_al_precio_anterior) / (acciones_totales + acciones_nuevas),
+        )
+        nuevo_precio = np.where(activada, nuevo_precio, precio_conversion)
+
+        # Las acciones protegidas se convierten al nuevo precio; la diferencia son acciones de ajuste
+        acciones_ajuste_total = protegidas * (precio_original / nuevo_precio - 1)
+        incremento = acciones_ajuste_total - acciones_ajuste
+
+        ajustados = np.flatnonzero(activada)
+        filas_ajustes.append(pd.DataFrame({
+            'ronda': nombre_ronda,
+            'nombre': df['nombre'].to_numpy()[ajustados],
+            'mecanismo': tipos[ajustados],
+            'descuento_%': descuento[ajustados],
+            'precio_conversion_anterior': precio_conversion[ajustados],
+            'precio_conversion_nuevo': nuevo_precio[ajustados],
+            'acciones_adicionales': incremento[ajustados],
+        }))
+
+        precio_conversion = nuevo_precio
+        acciones_ajuste = acciones_ajuste_total
+        acciones_totales += acciones_nuevas + float(incremento.sum())
+        inversores.append((nombre_ronda, acciones_nuevas))
+
+        filas_rondas.append({
+            'ronda': nombre_ronda,
+            'precio_por_accion': precio_ronda,
+            'acciones_nuevas': acciones_nuevas,
+            'acciones_ajuste': float(incremento.sum()),
+            'socios_ajustados': int(activada.sum()),
+            'acciones_totales': acciones_totales,
+        })
+
+    # Cap table post-rondas: los ajustes se suman a las acciones preferenciales del socio
+    acciones_finales = acciones_socios.copy()
+    acciones_finales[:, COLUMNAS_EQUITY_COMPLETA.index('acciones_preferenciales')] += acciones_ajuste
+    socios_post = df.drop(columns=COLUMNAS_DERIVADAS, errors='ignore')
+    socios_post[COLUMNAS_EQUITY_COMPLETA] = acciones_finales / acciones_totales * 100
+
+    if inversores:
+        filas_inversores = pd.DataFrame([
+            {
+                **VALORES_POR_DEFECTO,
+                'nombre': f"Inversor {nombre}",
+                'rol': 'Inversor',
+                'categoria': CATEGORIA_INVERSOR,
+                'acciones_preferenciales': acciones / acciones_totales * 100,
+                'fecha_ingreso': hoy.strftime("%Y-%m-%d"),
+                'exclusiones_prorata': [],
+            }
+            for nombre, acciones in inversores
+        ])
+        categoricas = {c: object for c, tipo in socios_post.dtypes.items() if isinstance(tipo, pd.CategoricalDtype)}
+        socios_post = pd.concat([socios_post.astype(categoricas), filas_inversores], ignore_index=True)
+
+    columnas_ajustes = [
+        'ronda', 'nombre', 'mecanismo', 'descuento_%', 'precio_conversion_anterior',
+        'precio_conversion_nuevo', 'acciones_adicionales',
+    ]
+    ajustes = pd.concat(filas_ajustes, ignore_index=True) if filas_ajustes else pd.DataFrame(columns=columnas_ajustes)
+    resumen_rondas = pd.DataFrame(filas_rondas, columns=[
+        'ronda', 'precio_por_accion', 'acciones_nuevas', 'acciones_ajuste', 'socios_ajustados', 'acciones_totales',
+    ])
+    return ResultadoAntidilucion(socios_post, ajustes, resumen_rondas)
@@ -0,0 +1,145 @@
+"""Caché LRU por huella de contenido para resultados derivados del cap table.
+
+Streamlit re-ejecuta todo el script en cada interacción. Las vistas piden el
+cap table con la huella (hash de contenido) de los socios y de la empresa, de
+modo que solo se recalcula cuando los datos cambian realmente.
+"""
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Presupuesto de memoria por defecto para la caché compartida
+PRESUPUESTO_POR_DEFECTO = 64 * 1024 * 1024
+
+
+def _serializar(valor):
+    """Serialización canónica (claves ordenadas) para calcular huellas"""
+    return json.dumps(valor, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def huella_socios(socios):
+    """Hash de contenido de la lista de socios"""
+    huella = getattr(socios, 'huella', None)
+    if callable(huella):
+        return huella()
+    return hashlib.blake2b(_serializar(list(socios)), digest_size=16).hexdigest()
+
+
+def huella_company_info(company_info):
+    """Hash de contenido de la información de la empresa"""
+    return hashlib.blake2b(_serializar(company_info or {}), digest_size=16).hexdigest()
+
+
+def huella_serie(serie):
+    """Hash de contenido (índice y valores) de una Serie"""
+    filas = pd.util.hash_pandas_object(serie, index=True).to_numpy()
+    return hashlib.blake2b(filas.tobytes() + str(serie.name).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def huella_datos(socios, company_info, huella_de_socios=None):
+    """Huella combinada de socios y empresa (se puede pasar la de socios ya calculada)"""
+    if huella_de_socios is None:
+        huella_de_socios = huella_socios(socios)
+    return f"{huella_de_socios}:{huella_company_info(company_info)}"
+
+
+def estimar_tamano(valor):
+    """Estimación en bytes de la memoria que ocupa un valor cacheado"""
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(index=True, deep=True).sum())
+    if isinstance(valor, pd.Series):
+        return int(valor.memory_usage(index=True, deep=True))
+    if hasattr(valor, 'nbytes'):
+        return int(valor.nbytes)
+    if isinstance(valor, (list, tuple)):
+        return sys.getsizeof(valor) + sum(estimar_tamano(v) for v in valor)
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(estimar_tamano(v) for v in valor.values())
+    if hasattr(valor, 'to_plotly_json'):
+        # Figuras de Plotly: tamaño de su JSON (sus atributos se referencian entre sí)
+        return len(_serializar(valor.to_plotly_json()))
+    if hasattr(valor, '__dict__'):
+        # Resultados del motor (CapTable, ResultadoAntidilucion, ...): suma de sus atributos
+        return sys.getsizeof(valor) + sum(estimar_tamano(v) for v in vars(valor).values())
+    return sys.getsizeof(valor)
+
+
+class CacheLRU:
+    """Caché LRU acotada por memoria, segura para varias sesiones en paralelo"""
+
+    def __init__(self, presupuesto_bytes=PRESUPUESTO_POR_DEFECTO):
+        self.presupuesto_bytes = presupuesto_bytes
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes_usados = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.evicciones = 0
+        self.omitidas = 0
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def __contains__(self, clave):
+        return clave in self._entradas
+
+    def obtener(self, clave, defecto=None):
+        """Valor cacheado (y marcarlo como usado recientemente)"""
+        with self._lock:
+            if clave not in self._entradas:
+                self.fallos += 1
+                return defecto
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return self._entradas[clave][0]
+
+    def guardar(self, clave, valor, tamano=None):
+        """Guardar un valor y desalojar los menos usados si se supera el presupuesto"""
+        tamano = estimar_tamano(valor) if tamano is None else tamano
+        if tamano > self.presupuesto_bytes:
+            # No cabe ni sola: guardarla desalojaría todo lo demás en cada rerun
+            self.omitidas += 1
+            return valor
+        with self._lock:
+            if clave in self._entradas:
+                self.bytes_usados -= self._entradas.pop(clave)[1]
+            self._entradas[clave] = (valor, tamano)
+            self.bytes_usados += tamano
+            while self.bytes_usados > self.presupuesto_bytes and len(self._entradas) > 1:
+                _, (_, tamano_desalojado) = self._entradas.popitem(last=False)
+                self.bytes_usados -= tamano_desalojado
+                self.evicciones += 1
+        return valor
+
+    def obtener_o_calcular(self, clave, calcular):
+        """Devolver el valor cacheado o calcularlo y guardarlo"""
+        faltante = object()
+        valor = self.obtener(clave, faltante)
+        if valor is faltante:
+            valor = self.guardar(clave, calcular())
+        return valor
+
+    def invalidar(self, clave=None):
+        """Eliminar una entrada (o todas si no se indica clave)"""
+        with self._lock:
+            if clave is None:
+                self._entradas.clear()
+                self.bytes_usados = 0
+            elif clave in self._entradas:
+                self.bytes_usados -= self._entradas.pop(clave)[1]
+
+    def estadisticas(self):
+        """Métricas de uso de la caché"""
+        return {
+            'entradas': len(self._entradas),
+            'bytes_usados': self.bytes_usados,
+            'presupuesto_bytes': self.presupuesto_bytes,
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'evicciones': self.evicciones,
+            'omitidas': self.omitidas,
+        }
@@ -0,0 +1,350 @@
+"""Motor de cap table sin dependencias de Streamlit.
+
+Normaliza la lista de socios a un DataFrame con todas las columnas del
+formulario y calcula, en una sola pasada vectorizada, las columnas derivadas
+de equity, los totales y los agregados por categoría que usan todas las vistas.
+"""
+import numpy as np
+import pandas as pd
+
+# Componentes del "Equity Total" que muestra la app
+COLUMNAS_EQUITY = [
+    'acciones_ordinarias',
+    'acciones_preferenciales',
+    'stock_options',
+    'phantom_equity',
+    'acciones_vesting',
+]
+
+# Acciones "clásicas" (ordinarias + preferenciales + options)
+COLUMNAS_ACCIONES = COLUMNAS_EQUITY[:3]
+
+# Todas las columnas porcentuales, incluyendo alternativas contractuales
+COLUMNAS_EQUITY_COMPLETA = COLUMNAS_EQUITY + ['profit_sharing', 'warrants']
+
+# Desde pandas 3 el copy-on-write está siempre activo: una copia superficial no duplica datos
+COPIA_PEREZOSA = int(pd.__version__.split('.')[0]) >= 3
+
+# Porciones que muestra un gráfico de torta antes de agrupar el resto en 'Otros'
+MAXIMO_PORCIONES = 12
+ETIQUETA_OTROS = 'Otros'
+
+# Criterios de orden de la lista de socios: etiqueta -> (columna, ascendente)
+ORDENES_SOCIOS = {
+    'Orden de registro': (None, True),
+    'Nombre': ('nombre', True),
+    'Mayor equity': ('equity_total', False),
+    'Menor equity': ('equity_total', True),
+    'Mayor aporte': ('aporte_inicial', False),
+}
+
+# Valores por defecto de cada campo que produce formulario_socio
+VALORES_POR_DEFECTO = {
+    'nombre': '',
+    'rol': '',
+    'categoria': '',
+    'dedicacion': '',
+    'fecha_ingreso': '',
+    'salario': 0,
+    'acciones_ordinarias': 0.0,
+    'acciones_preferenciales': 0.0,
+    'stock_options': 0.0,
+    'phantom_equity': 0.0,
+    'profit_sharing': 0.0,
+    'warrants': 0.0,
+    'acciones_vesting': 0.0,
+    'vesting_total': 4,
+    'cliff_period': 12,
+    'vesting_schedule': 'Mensual',
+    'acceleration': False,
+    'immediate_vest': 0.0,
+    'buyback_option': True,
+    'aporte_inicial': 0,
+    'experiencia': '',
+    'responsabilidades': '',
+    'notas': '',
+    'equity_total': 0.0,
+    'proteccion_antidilucion': False,
+    'tipo_proteccion': 'Sin protección',
+    'porcentaje_proteccion': 0,
+    'umbral_activacion': 0.0,
+    'duracion_proteccion': 'Sin protección',
+    'derechos_prorata': False,
+    'tipo_derechos_prorata': 'Sin derechos pro-rata',
+    'participacion_minima_prorata': 1.0,
+    'plazo_ejercicio_prorata': 'No aplica',
+    'transferibilidad_derechos': False,
+    'exclusiones_prorata': [],
+    'incluir_stock_options': False,
+}
+
+COLUMNAS_SOCIO = list(VALORES_POR_DEFECTO)
+
+# Columnas que calcula el motor (no vienen del formulario)
+COLUMNAS_DERIVADAS = ['equity_acciones', 'equity_total', 'equity_total_completo', 'tipo_equity']
+
+
+def _tipo_columna(valor_defecto):
+    """Tipo numpy destino según el valor por defecto del campo"""
+    if isinstance(valor_defecto, bool):
+        return bool
+    if isinstance(valor_defecto, int):
+        return np.int64
+    if isinstance(valor_defecto, float):
+        return np.float64
+    return None
+
+
+def normalizar_socios(socios):
+    """Convertir la lista de socios en un DataFrame con todas las columnas tipadas"""
+    if hasattr(socios, 'to_frame'):
+        # SociosStore: columnas ya tipadas, se usan las vistas sin copiar
+        df = socios.to_frame()
+    elif isinstance(socios, pd.DataFrame):
+        df = socios.copy()
+    else:
+        df = pd.DataFrame.from_records(list(socios))
+
+    n = len(df)
+    for columna, defecto in VALORES_POR_DEFECTO.items():
+        if columna not in df.columns:
+            if isinstance(defecto, list):
+                df[columna] = pd.Series([[] for _ in range(n)], index=df.index, dtype=object)
+            else:
+                df[columna] = defecto
+            continue
+
+        tipo = _tipo_columna(defecto)
+        # Un campo que solo falta en algunos registros llega como float con NaN: se completa abajo
+        if tipo is not None and df[columna].dtype == tipo and not (tipo is np.float64 and df[columna].hasnans):
+            continue
+        if isinstance(df[columna].dtype, pd.CategoricalDtype):
+            continue
+        if tipo is None:
+            if isinstance(defecto, list):
+                df[columna] = df[columna].map(lambda v: list(v) if isinstance(v, (list, tuple)) else [])
+            else:
+                df[columna] = df[columna].where(df[columna].notna(), defecto).astype(object)
+        elif tipo is bool:
+            df[columna] = df[columna].where(df[columna].notna(), defecto).astype(bool)
+        else:
+            df[columna] = pd.to_numeric(df[columna], errors='coerce').fillna(defecto).astype(tipo)
+
+    return df
+
+
+def _tipo_equity_principal(df):
+    """Tipo principal de equity de cada socio, en el orden de prioridad de la vista ejecutiva"""
+    condiciones = [
+        df['acciones_ordinarias'].to_numpy() > 0,
+        df['phantom_equity'].to_numpy() > 0,
+        df['profit_sharing'].to_numpy() > 0,
+        df['warrants'].to_numpy() > 0,
+        df['acciones_vesting'].to_numpy() > 0,
+        df['stock_options'].to_numpy() > 0,
+    ]
+    etiquetas = ["🗳️ Ordinarias", "👻 Phantom", "💰 Profit Share", "📜 Warrants", "📈 Acc. Vesting", "📈 Options"]
+    return np.select(condiciones, etiquetas, default="❌ Ninguno")
+
+
+class CapTable:
+    """Resultado del motor: socios normalizados, totales y agregados por categoría"""
+
+    def __init__(self, df, totales, por_categoria):
+        self.df = df
+        self.totales = totales
+        self.por_categoria = por_categoria
+
+    def __len__(self):
+        return len(self.df)
+
+    @property
+    def vacia(self):
+        return len(self.df) == 0
+
+    def vista(self):
+        """Copia para una vista: sus cambios (columnas nuevas, asignaciones) no tocan este cap table
+
+        El cap table cacheado se comparte entre sesiones y reruns, así que las
+        vistas trabajan sobre una vista propia. Con copy-on-write es una copia
+        superficial (solo se copia lo que la vista modifica).
+        """
+        return CapTable(
+            self.df.copy(deep=not COPIA_PEREZOSA), dict(self.totales),
+            self.por_categoria.copy(deep=not COPIA_PEREZOSA)
+        )
+
+
+def calcular_cap_table(socios):
+    """Calcular columnas de equity, totales y agregados por categoría en una pasada"""
+    df = normalizar_socios(socios)
+
+    matriz = df[COLUMNAS_EQUITY_COMPLETA].to_numpy(dtype=np.float64)
+    n_acciones = len(COLUMNAS_ACCIONES)
+    n_equity = len(COLUMNAS_EQUITY)
+
+    df['equity_acciones'] = matriz[:, :n_acciones].sum(axis=1)
+    df['equity_total'] = matriz[:, :n_equity].sum(axis=1)
+    df['equity_total_completo'] = matriz.sum(axis=1)
+    df['tipo_equity'] = _tipo_equity_principal(df)
+
+    sumas = matriz.sum(axis=0)
+    totales = dict(zip(COLUMNAS_EQUITY_COMPLETA, sumas.tolist()))
+    totales['equity_acciones'] = float(sumas[:n_acciones].sum())
+    totales['equity_total'] = float(sumas[:n_equity].sum())
+    totales['equity_total_completo'] = float(sumas.sum())
+    totales['equity_disponible'] = 100 - totales['equity_total']
+    totales['aporte_inicial'] = df['aporte_inicial'].sum()
+    totales['salario'] = df['salario'].sum()
+    totales['socios'] = len(df)
+
+    columnas_suma = COLUMNAS_EQUITY_COMPLETA + ['equity_acciones', 'equity_total', 'aporte_inicial', 'salario']
+    grupos = df.groupby('categoria', sort=True, observed=True)
+    por_categoria = grupos[columnas_suma].sum()
+    por_categoria['cantidad'] = grupos.size()
+    if isinstance(por_categoria.index, pd.CategoricalIndex):
+        por_categoria.index = pd.Index(por_categoria.index.astype(str), name='categoria')
+        por_categoria = por_categoria.sort_index()
+
+    return CapTable(df, totales, por_categoria)
+
+
+def construir_analisis_categorias_resumen(cap):
+    """Tabla por categoría de la pestaña Tabla Resumen (acciones clásicas, aportes y salarios)"""
+    analisis = cap.por_categoria[COLUMNAS_ACCIONES + ['aporte_inicial', 'salario', 'cantidad']].round(2)
+    analisis.columns = ['Ordinarias %', 'Preferenciales %', 'Options %', 'Aportes', 'Salarios', 'Cantidad']
+    analisis['Total Equity %'] = cap.por_categoria['equity_acciones'].round(2)
+
+    # Formatear números para mejor visualización
+    analisis['Aportes'] = analisis['Aportes'].map(lambda x: f"${x:,.0f}")
+    analisis['Salarios'] = analisis['Salarios'].map(lambda x: f"${x:,.0f}")
+    return analisis
+
+
+def construir_analisis_categorias(cap):
+    """Tabla por categoría de la pestaña Análisis Equity (todos los componentes del equity total)"""
+    analisis = cap.por_categoria[COLUMNAS_EQUITY + ['cantidad']].round(2)
+    analisis.columns = ['Ordinarias %', 'Preferenciales %', 'Options %', 'Phantom %', 'Vesting %', 'Cantidad']
+    analisis['Total %'] = cap.por_categoria['equity_total'].round(2)
+    return analisis
+
+
+def construir_tabla_ejecutiva(df, mostrar_proteccion):
+    """Vista ejecutiva con métricas clave"""
+    tabla_exec = df[['nombre', 'categoria', 'rol']].copy()
+    tabla_exec['Equity Total %'] = df['equity_total'].round(1)
+    tabla_exec['Tipo Equity'] = df['tipo_equity']
+    tabla_exec['Vesting'] = df['vesting_total'].astype(str) + 'a / ' + df['cliff_period'].astype(str) + 'm'
+    tabla_exec['Aportes'] = df['aporte_inicial'].map(lambda x: f"${x:,.0f}")
+
+    if mostrar_proteccion:
+        tabla_exec['Protección Anti-D'] = np.where(df['proteccion_antidilucion'], "🛡️ Sí", "❌ No")
+        tabla_exec['Derechos Pro-rata'] = np.where(df['derechos_prorata'], "🎯 Sí", "❌ No")
+
+    return tabla_exec
+
+
+def construir_tabla_resumida(df, mostrar_proteccion):
+    """Vista resumida con información esencial"""
+    tabla_res = df[['nombre', 'categoria', 'dedicacion']].copy()
+    tabla_res['Ordinarias %'] = df['acciones_ordinarias'].round(1)
+    tabla_res['Phantom %'] = df['phantom_equity'].round(1)
+    tabla_res['Profit Share %'] = df['profit_sharing'].round(1)
+    tabla_res['Total %'] = df['equity_total'].round(1)
+    tabla_res['Salario'] = df['salario'].map(lambda x: f"${x:,.0f}")
+
+    if mostrar_proteccion:
+        tabla_res['Protección Anti-D'] = df['tipo_proteccion']
+        tabla_res['Derechos Pro-rata'] = df['tipo_derechos_prorata']
+
+    return tabla_res
+
+
+def construir_tabla_completa(df, mostrar_proteccion, consolidado_hoy=None):
+    """Vista completa con toda la información (y el equity consolidado hoy si se indica)"""
+    tabla_comp = df[['nombre', 'categoria', 'rol', 'dedicacion']].copy()
+    tabla_comp['Ordinarias %'] = df['acciones_ordinarias'].round(1)
+    tabla_comp['Preferenciales %'] = df['acciones_preferenciales'].round(1)
+    tabla_comp['Options %'] = df['stock_options'].round(1)
+    tabla_comp['Phantom %'] = df['phantom_equity'].round(1)
+    tabla_comp['Profit Share %'] = df['profit_sharing'].round(1)
+    tabla_comp['Warrants %'] = df['warrants'].round(1)
+    tabla_comp['Acc. Vesting %'] = df['acciones_vesting'].round(1)
+    tabla_comp['Total %'] = df['equity_total_completo'].round(1)
+    tabla_comp['Vesting'] = df['vesting_total'].astype(str) + 'a'
+    tabla_comp['Cliff'] = df['cliff_period'].astype(str) + 'm'
+    if consolidado_hoy is not None:
+        tabla_comp['Consolidado Hoy %'] = consolidado_hoy.reindex(df.index).round(1)
+    tabla_comp['Aportes'] = df['aporte_inicial'].map(lambda x: f"${x:,.0f}")
+    tabla_comp['Salario'] = df['salario'].map(lambda x: f"${x:,.0f}")
+
+    if mostrar_proteccion:
+        tabla_comp['Protección Anti-D'] = np.where(df['proteccion_antidilucion'], "🛡️ Activa", "❌ Inactiva")
+        tabla_comp['Tipo Protección'] = df['tipo_proteccion']
+        tabla_comp['Derechos Pro-rata'] = np.where(df['derechos_prorata'], "🎯 Activos", "❌ Inactivos")
+        tabla_comp['Tipo Pro-rata'] = df['tipo_derechos_prorata']
+
+    return tabla_comp
+
+
+def calcular_dilucion_df(df, nueva_emision):
+    """Equity (acciones clásicas) antes y después de una nueva emisión porcentual"""
+    factor_dilucion = 100 / (100 + nueva_emision)
+
+    df_diluido = df[['nombre']].copy()
+    df_diluido['equity_actual'] = df['equity_acciones']
+    df_diluido['equity_post_dilucion'] = df_diluido['equity_actual'] * factor_dilucion
+    df_diluido['perdida_equity'] = df_diluido['equity_actual'] - df_diluido['equity_post_dilucion']
+    return df_diluido
+
+
+def agrupar_porciones(valores, maximo=MAXIMO_PORCIONES, etiqueta_otros=ETIQUETA_OTROS):
+    """Serie etiqueta -> valor con las 'maximo - 1' mayores porciones y el resto sumado en 'Otros'"""
+    # Etiquetas repetidas se suman, igual que en px.pie
+    valores = valores.groupby(level=0, sort=False).sum()
+    if len(valores) <= maximo:
+        return valores
+    orden = valores.sort_values(ascending=False, kind='stable')
+    otros = pd.Series([orden.iloc[maximo - 1:].sum()], index=[etiqueta_otros])
+    return pd.concat([orden.iloc[:maximo - 1], otros])
+
+
+def distribucion_por_socio(df, maximo=MAXIMO_PORCIONES):
+    """Equity total por socio para el gráfico de distribución, agrupando los menores en 'Otros'"""
+    return agrupar_porciones(df.set_index('nombre')['equity_total'], maximo)
+
+
+def distribucion_por_tipo(totales):
+    """Equity total por tipo de acción, más el disponible"""
+    return pd.Series({
+        'Acciones Ordinarias': totales['acciones_ordinarias'],
+        'Phantom Equity': totales['phantom_equity'],
+        'Acciones con Vesting': totales['acciones_vesting'],
+        'Stock Options': totales['stock_options'],
+        'Disponible': max(0, 100 - totales['equity_total']),
+    })
+
+
+def filtrar_socios(df, texto='', categoria=None, dedicacion=None, proteccion=None, orden='Orden de registro'):
+    """Posiciones de los socios que cumplen los filtros, en el orden pedido"""
+    mascara = np.ones(len(df), dtype=bool)
+    texto = texto.strip().lower()
+    if texto:
+        # Búsqueda sin distinguir mayúsculas en nombre y rol
+        mascara &= (df['nombre'].str.lower().str.contains(texto, regex=False)
+                    | df['rol'].str.lower().str.contains(texto, regex=False)).to_numpy(dtype=bool)
+    if categoria:
+        mascara &= (df['categoria'] == categoria).to_numpy(dtype=bool)
+    if dedicacion:
+        mascara &= (df['dedicacion'] == dedicacion).to_numpy(dtype=bool)
+    if proteccion is not None:
+        mascara &= df['proteccion_antidilucion'].to_numpy(dtype=bool) == proteccion
+    posiciones = np.flatnonzero(mascara)
+
+    columna, ascendente = ORDENES_SOCIOS[orden]
+    if columna is not None and len(posiciones):
+        valores = df[columna].iloc[posiciones].reset_index(drop=True)
+        clave = (lambda serie: serie.str.lower()) if columna == 'nombre' else None
+        orden_valores = valores.sort_values(ascending=ascendente, kind='stable', key=clave).index.to_numpy()
+        posiciones = posiciones[orden_valores]
+    return posiciones
@@ -0,0 +1,290 @@
+"""Modo batch por línea de comandos: `python -m equity_engine exportacion.json ...`
+
+Procesa exportaciones JSON (o snapshots .eqsnap) sin Streamlit ni Plotly y
+escribe, por cada archivo, la tabla completa, el análisis por categoría, la
+dilución de una nueva emisión y la simulación pro-rata en JSON, CSV o Parquet.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from equity_engine.cap_table import (
+    calcular_cap_table,
+    calcular_dilucion_df,
+    construir_analisis_categorias,
+    construir_tabla_completa,
+)
+from equity_engine.importador import ErrorImportacion, importar_json
+from equity_engine.portafolio import MINIMO_ARCHIVOS_PROCESOS
+from equity_engine.prorata import (
+    DESCRIPCION_MOTIVOS,
+    TIPOS_EMISION_PRORATA,
+    construir_tabla_simulacion_prorata,
+    evaluar_elegibilidad_prorata,
+    simular_montecarlo_prorata,
+)
+from equity_engine.snapshot import ARROW_DISPONIBLE, EXTENSION_SNAPSHOT, ErrorSnapshot, cargar_snapshot
+from equity_engine.vesting import equity_consolidado_en
+
+FORMATOS = ['json', 'csv', 'parquet']
+
+# Mismos valores por defecto que los simuladores de la app
+NUEVA_EMISION_POR_DEFECTO = 20.0
+MONTO_RECAUDAR_POR_DEFECTO = 500000
+VALORACION_PRE_MONEY_POR_DEFECTO = 2000000
+PROBABILIDAD_EJERCICIO_POR_DEFECTO = 80
+SIMULACIONES_POR_DEFECTO = 100_000
+SEMILLA_POR_DEFECTO = 42
+
+
+class Parametros:
+    """Parámetros de los simuladores, comunes a todos los archivos del lote"""
+
+    def __init__(self, nueva_emision=NUEVA_EMISION_POR_DEFECTO, monto_recaudar=MONTO_RECAUDAR_POR_DEFECTO,
+                 valoracion_pre_money=VALORACION_PRE_MONEY_POR_DEFECTO, tipos_emision=(),
+                 probabilidad_ejercicio=PROBABILIDAD_EJERCICIO_POR_DEFECTO,
+                 n_simulaciones=SIMULACIONES_POR_DEFECTO, semilla=SEMILLA_POR_DEFECTO, fecha_referencia=None,
+                 mostrar_proteccion=True):
+        self.nueva_emision = nueva_emision
+        self.monto_recaudar = monto_recaudar
+        self.valoracion_pre_money = valoracion_pre_money
+        self.tipos_emision = list(tipos_emision)
+        self.probabilidad_ejercicio = probabilidad_ejercicio
+        self.n_simulaciones = n_simulaciones
+        self.semilla = semilla
+        self.fecha_referencia = fecha_referencia or date.today()
+        self.mostrar_proteccion = mostrar_proteccion
+
+
+def leer_exportacion(ruta):
+    """Importar un JSON exportado o un snapshot según la extensión"""
+    if ruta.lower().endswith(EXTENSION_SNAPSHOT):
+        return cargar_snapshot(ruta).a_importacion()
+    with open(ruta, 'rb') as f:
+        return importar_json(f)
+
+
+def calcular_resultados(socios, parametros):
+    """Tablas y resumen de un cap table con los parámetros del lote"""
+    cap = calcular_cap_table(socios)
+    df = cap.df
+    hoy = pd.Timestamp(parametros.fecha_referencia)
+
+    # Solo hace falta el consolidado a la fecha, no la matriz mes a mes
+    consolidado_hoy = equity_consolidado_en(df, hoy)
+
+    tablas = {
+        'tabla_completa': construir_tabla_completa(df, parametros.mostrar_proteccion, consolidado_hoy),
+        'categorias': construir_analisis_categorias(cap).reset_index(),
+        'dilucion': calcular_dilucion_df(df, parametros.nueva_emision).round(2),
+    }
+    resumen = {
+        'totales': dict({k: float(v) for k, v in cap.totales.items()}, socios=int(cap.totales['socios'])),
+        'nueva_emision': parametros.nueva_emision,
+    }
+
+    socios_con_prorata = df[df['derechos_prorata']]
+    elegibilidad = evaluar_elegibilidad_prorata(socios_con_prorata, parametros.tipos_emision)
+    socios_elegibles = socios_con_prorata[elegibilidad['elegible']]
+    excluidos = socios_con_prorata.loc[~elegibilidad['elegible'], ['nombre', 'categoria']].copy()
+    excluidos['Motivo'] = elegibilidad.loc[excluidos.index, 'motivo'].map(DESCRIPCION_MOTIVOS)
+    tablas['prorata_excluidos'] = excluidos
+
+    resumen['prorata'] = {
+        'monto_recaudar': parametros.monto_recaudar,
+        'valoracion_pre_money': parametros.valoracion_pre_money,
+        'tipos_emision': parametros.tipos_emision,
+        'socios_con_derechos': len(socios_con_prorata),
+        'socios_elegibles': len(socios_elegibles),
+    }
+    if len(socios_elegibles) > 0:
+        valoracion_post_money = parametros.valoracion_pre_money + parametros.monto_recaudar
+        porcentaje_nueva_emision = parametros.monto_recaudar / valoracion_post_money * 100
+        simulacion = simular_montecarlo_prorata(
+            socios_elegibles['equity_acciones'].to_numpy(), parametros.probabilidad_ejercicio / 100,
+            parametros.monto_recaudar, porcentaje_nueva_emision,
+            n_simulaciones=parametros.n_simulaciones, semilla=parametros.semilla
+        )
+        tablas['prorata'] = construir_tabla_simulacion_prorata(socios_elegibles, simulacion)
+        resumen['prorata'].update(simulacion.resumen())
+        resumen['prorata'].update(n_simulaciones=parametros.n_simulaciones, semilla=parametros.semilla)
+    return tablas, resumen
+
+
+def _a_registros(tabla):
+    return tabla.to_dict(orient='records')
+
+
+def _texto_json(valor):
+    """Valores que json no serializa por sí solo (fechas, escalares de NumPy)"""
+    if isinstance(valor, (datetime, date, pd.Timestamp)):
+        return valor.isoformat()
+    if isinstance(valor, np.generic):
+        return valor.item()
+    return str(valor)
+
+
+def escribir_resultados(nombre, tablas, resumen, destino, formato):
+    """Escribir las tablas de un archivo; devuelve las rutas creadas"""
+    if formato == 'json':
+        ruta = os.path.join(destino, f"{nombre}.resultados.json")
+        documento = dict(resumen, tablas={k: _a_registros(t) for k, t in tablas.items()})
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(documento, f, ensure_ascii=False, indent=2, default=_texto_json)
+        return [ruta]
+
+    carpeta = os.path.join(destino, nombre)
+    os.makedirs(carpeta, exist_ok=True)
+    rutas = []
+    for tabla, datos in tablas.items():
+        ruta = os.path.join(carpeta, f"{tabla}.{formato}")
+        if formato == 'csv':
+            datos.to_csv(ruta, index=False)
+        else:
+            datos.to_parquet(ruta, index=False)
+        rutas.append(ruta)
+    ruta = os.path.join(carpeta, 'resumen.json')
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(resumen, f, ensure_ascii=False, indent=2, default=_texto_json)
+    rutas.append(ruta)
+    return rutas
+
+
+def nombres_salida(rutas):
+    """Nombre de salida de cada archivo, único dentro del lote
+
+    Es el nombre del archivo sin extensión; los que se repiten (mismo nombre en
+    distintos directorios) usan su ruta relativa al directorio común, y si aun
+    así coinciden se les agrega un sufijo numérico.
+    """
+    bases = [os.path.splitext(os.path.basename(ruta))[0] for ruta in rutas]
+    repeticiones = Counter(bases)
+    repetidas = [os.path.abspath(r) for r, b in zip(rutas, bases) if repeticiones[b] > 1]
+    comun = os.path.commonpath([os.path.dirname(r) for r in repetidas]) if repetidas else ''
+
+    nombres = []
+    usados = set()
+    for ruta, base in zip(rutas, bases):
+        nombre = base
+        if repeticiones[base] > 1:
+            relativa = os.path.relpath(os.path.abspath(ruta), comun)
+            nombre = os.path.splitext(relativa)[0].replace(os.sep, '__')
+        candidato, sufijo = nombre, 1
+        while candidato in usados:
+            sufijo += 1
+            candidato = f"{nombre}-{sufijo}"
+        usados.add(candidato)
+        nombres.append(candidato)
+    return nombres
+
+
+def procesar_archivo(ruta, destino, formato, parametros, nombre=None):
+    """Importar, calcular y escribir un archivo; devuelve (ruta, socios, error)
+
+    nombre: nombre de salida (por defecto, el del archivo sin extensión).
+
+    Cualquier error queda como el error de ese archivo: un archivo dañado no
+    detiene el lote ni descarta los resultados de los demás procesos.
+    """
+    try:
+        importacion = leer_exportacion(ruta)
+        tablas, resumen = calcular_resultados(importacion.socios, parametros)
+        resumen = dict(
+            archivo=os.path.basename(ruta),
+            company_info=importacion.company_info or {},
+            registros_invalidos=importacion.registros_invalidos,
+            **resumen,
+        )
+        nombre = nombre or os.path.splitext(os.path.basename(ruta))[0]
+        escribir_resultados(nombre, tablas, resumen, destino, formato)
+    except (ErrorImportacion, ErrorSnapshot, OSError) as e:
+        return ruta, 0, str(e)
+    except Exception as e:
+        return ruta, 0, f"{type(e).__name__}: {e}"
+    return ruta, len(importacion.socios), None
+
+
+def _procesar(argumentos):
+    return procesar_archivo(*argumentos)
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m equity_engine',
+        description="Calcula el cap table de exportaciones JSON (o snapshots .eqsnap) sin levantar la app.",
+    )
+    parser.add_argument('archivos', nargs='+', help="Exportaciones a procesar")
+    parser.add_argument('-o', '--salida', default='.', help="Directorio de salida (por defecto, el actual)")
+    parser.add_argument('-f', '--formato', choices=FORMATOS, default='json',
+                        help="json: un archivo por exportación; csv/parquet: una carpeta con una tabla por archivo")
+    parser.add_argument('--nueva-emision', type=float, default=NUEVA_EMISION_POR_DEFECTO,
+                        help="Nueva emisión (%%) para el cálculo de dilución")
+    parser.add_argument('--monto-recaudar', type=float, default=MONTO_RECAUDAR_POR_DEFECTO,
+                        help="Monto de la ronda para la simulación pro-rata (USD)")
+    parser.add_argument('--valoracion-pre-money', type=float, default=VALORACION_PRE_MONEY_POR_DEFECTO,
+                        help="Valoración pre-money de la ronda (USD)")
+    parser.add_argument('--tipo-emision', action='append', default=[], choices=TIPOS_EMISION_PRORATA,
+                        metavar='TIPO', help="Tipo de la emisión (se puede repetir); aplica las exclusiones pro-rata")
+    parser.add_argument('--probabilidad', type=float, default=PROBABILIDAD_EJERCICIO_POR_DEFECTO,
+                        help="Probabilidad de ejercicio pro-rata de cada socio (%%)")
+    parser.add_argument('--simulaciones', type=int, default=SIMULACIONES_POR_DEFECTO,
+                        help="Simulaciones Monte Carlo pro-rata")
+    parser.add_argument('--semilla', type=int, default=SEMILLA_POR_DEFECTO)
+    parser.add_argument('--fecha', type=date.fromisoformat, default=None,
+                        help="Fecha de referencia AAAA-MM-DD para el equity consolidado (por defecto, hoy)")
+    parser.add_argument('--sin-proteccion', action='store_true',
+                        help="Omitir las columnas de protección antidilución y pro-rata en la tabla completa")
+    parser.add_argument('-j', '--procesos', type=int, default=1,
+                        help="Procesos en paralelo (0 = uno por CPU)")
+    return parser
+
+
+def main(argv=None):
+    """Punto de entrada; devuelve el código de salida (1 si algún archivo falló)"""
+    args = crear_parser().parse_args(argv)
+    if args.formato == 'parquet' and not ARROW_DISPONIBLE:
+        print("El formato parquet requiere pyarrow", file=sys.stderr)
+        return 2
+
+    parametros = Parametros(
+        nueva_emision=args.nueva_emision,
+        monto_recaudar=args.monto_recaudar,
+        valoracion_pre_money=args.valoracion_pre_money,
+        tipos_emision=args.tipo_emision,
+        probabilidad_ejercicio=args.probabilidad,
+        n_simulaciones=args.simulaciones,
+        semilla=args.semilla,
+        fecha_referencia=args.fecha,
+        mostrar_proteccion=not args.sin_proteccion,
+    )
+    os.makedirs(args.salida, exist_ok=True)
+    trabajos = [
+        (ruta, args.salida, args.formato, parametros, nombre)
+        for ruta, nombre in zip(args.archivos, nombres_salida(args.archivos))
+    ]
+
+    procesos = min(args.procesos or os.cpu_count() or 1, len(trabajos))
+    if len(trabajos) >= MINIMO_ARCHIVOS_PROCESOS and procesos > 1:
+        contexto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as pool:
+            resultados = list(pool.map(_procesar, trabajos))
+    else:
+        resultados = [_procesar(t) for t in trabajos]
+
+    fallidos = 0
+    for ruta, n_socios, error in resultados:
+        if error:
+            fallidos += 1
+            print(f"✗ {ruta}: {error}", file=sys.stderr)
+        else:
+            print(f"✓ {ruta}: {n_socios} socios")
+    print(f"{len(resultados) - fallidos} de {len(resultados)} archivos procesados en {args.salida}")
+    return 1 if fallidos else 0
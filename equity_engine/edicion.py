@@ -0,0 +1,79 @@
+"""Edición masiva de socios con validación de todo el lote.
+
+Los cambios llegan como ``{posición: {campo: valor}}`` (celdas editadas en la
+grilla u operaciones como "cliff de 12 meses para todos los Employee"). Cada
+socio modificado se valida completo contra el esquema y se recalcula su
+``equity_total``; si algún registro no es válido no se aplica ninguno.
+"""
+import numpy as np
+
+from equity_engine.cap_table import COLUMNAS_EQUITY
+from equity_engine.esquema import ErrorCampo, validar_socio, validar_valor
+
+# Columnas de la grilla de edición masiva, en orden
+COLUMNAS_EDITABLES = [
+    'nombre',
+    'rol',
+    'categoria',
+    'dedicacion',
+    'fecha_ingreso',
+    'salario',
+    'aporte_inicial',
+    'acciones_ordinarias',
+    'acciones_preferenciales',
+    'stock_options',
+    'phantom_equity',
+    'acciones_vesting',
+    'vesting_total',
+    'cliff_period',
+    'vesting_schedule',
+    'immediate_vest',
+    'acceleration',
+    'proteccion_antidilucion',
+    'derechos_prorata',
+]
+
+
+class ResultadoEdicion:
+    """Registros completos a escribir por posición y errores (posición, campo, mensaje)"""
+
+    def __init__(self, registros, errores):
+        self.registros = registros
+        self.errores = errores
+
+    def __len__(self):
+        return len(self.registros)
+
+    @property
+    def valido(self):
+        return not self.errores
+
+
+def preparar_edicion(socios, cambios):
+    """Validar los cambios sobre los socios actuales; omite los que no modifican nada"""
+    registros = {}
+    errores = []
+    for posicion, campos in cambios.items():
+        if not 0 <= posicion < len(socios):
+            # La grilla se armó antes de que se eliminara el socio
+            errores.append((posicion, '', "el socio ya no existe"))
+            continue
+        original = socios[posicion]
+        socio, errores_socio = validar_socio(dict(original, **campos))
+        if not errores_socio:
+            socio['equity_total'] = sum(socio.get(campo, 0.0) for campo in COLUMNAS_EQUITY)
+            if socio['equity_total'] <= 0:
+                errores_socio = [('equity_total', "el socio debe tener algo de equity")]
+        if errores_socio:
+            errores.extend((posicion, campo, mensaje) for campo, mensaje in errores_socio)
+        elif socio != original:
+            registros[posicion] = socio
+    return ResultadoEdicion(registros, errores)
+
+
+def cambios_en_lote(posiciones, campo, valor):
+    """Mismo valor de un campo para varias posiciones (lanza ErrorCampo si el valor no es válido)"""
+    if campo not in COLUMNAS_EDITABLES:
+        raise ErrorCampo(f"el campo '{campo}' no se edita en lote")
+    valor = validar_valor(campo, valor)
+    return {int(posicion): {campo: valor} for posicion in np.asarray(posiciones)}
@@ -0,0 +1,136 @@
+"""Espacio de escenarios: varios planes de financiación evaluados juntos.
+
+Un escenario es una secuencia de rondas con monto a recaudar, valoración
+pre-money, pool de empleados (% de emisión) y probabilidad de ejercicio
+pro-rata. Con las mismas convenciones de los simuladores de dilución y
+pro-rata, cada ronda retiene de la participación de un socio:
+
+- sin derechos pro-rata: ``f_inversion * f_pool``
+- con derechos pro-rata elegibles: ``(f_inversion + p * (1 - f_inversion)) * f_pool``
+
+con ``f_inversion = 100 / (100 + % emitido a inversores)`` y
+``f_pool = 100 / (100 + % pool)``; el pool no da derechos pro-rata. Como la
+retención solo depende de si el socio es elegible, todos los escenarios se
+evalúan con dos productos acumulados (escenarios x rondas) y un único
+broadcasting (socios x escenarios).
+"""
+import numpy as np
+import pandas as pd
+
+from equity_engine.esquema import CATEGORIAS_FUNDADORES
+from equity_engine.prorata import evaluar_elegibilidad_prorata
+
+# Columnas de la tabla del espacio de escenarios: una fila por ronda
+COLUMNAS_ESCENARIOS = ['escenario', 'monto_recaudar', 'valoracion_pre_money', 'pool_empleados', 'probabilidad_ejercicio']
+
+# Campos numéricos de una ronda, en el orden de los parámetros normalizados
+_CAMPOS_RONDA = COLUMNAS_ESCENARIOS[1:]
+
+# Escenarios con que arranca el espacio (los valores por defecto de los simuladores)
+ESCENARIOS_INICIALES = [
+    {'escenario': 'Seed 500k', 'monto_recaudar': 500_000, 'valoracion_pre_money': 2_000_000,
+     'pool_empleados': 0.0, 'probabilidad_ejercicio': 0.8},
+    {'escenario': 'Seed 1M + pool 10%', 'monto_recaudar': 1_000_000, 'valoracion_pre_money': 4_000_000,
+     'pool_empleados': 10.0, 'probabilidad_ejercicio': 0.8},
+]
+
+
+class ResultadoEscenario:
+    """Participación final de cada socio y métricas de un escenario"""
+
+    def __init__(self, parametros, equity_final, resumen):
+        self.parametros = parametros
+        self.equity_final = equity_final
+        self.resumen = resumen
+
+    def __len__(self):
+        return len(self.parametros)
+
+
+def _numero(valor):
+    return 0.0 if valor is None or pd.isna(valor) else max(float(valor), 0.0)
+
+
+def normalizar_rondas(rondas):
+    """Rondas como tupla de tuplas de floats: clave de memoización independiente del nombre"""
+    return tuple(
+        tuple(min(_numero(ronda.get(campo)), 1.0) if campo == 'probabilidad_ejercicio' else _numero(ronda.get(campo))
+              for campo in _CAMPOS_RONDA)
+        for ronda in rondas
+    )
+
+
+def agrupar_escenarios(filas):
+    """{nombre: parámetros normalizados} a partir de las filas de rondas (se ignoran las filas sin nombre)"""
+    escenarios = {}
+    for fila in filas:
+        nombre = fila.get('escenario')
+        nombre = '' if nombre is None or pd.isna(nombre) else str(nombre).strip()
+        if nombre:
+            escenarios.setdefault(nombre, []).append(fila)
+    return {nombre: normalizar_rondas(rondas) for nombre, rondas in escenarios.items()}
+
+
+def evaluar_escenarios(df, lista_parametros):
+    """Evaluar varios escenarios (parámetros normalizados) en una sola pasada vectorizada"""
+    equity = df['equity_acciones'].to_numpy(dtype=np.float64)
+    elegible = evaluar_elegibilidad_prorata(df, [])['elegible'].to_numpy()
+    fundador = df['categoria'].isin(CATEGORIAS_FUNDADORES).to_numpy()
+
+    # (escenarios x rondas x campos); las rondas que faltan no emiten nada y retienen 1
+    maximo_rondas = max((len(p) for p in lista_parametros), default=0)
+    matriz = np.zeros((len(lista_parametros), maximo_rondas, len(_CAMPOS_RONDA)))
+    for i, parametros in enumerate(lista_parametros):
+        if parametros:
+            matriz[i, :len(parametros)] = parametros
+    monto, pre_money, pool, probabilidad = np.moveaxis(matriz, -1, 0)
+
+    post_money = pre_money + monto
+    with np.errstate(divide='ignore', invalid='ignore'):
+        porcentaje_inversion = np.where(post_money > 0, monto / post_money * 100, 0.0)
+    f_inversion = 100 / (100 + porcentaje_inversion)
+    f_pool = 100 / (100 + pool)
+    retencion_sin = f_inversion * f_pool
+    retencion_con = (f_inversion + probabilidad * (1 - f_inversion)) * f_pool
+    acumulada_con = np.cumprod(retencion_con, axis=1)
+    final_sin = np.prod(retencion_sin, axis=1)
+    final_con = acumulada_con[:, -1] if maximo_rondas else np.ones(len(lista_parametros))
+
+    # (socios x escenarios) en un solo broadcasting
+    equity_final = equity[:, np.newaxis] * np.where(elegible[:, np.newaxis], final_con, final_sin)
+
+    # Capital esperado de los socios actuales: su derecho en cada ronda (equity a esa fecha x monto) x prob.
+    equity_elegible = equity[elegible].sum()
+    previa_con = acumulada_con / retencion_con
+    capital_insiders = (equity_elegible * previa_con / 100 * monto * probabilidad).sum(axis=1)
+    capital_total = monto.sum(axis=1)
+    equity_fundadores = equity_final[fundador].sum(axis=0)
+
+    resultados = []
+    for i, parametros in enumerate(lista_parametros):
+        resumen = {
+            'rondas': len(parametros),
+            'capital_total': float(capital_total[i]),
+            'post_money_final': float(post_money[i, len(parametros) - 1]) if parametros else 0.0,
+            'dilucion_sin_prorata_%': float((1 - final_sin[i]) * 100),
+            'equity_fundadores_%': float(equity_fundadores[i]),
+            'capital_insiders_esperado': float(capital_insiders[i]),
+            'capital_externo_esperado': float(capital_total[i] - capital_insiders[i]),
+        }
+        resultados.append(ResultadoEscenario(parametros, equity_final[:, i].copy(), resumen))
+    return resultados
+
+
+def tabla_resumen_escenarios(resultados):
+    """Métricas de cada escenario (filas) para compararlos"""
+    return pd.DataFrame.from_dict({nombre: r.resumen for nombre, r in resultados.items()}, orient='index')
+
+
+def tabla_deltas_escenarios(df, resultados):
+    """Equity actual de cada socio y, por escenario, su equity final y el cambio (columnas lado a lado)"""
+    equity = df['equity_acciones'].to_numpy(dtype=np.float64)
+    columnas = {'nombre': df['nombre'].to_numpy(), 'categoria': df['categoria'].to_numpy(), 'equity_actual': equity}
+    for nombre, resultado in resultados.items():
+        columnas[f"{nombre} %"] = resultado.equity_final
+        columnas[f"{nombre} Δ"] = resultado.equity_final - equity
+    return pd.DataFrame(columnas)
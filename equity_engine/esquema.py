@@ -0,0 +1,298 @@
+"""Esquema declarado de un socio: tipos, valores permitidos y rangos.
+
+Se usa para validar y convertir los registros que llegan de archivos
+importados antes de que entren al almacén, de modo que un campo inválido se
+reporte al importar (con el índice del registro) y no más tarde en una tabla.
+"""
+from datetime import datetime
+from functools import lru_cache
+
+from equity_engine.cap_table import VALORES_POR_DEFECTO
+from equity_engine.prorata import TIPOS_EMISION_PRORATA
+from equity_engine.vesting import MESES_POR_PERIODO
+
+CATEGORIAS = ['Fundador Principal', 'Co-fundador', 'Early Employee', 'Employee', 'Advisor', 'Consultor']
+
+DEDICACIONES = [
+    'Tiempo Completo (100%)',
+    'Tiempo Parcial (75%)',
+    'Tiempo Parcial (50%)',
+    'Tiempo Parcial (25%)',
+    'Consultoría',
+]
+
+TIPOS_PROTECCION = [
+    'Sin protección',
+    'Full Ratchet (Máxima protección)',
+    'Weighted Average Broad (Protección balanceada)',
+]
+
+TIPOS_DERECHOS_PRORATA = [
+    'Sin derechos pro-rata',
+    'Derechos Completos (todas las emisiones)',
+    'Derechos Parciales (emisiones principales)',
+]
+
+ROLES = [
+    'CEO/Fundador Principal', 'Co-fundador', 'CTO', 'CMO', 'CFO',
+    'VP Tecnología', 'VP Marketing', 'VP Ventas', 'VP Operaciones',
+    'Director', 'Gerente', 'Empleado Senior', 'Empleado', 'Advisor', 'Consultor',
+]
+
+CATEGORIAS_FUNDADORES = ['Fundador Principal', 'Co-fundador']
+
+# Rangos típicos de equity (%), cliff (meses) y vesting (años) por categoría
+VALORES_SUGERIDOS = {
+    'Fundador Principal': {'ordinarias': (35, 51), 'cliff': 12, 'vesting': 4},
+    'Co-fundador': {'ordinarias': (10, 25), 'cliff': 12, 'vesting': 4},
+    'Early Employee': {'options': (1, 5), 'cliff': 12, 'vesting': 4},
+    'Employee': {'options': (0.1, 2), 'cliff': 12, 'vesting': 4},
+    'Advisor': {'options': (0.25, 1), 'cliff': 6, 'vesting': 2},
+}
+
+VALORES_SUGERIDOS_POR_DEFECTO = {'ordinarias': (0, 5), 'cliff': 12, 'vesting': 4}
+
+# Configuraciones recomendadas de protección antidilución y derechos pro-rata
+PRESETS_PROTECCION = {
+    'fundador': {
+        'tipo_proteccion': "Full Ratchet (Máxima protección)",
+        'porcentaje_proteccion': 100,
+        'umbral_activacion': 20.0,
+        'duracion_proteccion': "3 años",
+    },
+    'empleado': {
+        'tipo_proteccion': "Weighted Average Broad (Protección balanceada)",
+        'porcentaje_proteccion': 100,
+        'umbral_activacion': 25.0,
+        'duracion_proteccion': "2 años",
+    },
+    'sin_proteccion': {
+        'tipo_proteccion': "Sin protección",
+        'porcentaje_proteccion': 0,
+        'umbral_activacion': 0.0,
+        'duracion_proteccion': "Sin protección",
+    },
+}
+
+PRESETS_PRORATA = {
+    'fundador': {
+        'tipo_derechos_prorata': "Derechos Completos (todas las emisiones)",
+        'participacion_minima_prorata': 1.0,
+        'plazo_ejercicio_prorata': "30 días",
+        'transferibilidad_derechos': False,
+        'exclusiones_prorata': ["Emisiones para empleados (stock options)"],
+    },
+    'empleado': {
+        'tipo_derechos_prorata': "Derechos Parciales (emisiones principales)",
+        'participacion_minima_prorata': 2.0,
+        'plazo_ejercicio_prorata': "30 días",
+        'transferibilidad_derechos': False,
+        'exclusiones_prorata': ["Emisiones para empleados (stock options)", "Conversión de deuda en acciones"],
+    },
+    'sin_derechos': {
+        'tipo_derechos_prorata': "Sin derechos pro-rata",
+        'participacion_minima_prorata': 0.0,
+        'plazo_ejercicio_prorata': "No aplica",
+        'transferibilidad_derechos': False,
+        'exclusiones_prorata': [],
+    },
+}
+
+
+def valores_sugeridos(categoria):
+    """Rangos típicos de una categoría"""
+    return VALORES_SUGERIDOS.get(categoria, VALORES_SUGERIDOS_POR_DEFECTO)
+
+
+def preset_proteccion(categoria, activa=True):
+    """Protección antidilución recomendada para la categoría"""
+    if not activa:
+        return dict(PRESETS_PROTECCION['sin_proteccion'])
+    return dict(PRESETS_PROTECCION['fundador' if categoria in CATEGORIAS_FUNDADORES else 'empleado'])
+
+
+def preset_prorata(categoria, activos=True):
+    """Derechos pro-rata recomendados para la categoría"""
+    clave = 'sin_derechos' if not activos else 'fundador' if categoria in CATEGORIAS_FUNDADORES else 'empleado'
+    preset = dict(PRESETS_PRORATA[clave])
+    preset['exclusiones_prorata'] = list(preset['exclusiones_prorata'])
+    return preset
+
+
+_PORCENTAJE = {'tipo': 'numero', 'min': 0, 'max': 100}
+
+# Especificación de cada campo: tipo, requerido, opciones permitidas y rango
+ESQUEMA_SOCIO = {
+    'nombre': {'tipo': 'texto', 'requerido': True},
+    'rol': {'tipo': 'texto'},
+    'categoria': {'tipo': 'texto', 'opciones': CATEGORIAS},
+    'dedicacion': {'tipo': 'texto', 'opciones': DEDICACIONES},
+    'fecha_ingreso': {'tipo': 'fecha'},
+    'salario': {'tipo': 'entero', 'min': 0},
+    'acciones_ordinarias': _PORCENTAJE,
+    'acciones_preferenciales': _PORCENTAJE,
+    'stock_options': _PORCENTAJE,
+    'phantom_equity': _PORCENTAJE,
+    'profit_sharing': _PORCENTAJE,
+    'warrants': _PORCENTAJE,
+    'acciones_vesting': _PORCENTAJE,
+    'vesting_total': {'tipo': 'entero', 'min': 0, 'max': 10},
+    'cliff_period': {'tipo': 'entero', 'min': 0, 'max': 120},
+    'vesting_schedule': {'tipo': 'texto', 'opciones': list(MESES_POR_PERIODO)},
+    'acceleration': {'tipo': 'booleano'},
+    'immediate_vest': _PORCENTAJE,
+    'buyback_option': {'tipo': 'booleano'},
+    'aporte_inicial': {'tipo': 'entero', 'min': 0},
+    'experiencia': {'tipo': 'texto'},
+    'responsabilidades': {'tipo': 'texto'},
+    'notas': {'tipo': 'texto'},
+    'equity_total': {'tipo': 'numero', 'min': 0},
+    'proteccion_antidilucion': {'tipo': 'booleano'},
+    'tipo_proteccion': {'tipo': 'texto', 'opciones': TIPOS_PROTECCION},
+    'porcentaje_proteccion': {'tipo': 'entero', 'min': 0, 'max': 100},
+    'umbral_activacion': _PORCENTAJE,
+    'duracion_proteccion': {'tipo': 'texto'},
+    'derechos_prorata': {'tipo': 'booleano'},
+    'tipo_derechos_prorata': {'tipo': 'texto', 'opciones': TIPOS_DERECHOS_PRORATA},
+    'participacion_minima_prorata': _PORCENTAJE,
+    'plazo_ejercicio_prorata': {'tipo': 'texto'},
+    'transferibilidad_derechos': {'tipo': 'booleano'},
+    'exclusiones_prorata': {'tipo': 'lista', 'opciones': TIPOS_EMISION_PRORATA},
+    'incluir_stock_options': {'tipo': 'booleano'},
+}
+
+# Textos aceptados como booleanos (en minúsculas) en importaciones JSON y planillas
+TEXTOS_VERDADEROS = {'true', 'sí', 'si', 'yes', '1', 'x'}
+TEXTOS_FALSOS = {'false', 'no', '0', ''}
+
+
+class ErrorCampo(ValueError):
+    """Valor que no cumple el esquema de su campo"""
+
+
+def _convertir_numero(valor):
+    if isinstance(valor, bool):
+        raise ErrorCampo("se esperaba un número, no un booleano")
+    if isinstance(valor, (int, float)):
+        resultado = float(valor)
+    elif isinstance(valor, str):
+        try:
+            resultado = float(valor.strip().replace(',', ''))
+        except ValueError:
+            raise ErrorCampo(f"'{valor}' no es un número") from None
+    else:
+        raise ErrorCampo(f"se esperaba un número, llegó {type(valor).__name__}")
+    if resultado != resultado or resultado in (float('inf'), float('-inf')):
+        raise ErrorCampo("el número no es finito")
+    return resultado
+
+
+def _convertir_entero(valor):
+    numero = _convertir_numero(valor)
+    if not numero.is_integer():
+        raise ErrorCampo(f"se esperaba un entero, llegó {numero}")
+    return int(numero)
+
+
+def _convertir_booleano(valor):
+    if isinstance(valor, bool):
+        return valor
+    if isinstance(valor, (int, float)) and valor in (0, 1):
+        return bool(valor)
+    if isinstance(valor, str):
+        texto = valor.strip().lower()
+        if texto in TEXTOS_VERDADEROS:
+            return True
+        if texto in TEXTOS_FALSOS:
+            return False
+    raise ErrorCampo(f"'{valor}' no es un valor booleano")
+
+
+def _convertir_texto(valor):
+    if isinstance(valor, str):
+        return valor.strip()
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return str(valor)
+    raise ErrorCampo(f"se esperaba texto, llegó {type(valor).__name__}")
+
+
+@lru_cache(maxsize=4096)
+def _es_fecha(texto):
+    """Las fechas de ingreso se repiten mucho: se valida cada texto una sola vez"""
+    try:
+        datetime.strptime(texto, "%Y-%m-%d")
+    except ValueError:
+        return False
+    return True
+
+
+def _convertir_fecha(valor):
+    texto = _convertir_texto(valor)
+    if not _es_fecha(texto):
+        raise ErrorCampo(f"'{texto}' no es una fecha AAAA-MM-DD")
+    return texto
+
+
+def _convertir_lista(valor):
+    if isinstance(valor, str):
+        return [v.strip() for v in valor.split(';') if v.strip()]
+    if isinstance(valor, (list, tuple)):
+        return [_convertir_texto(v) for v in valor]
+    raise ErrorCampo(f"se esperaba una lista, llegó {type(valor).__name__}")
+
+
+CONVERSORES = {
+    'numero': _convertir_numero,
+    'entero': _convertir_entero,
+    'booleano': _convertir_booleano,
+    'texto': _convertir_texto,
+    'fecha': _convertir_fecha,
+    'lista': _convertir_lista,
+}
+
+
+def validar_valor(campo, valor):
+    """Convertir un valor según el esquema de su campo (lanza ErrorCampo si no cumple)"""
+    spec = ESQUEMA_SOCIO[campo]
+    resultado = CONVERSORES[spec['tipo']](valor)
+
+    opciones = spec.get('opciones')
+    if opciones is not None:
+        invalidos = [v for v in resultado if v not in opciones] if spec['tipo'] == 'lista' else (
+            [resultado] if resultado not in opciones and resultado != VALORES_POR_DEFECTO[campo] else []
+        )
+        if invalidos:
+            raise ErrorCampo(f"valor no permitido: {', '.join(map(str, invalidos))}")
+    if 'min' in spec and resultado < spec['min']:
+        raise ErrorCampo(f"{resultado} es menor que el mínimo {spec['min']}")
+    if 'max' in spec and resultado > spec['max']:
+        raise ErrorCampo(f"{resultado} es mayor que el máximo {spec['max']}")
+    return resultado
+
+
+def validar_socio(registro):
+    """Validar y convertir un socio; devuelve (socio, [(campo, mensaje), ...])"""
+    if not isinstance(registro, dict):
+        return None, [('', f"se esperaba un objeto, llegó {type(registro).__name__}")]
+
+    socio = {}
+    errores = []
+    for campo, spec in ESQUEMA_SOCIO.items():
+        valor = registro.get(campo)
+        if valor is None:
+            if spec.get('requerido'):
+                errores.append((campo, "campo requerido"))
+            continue
+        try:
+            socio[campo] = validar_valor(campo, valor)
+        except ErrorCampo as e:
+            errores.append((campo, str(e)))
+
+    if not errores and not socio.get('nombre'):
+        errores.append(('nombre', "el nombre no puede estar vacío"))
+
+    # Campos desconocidos se conservan tal cual (los guarda el almacén como extras)
+    for campo, valor in registro.items():
+        if campo not in ESQUEMA_SOCIO:
+            socio[campo] = valor
+    return socio, errores
@@ -0,0 +1,250 @@
+"""Importación en streaming de archivos JSON exportados por la app.
+
+El arreglo ``socios`` se recorre registro por registro con
+``json.JSONDecoder.raw_decode`` sobre un búfer que se rellena por bloques, así
+que la memoria pico depende del tamaño del bloque y del lote, no del archivo.
+Un socio que no cierra en MAXIMO_REGISTRO caracteres (JSON dañado) se
+rechaza sin leer el resto del archivo.
+Cada registro se valida contra el esquema y los válidos se cargan por lotes en
+un SociosStore.
+"""
+import codecs
+import json
+
+from equity_engine.esquema import validar_socio
+from equity_engine.store import SociosStore
+
+# Bytes que se leen del archivo en cada bloque
+TAMANO_BLOQUE = 256 * 1024
+
+# Socios válidos que se acumulan antes de cargarlos en bloque al almacén
+TAMANO_LOTE = 5000
+
+# Caracteres que puede ocupar un socio: si no cierra antes, el registro está dañado
+MAXIMO_REGISTRO = 1024 * 1024
+
+# Errores que se guardan con su detalle; del resto solo se lleva la cuenta
+MAXIMO_ERRORES = 10_000
+
+_ESPACIOS = ' \t\r\n'
+
+
+class ErrorImportacion(ValueError):
+    """El archivo no es un JSON con la estructura esperada"""
+
+
+class _LectorJSON:
+    """Búfer de texto sobre un archivo binario, con decodificación UTF-8 incremental"""
+
+    def __init__(self, archivo, tamano_bloque):
+        self.archivo = archivo
+        self.tamano_bloque = tamano_bloque
+        self.decodificador = codecs.getincrementaldecoder('utf-8-sig')()
+        self.json = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.consumidos = 0
+        self.fin_archivo = False
+
+    def leer(self, minimo=0):
+        """Agregar un bloque (de al menos 'minimo' bytes) al búfer descartando lo ya consumido"""
+        bloque = self.archivo.read(max(self.tamano_bloque, minimo))
+        if isinstance(bloque, str):
+            bloque = bloque.encode('utf-8')
+        self.fin_archivo = not bloque
+        texto = self.decodificador.decode(bloque, final=self.fin_archivo)
+        self.consumidos += self.pos
+        self.buffer = self.buffer[self.pos:] + texto
+        self.pos = 0
+
+    def siguiente(self):
+        """Siguiente carácter no blanco (sin consumirlo); '' al final del archivo"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _ESPACIOS:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if self.fin_archivo:
+                return ''
+            self.leer()
+
+    def esperar(self, caracter):
+        """Consumir un carácter de estructura esperado"""
+        encontrado = self.siguiente()
+        if encontrado != caracter:
+            raise ErrorImportacion(
+                f"se esperaba '{caracter}' y se encontró '{encontrado or 'fin de archivo'}' "
+                f"en la posición {self.consumidos + self.pos}"
+            )
+        self.pos += 1
+
+    def valor(self, maximo=None):
+        """Decodificar el siguiente valor JSON completo, leyendo más bloques si hace falta
+
+        Con 'maximo', un valor que no cierra en esa cantidad de caracteres se
+        rechaza en vez de seguir leyendo el resto del archivo.
+        """
+        self.siguiente()
+        while True:
+            try:
+                valor, fin = self.json.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                if self.fin_archivo:
+                    raise ErrorImportacion(f"JSON inválido en la posición {self.consumidos + e.pos}: {e.msg}") from None
+                pendiente = len(self.buffer) - self.pos
+                if maximo is not None and pendiente >= maximo:
+                    raise ErrorImportacion(
+                        f"registro inválido o de más de {maximo:,} caracteres en la posición "
+                        f"{self.consumidos + self.pos}: {e.msg}"
+                    ) from None
+                # Duplicar lo pendiente: los reintentos desde el inicio del valor suman O(tamaño), no O(tamaño²)
+                self.leer(pendiente if maximo is None else min(pendiente, maximo))
+                continue
+            if maximo is not None and fin - self.pos > maximo:
+                raise ErrorImportacion(
+                    f"registro de más de {maximo:,} caracteres en la posición {self.consumidos + self.pos}"
+                )
+            # Un número al final del búfer podría continuar en el siguiente bloque
+            if fin == len(self.buffer) and not self.fin_archivo:
+                self.leer()
+                continue
+            self.pos = fin
+            return valor
+
+
+def iterar_json(archivo, tamano_bloque=TAMANO_BLOQUE, maximo_registro=MAXIMO_REGISTRO):
+    """Recorrer el archivo emitiendo ('campo', clave, valor) y ('socio', indice, registro)
+
+    Acepta el formato de exportación ({"company_info": ..., "socios": [...]})
+    o directamente un arreglo de socios. Cada socio puede ocupar como mucho
+    maximo_registro caracteres; los demás campos (p. ej. el historial) no
+    tienen límite.
+    """
+    lector = _LectorJSON(archivo, tamano_bloque)
+
+    def socios():
+        lector.esperar('[')
+        indice = 0
+        if lector.siguiente() == ']':
+            lector.pos += 1
+            return
+        while True:
+            yield ('socio', indice, lector.valor(maximo_registro))
+            indice += 1
+            separador = lector.siguiente()
+            if separador == ']':
+                lector.pos += 1
+                return
+            lector.esperar(',')
+
+    inicio = lector.siguiente()
+    if inicio == '[':
+        yield from socios()
+        return
+
+    lector.esperar('{')
+    if lector.siguiente() == '}':
+        return
+    while True:
+        clave = lector.valor()
+        if not isinstance(clave, str):
+            raise ErrorImportacion(f"clave inválida en la posición {lector.consumidos + lector.pos}")
+        lector.esperar(':')
+        if clave == 'socios' and lector.siguiente() == '[':
+            yield from socios()
+        else:
+            yield ('campo', clave, lector.valor())
+        if lector.siguiente() == '}':
+            return
+        lector.esperar(',')
+
+
+def tamano_archivo(archivo):
+    """Tamaño total en bytes (None si no se puede saber sin leerlo)"""
+    tamano = getattr(archivo, 'size', None)
+    if tamano is not None:
+        return tamano
+    try:
+        posicion = archivo.tell()
+        archivo.seek(0, 2)
+        tamano = archivo.tell()
+        archivo.seek(posicion)
+        return tamano - posicion
+    except (AttributeError, OSError):
+        return None
+
+
+def posicion_archivo(archivo):
+    """Bytes leídos hasta ahora (None si el archivo no lo informa)"""
+    try:
+        return archivo.tell()
+    except (AttributeError, OSError):
+        return None
+
+
+class ResultadoImportacion:
+    """Socios válidos, campos del documento y errores por registro
+
+    Solo se guarda el detalle de los primeros MAXIMO_ERRORES errores;
+    total_errores cuenta todos.
+    """
+
+    def __init__(self):
+        self.socios = SociosStore()
+        self.campos = {}
+        self.errores = []
+        self.total_errores = 0
+        self.total_registros = 0
+        self.registros_invalidos = 0
+
+    @property
+    def company_info(self):
+        return self.campos.get('company_info')
+
+    @property
+    def valido(self):
+        return not self.total_errores
+
+    def agregar_errores(self, errores):
+        """Contar los errores y guardar su detalle mientras no se llegue a MAXIMO_ERRORES"""
+        for error in errores:
+            self.total_errores += 1
+            if len(self.errores) < MAXIMO_ERRORES:
+                self.errores.append(error)
+
+
+def importar_json(archivo, al_progresar=None, tamano_lote=TAMANO_LOTE, tamano_bloque=TAMANO_BLOQUE):
+    """Importar un JSON validando cada socio; al_progresar(fraccion, registros) informa el avance"""
+    tamano = tamano_archivo(archivo)
+    resultado = ResultadoImportacion()
+    lote = []
+
+    inicio = posicion_archivo(archivo) or 0
+    for evento in iterar_json(archivo, tamano_bloque):
+        if evento[0] == 'campo':
+            resultado.campos[evento[1]] = evento[2]
+            continue
+
+        _, indice, registro = evento
+        resultado.total_registros += 1
+        socio, errores = validar_socio(registro)
+        if errores:
+            resultado.registros_invalidos += 1
+            resultado.agregar_errores(
+                {'indice': indice, 'campo': campo, 'mensaje': mensaje} for campo, mensaje in errores
+            )
+        else:
+            lote.append(socio)
+
+        if len(lote) >= tamano_lote:
+            resultado.socios.extend(lote)
+            lote = []
+            if al_progresar is not None:
+                leidos = (posicion_archivo(archivo) or 0) - inicio
+                al_progresar(min(leidos / tamano, 1.0) if tamano else None, resultado.total_registros)
+
+    if lote:
+        resultado.socios.extend(lote)
+    if al_progresar is not None:
+        al_progresar(1.0, resultado.total_registros)
+    return resultado
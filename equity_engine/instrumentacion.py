@@ -0,0 +1,178 @@
+"""Tiempos por sección y por cálculo en cada rerun, con historial acotado.
+
+La app abre un rerun al comenzar ``main``, mide cada sección y cada cálculo
+pesado con ``RegistroTiempos.medir`` y lo cierra al terminar. Se guardan los
+últimos ``HISTORIAL_POR_DEFECTO`` reruns para ver medias y percentiles, y
+todo se puede exportar a JSON.
+
+``perfilar`` ejecuta una función bajo cProfile y, opcionalmente, tracemalloc
+para capturar en detalle un solo rerun.
+"""
+import cProfile
+import io
+import json
+import pstats
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+HISTORIAL_POR_DEFECTO = 50
+
+# Funciones del perfil y líneas de asignación de memoria que se muestran
+LIMITE_PERFIL = 40
+LIMITE_MEMORIA = 25
+
+
+class RegistroTiempos:
+    """Mediciones del rerun en curso e historial de los últimos reruns"""
+
+    def __init__(self, historial=HISTORIAL_POR_DEFECTO):
+        self.historial = deque(maxlen=historial)
+        self._actual = None
+        self._nivel = 0
+        self._reruns = 0
+
+    def __len__(self):
+        return len(self.historial)
+
+    def iniciar_rerun(self, **contexto):
+        """Comenzar a registrar un rerun (contexto: p. ej. la sección activa)"""
+        self._reruns += 1
+        self._nivel = 0
+        self._actual = {
+            'rerun': self._reruns,
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'contexto': dict(contexto),
+            'mediciones': [],
+            '_inicio': time.perf_counter(),
+        }
+
+    def cerrar_rerun(self):
+        """Guardar el rerun en curso en el historial y devolverlo"""
+        rerun = self._actual
+        if rerun is None:
+            return None
+        rerun['total_ms'] = (time.perf_counter() - rerun.pop('_inicio')) * 1000
+        self.historial.append(rerun)
+        self._actual = None
+        return rerun
+
+    @contextmanager
+    def medir(self, nombre, tipo='calculo'):
+        """Medir un bloque; fuera de un rerun no registra nada"""
+        rerun = self._actual
+        if rerun is None:
+            yield
+            return
+        nivel = self._nivel
+        self._nivel += 1
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            fin = time.perf_counter()
+            self._nivel = nivel
+            rerun['mediciones'].append({
+                'nombre': nombre,
+                'tipo': tipo,
+                'nivel': nivel,
+                'inicio_ms': (inicio - rerun['_inicio']) * 1000,
+                'duracion_ms': (fin - inicio) * 1000,
+            })
+
+    def ultimo(self):
+        return self.historial[-1] if self.historial else None
+
+    def tabla_rerun(self, rerun=None):
+        """Mediciones de un rerun (el último si no se indica) en orden de inicio"""
+        rerun = rerun or self.ultimo()
+        columnas = ['nombre', 'tipo', 'nivel', 'inicio_ms', 'duracion_ms']
+        if rerun is None or not rerun['mediciones']:
+            return pd.DataFrame(columns=columnas)
+        return pd.DataFrame(rerun['mediciones'], columns=columnas).sort_values('inicio_ms', ignore_index=True)
+
+    def resumen(self):
+        """Por nombre y tipo: llamadas, media, p50, p95 y máximo en el historial"""
+        filas = [m for rerun in self.historial for m in rerun['mediciones']]
+        columnas = ['nombre', 'tipo', 'llamadas', 'media_ms', 'p50_ms', 'p95_ms', 'max_ms']
+        if not filas:
+            return pd.DataFrame(columns=columnas)
+        grupos = pd.DataFrame(filas).groupby(['nombre', 'tipo'], sort=False)['duracion_ms']
+        resumen = pd.DataFrame({
+            'llamadas': grupos.size(),
+            'media_ms': grupos.mean(),
+            'p50_ms': grupos.median(),
+            'p95_ms': grupos.quantile(0.95),
+            'max_ms': grupos.max(),
+        }).reset_index()
+        return resumen.sort_values('media_ms', ascending=False, ignore_index=True)[columnas]
+
+    def totales(self):
+        """Duración total de cada rerun del historial"""
+        return pd.DataFrame({
+            'rerun': [r['rerun'] for r in self.historial],
+            'fecha': [r['fecha'] for r in self.historial],
+            'seccion': [r['contexto'].get('seccion', '') for r in self.historial],
+            'total_ms': [r['total_ms'] for r in self.historial],
+        })
+
+    def a_json(self):
+        return json.dumps({'reruns': list(self.historial)}, indent=2, ensure_ascii=False)
+
+    def limpiar(self):
+        self.historial.clear()
+
+
+class Perfil:
+    """Resultado de perfilar una ejecución"""
+
+    def __init__(self, fecha, duracion_ms, estadisticas, memoria=None, pico_memoria=None):
+        self.fecha = fecha
+        self.duracion_ms = duracion_ms
+        self.estadisticas = estadisticas
+        self.memoria = memoria
+        self.pico_memoria = pico_memoria
+
+    def a_texto(self):
+        partes = [f"Perfil {self.fecha} — {self.duracion_ms:.1f} ms", '', self.estadisticas]
+        if self.memoria is not None:
+            partes += ['', f"Pico de memoria: {self.pico_memoria / 1024 / 1024:.2f} MB", '', self.memoria]
+        return '\n'.join(partes)
+
+
+def perfilar(funcion, memoria=False, orden='cumulative', limite=LIMITE_PERFIL):
+    """Ejecutar funcion() bajo cProfile (y tracemalloc si memoria); devuelve (resultado, Perfil)"""
+    perfilador = cProfile.Profile()
+    rastreando = memoria and not tracemalloc.is_tracing()
+    if rastreando:
+        tracemalloc.start()
+    inicio = time.perf_counter()
+    try:
+        perfilador.enable()
+        try:
+            resultado = funcion()
+        finally:
+            perfilador.disable()
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+
+        texto_memoria = pico = None
+        if memoria:
+            captura = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            ])
+            pico = tracemalloc.get_traced_memory()[1]
+            lineas = captura.statistics('lineno')[:LIMITE_MEMORIA]
+            texto_memoria = '\n'.join(str(linea) for linea in lineas)
+    finally:
+        if rastreando:
+            tracemalloc.stop()
+
+    salida = io.StringIO()
+    pstats.Stats(perfilador, stream=salida).strip_dirs().sort_stats(orden).print_stats(limite)
+    perfil = Perfil(datetime.now().isoformat(timespec='seconds'), duracion_ms, salida.getvalue(), texto_memoria, pico)
+    return resultado, perfil
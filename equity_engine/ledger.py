@@ -0,0 +1,323 @@
+"""Libro de eventos del cap table (event sourcing) con consultas en el tiempo.
+
+Cada cambio se agrega como un evento inmutable (alta, edición, baja, emisión,
+transferencia o importación) en orden de fecha. Cada INTERVALO_SNAPSHOT
+eventos se guarda un estado compactado; los socios se reemplazan en lugar de
+modificarse, así que los estados comparten los registros que no cambiaron.
+
+"Cap table al día D" parte del estado compactado más cercano y reaplica como
+mucho INTERVALO_SNAPSHOT eventos; "cambios entre D1 y D2" ubica los eventos
+del rango con búsqueda binaria y solo compara los socios que tocaron.
+
+Los eventos se serializan con ``Evento.a_dict`` (JSON) y el libro se
+reconstruye con ``LibroEventos.desde_eventos``, que vuelve a compactar
+mientras reaplica: así el historial se guarda con la empresa y en las
+exportaciones.
+"""
+from bisect import bisect_right
+from datetime import date, datetime, time
+
+import pandas as pd
+
+from equity_engine.cap_table import COLUMNAS_EQUITY, COLUMNAS_EQUITY_COMPLETA
+from equity_engine.store import SociosStore
+
+TIPOS_EVENTO = {
+    'alta': "Alta de socio",
+    'edicion': "Edición",
+    'baja': "Baja de socio",
+    'emision': "Emisión",
+    'transferencia': "Transferencia",
+    'importacion': "Importación",
+}
+
+# Eventos entre estados compactados: acota el costo de cualquier consulta
+INTERVALO_SNAPSHOT = 100
+
+
+class Evento:
+    """Cambio inmutable del cap table"""
+
+    def __init__(self, secuencia, fecha, tipo, datos):
+        self.secuencia = secuencia
+        self.fecha = fecha
+        self.tipo = tipo
+        self.datos = datos
+
+    def ids(self):
+        """Socios que toca el evento"""
+        if self.tipo == 'transferencia':
+            return [self.datos['origen'], self.datos['destino']]
+        if self.tipo == 'importacion':
+            return list(self.datos['ids'])
+        return [self.datos['id']]
+
+    def descripcion(self):
+        """Texto corto para el historial"""
+        d = self.datos
+        if self.tipo in ('alta', 'edicion'):
+            return f"{d['socio'].get('nombre', '')} (#{d['id']})"
+        if self.tipo == 'baja':
+            return f"Socio #{d['id']}"
+        if self.tipo == 'emision':
+            return f"{d['cantidad']:+.2f}% {d['campo']} a #{d['id']}"
+        if self.tipo == 'transferencia':
+            return f"{d['cantidad']:.2f}% {d['campo']} de #{d['origen']} a #{d['destino']}"
+        return f"{len(d['ids'])} socios"
+
+    def a_dict(self):
+        return {'secuencia': self.secuencia, 'fecha': self.fecha.isoformat(), 'tipo': self.tipo, 'datos': self.datos}
+
+    @classmethod
+    def desde_dict(cls, datos):
+        if datos['tipo'] not in TIPOS_EVENTO:
+            raise ValueError(f"tipo de evento desconocido: {datos['tipo']}")
+        return cls(int(datos['secuencia']), datetime.fromisoformat(datos['fecha']), datos['tipo'], datos['datos'])
+
+    def __repr__(self):
+        return f"Evento({self.secuencia}, {self.fecha:%Y-%m-%d %H:%M}, {self.tipo})"
+
+
+def _como_fecha(fecha, fin_del_dia=True):
+    """datetime para comparar con el libro (una fecha sin hora cubre el día completo)"""
+    if isinstance(fecha, datetime):
+        return fecha
+    if isinstance(fecha, date):
+        return datetime.combine(fecha, time.max if fin_del_dia else time.min)
+    return pd.Timestamp(fecha).to_pydatetime()
+
+
+def _equity(registro):
+    return sum(float(registro.get(c, 0) or 0) for c in COLUMNAS_EQUITY)
+
+
+def _aplicar(estado, evento):
+    """Aplicar un evento al estado {id: socio} sin modificar los socios existentes"""
+    d = evento.datos
+    if evento.tipo in ('alta', 'edicion'):
+        estado[d['id']] = d['socio']
+    elif evento.tipo == 'baja':
+        del estado[d['id']]
+    elif evento.tipo == 'emision':
+        socio = dict(estado[d['id']])
+        socio[d['campo']] = socio.get(d['campo'], 0.0) + d['cantidad']
+        estado[d['id']] = socio
+    elif evento.tipo == 'transferencia':
+        origen = dict(estado[d['origen']])
+        destino = dict(estado[d['destino']])
+        origen[d['campo']] = origen.get(d['campo'], 0.0) - d['cantidad']
+        destino[d['campo']] = destino.get(d['campo'], 0.0) + d['cantidad']
+        estado[d['origen']] = origen
+        estado[d['destino']] = destino
+    elif evento.tipo == 'importacion':
+        estado.clear()
+        estado.update(zip(d['ids'], d['socios']))
+
+
+class LibroEventos:
+    """Libro de solo agregar con estados compactados periódicos"""
+
+    def __init__(self, intervalo_snapshot=INTERVALO_SNAPSHOT):
+        self.intervalo_snapshot = intervalo_snapshot
+        self._eventos = []
+        self._fechas = []
+        self._estado = {}
+        # Ids del estado en orden; se rehace solo cuando cambia la composición (alta, baja, importación)
+        self._orden = []
+        self._siguiente_id = 1
+        # Estados compactados: (eventos aplicados, {id: socio})
+        self._aplicados_snapshot = [0]
+        self._snapshots = [{}]
+
+    def __len__(self):
+        return len(self._eventos)
+
+    @property
+    def eventos(self):
+        return list(self._eventos)
+
+    @property
+    def n_snapshots(self):
+        return len(self._snapshots)
+
+    # ------------------------------------------------------------------
+    # Registro de eventos
+    # ------------------------------------------------------------------
+
+    def _nuevo_id(self):
+        nuevo = self._siguiente_id
+        self._siguiente_id += 1
+        return nuevo
+
+    def _verificar_socio(self, id_socio):
+        if id_socio not in self._estado:
+            raise KeyError(f"el socio #{id_socio} no existe en el libro")
+
+    def _registrar(self, tipo, datos, fecha=None):
+        fecha = _como_fecha(fecha) if fecha is not None else datetime.now()
+        return self._agregar(Evento(len(self._eventos) + 1, fecha, tipo, datos))
+
+    def _agregar(self, evento):
+        if self._fechas and evento.fecha < self._fechas[-1]:
+            raise ValueError("el libro es de solo agregar: la fecha no puede ser anterior al último evento")
+        _aplicar(self._estado, evento)
+        if evento.tipo == 'alta':
+            self._orden.append(evento.datos['id'])
+        elif evento.tipo == 'baja':
+            self._orden.remove(evento.datos['id'])
+        elif evento.tipo == 'importacion':
+            self._orden = list(self._estado)
+        self._eventos.append(evento)
+        self._fechas.append(evento.fecha)
+        if evento.tipo == 'importacion' or len(self._eventos) - self._aplicados_snapshot[-1] >= self.intervalo_snapshot:
+            self._compactar()
+        return evento
+
+    @classmethod
+    def desde_eventos(cls, eventos, intervalo_snapshot=INTERVALO_SNAPSHOT):
+        """Reconstruir un libro a partir de eventos serializados con Evento.a_dict (ValueError si no son válidos)"""
+        libro = cls(intervalo_snapshot)
+        try:
+            for datos in eventos:
+                evento = Evento.desde_dict(datos)
+                if evento.secuencia != len(libro._eventos) + 1:
+                    raise ValueError(f"secuencia de eventos no consecutiva en el evento {evento.secuencia}")
+                libro._agregar(evento)
+                libro._siguiente_id = max([libro._siguiente_id] + [i + 1 for i in evento.ids()])
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"evento del historial no válido: {e}") from e
+        return libro
+
+    def eventos_desde(self, inicio):
+        """Eventos serializados a partir de la posición 'inicio' (para guardarlos)"""
+        return [e.a_dict() for e in self._eventos[inicio:]]
+
+    def _compactar(self):
+        """Guardar el estado actual (copia superficial: comparte los socios)"""
+        self._aplicados_snapshot.append(len(self._eventos))
+        self._snapshots.append(dict(self._estado))
+
+    def alta(self, socio, fecha=None):
+        """Agregar un socio; devuelve su id en el libro"""
+        id_socio = self._nuevo_id()
+        self._registrar('alta', {'id': id_socio, 'socio': dict(socio)}, fecha)
+        return id_socio
+
+    def edicion(self, id_socio, socio, fecha=None):
+        """Reemplazar los datos de un socio"""
+        self._verificar_socio(id_socio)
+        return self._registrar('edicion', {'id': id_socio, 'socio': dict(socio)}, fecha)
+
+    def baja(self, id_socio, fecha=None):
+        self._verificar_socio(id_socio)
+        return self._registrar('baja', {'id': id_socio}, fecha)
+
+    def emision(self, id_socio, campo, cantidad, fecha=None):
+        """Emitir (o cancelar, si es negativa) equity de una clase a un socio"""
+        self._verificar_socio(id_socio)
+        if campo not in COLUMNAS_EQUITY_COMPLETA:
+            raise ValueError(f"clase de equity desconocida: {campo}")
+        return self._registrar('emision', {'id': id_socio, 'campo': campo, 'cantidad': float(cantidad)}, fecha)
+
+    def transferencia(self, origen, destino, campo, cantidad, fecha=None):
+        """Transferir equity de una clase entre dos socios"""
+        self._verificar_socio(origen)
+        self._verificar_socio(destino)
+        if campo not in COLUMNAS_EQUITY_COMPLETA:
+            raise ValueError(f"clase de equity desconocida: {campo}")
+        disponible = float(self._estado[origen].get(campo, 0) or 0)
+        if cantidad <= 0 or cantidad > disponible + 1e-9:
+            raise ValueError(f"cantidad inválida: el socio #{origen} tiene {disponible:.2f}% de {campo}")
+        datos = {'origen': origen, 'destino': destino, 'campo': campo, 'cantidad': float(cantidad)}
+        return self._registrar('transferencia', datos, fecha)
+
+    def importacion(self, socios, fecha=None):
+        """Reemplazar todos los socios; devuelve los ids asignados"""
+        socios = [dict(s) for s in socios]
+        ids = [self._nuevo_id() for _ in socios]
+        self._registrar('importacion', {'ids': ids, 'socios': socios}, fecha)
+        return ids
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def ids(self):
+        """Ids de los socios actuales, en el mismo orden que la lista de socios"""
+        return list(self._orden)
+
+    def socio(self, id_socio):
+        """Datos actuales de un socio"""
+        self._verificar_socio(id_socio)
+        return dict(self._estado[id_socio])
+
+    def id_en(self, posicion):
+        """Id del socio en una posición de la lista actual"""
+        return self._orden[posicion]
+
+    def _estado_hasta(self, aplicados):
+        """Estado tras los primeros 'aplicados' eventos, desde el snapshot más cercano"""
+        if aplicados == len(self._eventos):
+            return dict(self._estado)
+        j = bisect_right(self._aplicados_snapshot, aplicados) - 1
+        estado = dict(self._snapshots[j])
+        for evento in self._eventos[self._aplicados_snapshot[j]:aplicados]:
+            _aplicar(estado, evento)
+        return estado
+
+    def estado_en(self, fecha):
+        """{id: socio} al cierre de una fecha (o en un instante, si es datetime)"""
+        return self._estado_hasta(bisect_right(self._fechas, _como_fecha(fecha)))
+
+    def socios_en(self, fecha):
+        """Socios vigentes en una fecha como SociosStore"""
+        return SociosStore.from_records(self.estado_en(fecha).values())
+
+    def eventos_entre(self, desde, hasta):
+        """Eventos posteriores a 'desde' y hasta 'hasta' (inclusive, por día si son fechas)"""
+        inicio = bisect_right(self._fechas, _como_fecha(desde))
+        fin = bisect_right(self._fechas, _como_fecha(hasta))
+        return self._eventos[inicio:fin]
+
+    def tabla_eventos(self, eventos=None):
+        """DataFrame del historial (todos los eventos si no se indican)"""
+        eventos = self._eventos if eventos is None else eventos
+        return pd.DataFrame({
+            'secuencia': [e.secuencia for e in eventos],
+            'fecha': [e.fecha for e in eventos],
+            'tipo': [TIPOS_EVENTO[e.tipo] for e in eventos],
+            'detalle': [e.descripcion() for e in eventos],
+        })
+
+    def cambios_entre(self, desde, hasta):
+        """Equity antes y después de cada socio que cambió entre dos fechas"""
+        inicio = bisect_right(self._fechas, _como_fecha(desde))
+        fin = bisect_right(self._fechas, _como_fecha(hasta))
+        tocados = list(dict.fromkeys(i for e in self._eventos[inicio:fin] for i in e.ids()))
+        antes = self._estado_hasta(inicio)
+        despues = self._estado_hasta(fin)
+
+        filas = []
+        for id_socio in tocados:
+            previo, actual = antes.get(id_socio), despues.get(id_socio)
+            if previo is None and actual is None:
+                continue
+            if previo is None:
+                cambio = 'alta'
+            elif actual is None:
+                cambio = 'baja'
+            elif previo == actual:
+                continue
+            else:
+                cambio = 'modificado'
+            filas.append({
+                'id': id_socio,
+                'nombre': (actual or previo).get('nombre', ''),
+                'cambio': cambio,
+                'equity_antes': _equity(previo) if previo is not None else 0.0,
+                'equity_despues': _equity(actual) if actual is not None else 0.0,
+            })
+        tabla = pd.DataFrame(filas, columns=['id', 'nombre', 'cambio', 'equity_antes', 'equity_despues'])
+        tabla['variacion'] = tabla['equity_despues'] - tabla['equity_antes']
+        return tabla
+
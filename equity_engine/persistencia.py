@@ -0,0 +1,480 @@
+"""Almacenamiento local en SQLite para empresas, socios, historial y escenarios.
+
+La base usa WAL para que muchas sesiones lean a la vez mientras una escribe.
+Los socios se guardan como JSON con columnas indexadas por empresa,
+categoría y fecha de ingreso. Las lecturas son paginadas (por id, sin
+OFFSET) y los cambios de una sesión se acumulan en ``SesionPersistente`` y se
+escriben juntos en una sola transacción.
+
+Los cambios se encolan por id de fila y la transacción exige que la versión
+de la empresa sea la misma que cuando la sesión la cargó: si otra sesión la
+cambió entremedio se lanza ``ErrorConflicto`` en lugar de pisar (o perder)
+sus cambios. Los eventos nuevos del libro de eventos se agregan en esa misma
+transacción, así que el historial queda siempre al día con los socios.
+
+Para cargar una empresa completa sin decodificar miles de JSON, cada empresa
+guarda además una copia columnar (Arrow) de sus socios. Se reconstruye de
+forma diferida en la primera carga después de un cambio y se descarta en
+cuanto la versión de la empresa avanza.
+"""
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+from equity_engine.cache import huella_company_info
+from equity_engine.ledger import LibroEventos
+from equity_engine.snapshot import ARROW_DISPONIBLE, socios_a_arrow, socios_desde_arrow
+from equity_engine.store import SociosStore
+
+RUTA_POR_DEFECTO = 'startup_equity.db'
+
+TAMANO_PAGINA = 1000
+
+ESQUEMA_SQL = """
+CREATE TABLE IF NOT EXISTS empresas (
+    id INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL UNIQUE,
+    company_info TEXT NOT NULL DEFAULT '{}',
+    actualizada TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    columnar BLOB,
+    version_columnar INTEGER
+);
+CREATE TABLE IF NOT EXISTS socios (
+    id INTEGER PRIMARY KEY,
+    empresa_id INTEGER NOT NULL REFERENCES empresas(id) ON DELETE CASCADE,
+    nombre TEXT NOT NULL,
+    categoria TEXT NOT NULL,
+    fecha_ingreso TEXT NOT NULL,
+    datos TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_socios_empresa ON socios(empresa_id, id);
+CREATE INDEX IF NOT EXISTS idx_socios_categoria ON socios(empresa_id, categoria, id);
+CREATE INDEX IF NOT EXISTS idx_socios_ingreso ON socios(empresa_id, fecha_ingreso);
+CREATE TABLE IF NOT EXISTS eventos (
+    id INTEGER PRIMARY KEY,
+    empresa_id INTEGER NOT NULL REFERENCES empresas(id) ON DELETE CASCADE,
+    secuencia INTEGER NOT NULL,
+    fecha TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    datos TEXT NOT NULL,
+    UNIQUE (empresa_id, secuencia)
+);
+CREATE TABLE IF NOT EXISTS escenarios (
+    id INTEGER PRIMARY KEY,
+    empresa_id INTEGER NOT NULL REFERENCES empresas(id) ON DELETE CASCADE,
+    nombre TEXT NOT NULL,
+    creado TEXT NOT NULL,
+    datos TEXT NOT NULL,
+    UNIQUE (empresa_id, nombre)
+);
+"""
+
+_INSERTAR_SOCIO = "INSERT INTO socios (empresa_id, nombre, categoria, fecha_ingreso, datos) VALUES (?, ?, ?, ?, ?)"
+
+_INSERTAR_EVENTO = "INSERT INTO eventos (empresa_id, secuencia, fecha, tipo, datos) VALUES (?, ?, ?, ?, ?)"
+
+
+def _fila_socio(empresa_id, registro):
+    return (
+        empresa_id,
+        str(registro.get('nombre', '')),
+        str(registro.get('categoria', '')),
+        str(registro.get('fecha_ingreso', '')),
+        json.dumps(registro, ensure_ascii=False, default=str),
+    )
+
+
+class ErrorConflicto(Exception):
+    """Otra sesión cambió la empresa desde que esta sesión la cargó"""
+
+
+def _filas_eventos(empresa_id, eventos):
+    return [
+        (empresa_id, e['secuencia'], e['fecha'], e['tipo'], json.dumps(e['datos'], ensure_ascii=False, default=str))
+        for e in eventos
+    ]
+
+
+def _filtros(empresa_id, categoria=None, ingreso_desde=None, ingreso_hasta=None):
+    """Cláusula WHERE y parámetros (siempre por empresa, para usar los índices)"""
+    condiciones = ["empresa_id = ?"]
+    parametros = [empresa_id]
+    if categoria is not None:
+        condiciones.append("categoria = ?")
+        parametros.append(categoria)
+    if ingreso_desde is not None:
+        condiciones.append("fecha_ingreso >= ?")
+        parametros.append(str(ingreso_desde))
+    if ingreso_hasta is not None:
+        condiciones.append("fecha_ingreso <= ?")
+        parametros.append(str(ingreso_hasta))
+    return " AND ".join(condiciones), parametros
+
+
+class RepositorioSQLite:
+    """Acceso a la base; seguro entre hilos (una conexión por hilo)"""
+
+    def __init__(self, ruta=RUTA_POR_DEFECTO):
+        self.ruta = str(ruta)
+        self._local = threading.local()
+        self._conexion().executescript(ESQUEMA_SQL)
+
+    def _conexion(self):
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None:
+            conexion = sqlite3.connect(self.ruta, timeout=10, isolation_level=None)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            conexion.execute("PRAGMA foreign_keys=ON")
+            self._local.conexion = conexion
+        return conexion
+
+    @contextmanager
+    def _transaccion(self):
+        """Transacción de escritura (BEGIN IMMEDIATE: toma el bloqueo al empezar)"""
+        conexion = self._conexion()
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            yield conexion
+        except BaseException:
+            conexion.execute("ROLLBACK")
+            raise
+        conexion.execute("COMMIT")
+
+    def cerrar(self):
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is not None:
+            conexion.close()
+            self._local.conexion = None
+
+    # ------------------------------------------------------------------
+    # Empresas
+    # ------------------------------------------------------------------
+
+    def guardar_empresa(self, nombre, company_info=None, socios=None, eventos=None):
+        """Crear (o reemplazar) una empresa con sus socios e historial; devuelve (empresa_id, ids de socios, versión)"""
+        ahora = datetime.now().isoformat()
+        with self._transaccion() as conexion:
+            fila = conexion.execute("SELECT id FROM empresas WHERE nombre = ?", (nombre,)).fetchone()
+            info = json.dumps(company_info or {}, ensure_ascii=False, default=str)
+            if fila is None:
+                empresa_id = conexion.execute(
+                    "INSERT INTO empresas (nombre, company_info, actualizada) VALUES (?, ?, ?)", (nombre, info, ahora)
+                ).lastrowid
+            else:
+                empresa_id = fila[0]
+                conexion.execute("""
+                    UPDATE empresas SET company_info = ?, actualizada = ?, version = version + 1, columnar = NULL
+                    WHERE id = ?
+                """, (info, ahora, empresa_id))
+            ids = self._reemplazar_socios(conexion, empresa_id, socios or [])
+            conexion.execute("DELETE FROM eventos WHERE empresa_id = ?", (empresa_id,))
+            conexion.executemany(_INSERTAR_EVENTO, _filas_eventos(empresa_id, eventos or []))
+            version = conexion.execute("SELECT version FROM empresas WHERE id = ?", (empresa_id,)).fetchone()[0]
+        return empresa_id, ids, version
+
+    def eliminar_empresa(self, empresa_id):
+        with self._transaccion() as conexion:
+            conexion.execute("DELETE FROM empresas WHERE id = ?", (empresa_id,))
+
+    def listar_empresas(self):
+        """Empresas guardadas con su cantidad de socios"""
+        filas = self._conexion().execute("""
+            SELECT e.id, e.nombre, e.actualizada,
+                   (SELECT COUNT(*) FROM socios s WHERE s.empresa_id = e.id) AS socios
+            FROM empresas e ORDER BY e.actualizada DESC
+        """).fetchall()
+        return pd.DataFrame(filas, columns=['id', 'nombre', 'actualizada', 'socios'])
+
+    def cargar_empresa(self, empresa_id):
+        """Nombre y company_info de una empresa"""
+        fila = self._conexion().execute(
+            "SELECT nombre, company_info FROM empresas WHERE id = ?", (empresa_id,)
+        ).fetchone()
+        if fila is None:
+            raise KeyError(f"no existe la empresa {empresa_id}")
+        return fila[0], json.loads(fila[1])
+
+    # ------------------------------------------------------------------
+    # Socios
+    # ------------------------------------------------------------------
+
+    def contar_socios(self, empresa_id, categoria=None, ingreso_desde=None, ingreso_hasta=None):
+        donde, parametros = _filtros(empresa_id, categoria, ingreso_desde, ingreso_hasta)
+        return self._conexion().execute(f"SELECT COUNT(*) FROM socios WHERE {donde}", parametros).fetchone()[0]
+
+    def ids_socios(self, empresa_id):
+        """Ids de los socios de la empresa, en el orden de la lista"""
+        filas = self._conexion().execute("SELECT id FROM socios WHERE empresa_id = ? ORDER BY id", (empresa_id,))
+        return [f[0] for f in filas]
+
+    def pagina_socios(self, empresa_id, despues_de=0, tamano=TAMANO_PAGINA, categoria=None,
+                      ingreso_desde=None, ingreso_hasta=None):
+        """Siguiente página de socios con id mayor a despues_de: (ids, registros)"""
+        donde, parametros = _filtros(empresa_id, categoria, ingreso_desde, ingreso_hasta)
+        filas = self._conexion().execute(
+            f"SELECT id, datos FROM socios WHERE {donde} AND id > ? ORDER BY id LIMIT ?",
+            parametros + [despues_de, tamano]
+        ).fetchall()
+        return [f[0] for f in filas], [json.loads(f[1]) for f in filas]
+
+    def iterar_socios(self, empresa_id, tamano=TAMANO_PAGINA, **filtros):
+        """Recorrer los socios página por página sin cargarlos todos en memoria"""
+        ultimo = 0
+        while True:
+            ids, registros = self.pagina_socios(empresa_id, ultimo, tamano, **filtros)
+            yield from zip(ids, registros)
+            if len(ids) < tamano:
+                return
+            ultimo = ids[-1]
+
+    def cargar_socios(self, empresa_id):
+        """Todos los socios de la empresa como (ids, SociosStore), desde la copia columnar si está al día"""
+        ids, socios, _ = self.cargar_socios_versionados(empresa_id)
+        return ids, socios
+
+    def cargar_socios_versionados(self, empresa_id):
+        """Como cargar_socios, más la versión de la empresa a la que corresponden"""
+        conexion = self._conexion()
+        # Una transacción de lectura: la copia columnar y los ids corresponden a la misma versión
+        conexion.execute("BEGIN")
+        try:
+            fila = conexion.execute(
+                "SELECT version, version_columnar, columnar FROM empresas WHERE id = ?", (empresa_id,)
+            ).fetchone()
+            if fila is None:
+                raise KeyError(f"no existe la empresa {empresa_id}")
+            version, version_columnar, columnar = fila
+            if ARROW_DISPONIBLE and columnar is not None and version_columnar == version:
+                return self.ids_socios(empresa_id), socios_desde_arrow(columnar), version
+            filas = conexion.execute(
+                "SELECT id, datos FROM socios WHERE empresa_id = ? ORDER BY id", (empresa_id,)
+            ).fetchall()
+        finally:
+            conexion.execute("COMMIT")
+
+        socios = SociosStore.from_records(json.loads(f[1]) for f in filas)
+        if ARROW_DISPONIBLE:
+            # Solo se guarda si nadie cambió la empresa mientras tanto
+            with self._transaccion() as escritura:
+                escritura.execute(
+                    "UPDATE empresas SET columnar = ?, version_columnar = version WHERE id = ? AND version = ?",
+                    (socios_a_arrow(socios), empresa_id, version)
+                )
+        return [f[0] for f in filas], socios, version
+
+    def _reemplazar_socios(self, conexion, empresa_id, registros):
+        conexion.execute("DELETE FROM socios WHERE empresa_id = ?", (empresa_id,))
+        conexion.executemany(_INSERTAR_SOCIO, (_fila_socio(empresa_id, r) for r in registros))
+        return [f[0] for f in conexion.execute("SELECT id FROM socios WHERE empresa_id = ? ORDER BY id", (empresa_id,))]
+
+    def aplicar_cambios(self, empresa_id, operaciones, version, company_info=None, eventos=(),
+                        reemplazar_eventos=False):
+        """Aplicar en una transacción una secuencia de cambios por id de fila
+
+        operaciones: ('alta', id_provisorio, registro), ('edicion', id, registro),
+        ('baja', id) o ('reemplazo', [(id_provisorio, registro), ...]), en el orden
+        en que ocurrieron. Los ids provisorios (negativos) identifican filas aún no
+        insertadas. eventos: eventos del libro a agregar (o a dejar como historial
+        completo con reemplazar_eventos). Lanza ErrorConflicto si la empresa ya no
+        está en ``version`` o si una fila a editar o borrar no existe; devuelve
+        ({provisorio: id}, versión nueva).
+        """
+        asignados = {}
+        with self._transaccion() as conexion:
+            fila = conexion.execute("SELECT version FROM empresas WHERE id = ?", (empresa_id,)).fetchone()
+            if fila is None:
+                raise KeyError(f"no existe la empresa {empresa_id}")
+            if fila[0] != version:
+                raise ErrorConflicto(f"la empresa cambió en otra sesión (versión {fila[0]}, esperada {version})")
+            for operacion in operaciones:
+                tipo = operacion[0]
+                if tipo == 'alta':
+                    _, provisorio, registro = operacion
+                    asignados[provisorio] = conexion.execute(_INSERTAR_SOCIO, _fila_socio(empresa_id, registro)).lastrowid
+                elif tipo == 'edicion':
+                    _, socio_id, registro = operacion
+                    cursor = conexion.execute(
+                        "UPDATE socios SET nombre = ?, categoria = ?, fecha_ingreso = ?, datos = ? "
+                        "WHERE id = ? AND empresa_id = ?",
+                        _fila_socio(empresa_id, registro)[1:] + (asignados.get(socio_id, socio_id), empresa_id)
+                    )
+                    if cursor.rowcount != 1:
+                        raise ErrorConflicto(f"el socio {socio_id} ya no existe")
+                elif tipo == 'baja':
+                    socio_id = operacion[1]
+                    cursor = conexion.execute(
+                        "DELETE FROM socios WHERE id = ? AND empresa_id = ?", (asignados.get(socio_id, socio_id), empresa_id)
+                    )
+                    if cursor.rowcount != 1:
+                        raise ErrorConflicto(f"el socio {socio_id} ya no existe")
+                elif tipo == 'reemplazo':
+                    provisorios = [provisorio for provisorio, _ in operacion[1]]
+                    ids = self._reemplazar_socios(conexion, empresa_id, [registro for _, registro in operacion[1]])
+                    asignados.update(zip(provisorios, ids))
+                else:
+                    raise ValueError(f"operación desconocida: {tipo}")
+            if reemplazar_eventos:
+                conexion.execute("DELETE FROM eventos WHERE empresa_id = ?", (empresa_id,))
+            try:
+                conexion.executemany(_INSERTAR_EVENTO, _filas_eventos(empresa_id, eventos))
+            except sqlite3.IntegrityError:
+                raise ErrorConflicto("el historial de la empresa cambió en otra sesión") from None
+            campos = "actualizada = ?, version = version + 1, columnar = NULL"
+            parametros = [datetime.now().isoformat()]
+            if company_info is not None:
+                campos += ", company_info = ?"
+                parametros.append(json.dumps(company_info, ensure_ascii=False, default=str))
+            conexion.execute(f"UPDATE empresas SET {campos} WHERE id = ?", parametros + [empresa_id])
+        return asignados, version + 1
+
+    # ------------------------------------------------------------------
+    # Historial
+    # ------------------------------------------------------------------
+
+    def cargar_eventos(self, empresa_id):
+        """Eventos del libro de la empresa en orden, como diccionarios de Evento.a_dict"""
+        filas = self._conexion().execute(
+            "SELECT secuencia, fecha, tipo, datos FROM eventos WHERE empresa_id = ? ORDER BY secuencia", (empresa_id,)
+        )
+        return [{'secuencia': f[0], 'fecha': f[1], 'tipo': f[2], 'datos': json.loads(f[3])} for f in filas]
+
+    # ------------------------------------------------------------------
+    # Escenarios
+    # ------------------------------------------------------------------
+
+    def guardar_escenario(self, empresa_id, nombre, datos):
+        """Crear o reemplazar un escenario (datos serializables a JSON)"""
+        with self._transaccion() as conexion:
+            conexion.execute("""
+                INSERT INTO escenarios (empresa_id, nombre, creado, datos) VALUES (?, ?, ?, ?)
+                ON CONFLICT (empresa_id, nombre) DO UPDATE SET creado = excluded.creado, datos = excluded.datos
+            """, (empresa_id, nombre, datetime.now().isoformat(), json.dumps(datos, ensure_ascii=False, default=str)))
+
+    def listar_escenarios(self, empresa_id):
+        filas = self._conexion().execute(
+            "SELECT nombre, creado FROM escenarios WHERE empresa_id = ? ORDER BY creado DESC", (empresa_id,)
+        ).fetchall()
+        return pd.DataFrame(filas, columns=['nombre', 'creado'])
+
+    def cargar_escenario(self, empresa_id, nombre):
+        fila = self._conexion().execute(
+            "SELECT datos FROM escenarios WHERE empresa_id = ? AND nombre = ?", (empresa_id, nombre)
+        ).fetchone()
+        if fila is None:
+            raise KeyError(f"no existe el escenario '{nombre}'")
+        return json.loads(fila[0])
+
+    def eliminar_escenario(self, empresa_id, nombre):
+        with self._transaccion() as conexion:
+            conexion.execute("DELETE FROM escenarios WHERE empresa_id = ? AND nombre = ?", (empresa_id, nombre))
+
+    def cargar_escenarios(self, empresa_id):
+        """Todos los escenarios de una empresa: {nombre: datos} en orden de creación"""
+        filas = self._conexion().execute(
+            "SELECT nombre, datos FROM escenarios WHERE empresa_id = ? ORDER BY creado, id", (empresa_id,)
+        ).fetchall()
+        return {nombre: json.loads(datos) for nombre, datos in filas}
+
+    def reemplazar_escenarios(self, empresa_id, escenarios):
+        """Dejar exactamente estos escenarios ({nombre: datos}) en una sola transacción"""
+        creado = datetime.now().isoformat()
+        with self._transaccion() as conexion:
+            conexion.execute("DELETE FROM escenarios WHERE empresa_id = ?", (empresa_id,))
+            conexion.executemany(
+                "INSERT INTO escenarios (empresa_id, nombre, creado, datos) VALUES (?, ?, ?, ?)",
+                [(empresa_id, nombre, creado, json.dumps(datos, ensure_ascii=False, default=str))
+                 for nombre, datos in escenarios.items()]
+            )
+
+
+class SesionPersistente:
+    """Empresa vinculada a una sesión: acumula los cambios (por id de fila) y los escribe juntos"""
+
+    def __init__(self, repositorio, empresa_id, nombre, ids, company_info=None, version=0, libro=None,
+                 eventos_guardados=0):
+        self.repositorio = repositorio
+        self.empresa_id = empresa_id
+        self.nombre = nombre
+        # Id de fila de cada posición de la lista; negativos para altas aún no escritas
+        self.ids = list(ids)
+        self.version = version
+        self.pendientes = []
+        # Libro de eventos de la sesión: sus eventos a partir de eventos_guardados aún no están en la base
+        self.libro = libro
+        self.eventos_guardados = eventos_guardados
+        self._reemplazar_eventos = False
+        self._ultimo_provisorio = 0
+        self._huella_company_info = huella_company_info(company_info)
+
+    @classmethod
+    def abrir(cls, repositorio, empresa_id):
+        """Cargar una empresa: devuelve (sesión, company_info, socios); KeyError si no existe"""
+        nombre, company_info = repositorio.cargar_empresa(empresa_id)
+        ids, socios, version = repositorio.cargar_socios_versionados(empresa_id)
+        sesion = cls(repositorio, empresa_id, nombre, ids, company_info, version)
+        eventos = repositorio.cargar_eventos(empresa_id)
+        try:
+            sesion.libro = LibroEventos.desde_eventos(eventos)
+            sesion.eventos_guardados = len(eventos)
+        except ValueError:
+            eventos = []
+        if not eventos:
+            # Empresa sin historial (o ilegible): arranca con los socios actuales y se guarda al sincronizar
+            libro = LibroEventos()
+            libro.importacion(socios.to_records())
+            sesion.reemplazo_libro(libro)
+        return sesion, company_info, socios
+
+    def _provisorio(self):
+        self._ultimo_provisorio -= 1
+        return self._ultimo_provisorio
+
+    def alta(self, registro):
+        provisorio = self._provisorio()
+        self.ids.append(provisorio)
+        self.pendientes.append(('alta', provisorio, dict(registro)))
+
+    def edicion(self, posicion, registro):
+        self.pendientes.append(('edicion', self.ids[posicion], dict(registro)))
+
+    def baja(self, posicion):
+        self.pendientes.append(('baja', self.ids.pop(posicion)))
+
+    def reemplazo(self, registros):
+        # Un reemplazo anula los cambios anteriores aún no escritos
+        registros = [dict(r) for r in registros]
+        self.ids = [self._provisorio() for _ in registros]
+        self.pendientes = [('reemplazo', list(zip(self.ids, registros)))]
+
+    def reemplazo_libro(self, libro):
+        """Otro libro de eventos (p. ej. importado): su historial reemplaza al guardado"""
+        self.libro = libro
+        self.eventos_guardados = 0
+        self._reemplazar_eventos = True
+
+    def sincronizar(self, company_info=None):
+        """Escribir los cambios pendientes, los eventos nuevos (y la empresa si cambió) en una transacción
+
+        Lanza ErrorConflicto si otra sesión cambió la empresa; los cambios quedan pendientes.
+        """
+        huella = huella_company_info(company_info) if company_info is not None else self._huella_company_info
+        info_cambiada = huella != self._huella_company_info
+        eventos = self.libro.eventos_desde(self.eventos_guardados) if self.libro is not None else []
+        if not self.pendientes and not info_cambiada and not eventos and not self._reemplazar_eventos:
+            return False
+        asignados, self.version = self.repositorio.aplicar_cambios(
+            self.empresa_id, self.pendientes, self.version, company_info if info_cambiada else None,
+            eventos, self._reemplazar_eventos
+        )
+        self.ids = [asignados.get(i, i) for i in self.ids]
+        self.pendientes = []
+        self.eventos_guardados += len(eventos)
+        self._reemplazar_eventos = False
+        self._huella_company_info = huella
+        return True
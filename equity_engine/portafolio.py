@@ -0,0 +1,286 @@
+"""Modo portafolio: muchas exportaciones JSON analizadas en paralelo.
+
+Cada archivo se importa y se pasa por el mismo motor de cap table en un
+proceso del pool; del resultado solo vuelve un resumen pequeño por empresa
+(totales, equity por categoría y exposición a protección antidilución).
+
+Los resúmenes se guardan en un caché JSON junto a los archivos, con la
+fecha de modificación y el tamaño de cada uno: al reabrir el portafolio solo
+se vuelven a leer los archivos que cambiaron. El caché es solo datos (nunca
+pickle), así que un archivo plantado en el directorio no ejecuta código.
+
+Los directorios se resuelven siempre dentro de una raíz configurada y el
+patrón solo puede nombrar archivos de ese directorio: rutas absolutas, ``..``
+o enlaces que salgan de la raíz se rechazan con ``ErrorPortafolio``.
+"""
+import glob
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from equity_engine.cap_table import calcular_cap_table
+from equity_engine.importador import ErrorImportacion, importar_json
+
+PATRON_POR_DEFECTO = 'startup_equity_*.json'
+
+NOMBRE_CACHE = '.equity_portafolio.json'
+
+VERSION_CACHE = 2
+
+# Con menos archivos por leer no compensa levantar procesos
+MINIMO_ARCHIVOS_PROCESOS = 4
+
+
+class ErrorPortafolio(ValueError):
+    """Directorio o patrón fuera de la raíz del portafolio"""
+
+
+def _dentro_de(ruta, raiz):
+    return os.path.commonpath([ruta, raiz]) == raiz
+
+
+def resolver_directorio(raiz, directorio=''):
+    """Ruta real de un subdirectorio de la raíz; rechaza rutas que salgan de ella"""
+    raiz = os.path.realpath(raiz)
+    ruta = os.path.realpath(os.path.join(raiz, directorio or ''))
+    if os.path.isabs(directorio or '') or not _dentro_de(ruta, raiz):
+        raise ErrorPortafolio(f"el directorio {directorio!r} está fuera de la raíz del portafolio")
+    if not os.path.isdir(ruta):
+        raise ErrorPortafolio(f"no existe el directorio {directorio or '.'!r}")
+    return ruta
+
+
+def validar_patron(patron):
+    """El patrón solo puede nombrar archivos del directorio (sin separadores ni ``..``)"""
+    patron = (patron or '').strip()
+    separadores = {'/', os.sep} | ({os.altsep} if os.altsep else set())
+    if not patron or any(sep in patron for sep in separadores) or patron.startswith('.'):
+        raise ErrorPortafolio(f"patrón no válido: {patron!r} (solo nombres de archivo, p. ej. {PATRON_POR_DEFECTO})")
+    return patron
+
+
+class ResumenEmpresa:
+    """Lo que se conserva de cada exportación para los agregados del portafolio"""
+
+    def __init__(self, archivo, nombre, company_info=None, totales=None, por_categoria=None,
+                 proteccion=None, registros_invalidos=0, error=None):
+        self.archivo = archivo
+        self.nombre = nombre
+        self.company_info = company_info or {}
+        self.totales = totales or {}
+        self.por_categoria = por_categoria
+        self.proteccion = proteccion
+        self.registros_invalidos = registros_invalidos
+        self.error = error
+
+    @property
+    def valido(self):
+        return self.error is None
+
+    def a_dict(self):
+        """Representación JSON del resumen (para el caché en disco)"""
+        return {
+            'archivo': self.archivo,
+            'nombre': self.nombre,
+            'company_info': self.company_info,
+            'totales': self.totales,
+            'por_categoria': None if self.por_categoria is None else self.por_categoria.to_dict(orient='split'),
+            'proteccion': None if self.proteccion is None else {str(k): float(v) for k, v in self.proteccion.items()},
+            'registros_invalidos': self.registros_invalidos,
+            'error': self.error,
+        }
+
+    @classmethod
+    def desde_dict(cls, datos):
+        por_categoria = datos.get('por_categoria')
+        if por_categoria is not None:
+            por_categoria = pd.DataFrame(
+                por_categoria['data'], index=por_categoria['index'], columns=por_categoria['columns'], dtype=float
+            )
+        proteccion = datos.get('proteccion')
+        if proteccion is not None:
+            proteccion = pd.Series(proteccion, dtype=float)
+        return cls(
+            str(datos['archivo']),
+            str(datos['nombre']),
+            dict(datos.get('company_info') or {}),
+            {str(k): float(v) for k, v in (datos.get('totales') or {}).items()},
+            por_categoria,
+            proteccion,
+            int(datos.get('registros_invalidos') or 0),
+            datos.get('error'),
+        )
+
+
+def resumir_exportacion(ruta):
+    """Importar una exportación y resumir su cap table (se ejecuta en los procesos del pool)"""
+    archivo = os.path.basename(ruta)
+    nombre = os.path.splitext(archivo)[0]
+    try:
+        with open(ruta, 'rb') as f:
+            importacion = importar_json(f)
+    except (ErrorImportacion, OSError) as e:
+        return ResumenEmpresa(archivo, nombre, error=str(e))
+
+    company_info = importacion.company_info or {}
+    cap = calcular_cap_table(importacion.socios)
+    df = cap.df
+    protegidos = df[df['proteccion_antidilucion'].to_numpy(dtype=bool)]
+    proteccion = protegidos.groupby(protegidos['tipo_proteccion'].astype(str))['equity_total'].sum()
+    return ResumenEmpresa(
+        archivo,
+        company_info.get('name') or nombre,
+        company_info,
+        {k: float(v) for k, v in cap.totales.items()},
+        cap.por_categoria[['equity_total', 'aporte_inicial', 'cantidad']].copy(),
+        proteccion,
+        importacion.registros_invalidos,
+    )
+
+
+def _leer_cache(ruta_cache):
+    """{archivo: (mtime_ns, tamaño, ResumenEmpresa)}; un caché ilegible o de otra versión se ignora"""
+    try:
+        with open(ruta_cache, encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get('version') != VERSION_CACHE:
+            return {}
+        return {
+            str(archivo): (int(mtime), int(tamano), ResumenEmpresa.desde_dict(resumen))
+            for archivo, (mtime, tamano, resumen) in cache['archivos'].items()
+        }
+    except (OSError, ValueError, TypeError, KeyError, AttributeError):
+        return {}
+
+
+def _escribir_cache(ruta_cache, archivos):
+    temporal = ruta_cache + '.tmp'
+    contenido = {
+        'version': VERSION_CACHE,
+        'archivos': {archivo: [mtime, tamano, resumen.a_dict()] for archivo, (mtime, tamano, resumen) in archivos.items()},
+    }
+    try:
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(contenido, f, ensure_ascii=False, default=str)
+        os.replace(temporal, ruta_cache)
+    except OSError:
+        # Sin permisos de escritura el portafolio funciona igual, solo sin caché
+        pass
+
+
+class Portafolio:
+    """Resúmenes de las empresas y agregados entre empresas"""
+
+    def __init__(self, empresas, reanalizados=0):
+        self.empresas = empresas
+        self.reanalizados = reanalizados
+
+    def __len__(self):
+        return len(self.empresas)
+
+    @property
+    def validas(self):
+        return [e for e in self.empresas if e.valido]
+
+    @property
+    def errores(self):
+        return [(e.archivo, e.error) for e in self.empresas if not e.valido]
+
+    def resumen(self):
+        """Una fila por empresa: socios, equity asignado, pool disponible, protección y aportes"""
+        filas = []
+        for etiqueta, e in zip(self._etiquetas(), self.validas):
+            filas.append({
+                'empresa': etiqueta,
+                'archivo': e.archivo,
+                'socios': int(e.totales.get('socios', 0)),
+                'equity_asignado': e.totales.get('equity_total', 0.0),
+                'equity_disponible': e.totales.get('equity_disponible', 0.0),
+                'equity_protegido': float(e.proteccion.sum()) if e.proteccion is not None else 0.0,
+                'aporte_inicial': e.totales.get('aporte_inicial', 0.0),
+                'registros_invalidos': e.registros_invalidos,
+            })
+        columnas = ['empresa', 'archivo', 'socios', 'equity_asignado', 'equity_disponible',
+                    'equity_protegido', 'aporte_inicial', 'registros_invalidos']
+        return pd.DataFrame(filas, columns=columnas)
+
+    def _etiquetas(self):
+        """Nombre de cada empresa válida (con el archivo si hay nombres repetidos)"""
+        nombres = [e.nombre for e in self.validas]
+        return [f"{e.nombre} ({e.archivo})" if nombres.count(e.nombre) > 1 else e.nombre for e in self.validas]
+
+    def _matriz(self, atributo, columna=None):
+        """Empresas x claves a partir de una Serie/DataFrame de cada resumen"""
+        series = {}
+        for etiqueta, e in zip(self._etiquetas(), self.validas):
+            valor = getattr(e, atributo)
+            if valor is not None and len(valor):
+                series[etiqueta] = valor[columna] if columna else valor
+        if not series:
+            return pd.DataFrame()
+        return pd.DataFrame(series).T.fillna(0.0)
+
+    def equity_por_categoria(self):
+        """Equity total (%) de cada categoría en cada empresa"""
+        return self._matriz('por_categoria', 'equity_total')
+
+    def aportes_por_categoria(self):
+        return self._matriz('por_categoria', 'aporte_inicial')
+
+    def exposicion_proteccion(self):
+        """Equity con protección antidilución por tipo de protección en cada empresa"""
+        return self._matriz('proteccion')
+
+    def totales(self):
+        resumen = self.resumen()
+        return {
+            'empresas': len(resumen),
+            'socios': int(resumen['socios'].sum()),
+            'aporte_inicial': float(resumen['aporte_inicial'].sum()),
+            'equity_disponible_promedio': float(resumen['equity_disponible'].mean()) if len(resumen) else 0.0,
+            'equity_protegido_promedio': float(resumen['equity_protegido'].mean()) if len(resumen) else 0.0,
+            'archivos_con_error': len(self.errores),
+        }
+
+
+def cargar_portafolio(raiz, directorio='', patron=PATRON_POR_DEFECTO, procesos=None, ruta_cache=None):
+    """Analizar las exportaciones de un subdirectorio de la raíz reutilizando el caché por archivo"""
+    directorio = resolver_directorio(raiz, directorio)
+    patron = validar_patron(patron)
+    ruta_cache = ruta_cache or os.path.join(directorio, NOMBRE_CACHE)
+    cache = _leer_cache(ruta_cache)
+
+    # Nombres relativos al directorio; los enlaces que apuntan fuera de la raíz no se leen
+    raiz = os.path.realpath(raiz)
+    archivos = [
+        a for a in sorted(glob.glob(patron, root_dir=directorio))
+        if os.path.isfile(os.path.join(directorio, a)) and _dentro_de(os.path.realpath(os.path.join(directorio, a)), raiz)
+    ]
+    firmas = {}
+    for archivo in archivos:
+        estado = os.stat(os.path.join(directorio, archivo))
+        firmas[archivo] = (estado.st_mtime_ns, estado.st_size)
+
+    pendientes = [a for a in archivos if cache.get(a, (None, None))[:2] != firmas[a]]
+    rutas = [os.path.join(directorio, a) for a in pendientes]
+    procesos = min(procesos or os.cpu_count() or 1, len(pendientes))
+    if len(pendientes) >= MINIMO_ARCHIVOS_PROCESOS and procesos > 1:
+        # spawn: la app corre con hilos (Streamlit) y hacer fork de un proceso con hilos no es seguro
+        contexto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as pool:
+            nuevos = list(pool.map(resumir_exportacion, rutas))
+    else:
+        nuevos = [resumir_exportacion(r) for r in rutas]
+
+    for archivo, resumen in zip(pendientes, nuevos):
+        cache[archivo] = firmas[archivo] + (resumen,)
+    # Solo los archivos que siguen existiendo
+    eliminados = len(cache) - len(archivos)
+    cache = {a: cache[a] for a in archivos}
+    if pendientes or eliminados:
+        _escribir_cache(ruta_cache, cache)
+
+    return Portafolio([cache[a][2] for a in archivos], reanalizados=len(pendientes))
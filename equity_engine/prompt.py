@@ -0,0 +1,303 @@
+"""Prompt de consultoría para Claude con presupuesto de tokens.
+
+El prompt se arma por secciones: encabezado de la empresa, socios y
+solicitud. Las plantillas son constantes del módulo y la parte fija de la
+solicitud (que solo depende del nivel de detalle, la urgencia y el país) se
+renderiza una vez por combinación. Si el detalle de todos los socios no cabe
+en el presupuesto, la sección de socios pasa a un resumen por categoría más
+el detalle de los socios con más equity.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from equity_engine.cap_table import VALORES_POR_DEFECTO
+
+# Tokens máximos del prompt completo (estimados)
+PRESUPUESTO_TOKENS = 8000
+
+# Socios con detalle completo cuando el prompt se resume
+MAXIMO_SOCIOS_DETALLE = 25
+
+# Aproximación conservadora para texto en español con markdown
+CARACTERES_POR_TOKEN = 3.5
+
+_PLANTILLA_ENCABEZADO = """Actúa como un experto consultor en estructuración de startups y derecho corporativo. Necesito tu análisis y recomendaciones para la siguiente startup:
+
+## 📊 INFORMACIÓN DE LA EMPRESA:
+- **Nombre**: {nombre}
+- **Etapa**: {etapa}
+- **Sector**: {sector}
+- **País**: {pais}
+- **Capital Autorizado**: ${capital_autorizado:,} COP
+- **Capital Suscrito**: ${capital_suscrito:,} COP
+- **Valoración Actual**: ${valoracion:,} USD
+- **Busca Inversión**: {busca_inversion}
+
+## 👥 ESTRUCTURA DE SOCIOS ACTUAL:
+**Total Equity Asignado**: {total_equity:.1f}%
+**Equity Disponible**: {disponible:.1f}%
+
+"""
+
+_PLANTILLA_SOCIO = """
+### Socio {i}: {nombre}
+- **Rol**: {rol} ({categoria})
+- **Dedicación**: {dedicacion}
+- **Equity Total**: {equity:.1f}%
+  - Ordinarias: {acciones_ordinarias:.1f}%
+  - Preferenciales: {acciones_preferenciales:.1f}%
+  - Stock Options: {stock_options:.1f}%
+- **Vesting**: {vesting_total} años, cliff {cliff_period} meses
+- **Aporte Inicial**: ${aporte_inicial:,} COP
+- **Salario**: ${salario:,} COP/mes{proteccion}{prorata}
+"""
+
+_PLANTILLA_PROTECCION = """
+- **Protección Antidilución**: {tipo}
+  - Porcentaje protegido: {porcentaje}%
+  - Umbral activación: {umbral}% descuento
+  - Duración: {duracion}"""
+
+_PLANTILLA_PRORATA = """
+- **Derechos Pro-rata**: {tipo}
+  - Participación mínima: {participacion}%
+  - Plazo ejercicio: {plazo}
+  - Transferible: {transferible}
+  - Exclusiones: {exclusiones}"""
+
+_PLANTILLA_RESUMEN = """### Resumen por categoría ({socios:,} socios)
+| Categoría | Socios | Equity % | Ordinarias % | Preferenciales % | Stock Options % | Con protección | Con pro-rata | Aporte (COP) |
+|---|---|---|---|---|---|---|---|---|
+{filas}
+"""
+
+_FILA_RESUMEN = ("| {categoria} | {cantidad:,} | {equity:.1f} | {ordinarias:.1f} | {preferenciales:.1f} | "
+                 "{options:.1f} | {proteccion:,} | {prorata:,} | ${aporte:,.0f} |")
+
+_PLANTILLA_SOLICITUD = """
+
+## 🎯 ÁREAS DE ENFOQUE PRIORITARIAS:
+{areas}
+
+## 🚨 PROBLEMAS/PREOCUPACIONES ESPECÍFICAS:
+{problemas}
+
+## 🎯 OBJETIVOS PRINCIPALES:
+{objetivos}
+"""
+
+_PLANTILLA_INSTRUCCIONES = """
+## 📋 SOLICITUD ESPECÍFICA:
+Por favor proporciona un análisis {detalle} con nivel de urgencia {urgencia} que incluya:
+
+### 1. 🔍 ANÁLISIS DE LA ESTRUCTURA ACTUAL:
+- Evaluación de la distribución de equity
+- Identificación de problemas potenciales
+- Análisis de la estructura de vesting
+- Evaluación del balance fundadores vs empleados vs inversores
+
+### 2. ⚖️ RECOMENDACIONES LEGALES:
+- **Estatutos**: Cláusulas específicas a incluir para {pais_estatutos}
+- **Pacto de Socios**: Elementos críticos a documentar
+- **Vesting**: Estructura recomendada y cláusulas de protección
+- **Cláusulas de Salida**: Mecanismos de salida, drag-along, tag-along, etc.
+
+### 3. 📄 DOCUMENTOS NECESARIOS:
+- Lista priorizada de documentos legales a crear/modificar
+- Timeline de implementación
+- Costos estimados
+
+### 4. 🚀 ESTRATEGIA DE CRECIMIENTO:
+- Preparación para futuras rondas de inversión
+- Estructura de pool para empleados
+- Mecanismos de incentivos
+
+### 5. ⚠️ RIESGOS Y MITIGACIÓN:
+- Identificación de riesgos principales
+- Estrategias de mitigación
+- Señales de alerta temprana
+
+### 6. 📅 PLAN DE ACCIÓN:
+- Pasos inmediatos (próximas 2 semanas)
+- Mediano plazo (1-3 meses)
+- Largo plazo (6+ meses)
+
+## 📝 FORMATO DE RESPUESTA:
+- Usa secciones claras con headers
+- Incluye ejemplos de cláusulas cuando sea relevante
+- Proporciona justificaciones para cada recomendación
+- Señala aspectos específicos del derecho {pais_derecho}
+- Incluye templates o formatos sugeridos donde aplique
+
+¡Gracias por tu análisis experto!"""
+
+
+class ResultadoPrompt:
+    """Secciones del prompt, socios con detalle completo y si la sección de socios se resumió"""
+
+    def __init__(self, secciones, socios_detallados, total_socios):
+        self.secciones = secciones
+        self.socios_detallados = socios_detallados
+        self.total_socios = total_socios
+
+    @property
+    def texto(self):
+        return ''.join(self.secciones)
+
+    @property
+    def resumido(self):
+        return self.socios_detallados < self.total_socios
+
+    @property
+    def tokens(self):
+        return sum(estimar_tokens(seccion) for seccion in self.secciones)
+
+
+def estimar_tokens(texto):
+    """Tokens aproximados de un texto (sin tokenizador: por cantidad de caracteres)"""
+    return int(np.ceil(len(texto) / CARACTERES_POR_TOKEN))
+
+
+def _caracteres(tokens):
+    return int(tokens * CARACTERES_POR_TOKEN)
+
+
+def encabezado_prompt(company_info, total_equity):
+    """Datos de la empresa y equity asignado"""
+    return _PLANTILLA_ENCABEZADO.format(
+        nombre=company_info.get('name', 'No especificado'),
+        etapa=company_info.get('stage', 'No especificado'),
+        sector=company_info.get('sector', 'No especificado'),
+        pais=company_info.get('country', 'No especificado'),
+        capital_autorizado=company_info.get('capital_autorizado', 0),
+        capital_suscrito=company_info.get('capital_suscrito', 0),
+        valoracion=company_info.get('valuation', 0),
+        busca_inversion='Sí' if company_info.get('busca_inversion', False) else 'No',
+        total_equity=total_equity,
+        disponible=100 - total_equity,
+    )
+
+
+def bloque_socio(i, socio, equity):
+    """Detalle completo de un socio (i es su número de registro)"""
+    if socio.get('proteccion_antidilucion', False):
+        proteccion = _PLANTILLA_PROTECCION.format(
+            tipo=socio.get('tipo_proteccion', 'No especificado'),
+            porcentaje=socio.get('porcentaje_proteccion', 0),
+            umbral=socio.get('umbral_activacion', 0),
+            duracion=socio.get('duracion_proteccion', 'No especificado'),
+        )
+    else:
+        proteccion = "\n- **Protección Antidilución**: No configurada"
+    if socio.get('derechos_prorata', False):
+        exclusiones = ", ".join(socio.get('exclusiones_prorata', []))
+        prorata = _PLANTILLA_PRORATA.format(
+            tipo=socio.get('tipo_derechos_prorata', 'No especificado'),
+            participacion=socio.get('participacion_minima_prorata', 0),
+            plazo=socio.get('plazo_ejercicio_prorata', 'No especificado'),
+            transferible='Sí' if socio.get('transferibilidad_derechos', False) else 'No',
+            exclusiones=exclusiones if exclusiones else 'Ninguna',
+        )
+    else:
+        prorata = "\n- **Derechos Pro-rata**: No configurados"
+    return _PLANTILLA_SOCIO.format(i=i, equity=equity, proteccion=proteccion, prorata=prorata, **{
+        campo: socio[campo] for campo in (
+            'nombre', 'rol', 'categoria', 'dedicacion', 'acciones_ordinarias', 'acciones_preferenciales',
+            'stock_options', 'vesting_total', 'cliff_period', 'aporte_inicial', 'salario'
+        )
+    })
+
+
+# Cota inferior del largo de un bloque: con más datos los bloques solo crecen
+_MINIMO_CARACTERES_SOCIO = len(bloque_socio(1, VALORES_POR_DEFECTO, 0.0))
+
+
+def resumen_categorias(cap):
+    """Tabla markdown con socios, equity, protección y pro-rata por categoría"""
+    df = cap.df
+    por_categoria = cap.por_categoria.sort_values('equity_acciones', ascending=False)
+    banderas = df.groupby('categoria')[['proteccion_antidilucion', 'derechos_prorata']].sum()
+    filas = '\n'.join(
+        _FILA_RESUMEN.format(
+            categoria=categoria,
+            cantidad=int(fila['cantidad']),
+            equity=fila['equity_acciones'],
+            ordinarias=fila['acciones_ordinarias'],
+            preferenciales=fila['acciones_preferenciales'],
+            options=fila['stock_options'],
+            proteccion=int(banderas.at[categoria, 'proteccion_antidilucion']),
+            prorata=int(banderas.at[categoria, 'derechos_prorata']),
+            aporte=fila['aporte_inicial'],
+        )
+        for categoria, fila in por_categoria.iterrows()
+    )
+    return _PLANTILLA_RESUMEN.format(socios=len(df), filas=filas)
+
+
+def socios_prompt(socios, cap, presupuesto_tokens, maximo_detalle=MAXIMO_SOCIOS_DETALLE):
+    """Sección de socios dentro del presupuesto; devuelve (texto, socios con detalle completo)"""
+    equity = cap.df['equity_acciones'].to_numpy()
+    n = len(socios)
+    disponible = _caracteres(presupuesto_tokens)
+
+    # Con pocos socios se intenta el detalle completo (la cota inferior evita armarlo si no puede caber)
+    if n * _MINIMO_CARACTERES_SOCIO <= disponible:
+        bloques = [bloque_socio(i, socio, equity[i - 1]) for i, socio in enumerate(socios, 1)]
+        if sum(len(bloque) for bloque in bloques) <= disponible:
+            return ''.join(bloques), n
+
+    resumen = resumen_categorias(cap)
+    disponible -= len(resumen)
+    orden = np.argsort(-equity, kind='stable')
+    bloques = []
+    for posicion in orden[:maximo_detalle]:
+        bloque = bloque_socio(int(posicion) + 1, socios[int(posicion)], equity[posicion])
+        if len(bloque) > disponible:
+            break
+        bloques.append(bloque)
+        disponible -= len(bloque)
+
+    restantes = orden[len(bloques):]
+    partes = [resumen]
+    if bloques:
+        partes.append(f"\n### Principales socios por equity ({len(bloques)} de {n:,})\n")
+        partes.extend(bloques)
+    if len(restantes):
+        partes.append(f"\n_Los otros {len(restantes):,} socios suman {equity[restantes].sum():.1f}% del equity; "
+                      "están incluidos en el resumen por categoría._\n")
+    return ''.join(partes), len(bloques)
+
+
+@lru_cache(maxsize=64)
+def instrucciones_prompt(detalle_nivel, urgencia, pais=None):
+    """Parte fija de la solicitud: se renderiza una vez por combinación de parámetros"""
+    return _PLANTILLA_INSTRUCCIONES.format(
+        detalle=detalle_nivel.lower(),
+        urgencia=urgencia.lower(),
+        pais_estatutos=pais or 'Colombia',
+        pais_derecho=pais or 'colombiano',
+    )
+
+
+def solicitud_prompt(areas_focus, urgencia, detalle_nivel, problemas_especificos, objetivos, pais=None):
+    """Áreas, problemas y objetivos del usuario más las instrucciones fijas"""
+    return _PLANTILLA_SOLICITUD.format(
+        areas='\n'.join(f'- {area}' for area in areas_focus),
+        problemas=problemas_especificos if problemas_especificos else 'No se especificaron problemas particulares.',
+        objetivos=objetivos if objetivos else 'Estructuración general y mejores prácticas.',
+    ) + instrucciones_prompt(detalle_nivel, urgencia, pais)
+
+
+def generar_prompt(company_info, socios, cap, areas_focus, urgencia, detalle_nivel, problemas_especificos, objetivos,
+                   presupuesto_tokens=PRESUPUESTO_TOKENS, maximo_detalle=MAXIMO_SOCIOS_DETALLE, seccion_socios=None):
+    """Prompt completo; seccion_socios(presupuesto) permite reutilizar una sección de socios memoizada"""
+    encabezado = encabezado_prompt(company_info, cap.totales['equity_acciones'])
+    solicitud = solicitud_prompt(areas_focus, urgencia, detalle_nivel, problemas_especificos, objetivos,
+                                 company_info.get('country'))
+    presupuesto_socios = max(presupuesto_tokens - estimar_tokens(encabezado) - estimar_tokens(solicitud), 0)
+    if seccion_socios is None:
+        texto_socios, detallados = socios_prompt(socios, cap, presupuesto_socios, maximo_detalle)
+    else:
+        texto_socios, detallados = seccion_socios(presupuesto_socios)
+    return ResultadoPrompt([encabezado, texto_socios, solicitud], detallados, len(socios))
@@ -0,0 +1,163 @@
+"""Elegibilidad de derechos pro-rata sobre el cap table.
+
+Aplica las exclusiones y la participación mínima de cada socio como máscaras
+booleanas sobre todo el DataFrame, y devuelve para cada socio un código de
+motivo que explica por qué puede (o no) ejercer en la emisión seleccionada.
+También simula por Monte Carlo qué socios ejercen sus derechos en la emisión.
+"""
+import numpy as np
+import pandas as pd
+
+# Tipos de emisión que un socio puede excluir de sus derechos pro-rata
+TIPOS_EMISION_PRORATA = [
+    "Emisiones para empleados (stock options)",
+    "Conversión de deuda en acciones",
+    "Emisiones de acciones preferenciales",
+    "Fusiones y adquisiciones",
+    "Spin-offs o escisiones",
+]
+
+# Códigos de motivo (en orden de prioridad cuando aplica más de uno)
+MOTIVO_ELEGIBLE = 'elegible'
+MOTIVO_SIN_DERECHOS = 'sin_derechos'
+MOTIVO_EXCLUSION = 'exclusion_tipo_emision'
+MOTIVO_PARTICIPACION_MINIMA = 'bajo_participacion_minima'
+
+DESCRIPCION_MOTIVOS = {
+    MOTIVO_ELEGIBLE: "✅ Elegible",
+    MOTIVO_SIN_DERECHOS: "❌ Sin derechos pro-rata",
+    MOTIVO_EXCLUSION: "🚫 Tipo de emisión excluido",
+    MOTIVO_PARTICIPACION_MINIMA: "📉 Bajo la participación mínima",
+}
+
+
+def mascara_exclusiones(exclusiones, tipos_emision):
+    """True para los socios cuya lista de exclusiones contiene algún tipo de emisión seleccionado"""
+    n = len(exclusiones)
+    seleccion = set(tipos_emision)
+    if not seleccion or n == 0:
+        return np.zeros(n, dtype=bool)
+
+    # Las listas se repiten mucho (vienen de presets): se evalúa cada combinación una sola vez
+    codigos, combinaciones = pd.factorize(
+        pd.Series(exclusiones).map(lambda v: tuple(v) if isinstance(v, (list, tuple)) else ())
+    )
+    excluida = np.fromiter(
+        (not seleccion.isdisjoint(combinacion) for combinacion in combinaciones),
+        dtype=bool, count=len(combinaciones)
+    )
+    return excluida[codigos]
+
+
+def evaluar_elegibilidad_prorata(df, tipos_emision):
+    """Elegibilidad y código de motivo de cada socio para una emisión con los tipos indicados"""
+    con_derechos = df['derechos_prorata'].to_numpy(dtype=bool)
+    excluido = mascara_exclusiones(df['exclusiones_prorata'].to_numpy(), tipos_emision)
+    bajo_minimo = (
+        df['equity_total'].to_numpy(dtype=np.float64)
+        < df['participacion_minima_prorata'].to_numpy(dtype=np.float64)
+    )
+
+    motivo = np.select(
+        [~con_derechos, excluido, bajo_minimo],
+        [MOTIVO_SIN_DERECHOS, MOTIVO_EXCLUSION, MOTIVO_PARTICIPACION_MINIMA],
+        default=MOTIVO_ELEGIBLE,
+    )
+    return pd.DataFrame({'elegible': motivo == MOTIVO_ELEGIBLE, 'motivo': motivo}, index=df.index)
+
+
+# Número máximo de decisiones (simulaciones x socios) que se sortean por lote
+DECISIONES_POR_LOTE = 4_000_000
+
+# Percentiles que se reportan de cada distribución
+PERCENTILES = (5, 50, 95)
+
+
+def _cuantiles_dos_puntos(valor_ejerce, valor_no_ejerce, tasa_ejercicio, percentil):
+    """Percentil de una variable que vale valor_ejerce con prob. tasa_ejercicio y valor_no_ejerce si no"""
+    # valor_no_ejerce <= valor_ejerce: la masa baja es la probabilidad de no ejercer
+    return np.where((1 - tasa_ejercicio) * 100 > percentil, valor_no_ejerce, valor_ejerce)
+
+
+class SimulacionProrata:
+    """Distribuciones resultantes de la simulación Monte Carlo de ejercicio pro-rata"""
+
+    def __init__(self, capital_insiders, monto_recaudar, derecho_monto, equity_actual,
+                 equity_diluido, tasa_ejercicio, probabilidades):
+        self.capital_insiders = capital_insiders
+        self.brecha_externa = monto_recaudar - capital_insiders
+        self.monto_recaudar = monto_recaudar
+        self.derecho_monto = derecho_monto
+        self.equity_actual = equity_actual
+        self.equity_diluido = equity_diluido
+        self.tasa_ejercicio = tasa_ejercicio
+        self.probabilidades = probabilidades
+
+    def __len__(self):
+        return len(self.capital_insiders)
+
+    @property
+    def equity_final_media(self):
+        return self.equity_diluido + self.tasa_ejercicio * (self.equity_actual - self.equity_diluido)
+
+    def equity_final_percentil(self, percentil):
+        """Percentil del equity final de cada socio"""
+        return _cuantiles_dos_puntos(self.equity_actual, self.equity_diluido, self.tasa_ejercicio, percentil)
+
+    def resumen(self):
+        """Media y percentiles del capital aportado por socios y de la brecha externa"""
+        resumen = {}
+        for nombre, valores in (('capital_insiders', self.capital_insiders), ('brecha_externa', self.brecha_externa)):
+            resumen[nombre] = {'media': float(valores.mean())}
+            for percentil, valor in zip(PERCENTILES, np.percentile(valores, PERCENTILES)):
+                resumen[nombre][f'p{percentil}'] = float(valor)
+        resumen['socios_que_ejercen'] = float(self.tasa_ejercicio.sum())
+        resumen['porcentaje_ejercido'] = (
+            resumen['capital_insiders']['media'] / self.monto_recaudar * 100 if self.monto_recaudar > 0 else 0.0
+        )
+        return resumen
+
+
+def simular_montecarlo_prorata(equity_actual, probabilidades, monto_recaudar, porcentaje_nueva_emision,
+                               n_simulaciones=100_000, semilla=None):
+    """Simular n_simulaciones rondas de decisiones de ejercicio con un Generator de NumPy"""
+    equity_actual = np.asarray(equity_actual, dtype=np.float64)
+    n_socios = len(equity_actual)
+    probabilidades = np.broadcast_to(np.asarray(probabilidades, dtype=np.float64), (n_socios,))
+    probabilidades = np.clip(probabilidades, 0.0, 1.0)
+
+    derecho_monto = equity_actual / 100 * monto_recaudar
+    equity_diluido = equity_actual * (100 / (100 + porcentaje_nueva_emision))
+
+    rng = np.random.default_rng(semilla)
+    capital_insiders = np.empty(n_simulaciones, dtype=np.float64)
+    veces_ejercido = np.zeros(n_socios, dtype=np.int64)
+
+    # Se sortea por lotes para acotar la memoria de la matriz de decisiones
+    tamano_lote = max(1, DECISIONES_POR_LOTE // max(n_socios, 1))
+    for inicio in range(0, n_simulaciones, tamano_lote):
+        fin = min(inicio + tamano_lote, n_simulaciones)
+        ejerce = rng.random((fin - inicio, n_socios)) < probabilidades
+        capital_insiders[inicio:fin] = ejerce @ derecho_monto
+        veces_ejercido += ejerce.sum(axis=0)
+
+    tasa_ejercicio = veces_ejercido / n_simulaciones if n_simulaciones else np.zeros(n_socios)
+    return SimulacionProrata(
+        capital_insiders, monto_recaudar, derecho_monto, equity_actual,
+        equity_diluido, tasa_ejercicio, probabilidades
+    )
+
+
+def construir_tabla_simulacion_prorata(socios_elegibles, simulacion):
+    """Tabla por socio con la tasa de ejercicio y la distribución de su equity final"""
+    tabla = socios_elegibles[['nombre', 'categoria']].copy()
+    tabla.columns = ['Socio', 'Categoria']
+    tabla['Equity Inicial %'] = simulacion.equity_actual.round(2)
+    tabla['Derecho ($)'] = [f"${x:,.0f}" for x in simulacion.derecho_monto]
+    tabla['Prob. Ejercicio %'] = (simulacion.probabilidades * 100).round(0)
+    tabla['Ejerció (simulado) %'] = (simulacion.tasa_ejercicio * 100).round(1)
+    tabla['Equity Final Media %'] = simulacion.equity_final_media.round(2)
+    for percentil in (PERCENTILES[0], PERCENTILES[-1]):
+        tabla[f'Equity Final P{percentil} %'] = simulacion.equity_final_percentil(percentil).round(2)
+    tabla['Dilución Media %'] = (simulacion.equity_actual - simulacion.equity_final_media).round(2)
+    return tabla
@@ -0,0 +1,76 @@
+"""Proyección de dilución para una secuencia arbitraria de rondas.
+
+Cada ronda emite acciones nuevas a un precio. La retención de cada ronda
+(acciones previas / acciones posteriores) se compone con un único producto
+acumulado, y la ruta de participación de todos los socios y clases de acción
+se obtiene con un broadcasting sobre esa retención acumulada.
+"""
+import numpy as np
+import pandas as pd
+
+
+class ProyeccionRondas:
+    """Resultado de proyectar las rondas: tabla por ronda y ruta de participación"""
+
+    def __init__(self, rondas, retencion_acumulada, ruta):
+        self.rondas = rondas
+        self.retencion_acumulada = retencion_acumulada
+        self.ruta = ruta
+
+    def __len__(self):
+        return len(self.rondas)
+
+    @property
+    def dilucion_total(self):
+        """Dilución relativa acumulada de cualquier participación existente (%)"""
+        return (1 - self.retencion_acumulada[-1]) * 100 if len(self.retencion_acumulada) else 0.0
+
+    @property
+    def ronda_agota_autorizado(self):
+        """Nombre de la primera ronda que supera el capital autorizado (o None)"""
+        excedidas = self.rondas.index[self.rondas['excede_autorizado']]
+        return self.rondas.at[excedidas[0], 'ronda'] if len(excedidas) else None
+
+    def participacion_final(self):
+        """Participación de cada socio y clase tras la última ronda"""
+        return self.ruta[..., -1] if self.ruta is not None else None
+
+
+def proyectar_rondas(acciones_emitidas, acciones_autorizadas, rondas, participaciones=None):
+    """Proyectar una secuencia de rondas sobre las acciones emitidas
+
+    rondas: lista de dicts con 'nombre', 'acciones' y 'precio'.
+    participaciones: matriz (socios x clases) en % de las acciones emitidas hoy.
+    """
+    nombres = [r.get('nombre') or f"Ronda {i}" for i, r in enumerate(rondas, start=1)]
+    acciones = np.array([max(float(r.get('acciones', 0) or 0), 0.0) for r in rondas], dtype=np.float64)
+    precios = np.array([max(float(r.get('precio', 0) or 0), 0.0) for r in rondas], dtype=np.float64)
+
+    emitidas_post = acciones_emitidas + np.cumsum(acciones)
+    emitidas_pre = emitidas_post - acciones
+    with np.errstate(divide='ignore', invalid='ignore'):
+        retencion = np.where(emitidas_post > 0, emitidas_pre / emitidas_post, 1.0)
+    retencion_acumulada = np.cumprod(retencion)
+
+    disponibles = acciones_autorizadas - emitidas_post
+    tabla = pd.DataFrame({
+        'ronda': nombres,
+        'acciones_nuevas': acciones,
+        'precio_por_accion': precios,
+        'capital': acciones * precios,
+        'valoracion_pre_money': emitidas_pre * precios,
+        'dilucion_ronda_%': (1 - retencion) * 100,
+        'dilucion_acumulada_%': (1 - retencion_acumulada) * 100,
+        'acciones_totales': emitidas_post,
+        'acciones_disponibles': disponibles,
+        'porcentaje_autorizado_usado': emitidas_post / acciones_autorizadas * 100 if acciones_autorizadas else np.nan,
+        'excede_autorizado': disponibles < 0,
+    })
+
+    ruta = None
+    if participaciones is not None:
+        # (socios x clases x [hoy + rondas]) en una sola pasada de broadcasting
+        factores = np.concatenate(([1.0], retencion_acumulada))
+        ruta = np.asarray(participaciones, dtype=np.float64)[..., np.newaxis] * factores
+
+    return ProyeccionRondas(tabla, retencion_acumulada, ruta)
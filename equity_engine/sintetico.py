@@ -0,0 +1,235 @@
+"""Generador de cap tables sintéticos y reproducibles para pruebas de escala.
+
+Produce empresas con N socios usando los mismos rangos sugeridos por
+categoría y los presets de protección y pro-rata del formulario de socios.
+Los porcentajes se escalan para que el equity asignado quede por debajo del
+100% sin importar cuántos socios haya. La misma semilla da la misma empresa.
+"""
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from equity_engine.cap_table import COLUMNAS_EQUITY, VALORES_POR_DEFECTO
+from equity_engine.esquema import (
+    CATEGORIAS_FUNDADORES,
+    DEDICACIONES,
+    PRESETS_PRORATA,
+    PRESETS_PROTECCION,
+    valores_sugeridos,
+)
+from equity_engine.store import SociosStore
+from equity_engine.vesting import MESES_POR_PERIODO
+
+# Mezcla de categorías de los socios que no son fundadores
+MEZCLA_CATEGORIAS = {'Early Employee': 0.15, 'Employee': 0.60, 'Advisor': 0.15, 'Consultor': 0.10}
+
+ROLES_POR_CATEGORIA = {
+    'Fundador Principal': ['CEO/Fundador Principal'],
+    'Co-fundador': ['Co-fundador', 'CTO', 'CMO', 'CFO'],
+    'Early Employee': ['VP Tecnología', 'VP Marketing', 'VP Ventas', 'VP Operaciones', 'Director'],
+    'Employee': ['Gerente', 'Empleado Senior', 'Empleado'],
+    'Advisor': ['Advisor'],
+    'Consultor': ['Consultor'],
+}
+
+# Salario mensual en COP (mínimo, máximo) por categoría
+SALARIOS_POR_CATEGORIA = {
+    'Fundador Principal': (0, 15_000_000),
+    'Co-fundador': (0, 12_000_000),
+    'Early Employee': (6_000_000, 15_000_000),
+    'Employee': (2_500_000, 10_000_000),
+    'Advisor': (0, 0),
+    'Consultor': (0, 0),
+}
+
+# Probabilidad de tener protección antidilución / derechos pro-rata
+PROBABILIDAD_PROTECCION = {'fundador': 0.4, 'empleado': 0.05}
+PROBABILIDAD_PRORATA = {'fundador': 0.6, 'Early Employee': 0.25, 'empleado': 0.05}
+
+# Fracción de los empleados que recibe phantom equity en lugar de stock options
+FRACCION_PHANTOM = 0.25
+
+PROBABILIDAD_CRONOGRAMA = {'Mensual': 0.7, 'Trimestral': 0.2, 'Semestral': 0.05, 'Anual': 0.05}
+
+NOMBRES = [
+    'Ana', 'Andrés', 'Camila', 'Carlos', 'Catalina', 'Daniel', 'Diana', 'Felipe', 'Gabriela', 'Jorge',
+    'Juan', 'Laura', 'Luis', 'María', 'Natalia', 'Pablo', 'Paula', 'Santiago', 'Sofía', 'Valentina',
+]
+APELLIDOS = [
+    'Álvarez', 'Castro', 'Díaz', 'Gómez', 'González', 'Gutiérrez', 'Herrera', 'Jiménez', 'López', 'Martínez',
+    'Moreno', 'Muñoz', 'Ortiz', 'Pérez', 'Ramírez', 'Restrepo', 'Rodríguez', 'Rojas', 'Sánchez', 'Vargas',
+]
+
+ETAPAS = ['Idea', 'Prototipo', 'MVP', 'Primeros ingresos', 'Crecimiento', 'Expansión', 'Pre-IPO']
+SECTORES = ['Software/Tecnología', 'Fintech', 'Healthtech', 'E-commerce', 'Edtech', 'Agrotech', 'Logística']
+
+
+def _categorico(rng, opciones, n, probabilidades=None):
+    return pd.Categorical.from_codes(rng.choice(len(opciones), size=n, p=probabilidades), categories=opciones)
+
+
+def _en_rango(rng, rangos, paso):
+    """Valor uniforme en el rango de cada socio, redondeado al paso del formulario"""
+    minimos, maximos = rangos
+    return np.round(rng.uniform(minimos, maximos) / paso) * paso
+
+
+def _categorias(rng, n):
+    """1 fundador principal, hasta 3 co-fundadores y el resto según MEZCLA_CATEGORIAS"""
+    n_cofundadores = min(int(rng.integers(1, 4)), max(n - 1, 0))
+    resto = list(MEZCLA_CATEGORIAS)
+    otros = rng.choice(resto, size=max(n - 1 - n_cofundadores, 0), p=list(MEZCLA_CATEGORIAS.values()))
+    categorias = np.concatenate([['Fundador Principal'], ['Co-fundador'] * n_cofundadores, otros])[:n]
+    return categorias.astype(object)
+
+
+def _escalar(valores, maximo):
+    total = valores.sum()
+    return valores * (maximo / total) if total > maximo else valores
+
+
+def _fechas_ingreso(rng, categorias, fundacion, hoy):
+    """Fundadores al fundar la empresa; el resto repartido hasta la fecha de referencia"""
+    inicio = np.datetime64(fundacion, 'D')
+    dias = max(int((np.datetime64(hoy, 'D') - inicio).astype(np.int64)), 1)
+    desplazamiento = rng.integers(0, dias, size=len(categorias))
+    desplazamiento[np.isin(categorias, CATEGORIAS_FUNDADORES)] = 0
+    return np.datetime_as_string(inicio + desplazamiento, unit='D')
+
+
+def _preset(claves, presets, campo):
+    """Valor de un campo del preset que corresponde a cada socio"""
+    return pd.Series(claves).map({clave: preset[campo] for clave, preset in presets.items()}).to_numpy()
+
+
+def generar_socios_df(n, semilla=None, fecha_referencia=None):
+    """DataFrame con n socios sintéticos y todas las columnas de VALORES_POR_DEFECTO"""
+    rng = np.random.default_rng(semilla)
+    hoy = pd.Timestamp(fecha_referencia or date.today()).date()
+    categorias = _categorias(rng, n)
+    es_fundador = np.isin(categorias, CATEGORIAS_FUNDADORES)
+    es_principal = categorias == 'Fundador Principal'
+
+    sugeridos = [valores_sugeridos(c) for c in categorias]
+    rango_ordinarias = np.array([s.get('ordinarias', (0, 0)) for s in sugeridos], dtype=np.float64).reshape(n, 2)
+    rango_options = np.array([s.get('options', (0, 0)) for s in sugeridos], dtype=np.float64).reshape(n, 2)
+
+    # Equity objetivo de la empresa: los fundadores se quedan con la mayor parte
+    objetivo = rng.uniform(85, 98)
+    ordinarias = _en_rango(rng, rango_ordinarias.T, 0.5)
+    options = _en_rango(rng, rango_options.T, 0.1)
+    maximo_fundadores = objetivo * (0.75 if (~es_fundador).any() else 1.0)
+    ordinarias[es_fundador] = _escalar(ordinarias[es_fundador], maximo_fundadores)
+    disponible = objetivo - ordinarias[es_fundador].sum()
+    otros = ~es_fundador
+    escala = disponible / max(ordinarias[otros].sum() + options[otros].sum(), disponible)
+    ordinarias[otros] *= escala
+    options[otros] *= escala
+    # Con miles de socios las asignaciones individuales son muy pequeñas: 4 decimales
+    ordinarias = ordinarias.round(4)
+    options = options.round(4)
+
+    con_phantom = (categorias == 'Employee') & (rng.random(n) < FRACCION_PHANTOM)
+    phantom = np.where(con_phantom, options, 0.0)
+    stock_options = np.where(con_phantom, 0.0, options)
+
+    salarios = np.array([SALARIOS_POR_CATEGORIA[c] for c in categorias], dtype=np.float64).reshape(n, 2)
+    salario = (_en_rango(rng, salarios.T, 500_000)).astype(np.int64)
+    aporte = np.where(es_fundador, rng.integers(5, 101, size=n) * 1_000_000, 0).astype(np.int64)
+
+    clave_preset = np.where(es_fundador, 'fundador', 'empleado')
+    con_proteccion = rng.random(n) < np.where(es_fundador, PROBABILIDAD_PROTECCION['fundador'],
+                                              PROBABILIDAD_PROTECCION['empleado'])
+    prob_prorata = np.where(es_fundador, PROBABILIDAD_PRORATA['fundador'],
+                            np.where(categorias == 'Early Employee', PROBABILIDAD_PRORATA['Early Employee'],
+                                     PROBABILIDAD_PRORATA['empleado']))
+    con_prorata = rng.random(n) < prob_prorata
+    preset_proteccion = np.where(con_proteccion, clave_preset, 'sin_proteccion')
+    preset_prorata = np.where(con_prorata, clave_preset, 'sin_derechos')
+
+    dedicacion = np.where(
+        es_fundador, DEDICACIONES[0],
+        np.where(np.isin(categorias, ['Advisor', 'Consultor']), 'Consultoría',
+                 np.array(DEDICACIONES[:4], dtype=object)[rng.choice(4, size=n, p=[0.7, 0.1, 0.15, 0.05])])
+    )
+
+    roles = np.empty(n, dtype=object)
+    for categoria, opciones in ROLES_POR_CATEGORIA.items():
+        mascara = categorias == categoria
+        roles[mascara] = np.array(opciones, dtype=object)[rng.integers(0, len(opciones), size=int(mascara.sum()))]
+
+    nombres = (np.array(NOMBRES, dtype=object)[rng.integers(0, len(NOMBRES), size=n)] + ' '
+               + np.array(APELLIDOS, dtype=object)[rng.integers(0, len(APELLIDOS), size=n)])
+    fundacion = (pd.Timestamp(hoy) - pd.DateOffset(months=int(rng.integers(12, 97)))).date()
+
+    columnas = {
+        'nombre': nombres,
+        'rol': roles,
+        'categoria': categorias,
+        'dedicacion': dedicacion,
+        'fecha_ingreso': _fechas_ingreso(rng, categorias, fundacion, hoy).astype(object),
+        'salario': salario,
+        'acciones_ordinarias': ordinarias,
+        'acciones_preferenciales': np.zeros(n),
+        'stock_options': stock_options,
+        'phantom_equity': phantom,
+        'profit_sharing': np.zeros(n),
+        'warrants': np.zeros(n),
+        'acciones_vesting': np.zeros(n),
+        'vesting_total': np.array([s['vesting'] for s in sugeridos], dtype=np.int64),
+        'cliff_period': np.array([s['cliff'] for s in sugeridos], dtype=np.int64),
+        'vesting_schedule': _categorico(rng, list(MESES_POR_PERIODO), n,
+                                        [PROBABILIDAD_CRONOGRAMA[p] for p in MESES_POR_PERIODO]).astype(object),
+        'acceleration': es_fundador & (rng.random(n) < 0.5),
+        'immediate_vest': np.where(es_principal, 25.0, 0.0),
+        'buyback_option': np.ones(n, dtype=bool),
+        'aporte_inicial': aporte,
+        'proteccion_antidilucion': con_proteccion,
+        'derechos_prorata': con_prorata,
+    }
+    for campo in PRESETS_PROTECCION['sin_proteccion']:
+        columnas[campo] = _preset(preset_proteccion, PRESETS_PROTECCION, campo)
+    for campo in PRESETS_PRORATA['sin_derechos']:
+        columnas[campo] = _preset(preset_prorata, PRESETS_PRORATA, campo)
+    columnas['porcentaje_proteccion'] = columnas['porcentaje_proteccion'].astype(np.int64)
+    columnas['umbral_activacion'] = columnas['umbral_activacion'].astype(np.float64)
+    columnas['participacion_minima_prorata'] = columnas['participacion_minima_prorata'].astype(np.float64)
+    columnas['transferibilidad_derechos'] = columnas['transferibilidad_derechos'].astype(bool)
+
+    df = pd.DataFrame(columnas)
+    df['equity_total'] = df[COLUMNAS_EQUITY].sum(axis=1)
+    for campo, defecto in VALORES_POR_DEFECTO.items():
+        if campo not in df.columns:
+            df[campo] = [defecto] * n if isinstance(defecto, list) else defecto
+    return df[list(VALORES_POR_DEFECTO)]
+
+
+def generar_socios(n, semilla=None, fecha_referencia=None):
+    """SociosStore con n socios sintéticos"""
+    return SociosStore.from_frame(generar_socios_df(n, semilla, fecha_referencia))
+
+
+def generar_company_info(semilla=None, nombre=None):
+    """company_info sintético con los campos básicos de la sección Info Empresa"""
+    rng = np.random.default_rng(semilla)
+    capital_autorizado = int(rng.integers(1, 11)) * 100_000_000
+    return {
+        'name': nombre or f"Startup Sintética {int(rng.integers(1000, 10000))}",
+        'stage': ETAPAS[int(rng.integers(0, len(ETAPAS)))],
+        'sector': SECTORES[int(rng.integers(0, len(SECTORES)))],
+        'country': 'Colombia',
+        'capital_autorizado': capital_autorizado,
+        'capital_suscrito': capital_autorizado // 5,
+        'valuation': int(rng.integers(5, 200)) * 100_000,
+        'busca_inversion': bool(rng.random() < 0.5),
+    }
+
+
+def generar_exportacion(n, semilla=None, fecha_referencia=None, nombre=None):
+    """Diccionario con el formato del export JSON de la app"""
+    return {
+        'company_info': generar_company_info(semilla, nombre),
+        'socios': generar_socios(n, semilla, fecha_referencia).to_records(),
+        'export_date': datetime.now().isoformat(),
+    }
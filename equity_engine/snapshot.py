@@ -0,0 +1,312 @@
+"""Snapshot binario columnar de una configuración (alternativa al JSON).
+
+Un snapshot es un ZIP sin compresión que contiene:
+
+- ``manifiesto.json``: versión del formato, ``company_info``, fecha de
+  exportación y la lista de tablas.
+- ``socios.arrow``: la tabla de socios en formato Arrow IPC, con tipos
+  numéricos nativos, categóricos como diccionarios y exclusiones como listas.
+- ``tablas/<nombre>.arrow``: resultados de simulaciones u otras tablas.
+
+Cada tabla Arrow se comprime por columna (zstd o lz4) y se guarda alineada a
+64 bytes dentro del ZIP, de modo que al abrir un archivo en disco se mapea en
+memoria y solo se leen (y descomprimen) las columnas pedidas. Sin compresión,
+las columnas numéricas se leen sin copia desde el mapa de memoria.
+
+``Snapshot.a_exportacion()`` devuelve el mismo diccionario que el export JSON,
+así que ambos formatos son intercambiables.
+"""
+import io
+import json
+import struct
+import zipfile
+from contextlib import contextmanager
+from datetime import datetime
+
+from equity_engine.importador import ResultadoImportacion
+from equity_engine.store import CAMPOS_LISTA, SociosStore
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:  # pragma: no cover - pyarrow viene con Streamlit
+    pa = None
+    ipc = None
+
+ARROW_DISPONIBLE = pa is not None
+
+VERSION_FORMATO = 1
+
+EXTENSION_SNAPSHOT = '.eqsnap'
+
+COMPRESIONES = ('zstd', 'lz4', None)
+
+MIEMBRO_MANIFIESTO = 'manifiesto.json'
+MIEMBRO_SOCIOS = 'socios.arrow'
+PREFIJO_TABLAS = 'tablas/'
+
+# Columna con los campos desconocidos de cada socio (JSON), si los hay
+COLUMNA_EXTRAS = '_extras'
+
+# Alineación de los datos de cada miembro dentro del ZIP (la de los búferes Arrow)
+ALINEACION = 64
+
+# Id del campo "extra" de relleno (el mismo que usa zipalign de Android)
+_ID_RELLENO_ZIP = 0xD935
+_CABECERA_LOCAL = struct.Struct('<4s5H3L2H')
+
+
+class ErrorSnapshot(ValueError):
+    """El archivo no es un snapshot válido"""
+
+
+@contextmanager
+def _errores_lectura(contexto):
+    """Errores de un snapshot truncado o corrupto como ErrorSnapshot (y no excepciones de pyarrow/zipfile)"""
+    try:
+        yield
+    except ErrorSnapshot:
+        raise
+    except (pa.ArrowException, zipfile.BadZipFile, struct.error, KeyError, ValueError, IndexError, OSError) as e:
+        # pyarrow informa algunos datos inválidos como OSError (p. ej. un footer Arrow corrupto)
+        raise ErrorSnapshot(f"snapshot dañado: no se pudo leer {contexto} ({e})") from e
+
+
+def _requerir_pyarrow():
+    if pa is None:
+        raise ImportError("los snapshots requieren pyarrow (pip install pyarrow)")
+
+
+def _tabla_socios(socios):
+    """Tabla Arrow tipada a partir de un SociosStore o de la lista de socios"""
+    if not isinstance(socios, SociosStore):
+        socios = SociosStore.from_records(socios)
+    df = socios.to_frame()
+    columnas = {}
+    for campo in df.columns:
+        if campo in CAMPOS_LISTA:
+            columnas[campo] = pa.array(df[campo].to_numpy(dtype=object), type=pa.list_(pa.string()))
+        else:
+            columnas[campo] = pa.Array.from_pandas(df[campo])
+    extras = socios.extras()
+    if any(extras):
+        columnas[COLUMNA_EXTRAS] = pa.array(
+            [json.dumps(e, ensure_ascii=False, default=str) if e else None for e in extras], type=pa.string()
+        )
+    return pa.table(columnas)
+
+
+def _store_desde_tabla(tabla):
+    """SociosStore desde la tabla Arrow de socios (con sus campos desconocidos)"""
+    df = tabla.to_pandas()
+    extras = None
+    if COLUMNA_EXTRAS in df.columns:
+        extras = [json.loads(e) if isinstance(e, str) else None for e in df.pop(COLUMNA_EXTRAS)]
+    return SociosStore.from_frame(df, extras)
+
+
+def _serializar(tabla, compresion):
+    """Tabla Arrow como archivo IPC en memoria"""
+    salida = pa.BufferOutputStream()
+    opciones = ipc.IpcWriteOptions(compression=compresion)
+    with ipc.new_file(salida, tabla.schema, options=opciones) as escritor:
+        escritor.write_table(tabla)
+    return salida.getvalue()
+
+
+def _escribir_alineado(zf, nombre, datos):
+    """Agregar un miembro sin comprimir cuyos datos empiezan en un múltiplo de ALINEACION"""
+    info = zipfile.ZipInfo(nombre, date_time=datetime.now().timetuple()[:6])
+    info.compress_type = zipfile.ZIP_STORED
+    inicio_datos = zf.fp.tell() + _CABECERA_LOCAL.size + len(nombre.encode('utf-8')) + 6
+    relleno = -inicio_datos % ALINEACION
+    info.extra = struct.pack('<HHH', _ID_RELLENO_ZIP, 2 + relleno, ALINEACION) + b'\0' * relleno
+    zf.writestr(info, datos)
+
+
+def guardar_snapshot(destino, export_data, tablas=None, compresion='zstd'):
+    """Guardar un snapshot a partir del diccionario del export JSON
+
+    destino: ruta o archivo binario con seek. tablas: {nombre: DataFrame} con
+    resultados de simulaciones u otras tablas para guardar junto a los socios.
+    """
+    _requerir_pyarrow()
+    if compresion not in COMPRESIONES:
+        raise ValueError(f"compresión no soportada: {compresion}")
+    tablas = tablas or {}
+
+    manifiesto = {
+        'formato': 'equity_snapshot',
+        'version': VERSION_FORMATO,
+        'company_info': export_data.get('company_info', {}),
+        'export_date': export_data.get('export_date') or datetime.now().isoformat(),
+        'compresion': compresion,
+        'tablas': list(tablas),
+    }
+    # Otros campos del export (p. ej. de versiones más nuevas) se conservan en el manifiesto
+    manifiesto['campos'] = {
+        k: v for k, v in export_data.items() if k not in ('company_info', 'socios', 'export_date')
+    }
+
+    with zipfile.ZipFile(destino, 'w', compression=zipfile.ZIP_STORED) as zf:
+        zf.writestr(MIEMBRO_MANIFIESTO, json.dumps(manifiesto, ensure_ascii=False, default=str))
+        _escribir_alineado(zf, MIEMBRO_SOCIOS, _serializar(_tabla_socios(export_data.get('socios', [])), compresion))
+        for nombre, df in tablas.items():
+            tabla = pa.Table.from_pandas(df, preserve_index=None)
+            _escribir_alineado(zf, PREFIJO_TABLAS + nombre + '.arrow', _serializar(tabla, compresion))
+
+
+def snapshot_en_bytes(export_data, tablas=None, compresion='zstd'):
+    """Snapshot completo como bytes (para descargas)"""
+    salida = io.BytesIO()
+    guardar_snapshot(salida, export_data, tablas, compresion)
+    return salida.getvalue()
+
+
+def socios_a_arrow(socios, compresion='lz4'):
+    """Solo la tabla de socios como archivo Arrow IPC (bytes), p. ej. para una base de datos"""
+    _requerir_pyarrow()
+    return _serializar(_tabla_socios(socios), compresion).to_pybytes()
+
+
+def socios_desde_arrow(datos):
+    """SociosStore desde los bytes que produce socios_a_arrow"""
+    _requerir_pyarrow()
+    return _store_desde_tabla(ipc.open_file(pa.py_buffer(datos)).read_all())
+
+
+class Snapshot:
+    """Snapshot abierto: manifiesto en memoria y tablas leídas bajo demanda"""
+
+    def __init__(self, buffer, miembros, manifiesto):
+        self._buffer = buffer
+        self._miembros = miembros
+        self.manifiesto = manifiesto
+
+    @property
+    def company_info(self):
+        return self.manifiesto.get('company_info', {})
+
+    @property
+    def export_date(self):
+        return self.manifiesto.get('export_date')
+
+    @property
+    def tablas(self):
+        return list(self.manifiesto.get('tablas', []))
+
+    def _datos(self, tabla):
+        miembro = MIEMBRO_SOCIOS if tabla is None else PREFIJO_TABLAS + tabla + '.arrow'
+        if miembro not in self._miembros:
+            raise KeyError(f"el snapshot no contiene '{miembro}'")
+        inicio, tamano = self._miembros[miembro]
+        with _errores_lectura(f"'{miembro}'"):
+            return self._buffer.slice(inicio, tamano)
+
+    def _abrir(self, datos, tabla, opciones=None):
+        with _errores_lectura(f"la tabla '{tabla or 'socios'}'"):
+            return ipc.open_file(datos, options=opciones)
+
+    def columnas(self, tabla=None):
+        """Nombres de columna de los socios o de una tabla, sin leer datos"""
+        return [c for c in self._abrir(self._datos(tabla), tabla).schema.names if c != COLUMNA_EXTRAS]
+
+    def leer_arrow(self, tabla=None, columnas=None):
+        """Tabla Arrow de los socios (tabla=None) o de una tabla guardada, solo con las columnas pedidas"""
+        datos = self._datos(tabla)
+        lector = self._abrir(datos, tabla)
+        if columnas is None:
+            with _errores_lectura(f"la tabla '{tabla or 'socios'}'"):
+                return lector.read_all()
+        faltantes = [c for c in columnas if lector.schema.get_field_index(c) < 0]
+        if faltantes:
+            raise KeyError(f"columnas inexistentes: {', '.join(faltantes)}")
+        with _errores_lectura(f"la tabla '{tabla or 'socios'}'"):
+            if self.manifiesto.get('compresion') is None:
+                # Sin compresión la lectura completa son vistas sobre el mapa de memoria
+                return lector.read_all().select(columnas)
+            # Comprimido: solo se leen y descomprimen las columnas pedidas
+            opciones = ipc.IpcReadOptions(included_fields=[lector.schema.get_field_index(c) for c in columnas])
+            return ipc.open_file(datos, options=opciones).read_all()
+
+    def leer_tabla(self, nombre, columnas=None):
+        """DataFrame de una tabla guardada (resultados de simulaciones)"""
+        return self.leer_arrow(nombre, columnas).to_pandas()
+
+    def leer_socios(self, columnas=None):
+        """DataFrame de socios; con columnas solo lee y descomprime esas columnas"""
+        df = self.leer_arrow(None, columnas).to_pandas()
+        return df.drop(columns=[COLUMNA_EXTRAS], errors='ignore') if columnas is None else df
+
+    def socios(self):
+        """Todos los socios cargados en un SociosStore"""
+        tabla = self.leer_arrow()
+        with _errores_lectura("los socios"):
+            return _store_desde_tabla(tabla)
+
+    def a_exportacion(self):
+        """Mismo diccionario que produce el export JSON"""
+        export_data = {
+            'company_info': self.company_info,
+            'socios': self.socios().to_records(),
+            'export_date': self.export_date,
+        }
+        export_data.update(self.manifiesto.get('campos', {}))
+        return export_data
+
+    def a_importacion(self):
+        """Resultado equivalente al de importar el JSON (los socios ya vienen tipados)"""
+        resultado = ResultadoImportacion()
+        resultado.socios = self.socios()
+        resultado.total_registros = len(resultado.socios)
+        resultado.campos = {'company_info': self.company_info, 'socios': None, 'export_date': self.export_date}
+        resultado.campos.update(self.manifiesto.get('campos', {}))
+        return resultado
+
+
+def _miembros(buffer):
+    """Posición y tamaño de los datos de cada miembro del ZIP"""
+    miembros = {}
+    with zipfile.ZipFile(pa.BufferReader(buffer)) as zf:
+        for info in zf.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ErrorSnapshot(f"el miembro '{info.filename}' está comprimido en el ZIP")
+            cabecera = _CABECERA_LOCAL.unpack(buffer.slice(info.header_offset, _CABECERA_LOCAL.size).to_pybytes())
+            largo_nombre, largo_extra = cabecera[-2], cabecera[-1]
+            inicio = info.header_offset + _CABECERA_LOCAL.size + largo_nombre + largo_extra
+            miembros[info.filename] = (inicio, info.file_size)
+    return miembros
+
+
+def cargar_snapshot(origen, memoria_mapeada=True):
+    """Abrir un snapshot desde una ruta (mapeado en memoria), bytes o un archivo binario"""
+    _requerir_pyarrow()
+    if isinstance(origen, (bytes, bytearray, memoryview)):
+        buffer = pa.py_buffer(origen)
+    elif isinstance(origen, str) or hasattr(origen, '__fspath__'):
+        if memoria_mapeada:
+            buffer = pa.memory_map(str(origen), 'r').read_buffer()
+        else:
+            with open(origen, 'rb') as archivo:
+                buffer = pa.py_buffer(archivo.read())
+    else:
+        origen.seek(0)
+        buffer = pa.py_buffer(origen.read())
+
+    try:
+        miembros = _miembros(buffer)
+    except zipfile.BadZipFile:
+        raise ErrorSnapshot("el archivo no es un snapshot (.eqsnap)") from None
+    except (pa.ArrowException, struct.error, ValueError, IndexError, OSError) as e:
+        raise ErrorSnapshot(f"snapshot dañado: no se pudo leer el índice del ZIP ({e})") from e
+    if MIEMBRO_MANIFIESTO not in miembros or MIEMBRO_SOCIOS not in miembros:
+        raise ErrorSnapshot("al snapshot le falta el manifiesto o la tabla de socios")
+
+    inicio, tamano = miembros[MIEMBRO_MANIFIESTO]
+    with _errores_lectura("el manifiesto"):
+        manifiesto = json.loads(buffer.slice(inicio, tamano).to_pybytes().decode('utf-8'))
+    if not isinstance(manifiesto, dict) or manifiesto.get('formato') != 'equity_snapshot':
+        raise ErrorSnapshot("el manifiesto no corresponde a un snapshot de equity")
+    if manifiesto.get('version', 0) > VERSION_FORMATO:
+        raise ErrorSnapshot(f"versión de snapshot no soportada: {manifiesto.get('version')}")
+    return Snapshot(buffer, miembros, manifiesto)
@@ -0,0 +1,449 @@
+"""Almacén columnar (struct-of-arrays) para los socios de una sesión.
+
+Reemplaza la lista de diccionarios de ~38 claves: los campos numéricos viven en
+arreglos numpy tipados, los categóricos se codifican con diccionario y los textos
+libres en arreglos de objetos. Se comporta como una secuencia de diccionarios
+(``len``, indexación, ``append``, ``pop``, iteración) para que el resto de la
+app no cambie, y expone vistas sin copia hacia pandas con ``to_frame``.
+"""
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from equity_engine.cap_table import VALORES_POR_DEFECTO
+
+# Campos con pocos valores distintos: se guardan como códigos + diccionario
+CAMPOS_CATEGORICOS = [
+    'categoria',
+    'dedicacion',
+    'vesting_schedule',
+    'tipo_proteccion',
+    'rol',
+    'duracion_proteccion',
+    'tipo_derechos_prorata',
+    'plazo_ejercicio_prorata',
+]
+
+# Listas de exclusiones: se codifican como tuplas en su propio diccionario
+CAMPOS_LISTA = ['exclusiones_prorata']
+
+# Textos libres y fechas
+CAMPOS_TEXTO = ['nombre', 'fecha_ingreso', 'experiencia', 'responsabilidades', 'notas']
+
+CAMPOS_BOOL = [c for c, v in VALORES_POR_DEFECTO.items() if isinstance(v, bool)]
+CAMPOS_ENTEROS = [c for c, v in VALORES_POR_DEFECTO.items() if isinstance(v, int) and not isinstance(v, bool)]
+CAMPOS_FLOTANTES = [c for c, v in VALORES_POR_DEFECTO.items() if isinstance(v, float)]
+
+CAPACIDAD_INICIAL = 16
+
+# A partir de cuántos registros extend() carga en bloque en lugar de uno por uno
+MINIMO_CARGA_EN_BLOQUE = 64
+
+# Compactar cuando los huecos por eliminación superan esta fracción
+FRACCION_COMPACTACION = 0.25
+
+
+def _tipo_codigos(n_categorias):
+    """Mismo tipo de códigos que usa pandas, para que Categorical no copie"""
+    if n_categorias < 2 ** 7:
+        return np.int8
+    if n_categorias < 2 ** 15:
+        return np.int16
+    return np.int32
+
+
+class SociosStore:
+    """Socios en formato columnar con append/update/delete O(1) amortizado"""
+
+    def __init__(self, registros=None, capacidad=CAPACIDAD_INICIAL):
+        capacidad = max(int(capacidad), 1)
+        self._n = 0
+        self._huecos = 0
+        self._capacidad = capacidad
+        self._vivos = np.zeros(capacidad, dtype=bool)
+        self._posiciones = None
+        # Columnas cuyos arreglos pandas tiene como vista (sus primeras _filas_compartidas filas)
+        self._compartidas = set()
+        self._filas_compartidas = 0
+
+        self._numericos = {}
+        for campo in CAMPOS_FLOTANTES:
+            self._numericos[campo] = np.zeros(capacidad, dtype=np.float64)
+        for campo in CAMPOS_ENTEROS:
+            self._numericos[campo] = np.zeros(capacidad, dtype=np.int64)
+        for campo in CAMPOS_BOOL:
+            self._numericos[campo] = np.zeros(capacidad, dtype=bool)
+
+        self._codigos = {campo: np.zeros(capacidad, dtype=np.int8) for campo in CAMPOS_CATEGORICOS + CAMPOS_LISTA}
+        self._categorias = {campo: [] for campo in CAMPOS_CATEGORICOS + CAMPOS_LISTA}
+        self._indice_categorias = {campo: {} for campo in CAMPOS_CATEGORICOS + CAMPOS_LISTA}
+
+        self._textos = {campo: np.empty(capacidad, dtype=object) for campo in CAMPOS_TEXTO}
+        # Campos desconocidos (p. ej. de exportaciones más nuevas) para no perderlos al exportar
+        self._extras = np.empty(capacidad, dtype=object)
+
+        if registros is not None:
+            self.extend(registros)
+
+    # ------------------------------------------------------------------
+    # Construcción y exportación
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_records(cls, registros):
+        """Crear el almacén a partir de la lista de socios del JSON (carga vectorizada)"""
+        registros = list(registros)
+        store = cls(capacidad=max(len(registros), CAPACIDAD_INICIAL))
+        if registros:
+            store._cargar_frame(pd.DataFrame.from_records(registros), registros)
+        return store
+
+    @classmethod
+    def from_frame(cls, df, extras=None):
+        """Crear el almacén desde un DataFrame de socios (p. ej. leído de un snapshot)"""
+        df = df[[c for c in df.columns if c in VALORES_POR_DEFECTO]]
+        store = cls(capacidad=max(len(df), CAPACIDAD_INICIAL))
+        if len(df):
+            store._cargar_frame(df, None)
+            if extras is not None:
+                store._extras[:len(df)] = [e or None for e in extras]
+        return store
+
+    def to_records(self):
+        """Lista de diccionarios compatible con el formato de exportación JSON"""
+        return [self._registro(fila) for fila in self._filas()]
+
+    def copy(self):
+        """Copia independiente del almacén"""
+        return SociosStore.from_records(self.to_records())
+
+    def to_frame(self):
+        """DataFrame con vistas sin copia sobre las columnas numéricas y los códigos"""
+        if self._huecos:
+            self._compactar()
+        n = self._n
+        columnas = {}
+        for campo in VALORES_POR_DEFECTO:
+            if campo in self._numericos:
+                columnas[campo] = self._numericos[campo][:n]
+            elif campo in self._textos:
+                columnas[campo] = self._textos[campo][:n]
+            elif campo in CAMPOS_LISTA:
+                categorias = np.empty(len(self._categorias[campo]), dtype=object)
+                categorias[:] = [list(t) for t in self._categorias[campo]]
+                columnas[campo] = categorias[self._codigos[campo][:n]] if n else np.empty(0, dtype=object)
+            else:
+                columnas[campo] = pd.Categorical.from_codes(
+                    self._codigos[campo][:n], categories=self._categorias_unicas(campo), validate=False
+                )
+        self._compartidas = set(self._numericos) | set(self._codigos) | set(self._textos)
+        self._filas_compartidas = n
+        return pd.DataFrame(columnas, copy=False)
+
+    def extras(self):
+        """Campos desconocidos de cada socio vivo (None si no tiene)"""
+        return list(self._extras[self._filas()])
+
+    def huella(self):
+        """Hash de contenido de los socios vivos"""
+        if self._huecos:
+            self._compactar()
+        n = self._n
+        h = hashlib.blake2b(digest_size=16)
+        h.update(str(n).encode())
+        for campo in sorted(self._numericos):
+            h.update(self._numericos[campo][:n].tobytes())
+        for campo in CAMPOS_CATEGORICOS + CAMPOS_LISTA:
+            h.update(repr(self._categorias[campo]).encode('utf-8'))
+            h.update(self._codigos[campo][:n].tobytes())
+        for campo in CAMPOS_TEXTO:
+            h.update('\x1f'.join(self._textos[campo][:n]).encode('utf-8'))
+        h.update(repr([e for e in self._extras[:n] if e]).encode('utf-8'))
+        return h.hexdigest()
+
+    @property
+    def nbytes(self):
+        """Memoria aproximada ocupada por los arreglos del almacén"""
+        total = self._vivos.nbytes + self._extras.nbytes
+        total += sum(a.nbytes for a in self._numericos.values())
+        total += sum(a.nbytes for a in self._codigos.values())
+        total += sum(a.nbytes for a in self._textos.values())
+        return total
+
+    # ------------------------------------------------------------------
+    # Protocolo de secuencia (compatible con la lista de diccionarios)
+    # ------------------------------------------------------------------
+
+    def __len__(self):
+        return self._n - self._huecos
+
+    def __iter__(self):
+        for fila in self._filas():
+            yield self._registro(fila)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self._registro(f) for f in self._filas()[indice]]
+        return self._registro(self._fila(indice))
+
+    def __setitem__(self, indice, registro):
+        self._escribir(self._fila(indice), registro)
+
+    def __eq__(self, otro):
+        if isinstance(otro, (SociosStore, list)):
+            return list(self) == list(otro)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"SociosStore({len(self)} socios)"
+
+    def append(self, registro):
+        """Agregar un socio al final (O(1) amortizado)"""
+        valores = self._valores(registro)
+        if self._n == self._capacidad:
+            self._crecer(self._capacidad * 2)
+        fila = self._n
+        self._n += 1
+        self._vivos[fila] = True
+        self._escribir(fila, registro, valores)
+        if self._posiciones is not None:
+            self._posiciones = np.append(self._posiciones, fila)
+
+    def extend(self, registros):
+        """Agregar varios socios (en bloque vectorizado si son muchos)"""
+        registros = list(registros)
+        if len(registros) < MINIMO_CARGA_EN_BLOQUE:
+            for registro in registros:
+                self.append(registro)
+            return
+        # Las filas nuevas quedan fuera de las vistas entregadas a pandas: no hace falta copiar
+        self._cargar_frame(pd.DataFrame.from_records(registros), registros, inicio=self._n)
+
+    def pop(self, indice=-1):
+        """Eliminar un socio por posición (O(1): deja un hueco que se compacta después)"""
+        fila = self._fila(indice)
+        registro = self._registro(fila)
+        self._vivos[fila] = False
+        self._huecos += 1
+        self._posiciones = None
+        if self._huecos > max(CAPACIDAD_INICIAL, FRACCION_COMPACTACION * self._n):
+            self._compactar()
+        return registro
+
+    def columna(self, campo):
+        """Valores de un campo para los socios vivos"""
+        if self._huecos:
+            self._compactar()
+        return self.to_frame()[campo]
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _filas(self):
+        """Filas físicas de los socios vivos, en orden"""
+        if not self._huecos:
+            return np.arange(self._n)
+        if self._posiciones is None:
+            self._posiciones = np.flatnonzero(self._vivos[:self._n])
+        return self._posiciones
+
+    def _fila(self, indice):
+        """Fila física de la posición lógica indicada"""
+        total = len(self)
+        if indice < 0:
+            indice += total
+        if not 0 <= indice < total:
+            raise IndexError("índice de socio fuera de rango")
+        if not self._huecos:
+            return indice
+        return int(self._filas()[indice])
+
+    def _categorias_unicas(self, campo):
+        return pd.Index(self._categorias[campo], dtype=object)
+
+    def _codigo(self, campo, valor):
+        """Código del valor en el diccionario del campo (lo agrega si es nuevo)"""
+        indice = self._indice_categorias[campo]
+        codigo = indice.get(valor)
+        if codigo is None:
+            codigo = len(self._categorias[campo])
+            self._categorias[campo].append(valor)
+            indice[valor] = codigo
+            tipo = _tipo_codigos(codigo + 1)
+            if self._codigos[campo].dtype != tipo:
+                self._codigos[campo] = self._codigos[campo].astype(tipo)
+                self._compartidas.discard(campo)
+        return codigo
+
+    def _valores(self, registro):
+        """Valores a guardar de cada campo (ValueError si un campo entero no recibe un entero)"""
+        valores = {}
+        for campo, defecto in VALORES_POR_DEFECTO.items():
+            valor = registro.get(campo, defecto)
+            if valor is None:
+                valor = defecto
+            if campo in CAMPOS_ENTEROS and isinstance(valor, (float, np.floating)):
+                if not float(valor).is_integer():
+                    raise ValueError(f"{campo}: se esperaba un entero, llegó {valor}")
+                valor = int(valor)
+            elif campo in self._textos:
+                valor = str(valor)
+            elif campo in CAMPOS_LISTA:
+                valor = tuple(valor)
+            elif campo not in self._numericos:
+                valor = str(valor)
+            valores[campo] = valor
+        return valores
+
+    def _escribir(self, fila, registro, valores=None):
+        """Escribir un socio en la fila física; solo copia las columnas compartidas con pandas que cambian"""
+        if valores is None:
+            valores = self._valores(registro)
+        for campo, valor in valores.items():
+            if campo in self._numericos:
+                arreglos = self._numericos
+            elif campo in self._textos:
+                arreglos = self._textos
+            else:
+                arreglos = self._codigos
+                valor = self._codigo(campo, valor)
+            if fila < self._filas_compartidas and campo in self._compartidas:
+                if arreglos[campo][fila] == valor:
+                    continue
+                arreglos[campo] = arreglos[campo].copy()
+                self._compartidas.discard(campo)
+            arreglos[campo][fila] = valor
+        self._extras[fila] = {k: v for k, v in registro.items() if k not in VALORES_POR_DEFECTO} or None
+
+    def _registro(self, fila):
+        """Diccionario con tipos nativos de Python (serializable a JSON)"""
+        registro = {}
+        for campo in VALORES_POR_DEFECTO:
+            if campo in self._numericos:
+                registro[campo] = self._numericos[campo][fila].item()
+            elif campo in self._textos:
+                registro[campo] = self._textos[campo][fila]
+            elif campo in CAMPOS_LISTA:
+                registro[campo] = list(self._categorias[campo][self._codigos[campo][fila]])
+            else:
+                registro[campo] = self._categorias[campo][self._codigos[campo][fila]]
+        if self._extras[fila]:
+            registro.update(self._extras[fila])
+        return registro
+
+    def _cargar_frame(self, df, registros, inicio=0):
+        """Cargar en bloque un DataFrame de socios a partir de la fila física inicio"""
+        n = len(df)
+        fin = inicio + n
+        if fin > self._capacidad:
+            self._crecer(max(fin, self._capacidad * 2))
+        for campo, defecto in VALORES_POR_DEFECTO.items():
+            if campo in df.columns and self._cargar_columna_tipada(campo, df[campo], inicio, fin):
+                continue
+            if campo not in df.columns:
+                valores = pd.Series([defecto] * n, dtype=object)
+                nulos = np.zeros(n, dtype=bool)
+            else:
+                valores = df[campo].astype(object)
+                nulos = valores.isna().to_numpy()
+
+            if campo in self._numericos:
+                destino = self._numericos[campo]
+                if destino.dtype == bool:
+                    destino[inicio:fin] = np.where(nulos, defecto, valores.to_numpy(dtype=object) == True)  # noqa: E712
+                    continue
+                numeros = pd.to_numeric(valores, errors='coerce').fillna(defecto).to_numpy(dtype=np.float64)
+                if campo in CAMPOS_ENTEROS and (numeros % 1 != 0).any():
+                    raise ValueError(f"{campo}: se esperaba un entero, llegó {numeros[numeros % 1 != 0][0]}")
+                destino[inicio:fin] = numeros
+            elif campo in self._textos:
+                textos = valores.to_numpy(dtype=object, copy=True)
+                textos[nulos] = defecto
+                self._textos[campo][inicio:fin] = [t if isinstance(t, str) else str(t) for t in textos]
+            else:
+                if campo in CAMPOS_LISTA:
+                    claves = [tuple(v) if isinstance(v, (list, tuple, np.ndarray)) else () for v in valores]
+                else:
+                    claves = valores.to_numpy(dtype=object, copy=True)
+                    claves[nulos] = defecto
+                    claves = [c if isinstance(c, str) else str(c) for c in claves]
+                codigos, unicos = pd.factorize(pd.Series(claves, dtype=object), sort=False)
+                mapa = np.array([self._codigo(campo, u) for u in unicos], dtype=np.int64)
+                self._codigos[campo][inicio:fin] = mapa[codigos]
+
+        if any(c not in VALORES_POR_DEFECTO for c in df.columns):
+            self._extras[inicio:fin] = [
+                {k: v for k, v in r.items() if k not in VALORES_POR_DEFECTO} or None
+                for r in registros
+            ]
+        self._vivos[inicio:fin] = True
+        self._n = fin
+        if self._posiciones is not None:
+            self._posiciones = np.concatenate([self._posiciones, np.arange(inicio, fin)])
+
+    def _cargar_columna_tipada(self, campo, serie, inicio, fin):
+        """Atajo sin conversiones para columnas que ya llegan tipadas (de Arrow o de to_frame)"""
+        if campo in self._numericos:
+            destino = self._numericos[campo]
+            if serie.dtype != destino.dtype or (destino.dtype.kind == 'f' and serie.hasnans):
+                return False
+            destino[inicio:fin] = serie.to_numpy()
+            return True
+        if campo in self._textos:
+            if not isinstance(serie.dtype, pd.StringDtype) or serie.hasnans:
+                return False
+            self._textos[campo][inicio:fin] = serie.to_numpy(dtype=object)
+            return True
+        if campo in CAMPOS_CATEGORICOS and isinstance(serie.dtype, pd.CategoricalDtype):
+            codigos = serie.cat.codes.to_numpy()
+            if (codigos < 0).any():
+                return False
+            mapa = np.array([self._codigo(campo, str(c)) for c in serie.cat.categories], dtype=np.int64)
+            self._codigos[campo][inicio:fin] = mapa[codigos]
+            return True
+        return False
+
+    def _preparar_escritura(self):
+        """Copy-on-write de todas las columnas que pandas aún tiene como vista (antes de reordenar filas)"""
+        for arreglos in (self._numericos, self._codigos, self._textos):
+            for campo in arreglos:
+                if campo in self._compartidas:
+                    arreglos[campo] = arreglos[campo].copy()
+        self._compartidas.clear()
+        self._filas_compartidas = 0
+
+    def _crecer(self, capacidad):
+        def ampliar(arreglo):
+            nuevo = np.zeros(capacidad, dtype=arreglo.dtype) if arreglo.dtype != object else np.empty(capacidad, dtype=object)
+            nuevo[:len(arreglo)] = arreglo
+            return nuevo
+
+        self._vivos = ampliar(self._vivos)
+        self._extras = ampliar(self._extras)
+        for arreglos in (self._numericos, self._codigos, self._textos):
+            for campo in arreglos:
+                arreglos[campo] = ampliar(arreglos[campo])
+        self._capacidad = capacidad
+        # Los arreglos nuevos ya no son los que tiene pandas
+        self._compartidas.clear()
+        self._filas_compartidas = 0
+
+    def _compactar(self):
+        """Eliminar huecos dejados por pop() conservando el orden"""
+        filas = self._filas()
+        n = len(filas)
+        self._preparar_escritura()
+        for arreglos in (self._numericos, self._codigos, self._textos):
+            for campo in arreglos:
+                arreglos[campo][:n] = arreglos[campo][filas]
+        self._extras[:n] = self._extras[filas]
+        self._extras[n:self._n] = None
+        for campo in self._textos:
+            self._textos[campo][n:self._n] = None
+        self._vivos[:n] = True
+        self._vivos[n:self._n] = False
+        self._n = n
+        self._huecos = 0
+        self._posiciones = None
@@ -0,0 +1,436 @@
+"""Importación de cap tables desde hojas de cálculo (CSV y Excel).
+
+El archivo se lee por bloques de filas (``pd.read_csv(chunksize=...)`` o
+``python-calamine`` u ``openpyxl`` en modo solo lectura), cada columna se asigna a un campo del
+esquema de socios y los valores se validan columna por columna con las mismas
+reglas y mensajes que ``validar_socio``. Los campos que faltan se completan
+con los valores sugeridos de la categoría (cliff, vesting y presets de
+protección y pro-rata) y, si no, con los valores por defecto del formulario.
+"""
+import ast
+import codecs
+import importlib.util
+import re
+import unicodedata
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from equity_engine.cap_table import COLUMNAS_EQUITY, VALORES_POR_DEFECTO
+from equity_engine.esquema import (
+    CATEGORIAS_FUNDADORES,
+    ESQUEMA_SOCIO,
+    PRESETS_PRORATA,
+    PRESETS_PROTECCION,
+    TEXTOS_FALSOS,
+    TEXTOS_VERDADEROS,
+    valores_sugeridos,
+)
+from equity_engine.importador import ErrorImportacion, ResultadoImportacion, posicion_archivo, tamano_archivo
+from equity_engine.store import SociosStore
+
+CALAMINE_DISPONIBLE = importlib.util.find_spec('python_calamine') is not None
+
+EXCEL_DISPONIBLE = CALAMINE_DISPONIBLE or importlib.util.find_spec('openpyxl') is not None
+
+FORMATOS_TABULARES = ['.csv', '.xlsx']
+
+SEPARADORES_CSV = [',', ';', '\t', '|']
+
+# Filas que se leen y validan por bloque
+FILAS_POR_BLOQUE = 20000
+
+# Nombres habituales de cada campo en hojas de cálculo (además del nombre del campo)
+ALIAS_COLUMNAS = {
+    'nombre': ['name', 'socio', 'accionista', 'holder', 'nombre_completo', 'full_name'],
+    'rol': ['role', 'cargo', 'title', 'puesto'],
+    'categoria': ['category', 'tipo_socio', 'grupo'],
+    'dedicacion': ['dedication', 'jornada'],
+    'fecha_ingreso': ['fecha', 'ingreso', 'fecha_de_ingreso', 'start_date', 'fecha_inicio', 'hire_date'],
+    'salario': ['salary', 'sueldo', 'salario_mensual'],
+    'acciones_ordinarias': ['ordinarias', 'ordinarias_pct', 'common', 'common_shares', 'acciones'],
+    'acciones_preferenciales': ['preferenciales', 'preferenciales_pct', 'preferred', 'preferred_shares'],
+    'stock_options': ['options', 'options_pct', 'opciones', 'esop'],
+    'phantom_equity': ['phantom', 'phantom_pct'],
+    'acciones_vesting': ['vesting_pct', 'acciones_con_vesting', 'restricted_stock', 'rsa'],
+    'vesting_total': ['vesting', 'vesting_anos', 'vesting_years', 'anos_vesting'],
+    'cliff_period': ['cliff', 'cliff_meses', 'cliff_months'],
+    'vesting_schedule': ['cronograma', 'schedule', 'periodicidad'],
+    'aporte_inicial': ['aporte', 'contribution', 'inversion', 'investment'],
+    'equity_total': ['equity', 'total_equity', 'equity_total_pct'],
+    'proteccion_antidilucion': ['proteccion', 'antidilucion', 'anti_dilution'],
+    'derechos_prorata': ['prorata', 'pro_rata', 'pro_rata_rights'],
+}
+
+# Campos que se completan con el preset de protección o de pro-rata de la categoría
+_CAMPOS_PRESET = [
+    ('proteccion_antidilucion', PRESETS_PROTECCION, 'sin_proteccion'),
+    ('derechos_prorata', PRESETS_PRORATA, 'sin_derechos'),
+]
+
+
+def normalizar_encabezado(texto):
+    """Minúsculas, sin tildes y con '_' entre palabras: 'Fecha de Ingreso' -> 'fecha_de_ingreso'"""
+    texto = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '_', texto.lower()).strip('_')
+
+
+_CAMPO_POR_ENCABEZADO = {}
+for _campo, _alias in ALIAS_COLUMNAS.items():
+    for _nombre in _alias:
+        _CAMPO_POR_ENCABEZADO[normalizar_encabezado(_nombre)] = _campo
+for _campo in ESQUEMA_SOCIO:
+    _CAMPO_POR_ENCABEZADO[_campo] = _campo
+
+
+def formato_tabular(nombre_archivo):
+    """'.csv' o '.xlsx' según la extensión (None si no es una hoja de cálculo)"""
+    nombre = nombre_archivo.lower()
+    return next((f for f in FORMATOS_TABULARES if nombre.endswith(f)), None)
+
+
+def sugerir_mapeo(columnas):
+    """Campo del esquema para cada columna del archivo (None si no se reconoce)"""
+    mapeo = {}
+    usados = set()
+    for columna in columnas:
+        campo = _CAMPO_POR_ENCABEZADO.get(normalizar_encabezado(columna))
+        if campo in usados:
+            campo = None
+        mapeo[columna] = campo
+        usados.add(campo)
+    return mapeo
+
+
+# ----------------------------------------------------------------------
+# Lectura por bloques
+# ----------------------------------------------------------------------
+
+def _dialecto_csv(archivo):
+    """Codificación y separador a partir de la primera línea (UTF-8 o Latin-1 de Excel)"""
+    inicio = archivo.tell()
+    muestra = archivo.read(64 * 1024)
+    archivo.seek(inicio)
+    if isinstance(muestra, str):
+        muestra = muestra.encode('utf-8')
+    try:
+        texto = codecs.getincrementaldecoder('utf-8-sig')().decode(muestra)
+        codificacion = 'utf-8-sig'
+    except UnicodeDecodeError:
+        texto = muestra.decode('latin-1')
+        codificacion = 'latin-1'
+    primera_linea = texto.splitlines()[0] if texto else ''
+    separador = max(SEPARADORES_CSV, key=primera_linea.count)
+    return codificacion, separador
+
+
+def _bloques_csv(archivo, filas_por_bloque):
+    codificacion, separador = _dialecto_csv(archivo)
+    try:
+        lector = pd.read_csv(
+            archivo, sep=separador, encoding=codificacion, dtype=str, keep_default_na=False,
+            skipinitialspace=True, chunksize=filas_por_bloque
+        )
+        for bloque in lector:
+            yield bloque
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+        raise ErrorImportacion(f"CSV inválido: {e}") from None
+
+
+def _texto_celda(valor):
+    """Celda de Excel como texto, para validarla igual que una celda de CSV"""
+    if valor is None or valor == '':
+        return ''
+    if isinstance(valor, bool):
+        return 'true' if valor else 'false'
+    if isinstance(valor, (datetime, date)):
+        return valor.strftime('%Y-%m-%d')
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+
+def _lotes(encabezado, filas, filas_por_bloque):
+    """DataFrames de texto con 'filas_por_bloque' filas (las filas cortas se completan con celdas vacías)"""
+    columnas = [_texto_celda(c) or f"columna_{i + 1}" for i, c in enumerate(encabezado)]
+    vacia = [''] * len(columnas)
+    lote = []
+    for fila in filas:
+        celdas = [_texto_celda(c) for c in fila]
+        if not any(celdas):
+            continue
+        lote.append((celdas + vacia)[:len(columnas)])
+        if len(lote) >= filas_por_bloque:
+            yield pd.DataFrame(lote, columns=columnas, dtype=object)
+            lote = []
+    if lote:
+        yield pd.DataFrame(lote, columns=columnas, dtype=object)
+
+
+def _bloques_calamine(archivo, filas_por_bloque):
+    from python_calamine import CalamineWorkbook
+
+    try:
+        filas = CalamineWorkbook.from_filelike(archivo).get_sheet_by_index(0).iter_rows()
+    except Exception as e:  # calamine envuelve los errores de lectura en sus propios tipos
+        raise ErrorImportacion(f"Excel inválido: {e}") from None
+    encabezado = next(filas, None)
+    if encabezado is not None:
+        yield from _lotes(encabezado, filas, filas_por_bloque)
+
+
+def _bloques_excel(archivo, filas_por_bloque):
+    # calamine (Rust) lee ~8x más rápido que openpyxl; se usa si está instalado
+    if CALAMINE_DISPONIBLE:
+        yield from _bloques_calamine(archivo, filas_por_bloque)
+        return
+    if not EXCEL_DISPONIBLE:
+        raise ErrorImportacion("Para leer archivos .xlsx instala python-calamine u openpyxl (pip install python-calamine)")
+    import openpyxl
+
+    try:
+        libro = openpyxl.load_workbook(archivo, read_only=True, data_only=True)
+    except Exception as e:  # openpyxl lanza varios tipos según el daño del archivo
+        raise ErrorImportacion(f"Excel inválido: {e}") from None
+    try:
+        filas = libro.worksheets[0].iter_rows(values_only=True)
+        encabezado = next(filas, None)
+        if encabezado is not None:
+            yield from _lotes(encabezado, filas, filas_por_bloque)
+    finally:
+        libro.close()
+
+
+def _bloques(archivo, formato, filas_por_bloque):
+    if formato == '.xlsx':
+        return _bloques_excel(archivo, filas_por_bloque)
+    return _bloques_csv(archivo, filas_por_bloque)
+
+
+def leer_encabezados(archivo, formato):
+    """Nombres de las columnas del archivo (solo lee la primera fila)"""
+    inicio = archivo.tell()
+    try:
+        if formato == '.csv':
+            codificacion, separador = _dialecto_csv(archivo)
+            try:
+                columnas = pd.read_csv(archivo, sep=separador, encoding=codificacion, nrows=0).columns
+            except pd.errors.EmptyDataError:
+                columnas = []
+        else:
+            bloque = next(iter(_bloques_excel(archivo, 1)), None)
+            columnas = [] if bloque is None else bloque.columns
+    finally:
+        archivo.seek(inicio)
+    return [str(c).strip() for c in columnas]
+
+
+# ----------------------------------------------------------------------
+# Validación vectorizada
+# ----------------------------------------------------------------------
+
+def _formato_numero(valor, tipo):
+    return str(int(valor)) if tipo == 'entero' else str(float(valor))
+
+
+def _convertir_lista_texto(texto):
+    """Lista separada por ';' o escrita como lista de Python (así la deja el CSV que exporta la app)"""
+    if texto.startswith('['):
+        try:
+            valor = ast.literal_eval(texto)
+        except (ValueError, SyntaxError):
+            valor = None
+        if isinstance(valor, list):
+            return [str(v).strip() for v in valor if str(v).strip()]
+    return [v.strip() for v in texto.split(';') if v.strip()]
+
+
+def _texto_numerico(texto, coma_decimal):
+    """Quitar separadores de miles; con coma decimal, '1.234,5' -> '1234.5' (un '0.5' se deja igual)"""
+    if not coma_decimal:
+        return texto.str.replace(',', '', regex=False)
+    con_miles = texto.str.fullmatch(r'-?\d{1,3}(\.\d{3})+(,\d*)?')
+    texto = texto.where(~con_miles, texto.str.replace('.', '', regex=False))
+    return texto.str.replace(',', '.', regex=False)
+
+
+def _validar_columna(campo, texto, vacio, coma_decimal=False):
+    """Valores convertidos (NaN/None donde la celda está vacía) y Serie de mensajes de error"""
+    spec = ESQUEMA_SOCIO[campo]
+    tipo = spec['tipo']
+    errores = pd.Series(None, index=texto.index, dtype=object)
+
+    if tipo in ('numero', 'entero'):
+        valores = pd.to_numeric(_texto_numerico(texto, coma_decimal), errors='coerce').astype(np.float64)
+        malos = ~vacio & valores.isna()
+        errores[malos] = "'" + texto[malos] + "' no es un número"
+        no_finitos = np.isinf(valores)
+        errores[no_finitos] = "el número no es finito"
+        valores[no_finitos] = np.nan
+        if tipo == 'entero':
+            no_entero = valores.notna() & (valores % 1 != 0)
+            errores[no_entero] = [f"se esperaba un entero, llegó {v}" for v in valores[no_entero]]
+            valores[no_entero] = np.nan
+        if 'min' in spec:
+            bajos = valores < spec['min']
+            errores[bajos] = [f"{_formato_numero(v, tipo)} es menor que el mínimo {spec['min']}" for v in valores[bajos]]
+        if 'max' in spec:
+            altos = valores > spec['max']
+            errores[altos] = [f"{_formato_numero(v, tipo)} es mayor que el máximo {spec['max']}" for v in valores[altos]]
+        return valores, errores
+
+    if tipo == 'booleano':
+        minusculas = texto.str.lower()
+        verdaderos = minusculas.isin(TEXTOS_VERDADEROS)
+        malos = ~vacio & ~verdaderos & ~minusculas.isin(TEXTOS_FALSOS)
+        errores[malos] = "'" + texto[malos] + "' no es un valor booleano"
+        valores = pd.Series(verdaderos.to_numpy(dtype=bool), index=texto.index, dtype=object)
+        valores[vacio] = None
+        return valores, errores
+
+    if tipo == 'lista':
+        # Las listas se repiten mucho: cada texto distinto se convierte una sola vez
+        opciones = set(spec.get('opciones', ()))
+        textos = texto[~vacio]
+        listas = {t: _convertir_lista_texto(t) for t in textos.unique()}
+        mensajes = {t: "valor no permitido: " + ', '.join(v for v in lista if v not in opciones)
+                    for t, lista in listas.items() if any(v not in opciones for v in lista)}
+        valores = pd.Series(None, index=texto.index, dtype=object)
+        valores[~vacio] = pd.Series([listas[t] for t in textos], index=textos.index, dtype=object)
+        errores[~vacio] = textos.map(mensajes).astype(object)
+        return valores, errores
+
+    valores = texto.astype(object).where(~vacio, None)
+    if tipo == 'fecha':
+        fechas = pd.to_datetime(texto.where(~vacio), format='%Y-%m-%d', errors='coerce')
+        malos = ~vacio & fechas.isna()
+        errores[malos] = "'" + texto[malos] + "' no es una fecha AAAA-MM-DD"
+    opciones = spec.get('opciones')
+    if opciones is not None:
+        malos = ~vacio & ~texto.isin(list(opciones) + [VALORES_POR_DEFECTO[campo]])
+        errores[malos] = "valor no permitido: " + texto[malos]
+    return valores, errores
+
+
+def _completar(columnas, n):
+    """Completar campos vacíos: sugeridos por categoría, presets y valores por defecto"""
+    categoria = columnas.get('categoria')
+    categoria = (pd.Series([VALORES_POR_DEFECTO['categoria']] * n, dtype=object) if categoria is None
+                 else categoria.fillna(VALORES_POR_DEFECTO['categoria']))
+    unicas = categoria.unique()
+
+    for campo, clave in [('cliff_period', 'cliff'), ('vesting_total', 'vesting')]:
+        sugeridos = categoria.map({c: valores_sugeridos(c)[clave] for c in unicas})
+        actual = columnas.get(campo)
+        columnas[campo] = sugeridos if actual is None else actual.fillna(sugeridos)
+
+    fundador = categoria.isin(CATEGORIAS_FUNDADORES).to_numpy()
+    for activador, presets, sin_preset in _CAMPOS_PRESET:
+        activo = columnas.get(activador)
+        activo = (np.zeros(n, dtype=bool) if activo is None
+                  else activo.fillna(VALORES_POR_DEFECTO[activador]).to_numpy(dtype=bool))
+        for campo in presets[sin_preset]:
+            sugerido = pd.Series(
+                np.where(~activo, None, np.where(fundador, 'fundador', 'empleado')), dtype=object
+            ).map(lambda clave, campo=campo: presets[clave or sin_preset][campo])
+            actual = columnas.get(campo)
+            columnas[campo] = sugerido if actual is None else actual.where(actual.notna(), sugerido)
+
+    if columnas.get('equity_total') is None:
+        # Arranca en una Serie de ceros: el archivo puede no tener ninguna columna de equity
+        columnas['equity_total'] = sum(
+            (columnas[c].fillna(0.0) for c in COLUMNAS_EQUITY if c in columnas), pd.Series(np.zeros(n))
+        )
+
+    datos = {}
+    for campo, defecto in VALORES_POR_DEFECTO.items():
+        valores = columnas.get(campo)
+        if valores is None:
+            datos[campo] = [list(defecto) for _ in range(n)] if isinstance(defecto, list) else np.full(n, defecto, dtype=object)
+            continue
+        if isinstance(defecto, list):
+            datos[campo] = [list(defecto) if v is None else v for v in valores]
+        else:
+            datos[campo] = valores.where(valores.notna(), defecto).to_numpy(dtype=object)
+    frame = pd.DataFrame(datos)
+    for campo, defecto in VALORES_POR_DEFECTO.items():
+        if isinstance(defecto, bool):
+            frame[campo] = frame[campo].astype(bool)
+        elif isinstance(defecto, int):
+            frame[campo] = frame[campo].astype(np.int64)
+        elif isinstance(defecto, float):
+            frame[campo] = frame[campo].astype(np.float64)
+    return frame
+
+
+def validar_bloque(crudo, mapeo, primera_fila=2, coma_decimal=False):
+    """Validar un bloque de texto crudo; devuelve (socios válidos, errores por fila, filas inválidas)"""
+    crudo = crudo.reset_index(drop=True)
+    n = len(crudo)
+    columnas = {}
+    errores = []
+    invalidas = np.zeros(n, dtype=bool)
+    for columna, campo in mapeo.items():
+        if campo is None or columna not in crudo.columns:
+            continue
+        texto = crudo[columna].fillna('').astype(str).str.strip()
+        vacio = (texto == '').to_numpy()
+        if campo == 'nombre':
+            valores = texto.astype(object)
+            mensajes = pd.Series(np.where(vacio, "el nombre no puede estar vacío", None), dtype=object)
+        else:
+            valores, mensajes = _validar_columna(campo, texto, vacio, coma_decimal)
+        columnas[campo] = valores
+        con_error = mensajes.notna().to_numpy()
+        if con_error.any():
+            invalidas |= con_error
+            errores.extend(
+                {'indice': int(fila) + primera_fila, 'campo': campo, 'mensaje': mensaje}
+                for fila, mensaje in mensajes[con_error].items()
+            )
+
+    errores.sort(key=lambda error: error['indice'])
+    validas = ~invalidas
+    columnas = {campo: valores[validas].reset_index(drop=True) for campo, valores in columnas.items()}
+    return _completar(columnas, int(validas.sum())), errores, int(invalidas.sum())
+
+
+def importar_tabla(archivo, formato, mapeo=None, al_progresar=None, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Importar un CSV/XLSX por bloques; mapeo {columna: campo} (sugerido si no se indica)"""
+    if formato not in FORMATOS_TABULARES:
+        raise ErrorImportacion(f"formato no soportado: {formato}")
+    encabezados = leer_encabezados(archivo, formato)
+    if mapeo is None:
+        mapeo = sugerir_mapeo(encabezados)
+    campos = [c for c in mapeo.values() if c is not None]
+    repetidos = sorted({c for c in campos if campos.count(c) > 1})
+    if repetidos:
+        raise ErrorImportacion(f"varias columnas asignadas a: {', '.join(repetidos)}")
+    if 'nombre' not in campos:
+        raise ErrorImportacion("ninguna columna está asignada al nombre del socio")
+
+    tamano = tamano_archivo(archivo) if formato == '.csv' else None
+    # En CSV separados por ';' (Excel en español) la coma es el separador decimal
+    coma_decimal = formato == '.csv' and _dialecto_csv(archivo)[1] == ';'
+    inicio = posicion_archivo(archivo) or 0
+    resultado = ResultadoImportacion()
+    validos = []
+    fila = 2  # la fila 1 es el encabezado
+    for bloque in _bloques(archivo, formato, filas_por_bloque):
+        bloque.columns = [str(c).strip() for c in bloque.columns]
+        socios, errores, n_invalidas = validar_bloque(bloque, mapeo, fila, coma_decimal)
+        validos.append(socios)
+        resultado.agregar_errores(errores)
+        resultado.registros_invalidos += n_invalidas
+        resultado.total_registros += len(bloque)
+        fila += len(bloque)
+        if al_progresar is not None:
+            leidos = (posicion_archivo(archivo) or 0) - inicio
+            al_progresar(min(leidos / tamano, 1.0) if tamano else None, resultado.total_registros)
+
+    if validos:
+        resultado.socios = SociosStore.from_frame(pd.concat(validos, ignore_index=True))
+    if al_progresar is not None:
+        al_progresar(1.0, resultado.total_registros)
+    return resultado
@@ -0,0 +1,148 @@
+"""Cronograma de vesting de todo el equipo.
+
+Construye en una sola pasada de NumPy la matriz socios x meses con el
+porcentaje consolidado de cada socio (cliff, consolidación inmediata y
+cronograma Mensual/Trimestral/Semestral/Anual) y el equity consolidado.
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# Meses entre consolidaciones según el cronograma del formulario
+MESES_POR_PERIODO = {
+    'Mensual': 1,
+    'Trimestral': 3,
+    'Semestral': 6,
+    'Anual': 12,
+}
+
+# Clases de equity sujetas al cronograma (preferenciales y warrants son de inversores)
+COLUMNAS_CON_VESTING = ['acciones_ordinarias', 'stock_options', 'phantom_equity', 'acciones_vesting']
+
+
+def _mes_ordinal(fechas):
+    """Meses desde el año 0 (año * 12 + mes) de una serie de fechas"""
+    return (fechas.dt.year * 12 + fechas.dt.month - 1).to_numpy(dtype=np.int64)
+
+
+def _fechas_ingreso(df, defecto):
+    """Fechas de ingreso como Timestamps (las inválidas toman la fecha por defecto)"""
+    fechas = pd.to_datetime(pd.Series(df['fecha_ingreso'], dtype=object), format="%Y-%m-%d", errors='coerce')
+    return fechas.fillna(pd.Timestamp(defecto))
+
+
+def _parametros(df):
+    """Vectores de consolidación inmediata, meses totales, cliff, periodo y aceleración"""
+    inmediato = np.clip(df['immediate_vest'].to_numpy(dtype=np.float64), 0, 100) / 100
+    meses_totales = df['vesting_total'].to_numpy(dtype=np.float64) * 12
+    cliff = df['cliff_period'].to_numpy(dtype=np.float64)
+    periodo = pd.Series(df['vesting_schedule'].astype(str).to_numpy()).map(MESES_POR_PERIODO).fillna(1).to_numpy()
+    aceleracion = df['acceleration'].to_numpy(dtype=bool)
+    return inmediato, meses_totales, cliff, periodo, aceleracion
+
+
+def _fraccion(meses, inmediato, meses_totales, cliff, periodo):
+    """Fracción consolidada para meses transcurridos (escalar por socio o matriz socios x meses)"""
+    meses = np.maximum(meses, 0)
+    # Solo consolida al cerrar cada periodo del cronograma
+    meses_efectivos = np.floor(meses / periodo) * periodo
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lineal = np.where(meses_totales > 0, np.minimum(meses_efectivos / meses_totales, 1.0), 1.0)
+    fraccion = inmediato + (1 - inmediato) * lineal
+    return np.where(meses < cliff, inmediato, fraccion)
+
+
+def fraccion_consolidada(df, fecha=None, en_salida=False):
+    """Fracción consolidada de cada socio en una fecha (con aceleración si es una salida)"""
+    fecha = pd.Timestamp(fecha or date.today())
+    fechas = _fechas_ingreso(df, fecha)
+    meses = ((fecha.year - fechas.dt.year) * 12 + (fecha.month - fechas.dt.month)
+             - (fecha.day < fechas.dt.day)).to_numpy(dtype=np.float64)
+
+    inmediato, meses_totales, cliff, periodo, aceleracion = _parametros(df)
+    fraccion = _fraccion(meses, inmediato, meses_totales, cliff, periodo)
+    if en_salida:
+        fraccion = np.where(aceleracion, 1.0, fraccion)
+    return fraccion
+
+
+def equity_consolidado_en(df, fecha=None):
+    """Equity consolidado de cada socio en una fecha, sin construir la matriz mes a mes"""
+    equity = df[COLUMNAS_CON_VESTING].to_numpy(dtype=np.float64).sum(axis=1)
+    return pd.Series(fraccion_consolidada(df, fecha) * equity, index=df.index, name='consolidado_hoy')
+
+
+class MatrizVesting:
+    """Matriz socios x meses de porcentaje consolidado y equity consolidado"""
+
+    def __init__(self, nombres, categorias, meses, porcentaje, equity, indice, consolidado_hoy):
+        self.nombres = nombres
+        self.categorias = categorias
+        self.meses = meses
+        self.porcentaje = porcentaje
+        self.equity = equity
+        self.indice = indice
+        self.consolidado_hoy = consolidado_hoy
+
+    def __len__(self):
+        return len(self.nombres)
+
+    @property
+    def equity_consolidado(self):
+        """Equity consolidado (puntos porcentuales del cap table) por socio y mes"""
+        return self.porcentaje * self.equity[:, np.newaxis]
+
+    def columna_en(self, fecha):
+        """Posición del mes de la matriz que contiene la fecha (acotada al horizonte)"""
+        fecha = pd.Timestamp(fecha)
+        posicion = (fecha.year * 12 + fecha.month - 1) - (self.meses[0].year * 12 + self.meses[0].month - 1)
+        return int(np.clip(posicion, 0, len(self.meses) - 1))
+
+    def en(self, fecha):
+        """Consolidación de todos los socios al cierre del mes de una fecha"""
+        j = self.columna_en(fecha)
+        return pd.DataFrame({
+            'nombre': self.nombres,
+            'porcentaje_consolidado': self.porcentaje[:, j] * 100,
+            'equity_consolidado': self.porcentaje[:, j] * self.equity,
+            'equity_pendiente': (1 - self.porcentaje[:, j]) * self.equity,
+        }, index=self.indice)
+
+    def curvas_por_categoria(self):
+        """Equity consolidado agregado por categoría (categorías x meses)"""
+        codigos, categorias = pd.factorize(pd.Series(self.categorias, dtype=object).fillna(''))
+        curvas = np.zeros((len(categorias), len(self.meses)))
+        np.add.at(curvas, codigos, self.equity_consolidado)
+        return pd.DataFrame(curvas, index=pd.Index(categorias, name='categoria'), columns=self.meses)
+
+
+def calcular_matriz_vesting(df, fecha_referencia=None, meses_extra=6):
+    """Matriz de vesting desde el primer ingreso hasta que consolida el último socio"""
+    hoy = pd.Timestamp(fecha_referencia or date.today())
+    fechas = _fechas_ingreso(df, hoy)
+    inmediato, meses_totales, cliff, periodo, aceleracion = _parametros(df)
+    equity = df[COLUMNAS_CON_VESTING].to_numpy(dtype=np.float64).sum(axis=1)
+
+    ingreso = _mes_ordinal(fechas)
+    inicio = int(ingreso.min()) if len(ingreso) else hoy.year * 12 + hoy.month - 1
+    fin_vesting = ingreso + np.maximum(meses_totales, cliff).astype(np.int64)
+    fin = max(int(fin_vesting.max()) if len(fin_vesting) else inicio, hoy.year * 12 + hoy.month - 1) + meses_extra
+
+    ordinales = np.arange(inicio, fin + 1)
+    meses = pd.DatetimeIndex([pd.Timestamp(year=o // 12, month=o % 12 + 1, day=1) for o in ordinales])
+
+    # (socios x meses) de meses transcurridos, con broadcasting
+    transcurridos = (ordinales[np.newaxis, :] - ingreso[:, np.newaxis]).astype(np.float64)
+    porcentaje = _fraccion(
+        transcurridos, inmediato[:, np.newaxis], meses_totales[:, np.newaxis],
+        cliff[:, np.newaxis], periodo[:, np.newaxis]
+    )
+    # Antes de ingresar no hay nada consolidado
+    porcentaje = np.where(transcurridos < 0, 0.0, porcentaje)
+
+    consolidado_hoy = equity_consolidado_en(df, hoy)
+    return MatrizVesting(
+        df['nombre'].to_numpy(dtype=object), df['categoria'].to_numpy(dtype=object), meses,
+        porcentaje, equity, df.index, consolidado_hoy
+    )
@@ -0,0 +1,119 @@
+"""Waterfall de salida: quién recibe qué para una grilla de valoraciones de salida.
+
+Se calcula en una sola pasada vectorizada sobre toda la grilla:
+
+1. Las acciones preferenciales cobran primero su preferencia de liquidación
+   (múltiplo x inversión, a prorrata si la salida no alcanza).
+2. Sin participación, las preferenciales convierten a ordinarias cuando eso
+   les paga más que la preferencia; con participación cobran ambas.
+3. El remanente se reparte por acción entre ordinarias, options, acciones con
+   vesting, phantom equity y warrants (as-converted). El profit sharing paga
+   sobre utilidades, no en una salida, así que no participa.
+
+La parte del equity sujeto a vesting que aún no ha consolidado se reporta por
+separado; los socios con aceleración consolidan todo al salir.
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from equity_engine.vesting import COLUMNAS_CON_VESTING, fraccion_consolidada
+
+# Clases que participan del remanente como acciones ordinarias
+COLUMNAS_COMUNES = ['acciones_ordinarias', 'stock_options', 'acciones_vesting', 'phantom_equity', 'warrants']
+
+PUNTOS_POR_DEFECTO = 5000
+
+
+class ResultadoWaterfall:
+    """Pagos por socio (filas) para cada valoración de salida (columnas)"""
+
+    def __init__(self, nombres, categorias, salidas, pagos, pagos_preferencia, pagos_no_consolidados, convierte):
+        self.nombres = nombres
+        self.categorias = categorias
+        self.salidas = salidas
+        self.pagos = pagos
+        self.pagos_preferencia = pagos_preferencia
+        self.pagos_no_consolidados = pagos_no_consolidados
+        self.convierte = convierte
+
+    def __len__(self):
+        return len(self.salidas)
+
+    def indice_salida(self, valor_salida):
+        """Posición de la grilla más cercana a una valoración de salida"""
+        return int(np.abs(self.salidas - valor_salida).argmin())
+
+    def distribucion_en(self, valor_salida):
+        """Tabla de quién recibe qué en la salida más cercana de la grilla"""
+        j = self.indice_salida(valor_salida)
+        tabla = pd.DataFrame({
+            'nombre': self.nombres,
+            'categoria': self.categorias,
+            'pago_total': self.pagos[:, j],
+            'pago_preferencia': self.pagos_preferencia[:, j],
+            'pago_no_consolidado': self.pagos_no_consolidados[:, j],
+        })
+        tabla['pago_consolidado'] = tabla['pago_total'] - tabla['pago_no_consolidado']
+        total = self.salidas[j]
+        tabla['porcentaje_salida'] = tabla['pago_total'] / total * 100 if total > 0 else 0.0
+        return tabla
+
+    def curvas_por_categoria(self):
+        """Pagos agregados por categoría para toda la grilla (categorías x salidas)"""
+        codigos, categorias = pd.factorize(pd.Series(self.categorias, dtype=object).fillna(''))
+        curvas = np.zeros((len(categorias), len(self.salidas)))
+        np.add.at(curvas, codigos, self.pagos)
+        return pd.DataFrame(curvas, index=pd.Index(categorias, name='categoria'))
+
+
+def calcular_waterfall(df, salidas, valoracion_referencia, multiplo_preferencia=1.0,
+                       participativas=False, fecha_salida=None):
+    """Pagos de cada socio para cada valoración de salida de la grilla
+
+    La inversión de las preferenciales se estima como su porcentaje por la
+    valoración de referencia (el cap table no guarda montos invertidos).
+    """
+    salidas = np.asarray(salidas, dtype=np.float64)
+    fecha_salida = fecha_salida or date.today()
+
+    preferentes = df['acciones_preferenciales'].to_numpy(dtype=np.float64)
+    comunes_por_clase = df[COLUMNAS_COMUNES].to_numpy(dtype=np.float64)
+    comunes = comunes_por_clase.sum(axis=1)
+
+    fraccion = fraccion_consolidada(df, fecha_salida, en_salida=True)
+    con_vesting = df[COLUMNAS_CON_VESTING].to_numpy(dtype=np.float64).sum(axis=1)
+    no_consolidadas = con_vesting * (1 - fraccion)
+
+    total_preferentes = preferentes.sum()
+    total_unidades = total_preferentes + comunes.sum()
+
+    preferencia = multiplo_preferencia * preferentes / 100 * valoracion_referencia
+    total_preferencia = preferencia.sum()
+    pool_preferencia = np.minimum(salidas, total_preferencia)
+
+    if participativas:
+        convierte = np.zeros(len(salidas), dtype=bool)
+        unidades_remanente = np.full(len(salidas), total_unidades)
+    else:
+        # Convierten cuando su parte as-converted supera la preferencia que cobrarían
+        valor_convertido = salidas * (total_preferentes / total_unidades) if total_unidades > 0 else np.zeros_like(salidas)
+        convierte = valor_convertido > pool_preferencia
+        pool_preferencia = np.where(convierte, 0.0, pool_preferencia)
+        unidades_remanente = np.where(convierte, total_unidades, total_unidades - total_preferentes)
+
+    remanente = salidas - pool_preferencia
+    with np.errstate(divide='ignore', invalid='ignore'):
+        por_unidad = np.where(unidades_remanente > 0, remanente / unidades_remanente, 0.0)
+    participa_preferente = por_unidad if participativas else np.where(convierte, por_unidad, 0.0)
+
+    cuota_preferencia = preferencia / total_preferencia if total_preferencia > 0 else np.zeros_like(preferencia)
+    pagos_preferencia = np.outer(cuota_preferencia, pool_preferencia)
+    pagos = pagos_preferencia + np.outer(preferentes, participa_preferente) + np.outer(comunes, por_unidad)
+    pagos_no_consolidados = np.outer(no_consolidadas, por_unidad)
+
+    return ResultadoWaterfall(
+        df['nombre'].to_numpy(dtype=object), df['categoria'].to_numpy(dtype=object), salidas,
+        pagos, pagos_preferencia, pagos_no_consolidados, convierte
+    )
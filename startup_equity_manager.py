@@ -1,9 +1,80 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
+import functools
 import json
+import os
+
+from equity_engine import (
+    CATEGORIAS,
+    COLUMNAS_DERIVADAS,
+    COLUMNAS_EDITABLES,
+    COLUMNAS_EQUITY,
+    COLUMNAS_ESCENARIOS,
+    DEDICACIONES,
+    DESCRIPCION_MOTIVOS,
+    ESCENARIOS_INICIALES,
+    ESQUEMA_SOCIO,
+    EXTENSION_SNAPSHOT,
+    MAXIMO_PORCIONES,
+    MESES_POR_PERIODO,
+    ORDENES_SOCIOS,
+    PATRON_POR_DEFECTO,
+    PRESUPUESTO_TOKENS,
+    PUNTOS_POR_DEFECTO,
+    RUTA_POR_DEFECTO,
+    TIPOS_EMISION_PRORATA,
+    CacheLRU,
+    ErrorCampo,
+    ErrorConflicto,
+    ErrorImportacion,
+    ErrorPortafolio,
+    ErrorSnapshot,
+    LibroEventos,
+    RegistroTiempos,
+    RepositorioSQLite,
+    SesionPersistente,
+    SociosStore,
+    agrupar_escenarios,
+    aplicar_rondas_antidilucion,
+    calcular_cap_table,
+    calcular_dilucion_df,
+    calcular_matriz_vesting,
+    calcular_waterfall,
+    cambios_en_lote,
+    cargar_portafolio,
+    cargar_snapshot,
+    construir_analisis_categorias,
+    construir_analisis_categorias_resumen,
+    construir_tabla_completa,
+    construir_tabla_ejecutiva,
+    construir_tabla_resumida,
+    construir_tabla_simulacion_prorata,
+    distribucion_por_socio,
+    distribucion_por_tipo,
+    equity_consolidado_en,
+    filtrar_socios,
+    formato_tabular,
+    evaluar_elegibilidad_prorata,
+    evaluar_escenarios,
+    generar_prompt,
+    huella_datos,
+    huella_serie,
+    huella_socios,
+    importar_json,
+    importar_tabla,
+    leer_encabezados,
+    perfilar,
+    preparar_edicion,
+    proyectar_rondas,
+    simular_montecarlo_prorata,
+    snapshot_en_bytes,
+    socios_prompt,
+    sugerir_mapeo,
+    tabla_deltas_escenarios,
+    tabla_resumen_escenarios,
+)
 
 # Configuración de la página
 st.set_page_config(
@@ -12,6 +83,58 @@ st.set_page_config(
     layout="wide"
 )
 
+# Errores de importación que se muestran en pantalla (el resto se descarga en CSV)
+MAXIMO_ERRORES_VISIBLES = 200
+
+# Opciones de socios por página en la lista de Gestión Socios
+TAMANOS_PAGINA_SOCIOS = [10, 25, 50, 100]
+
+# Columnas de la grilla de edición masiva
+_PORCENTAJE_GRILLA = dict(min_value=0.0, max_value=100.0, format="%.4f")
+COLUMNAS_GRILLA_MASIVA = {
+    'nombre': st.column_config.TextColumn("Nombre", required=True),
+    'rol': st.column_config.TextColumn("Rol"),
+    'categoria': st.column_config.SelectboxColumn("Categoría", options=CATEGORIAS, required=True),
+    'dedicacion': st.column_config.SelectboxColumn("Dedicación", options=DEDICACIONES),
+    'fecha_ingreso': st.column_config.TextColumn("Ingreso", help="AAAA-MM-DD"),
+    'salario': st.column_config.NumberColumn("Salario", min_value=0, step=1),
+    'aporte_inicial': st.column_config.NumberColumn("Aporte", min_value=0, step=1),
+    'acciones_ordinarias': st.column_config.NumberColumn("Ordinarias %", **_PORCENTAJE_GRILLA),
+    'acciones_preferenciales': st.column_config.NumberColumn("Preferenciales %", **_PORCENTAJE_GRILLA),
+    'stock_options': st.column_config.NumberColumn("Options %", **_PORCENTAJE_GRILLA),
+    'phantom_equity': st.column_config.NumberColumn("Phantom %", **_PORCENTAJE_GRILLA),
+    'acciones_vesting': st.column_config.NumberColumn("Vesting %", **_PORCENTAJE_GRILLA),
+    'vesting_total': st.column_config.NumberColumn("Vesting (años)", min_value=0, max_value=10, step=1),
+    'cliff_period': st.column_config.NumberColumn("Cliff (meses)", min_value=0, max_value=120, step=1),
+    'vesting_schedule': st.column_config.SelectboxColumn("Cronograma", options=list(MESES_POR_PERIODO)),
+    'immediate_vest': st.column_config.NumberColumn("Inmediato %", **_PORCENTAJE_GRILLA),
+    'acceleration': st.column_config.CheckboxColumn("Aceleración"),
+    'proteccion_antidilucion': st.column_config.CheckboxColumn("Antidilución"),
+    'derechos_prorata': st.column_config.CheckboxColumn("Pro-rata"),
+}
+
+# Columnas de la grilla del espacio de escenarios (una fila por ronda)
+COLUMNAS_GRILLA_ESCENARIOS = {
+    'escenario': st.column_config.TextColumn("Escenario", required=True),
+    'monto_recaudar': st.column_config.NumberColumn("Monto (USD)", min_value=0, step=50000, format="$%d"),
+    'valoracion_pre_money': st.column_config.NumberColumn("Pre-money (USD)", min_value=0, step=100000, format="$%d"),
+    'pool_empleados': st.column_config.NumberColumn("Pool empleados %", min_value=0.0, max_value=50.0, step=1.0),
+    'probabilidad_ejercicio': st.column_config.NumberColumn("Prob. ejercicio pro-rata", min_value=0.0, max_value=1.0,
+                                                            step=0.05, format="%.2f"),
+}
+
+# Socios que se muestran en la comparación de escenarios (el resto va en el CSV)
+MAXIMO_SOCIOS_ESCENARIOS = 200
+
+# Porciones de los gráficos de torta antes de agrupar el resto en 'Otros'
+MAXIMO_PORCIONES_GRAFICO = int(os.environ.get('EQUITY_MAX_PORCIONES', MAXIMO_PORCIONES))
+
+# Tokens estimados del prompt para Claude antes de resumir los socios por categoría
+PRESUPUESTO_PROMPT = int(os.environ.get('EQUITY_PRESUPUESTO_PROMPT', PRESUPUESTO_TOKENS))
+
+# Solo se leen exportaciones dentro de esta raíz (el directorio del portafolio es relativo a ella)
+RAIZ_PORTAFOLIO = os.environ.get('EQUITY_PORTAFOLIO', os.getcwd())
+
 # CSS personalizado
 st.markdown("""
 <style>
@@ -59,13 +182,298 @@ st.markdown("""
 
 # Inicializar session state
 if 'socios' not in st.session_state:
-    st.session_state.socios = []
+    st.session_state.socios = SociosStore()
+elif isinstance(st.session_state.socios, list):
+    st.session_state.socios = SociosStore.from_records(st.session_state.socios)
 if 'company_info' not in st.session_state:
     st.session_state.company_info = {}
 if 'editing_socio' not in st.session_state:
     st.session_state.editing_socio = None
 if 'edit_mode' not in st.session_state:
     st.session_state.edit_mode = False
+if 'socios_version' not in st.session_state:
+    st.session_state.socios_version = 0
+if 'persistencia' not in st.session_state:
+    # Empresa guardada en la base local a la que se escriben los cambios (None: sin vincular)
+    st.session_state.persistencia = None
+if 'libro_eventos' not in st.session_state:
+    # Los socios con que arranca la sesión son el primer evento del historial
+    st.session_state.libro_eventos = LibroEventos()
+    if st.session_state.socios:
+        st.session_state.libro_eventos.importacion(st.session_state.socios.to_records())
+if 'escenarios' not in st.session_state:
+    # Filas de rondas del espacio de escenarios; la versión renueva la grilla al reemplazarlas
+    st.session_state.escenarios = [dict(fila) for fila in ESCENARIOS_INICIALES]
+    st.session_state.escenarios_version = 0
+if 'registro_tiempos' not in st.session_state:
+    # Tiempos de cada sección y cálculo en los últimos reruns (panel de rendimiento)
+    st.session_state.registro_tiempos = RegistroTiempos()
+
+# Widgets cuyo estado se conserva aunque su sección no se renderice
+PREFIJO_ESTADO_UI = 'ui_'
+
+def persistir_estado_widgets():
+    """Evitar que Streamlit descarte el estado de los widgets 'ui_*' de secciones ocultas"""
+    for clave in list(st.session_state.keys()):
+        if isinstance(clave, str) and clave.startswith(PREFIJO_ESTADO_UI):
+            st.session_state[clave] = st.session_state[clave]
+
+def por_defecto(clave, **valores):
+    """Argumentos de valor inicial de un widget: solo si su clave aún no está en session_state
+
+    Pasar value/index a un widget cuyo estado ya se escribió con persistir_estado_widgets
+    hace que Streamlit avise de un valor por defecto duplicado.
+    """
+    return {} if clave in st.session_state else valores
+
+def medir(nombre, tipo='calculo'):
+    """Medir un bloque dentro del rerun en curso"""
+    return st.session_state.registro_tiempos.medir(nombre, tipo)
+
+def cronometrado(funcion):
+    """Registrar la duración de cada llamada a un cálculo pesado"""
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        with medir(funcion.__name__):
+            return funcion(*args, **kwargs)
+    return envoltura
+
+@st.cache_resource
+def cache_cap_table():
+    """Caché LRU compartida entre sesiones (presupuesto configurable con EQUITY_CACHE_MB)"""
+    presupuesto_mb = float(os.environ.get('EQUITY_CACHE_MB', 64))
+    return CacheLRU(presupuesto_bytes=int(presupuesto_mb * 1024 * 1024))
+
+@st.cache_resource
+def repositorio_local():
+    """Base SQLite compartida entre sesiones (ruta configurable con EQUITY_DB)"""
+    return RepositorioSQLite(os.environ.get('EQUITY_DB', RUTA_POR_DEFECTO))
+
+def persistir(operacion, *args):
+    """Encolar un cambio para la empresa vinculada; se escribe en lote al sincronizar"""
+    persistencia = st.session_state.persistencia
+    if persistencia is not None:
+        getattr(persistencia, operacion)(*args)
+
+def sincronizar_persistencia():
+    """Escribir en una transacción los cambios pendientes de la empresa vinculada"""
+    persistencia = st.session_state.persistencia
+    if persistencia is None:
+        return
+    try:
+        persistencia.sincronizar(st.session_state.company_info)
+    except ErrorConflicto as e:
+        # Otra sesión cambió la empresa: se recarga en vez de pisar sus cambios
+        try:
+            vincular_empresa(persistencia.empresa_id)
+            st.session_state.aviso_persistencia = (
+                f"⚠️ {e}. Se recargó **{persistencia.nombre}** y se descartaron los cambios de esta sesión "
+                "que no se habían guardado."
+            )
+        except KeyError:
+            desvincular_empresa_eliminada()
+        st.rerun()
+    except KeyError:
+        desvincular_empresa_eliminada()
+        st.rerun()
+
+def desvincular_empresa_eliminada():
+    """La empresa vinculada ya no existe: los datos quedan en la sesión, sin guardar"""
+    st.session_state.persistencia = None
+    st.session_state.aviso_persistencia = (
+        "⚠️ La empresa vinculada ya no existe en la base local: la sesión quedó sin vincular. "
+        "Guárdala de nuevo desde 💾 Export/Import para no perder los datos."
+    )
+
+def vincular_empresa(empresa_id):
+    """Cargar una empresa guardada en la sesión y escribir ahí los cambios siguientes (KeyError si no existe)"""
+    persistencia, company_info, socios = SesionPersistente.abrir(repositorio_local(), empresa_id)
+    st.session_state.persistencia = persistencia
+    st.session_state.company_info = company_info
+    st.session_state.socios = socios
+    # El historial guardado con la empresa reemplaza al de la sesión
+    st.session_state.libro_eventos = persistencia.libro
+    marcar_socios_modificados()
+    guardados = repositorio_local().cargar_escenarios(empresa_id)
+    if guardados:
+        reemplazar_escenarios([
+            dict(ronda, escenario=nombre) for nombre, datos in guardados.items() for ronda in datos['rondas']
+        ])
+
+def reemplazar_escenarios(filas):
+    """Nuevas filas de rondas del espacio de escenarios (la grilla arranca de ellas)"""
+    st.session_state.escenarios = filas
+    st.session_state.escenarios_version += 1
+
+def guardar_escenarios_empresa():
+    """Guardar los escenarios de la sesión en la empresa vinculada"""
+    persistencia = st.session_state.persistencia
+    escenarios = {}
+    for fila in st.session_state.escenarios:
+        nombre = str(fila['escenario']).strip()
+        ronda = {campo: fila[campo] for campo in COLUMNAS_ESCENARIOS[1:]}
+        escenarios.setdefault(nombre, {'rondas': []})['rondas'].append(ronda)
+    persistencia.repositorio.reemplazar_escenarios(persistencia.empresa_id, escenarios)
+
+def guardar_empresa_actual(nombre):
+    """Guardar los datos de la sesión como empresa y vincularla"""
+    repositorio = repositorio_local()
+    libro = st.session_state.libro_eventos
+    empresa_id, ids, version = repositorio.guardar_empresa(
+        nombre, st.session_state.company_info, st.session_state.socios.to_records(), libro.eventos_desde(0)
+    )
+    st.session_state.persistencia = SesionPersistente(
+        repositorio, empresa_id, nombre, ids, st.session_state.company_info, version, libro, len(libro)
+    )
+
+def marcar_socios_modificados():
+    """Invalidar la huella de socios: solo se llama desde las rutas que cambian datos"""
+    st.session_state.socios_version += 1
+
+def huella_sesion():
+    """Huella de socios + empresa; la de socios se recalcula solo si cambió la versión"""
+    memo = st.session_state.get('huella_socios_memo')
+    if memo is None or memo[0] != st.session_state.socios_version:
+        memo = (st.session_state.socios_version, huella_socios(st.session_state.socios))
+        st.session_state.huella_socios_memo = memo
+    return huella_datos(st.session_state.socios, st.session_state.company_info, huella_de_socios=memo[1])
+
+@cronometrado
+def obtener_cap_table():
+    """Cap table calculado por el motor, memoizado por la huella de los datos
+
+    La entrada cacheada se comparte entre sesiones: cada llamada recibe su propia vista.
+    """
+    socios = st.session_state.socios
+    return cache_cap_table().obtener_o_calcular(
+        ('cap_table', huella_sesion()),
+        lambda: calcular_cap_table(socios)
+    ).vista()
+
+@cronometrado
+def obtener_rondas_antidilucion(rondas, valoracion_referencia):
+    """Cap table post-rondas con ajustes antidilución, memoizado por datos y rondas"""
+    cap = obtener_cap_table()
+    clave_rondas = json.dumps(rondas, sort_keys=True, default=str)
+    return cache_cap_table().obtener_o_calcular(
+        ('antidilucion', huella_sesion(), clave_rondas, valoracion_referencia),
+        lambda: aplicar_rondas_antidilucion(cap.df, rondas, valoracion_referencia)
+    )
+
+@cronometrado
+def obtener_waterfall(valor_maximo, valoracion_referencia, multiplo_preferencia, participativas):
+    """Waterfall de salida sobre la grilla de valoraciones, memoizado por datos y parámetros"""
+    cap = obtener_cap_table()
+    return cache_cap_table().obtener_o_calcular(
+        ('waterfall', huella_sesion(), valor_maximo, valoracion_referencia, multiplo_preferencia, participativas),
+        lambda: calcular_waterfall(
+            cap.df, np.linspace(0, valor_maximo, PUNTOS_POR_DEFECTO), valoracion_referencia,
+            multiplo_preferencia, participativas
+        )
+    )
+
+def figura_torta(nombre, porciones, titulo):
+    """Gráfico de torta memoizado por el contenido de sus porciones (la figura no se modifica al mostrarla)"""
+    def construir():
+        # Plotly se importa al dibujar el primer gráfico, no al arrancar la app
+        import plotly.express as px
+        return px.pie(values=porciones.to_numpy(), names=porciones.index, title=titulo)
+    return cache_cap_table().obtener_o_calcular(('figura', nombre, titulo, huella_serie(porciones)), construir)
+
+@cronometrado
+def obtener_matriz_vesting():
+    """Matriz de vesting del equipo, memoizada por la huella de los socios y el día"""
+    cap = obtener_cap_table()
+    hoy = datetime.now().date()
+    return cache_cap_table().obtener_o_calcular(
+        ('vesting', huella_sesion(), hoy.isoformat()),
+        lambda: calcular_matriz_vesting(cap.df, hoy)
+    )
+
+@cronometrado
+def obtener_consolidado_hoy():
+    """Equity consolidado hoy por socio (sin la matriz mes a mes), memoizado por la huella y el día"""
+    cap = obtener_cap_table()
+    hoy = datetime.now().date()
+    return cache_cap_table().obtener_o_calcular(
+        ('consolidado', huella_sesion(), hoy.isoformat()),
+        lambda: equity_consolidado_en(cap.df, hoy)
+    )
+
+def agregar_socio(datos):
+    """Agregar un socio a la sesión"""
+    st.session_state.socios.append(datos)
+    st.session_state.libro_eventos.alta(datos)
+    persistir('alta', datos)
+    marcar_socios_modificados()
+
+def actualizar_socio(indice, datos):
+    """Reemplazar los datos de un socio existente"""
+    libro = st.session_state.libro_eventos
+    st.session_state.socios[indice] = datos
+    libro.edicion(libro.id_en(indice), datos)
+    persistir('edicion', indice, datos)
+    marcar_socios_modificados()
+
+def actualizar_socios(registros):
+    """Reemplazar varios socios {posición: datos} en un solo rerun (la base se escribe en una transacción)"""
+    libro = st.session_state.libro_eventos
+    for indice, datos in registros.items():
+        st.session_state.socios[indice] = datos
+        libro.edicion(libro.id_en(indice), datos)
+        persistir('edicion', indice, datos)
+    marcar_socios_modificados()
+
+def eliminar_socio(indice):
+    """Eliminar un socio por posición"""
+    libro = st.session_state.libro_eventos
+    socio = st.session_state.socios.pop(indice)
+    libro.baja(libro.id_en(indice))
+    persistir('baja', indice)
+    marcar_socios_modificados()
+    return socio
+
+def reemplazar_socios(socios, libro=None):
+    """Reemplazar todos los socios (importación o limpieza); con libro, también el historial"""
+    if not isinstance(socios, SociosStore):
+        socios = SociosStore.from_records(socios)
+    st.session_state.socios = socios
+    registros = socios.to_records()
+    if libro is None:
+        st.session_state.libro_eventos.importacion(registros)
+    else:
+        if len(libro.ids()) != len(registros):
+            # El historial no termina en estos socios (p. ej. se editó el archivo): se agregan como importación
+            libro.importacion(registros)
+        st.session_state.libro_eventos = libro
+        persistir('reemplazo_libro', libro)
+    persistir('reemplazo', registros)
+    marcar_socios_modificados()
+
+def libro_importado(import_data):
+    """Libro de eventos incluido en una exportación (None si no trae historial o no es válido)"""
+    eventos = import_data.campos.get('eventos')
+    if not eventos:
+        return None
+    try:
+        return LibroEventos.desde_eventos(eventos)
+    except ValueError:
+        return None
+
+def mover_equity(origen, destino, campo, cantidad):
+    """Emitir equity a un socio (origen None) o transferirlo entre dos socios"""
+    libro = st.session_state.libro_eventos
+    id_destino = libro.id_en(destino)
+    if origen is None:
+        libro.emision(id_destino, campo, cantidad)
+    else:
+        id_origen = libro.id_en(origen)
+        libro.transferencia(id_origen, id_destino, campo, cantidad)
+        st.session_state.socios[origen] = libro.socio(id_origen)
+        persistir('edicion', origen, libro.socio(id_origen))
+    st.session_state.socios[destino] = libro.socio(id_destino)
+    persistir('edicion', destino, libro.socio(id_destino))
+    marcar_socios_modificados()
 
 def mostrar_ayuda_concepto(concepto):
     """Mostrar ayuda detallada para conceptos"""
@@ -202,9 +610,24 @@ def obtener_valores_sugeridos(categoria, dedicacion):
     
     return sugerencias.get(categoria, {'ordinarias': (0, 5), 'cliff': 12, 'vesting': 4})
 
+# Campos del socio nuevo cuyo valor inicial depende de la categoría
+CAMPOS_SEGUN_CATEGORIA = ['acciones_ordinarias_fundador', 'immediate_vest']
+
+def reiniciar_sugerencias_categoria():
+    """Al cambiar la categoría del socio nuevo, sus campos dependientes vuelven al valor sugerido"""
+    for campo in CAMPOS_SEGUN_CATEGORIA:
+        st.session_state.pop(f"{PREFIJO_ESTADO_UI}nuevo_{campo}", None)
+
 def formulario_socio(socio_data=None, modo="agregar"):
     """Formulario para agregar o editar socio"""
     es_edicion = modo == "editar" and socio_data is not None
+
+    def clave(campo):
+        """En modo agregar, clave persistente para no perder lo escrito al cambiar de sección"""
+        return None if es_edicion else f"{PREFIJO_ESTADO_UI}nuevo_{campo}"
+
+    def inicial(campo, **valores):
+        return por_defecto(clave(campo), **valores)
     
     # Título del formulario
     if es_edicion:
@@ -218,15 +641,18 @@ def formulario_socio(socio_data=None, modo="agregar"):
     
     with col_basic1:
         nombre = st.text_input("👤 **Nombre completo**", 
-                              value=socio_data.get('nombre', '') if es_edicion else '',
-                              placeholder="Ej: María García")
+                              **inicial('nombre', value=socio_data.get('nombre', '') if es_edicion else ''),
+                              placeholder="Ej: María García",
+                              key=clave('nombre'))
         
     with col_basic2:
-        categorias = ['Fundador Principal', 'Co-fundador', 'Early Employee', 'Employee', 'Advisor', 'Consultor']
+        categorias = CATEGORIAS
         categoria_index = categorias.index(socio_data['categoria']) if es_edicion and socio_data['categoria'] in categorias else 0
         categoria = st.selectbox("🏷️ **¿Qué tipo de socio es?**", categorias,
-                                index=categoria_index,
-                                help="Esto determina rangos típicos de equity y configuración")
+                                **inicial('categoria', index=categoria_index),
+                                help="Esto determina rangos típicos de equity y configuración",
+                                key=clave('categoria'),
+                                on_change=None if es_edicion else reiniciar_sugerencias_categoria)
     
     col_basic3, col_basic4 = st.columns(2)
     
@@ -235,14 +661,15 @@ def formulario_socio(socio_data=None, modo="agregar"):
                 'VP Tecnología', 'VP Marketing', 'VP Ventas', 'VP Operaciones',
                 'Director', 'Gerente', 'Empleado Senior', 'Empleado', 'Advisor', 'Consultor']
         rol_index = roles.index(socio_data['rol']) if es_edicion and socio_data['rol'] in roles else 0
-        rol = st.selectbox("💼 **Rol en la empresa**", roles, index=rol_index)
+        rol = st.selectbox("💼 **Rol en la empresa**", roles, **inicial('rol', index=rol_index), key=clave('rol'))
         
     with col_basic4:
-        dedicaciones = ['Tiempo Completo (100%)', 'Tiempo Parcial (75%)', 'Tiempo Parcial (50%)', 'Tiempo Parcial (25%)', 'Consultoría']
+        dedicaciones = DEDICACIONES
         dedicacion_index = dedicaciones.index(socio_data['dedicacion']) if es_edicion and socio_data['dedicacion'] in dedicaciones else 0
         dedicacion = st.selectbox("⏰ **Dedicación de tiempo**", dedicaciones,
-                                 index=dedicacion_index,
-                                 help="La dedicación afecta la cantidad de equity típica")
+                                 **inicial('dedicacion', index=dedicacion_index),
+                                 help="La dedicación afecta la cantidad de equity típica",
+                                 key=clave('dedicacion'))
     
     # Obtener sugerencias basadas en categoría
     sugerencias = obtener_valores_sugeridos(categoria, dedicacion)
@@ -267,8 +694,9 @@ def formulario_socio(socio_data=None, modo="agregar"):
             acciones_ordinarias = st.slider(
                 f"🗳️ **Acciones Ordinarias (%)** - Recomendado: {sugerido_min}-{sugerido_max}%",
                 min_value=0.0, max_value=100.0, step=0.5,
-                value=valor_inicial,
-                help="Acciones con derecho a voto - típico para fundadores"
+                **inicial('acciones_ordinarias_fundador', value=valor_inicial),
+                help="Acciones con derecho a voto - típico para fundadores",
+                key=clave('acciones_ordinarias_fundador')
             )
 
             # Alternativamente pueden tener preferenciales
@@ -276,8 +704,9 @@ def formulario_socio(socio_data=None, modo="agregar"):
             acciones_preferenciales = st.slider(
                 "👑 **Acciones Preferenciales (%)** - Solo si hay inversores",
                 min_value=0.0, max_value=50.0, step=0.5,
-                value=valor_inicial_pref,
-                help="Solo usar si hay rondas de inversión"
+                **inicial('acciones_preferenciales', value=valor_inicial_pref),
+                help="Solo usar si hay rondas de inversión",
+                key=clave('acciones_preferenciales')
             )
 
             # Stock options/alternativas colombianas para fundadores (menor uso)
@@ -293,8 +722,9 @@ def formulario_socio(socio_data=None, modo="agregar"):
             acciones_ordinarias = st.slider(
                 "🗳️ **Acciones Ordinarias (%)** - Para empleados clave",
                 min_value=0.0, max_value=20.0, step=0.1,
-                value=valor_inicial,
-                help="Solo para empleados muy importantes o con aporte económico"
+                **inicial('acciones_ordinarias_empleado', value=valor_inicial),
+                help="Solo para empleados muy importantes o con aporte económico",
+                key=clave('acciones_ordinarias_empleado')
             )
 
             acciones_preferenciales = 0.0  # Empleados no suelen tener preferenciales
@@ -307,8 +737,9 @@ def formulario_socio(socio_data=None, modo="agregar"):
             phantom_equity = st.slider(
                 "👻 **Phantom Equity (%)** - ¡Recomendado para Colombia!",
                 min_value=0.0, max_value=10.0, step=0.1,
-                value=valor_phantom,
-                help="Derecho a ganancias futuras sin acciones reales - Muy popular en Colombia"
+                **inicial('phantom_equity', value=valor_phantom),
+                help="Derecho a ganancias futuras sin acciones reales - Muy popular en Colombia",
+                key=clave('phantom_equity')
             )
 
             # Profit Sharing
@@ -316,8 +747,9 @@ def formulario_socio(socio_data=None, modo="agregar"):
             profit_sharing = st.slider(
                 "💰 **Profit Sharing (% utilidades anuales)** - Más simple",
                 min_value=0.0, max_value=15.0, step=0.5,
-                value=valor_profit,
-                help="Porcentaje de utilidades anuales - Fácil de implementar"
+                **inicial('profit_sharing', value=valor_profit),
+                help="Porcentaje de utilidades anuales - Fácil de implementar",
+                key=clave('profit_sharing')
             )
 
             # Warrants
@@ -325,8 +757,9 @@ def formulario_socio(socio_data=None, modo="agregar"):
             warrants = st.slider(
                 "📜 **Warrants (%)** - Para eventos específicos",
                 min_value=0.0, max_value=10.0, step=0.1,
-                value=valor_warrants,
-                help="Derecho a comprar acciones en eventos específicos (venta, inversión)"
+                **inicial('warrants', value=valor_warrants),
+                help="Derecho a comprar acciones en eventos específicos (venta, inversión)",
+                key=clave('warrants')
             )
 
             # Acciones con Vesting
@@ -334,20 +767,24 @@ def formulario_socio(socio_data=None, modo="agregar"):
             acciones_vesting = st.slider(
                 "📈 **Acciones con Vesting (%)** - Entrega directa",
                 min_value=0.0, max_value=10.0, step=0.1,
-                value=valor_vesting_acc,
-                help="Acciones reales que se liberan gradualmente"
+                **inicial('acciones_vesting', value=valor_vesting_acc),
+                help="Acciones reales que se liberan gradualmente",
+                key=clave('acciones_vesting')
             )
 
             # Stock Options tradicionales (menos usadas en Colombia)
             if st.checkbox("📈 **¿Incluir Stock Options tradicionales?**",
-                          value=socio_data.get('incluir_stock_options', False) if es_edicion else False,
-                          help="Poco usadas en Colombia, mejor usar alternativas de arriba"):
+                          **inicial('incluir_stock_options',
+                                    value=socio_data.get('incluir_stock_options', False) if es_edicion else False),
+                          help="Poco usadas en Colombia, mejor usar alternativas de arriba",
+                          key=clave('incluir_stock_options')):
                 valor_stock = socio_data.get('stock_options', 0.0) if es_edicion else 0.0
                 stock_options = st.slider(
                     "📈 **Stock Options (%)**",
                     min_value=0.0, max_value=10.0, step=0.1,
-                    value=valor_stock,
-                    help="Derecho a comprar acciones - Poco común en SAS Colombia"
+                    **inicial('stock_options', value=valor_stock),
+                    help="Derecho a comprar acciones - Poco común en SAS Colombia",
+                    key=clave('stock_options')
                 )
             else:
                 stock_options = 0.0
@@ -409,8 +846,10 @@ def formulario_socio(socio_data=None, modo="agregar"):
         # Protección Antidilución (simplificada)
         tiene_proteccion = st.toggle(
             "🛡️ **Protección Antidilución**",
-            value=socio_data.get('proteccion_antidilucion', False) if es_edicion else False,
-            help="Protege si venden acciones más baratas en el futuro"
+            **inicial('tiene_proteccion',
+                      value=socio_data.get('proteccion_antidilucion', False) if es_edicion else False),
+            help="Protege si venden acciones más baratas en el futuro",
+            key=clave('tiene_proteccion')
         )
 
         if tiene_proteccion:
@@ -436,8 +875,10 @@ def formulario_socio(socio_data=None, modo="agregar"):
         # Derechos Pro-rata (simplificados)
         tiene_derechos_prorata = st.toggle(
             "🎯 **Derechos Pro-rata**",
-            value=socio_data.get('derechos_prorata', False) if es_edicion else False,
-            help="Derecho a mantener tu porcentaje en futuras emisiones"
+            **inicial('tiene_derechos_prorata',
+                      value=socio_data.get('derechos_prorata', False) if es_edicion else False),
+            help="Derecho a mantener tu porcentaje en futuras emisiones",
+            key=clave('tiene_derechos_prorata')
         )
 
         if tiene_derechos_prorata:
@@ -482,26 +923,30 @@ def formulario_socio(socio_data=None, modo="agregar"):
         vesting_options = [1, 2, 3, 4, 5]
         vesting_index = vesting_options.index(socio_data['vesting_total']) if es_edicion and socio_data['vesting_total'] in vesting_options else 3
         vesting_total = st.selectbox("📅 **Período de vesting**", vesting_options, 
-                                    index=vesting_index, help="4 años es el estándar de la industria")
+                                    **inicial('vesting_total', index=vesting_index), help="4 años es el estándar de la industria",
+                                    key=clave('vesting_total'))
         st.info(f"✅ **{vesting_total} años** {'✨ Estándar!' if vesting_total == 4 else ''}")
         
         valor_inicial = socio_data.get('immediate_vest', 25.0 if categoria == 'Fundador Principal' else 0.0) if es_edicion else (25.0 if categoria == 'Fundador Principal' else 0.0)
         immediate_vest = st.number_input("💨 **Vesting inmediato (%)**", 
                                        min_value=0.0, max_value=50.0, 
-                                       value=valor_inicial,
-                                       help="% que se adquiere inmediatamente")
+                                       **inicial('immediate_vest', value=valor_inicial),
+                                       help="% que se adquiere inmediatamente",
+                                       key=clave('immediate_vest'))
     
     with col_vest2:
         cliff_options = [0, 6, 12, 18, 24]
         cliff_index = cliff_options.index(socio_data['cliff_period']) if es_edicion and socio_data['cliff_period'] in cliff_options else 2
         cliff_period = st.selectbox("🚧 **Período de cliff (meses)**", cliff_options, 
-                                   index=cliff_index, help="12 meses es típico")
+                                   **inicial('cliff_period', index=cliff_index), help="12 meses es típico",
+                                   key=clave('cliff_period'))
         st.info(f"✅ **{cliff_period} meses** {'✨ Estándar!' if cliff_period == 12 else ''}")
         
         schedules = ['Mensual', 'Trimestral', 'Semestral', 'Anual']
         schedule_index = schedules.index(socio_data['vesting_schedule']) if es_edicion and socio_data['vesting_schedule'] in schedules else 0
         vesting_schedule = st.selectbox("📊 **Cronograma**", schedules,
-                                       index=schedule_index, help="Mensual es lo más común")
+                                       **inicial('vesting_schedule', index=schedule_index), help="Mensual es lo más común",
+                                       key=clave('vesting_schedule'))
     
     # PASO 4: Información adicional (opcional y colapsable)
     with st.expander("4️⃣ **Información Adicional** (Opcional)", expanded=False):
@@ -509,33 +954,41 @@ def formulario_socio(socio_data=None, modo="agregar"):
         
         with col_extra1:
             valor_fecha = datetime.strptime(socio_data['fecha_ingreso'], "%Y-%m-%d").date() if es_edicion else datetime.now().date()
-            fecha_ingreso = st.date_input("📅 Fecha de ingreso", value=valor_fecha)
+            fecha_ingreso = st.date_input("📅 Fecha de ingreso", **inicial('fecha_ingreso', value=valor_fecha), key=clave('fecha_ingreso'))
             
             valor_inicial = socio_data.get('salario', 0) if es_edicion else 0
             salario = st.number_input("💵 Salario mensual (COP)", min_value=0, step=500000, 
-                                    value=valor_inicial, help="Opcional - para cálculos internos")
+                                    **inicial('salario', value=valor_inicial), help="Opcional - para cálculos internos",
+                                    key=clave('salario'))
             
             valor_inicial = socio_data.get('aporte_inicial', 0) if es_edicion else 0
             aporte_inicial = st.number_input("💰 Aporte inicial (COP)", min_value=0, step=1000000,
-                                           value=valor_inicial, help="Dinero o activos aportados")
+                                           **inicial('aporte_inicial', value=valor_inicial), help="Dinero o activos aportados",
+                                           key=clave('aporte_inicial'))
             
         with col_extra2:
             acceleration = st.checkbox("⚡ Aceleración por salida",
-                                     value=socio_data.get('acceleration', False) if es_edicion else False,
-                                     help="Si se va la empresa, ¿acelerar vesting?")
+                                     **inicial('acceleration', value=socio_data.get('acceleration', False) if es_edicion else False),
+                                     help="Si se va la empresa, ¿acelerar vesting?",
+                                     key=clave('acceleration'))
             buyback_option = st.checkbox("🔄 Opción de recompra", 
-                                       value=socio_data.get('buyback_option', True) if es_edicion else True,
-                                       help="¿Puede la empresa recomprar acciones?")
+                                       **inicial('buyback_option', value=socio_data.get('buyback_option', True) if es_edicion else True),
+                                       help="¿Puede la empresa recomprar acciones?",
+                                       key=clave('buyback_option'))
             
         experiencia = st.text_area("🎓 Experiencia relevante", height=60,
-                                 value=socio_data.get('experiencia', '') if es_edicion else '',
-                                 placeholder="Ej: 5 años en marketing digital, ex-Google")
+                                 **inicial('experiencia', value=socio_data.get('experiencia', '') if es_edicion else ''),
+                                 placeholder="Ej: 5 años en marketing digital, ex-Google",
+                                 key=clave('experiencia'))
         responsabilidades = st.text_area("📋 Responsabilidades principales", height=60,
-                                       value=socio_data.get('responsabilidades', '') if es_edicion else '',
-                                       placeholder="Ej: Liderar equipo de desarrollo, arquitectura técnica")
+                                       **inicial('responsabilidades',
+                                                 value=socio_data.get('responsabilidades', '') if es_edicion else ''),
+                                       placeholder="Ej: Liderar equipo de desarrollo, arquitectura técnica",
+                                       key=clave('responsabilidades'))
         notas = st.text_area("📌 Notas adicionales", height=60,
-                            value=socio_data.get('notas', '') if es_edicion else '',
-                            placeholder="Cualquier información adicional relevante")
+                            **inicial('notas', value=socio_data.get('notas', '') if es_edicion else ''),
+                            placeholder="Cualquier información adicional relevante",
+                            key=clave('notas'))
     
     # Validación y botones
     st.markdown("---")
@@ -596,6 +1049,15 @@ def formulario_socio(socio_data=None, modo="agregar"):
     }
 
 def main():
+    registro = st.session_state.registro_tiempos
+    registro.iniciar_rerun(seccion=st.session_state.get('seccion_activa'))
+    persistir_estado_widgets()
+    # Cambios encolados por el botón que provocó este rerun
+    sincronizar_persistencia()
+    aviso = st.session_state.pop('aviso_persistencia', None)
+    if aviso:
+        st.warning(aviso)
+
     # Disclaimer legal prominente
     st.markdown("""
     <div style="background-color: #fff3cd; border-left: 6px solid #856404; padding: 10px; margin-bottom: 20px;">
@@ -626,43 +1088,111 @@ def main():
         - Simulador de dilución futura
         - Normatividad legal colombiana
 
-        **⚠️ Limitaciones**: No almacena datos permanentemente. Exporta tu configuración antes de cerrar.
+        **⚠️ Limitaciones**: Solo guarda datos si vinculas la empresa a la base local (💾 Export/Import).
+        Si no, exporta tu configuración antes de cerrar.
 
         ---
         💡 **¿Tienes sugerencias?** Esta herramienta está en desarrollo continuo para servir mejor a la comunidad startup colombiana.
         """)
     
-    # Tabs principales
-    tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
-        "📊 Info Empresa",
-        "👥 Gestión Socios",
-        "📋 Tabla Resumen",
-        "📈 Análisis Equity",
-        "📚 Ayuda y Guías",
-        "📋 Prompt Claude",
-        "💾 Export/Import"
-    ])
-    
-    with tab1:
-        company_info_section()
-
-    with tab2:
-        socios_management_section()
-
-    with tab3:
-        tabla_resumen_section()
-
-    with tab4:
-        equity_analysis_section()
+    # Navegación: solo se ejecuta la sección seleccionada
+    secciones = {
+        "📊 Info Empresa": company_info_section,
+        "👥 Gestión Socios": socios_management_section,
+        "📋 Tabla Resumen": tabla_resumen_section,
+        "📈 Análisis Equity": equity_analysis_section,
+        "📚 Ayuda y Guías": ayuda_y_guias_section,
+        "📋 Prompt Claude": claude_prompt_section,
+        "💾 Export/Import": export_import_section,
+        "🗂️ Portafolio": portafolio_section,
+    }
 
-    with tab5:
-        ayuda_y_guias_section()
+    seccion_activa = st.radio(
+        "Sección",
+        list(secciones),
+        horizontal=True,
+        key="seccion_activa",
+        label_visibility="collapsed"
+    )
 
-    with tab6:
-        claude_prompt_section()
+    persistencia = st.session_state.persistencia
+    if persistencia is not None:
+        st.caption(f"🗄️ Guardando automáticamente en la empresa **{persistencia.nombre}**")
+
+    try:
+        ejecutar_seccion(secciones[seccion_activa])
+        with medir('sincronizar_persistencia', 'persistencia'):
+            sincronizar_persistencia()
+    finally:
+        registro.cerrar_rerun()
+
+    if modo_depuracion():
+        panel_rendimiento()
+
+def ejecutar_seccion(seccion):
+    """Renderizar la sección activa midiéndola (y perfilándola si se pidió)"""
+    with medir(seccion.__name__, 'seccion'):
+        # Se limpia antes de ejecutar: si la sección llama a st.rerun() el rerun siguiente no vuelve a perfilarse
+        if st.session_state.pop('perfilar_proximo_rerun', False):
+            _, st.session_state.ultimo_perfil = perfilar(
+                seccion, memoria=st.session_state.get('ui_perfil_memoria', False)
+            )
+        else:
+            seccion()
+
+def modo_depuracion():
+    """Panel de rendimiento: se activa con ?debug=1 o EQUITY_DEBUG=1"""
+    return st.query_params.get('debug') == '1' or os.environ.get('EQUITY_DEBUG') == '1'
+
+def panel_rendimiento():
+    """Tiempos del último rerun, historial exportable y perfil de un rerun"""
+    registro = st.session_state.registro_tiempos
+    with st.expander("🐞 Rendimiento", expanded=True):
+        ultimo = registro.ultimo()
+        if ultimo is not None:
+            st.caption(f"Rerun #{ultimo['rerun']} • {ultimo['total_ms']:,.0f} ms • "
+                       f"{len(registro)} reruns en el historial")
+
+        tab_ultimo, tab_historial, tab_perfil = st.tabs(["⏱️ Último rerun", "📈 Historial", "🔬 Perfil"])
+
+        with tab_ultimo:
+            tabla = registro.tabla_rerun()
+            tabla['nombre'] = tabla['nivel'].map(lambda nivel: '· ' * nivel) + tabla['nombre']
+            st.dataframe(tabla.drop(columns='nivel').round(2), use_container_width=True, hide_index=True)
+
+        with tab_historial:
+            st.dataframe(registro.resumen().round(2), use_container_width=True, hide_index=True)
+            if len(registro) > 1:
+                st.line_chart(registro.totales().set_index('rerun')['total_ms'], height=200)
+            col_json, col_limpiar = st.columns(2)
+            with col_json:
+                st.download_button(
+                    "⬇️ Exportar tiempos (JSON)", registro.a_json(),
+                    file_name=f"tiempos_{datetime.now().strftime('%Y%m%d_%H%M')}.json", mime="application/json"
+                )
+            with col_limpiar:
+                if st.button("🗑️ Limpiar historial"):
+                    registro.limpiar()
+                    st.rerun()
 
-    with tab7:
-        export_import_section()
+        with tab_perfil:
+            st.checkbox("Incluir memoria (tracemalloc, más lento)", key="ui_perfil_memoria")
+            st.caption("⚠️ tracemalloc es global del proceso: mientras se perfila la memoria, "
+                       "todas las sesiones del servidor corren más lento.")
+            if st.button("🔬 Perfilar el próximo rerun"):
+                st.session_state.perfilar_proximo_rerun = True
+                st.rerun()
+            perfil = st.session_state.get('ultimo_perfil')
+            if perfil is not None:
+                st.caption(f"Capturado {perfil.fecha} • {perfil.duracion_ms:,.0f} ms bajo cProfile")
+                st.code(perfil.estadisticas, language=None)
+                if perfil.memoria is not None:
+                    st.markdown(f"**Memoria** — pico {perfil.pico_memoria / 1024 / 1024:.2f} MB")
+                    st.code(perfil.memoria, language=None)
+                st.download_button(
+                    "⬇️ Descargar perfil", perfil.a_texto(),
+                    file_name=f"perfil_{datetime.now().strftime('%Y%m%d_%H%M')}.txt", mime="text/plain"
+                )
 
 def ayuda_y_guias_section():
     st.markdown('<h2 class="section-header">📚 Ayuda y Guías Completas</h2>', unsafe_allow_html=True)
@@ -678,7 +1208,8 @@ def ayuda_y_guias_section():
         "⚖️ Aspectos Legales Colombia"
     ]
 
-    tema_seleccionado = st.selectbox("🔍 **Selecciona el tema que quieres aprender:**", temas_disponibles)
+    tema_seleccionado = st.selectbox("🔍 **Selecciona el tema que quieres aprender:**", temas_disponibles,
+                                     key="ui_tema_ayuda")
 
     st.markdown("---")
 
@@ -1271,17 +1802,16 @@ def tabla_resumen_section():
         st.warning("⚠️ No hay socios registrados. Ve a la pestaña 'Gestión Socios' para agregar.")
         return
 
-    # Crear DataFrame a partir de los datos de socios
-    df = pd.DataFrame(st.session_state.socios)
+    # Cap table calculado por el motor
+    cap = obtener_cap_table()
+    df = cap.df
 
     # Calcular métricas de resumen
-    total_socios = len(df)
-    total_equity = (df['acciones_ordinarias'] + df['acciones_preferenciales'] + df['stock_options'] +
-                   (df['phantom_equity'] if 'phantom_equity' in df.columns else 0) +
-                   (df['acciones_vesting'] if 'acciones_vesting' in df.columns else 0)).sum()
-    equity_disponible = 100 - total_equity
-    total_aportes = df['aporte_inicial'].sum()
-    total_salarios = df['salario'].sum()
+    total_socios = cap.totales['socios']
+    total_equity = cap.totales['equity_total']
+    equity_disponible = cap.totales['equity_disponible']
+    total_aportes = cap.totales['aporte_inicial']
+    total_salarios = cap.totales['salario']
 
     # Métricas principales
     col1, col2, col3, col4, col5 = st.columns(5)
@@ -1314,13 +1844,18 @@ def tabla_resumen_section():
 
     with col_filter1:
         categorias_disponibles = ['Todos'] + list(df['categoria'].unique())
-        categoria_filtro = st.selectbox("🏷️ Filtrar por categoría", categorias_disponibles)
+        if st.session_state.get('ui_filtro_categoria') not in categorias_disponibles:
+            st.session_state.pop('ui_filtro_categoria', None)
+        categoria_filtro = st.selectbox("🏷️ Filtrar por categoría", categorias_disponibles,
+                                        key="ui_filtro_categoria")
 
     with col_filter2:
-        mostrar_proteccion = st.checkbox("🛡️ Mostrar protección antidilución", value=True)
+        mostrar_proteccion = st.checkbox("🛡️ Mostrar protección antidilución", **por_defecto("ui_mostrar_proteccion", value=True),
+                                         key="ui_mostrar_proteccion")
 
     with col_filter3:
-        formato_tabla = st.selectbox("📋 Formato de tabla", ["Completa", "Resumida", "Ejecutiva"])
+        formato_tabla = st.selectbox("📋 Formato de tabla", ["Completa", "Resumida", "Ejecutiva"],
+                                     key="ui_formato_tabla")
 
     # Aplicar filtros
     df_filtrado = df.copy()
@@ -1344,40 +1879,22 @@ def tabla_resumen_section():
     st.markdown("---")
     st.markdown("### 📊 Análisis por Categorías")
 
-    analisis_categorias = df.groupby('categoria').agg({
-        'acciones_ordinarias': 'sum',
-        'acciones_preferenciales': 'sum',
-        'stock_options': 'sum',
-        'aporte_inicial': 'sum',
-        'salario': 'sum',
-        'nombre': 'count'
-    }).round(2)
-
-    analisis_categorias.columns = ['Ordinarias %', 'Preferenciales %', 'Options %', 'Aportes', 'Salarios', 'Cantidad']
-    analisis_categorias['Total Equity %'] = (analisis_categorias['Ordinarias %'] +
-                                          analisis_categorias['Preferenciales %'] +
-                                          analisis_categorias['Options %'])
-
-    # Formatear números para mejor visualización
-    analisis_categorias['Aportes'] = analisis_categorias['Aportes'].apply(lambda x: f"${x:,.0f}")
-    analisis_categorias['Salarios'] = analisis_categorias['Salarios'].apply(lambda x: f"${x:,.0f}")
+    analisis_categorias = construir_analisis_categorias_resumen(cap)
 
     st.dataframe(analisis_categorias, use_container_width=True)
 
     # Resumen de protecciones antidilución
-    if mostrar_proteccion and 'proteccion_antidilucion' in df.columns:
+    if mostrar_proteccion:
         st.markdown("### 🛡️ Resumen de Protecciones Antidilución")
 
-        socios_con_proteccion = df[df.get('proteccion_antidilucion', False) == True]
+        socios_con_proteccion = df[df['proteccion_antidilucion']]
 
         if not socios_con_proteccion.empty:
             col_prot1, col_prot2 = st.columns(2)
 
             with col_prot1:
                 st.metric("👥 Socios Protegidos", len(socios_con_proteccion))
-                equity_protegido = (socios_con_proteccion['acciones_ordinarias'] +
-                                  socios_con_proteccion['acciones_preferenciales'] +
-                                  socios_con_proteccion['stock_options']).sum()
+                equity_protegido = socios_con_proteccion['equity_acciones'].sum()
                 st.metric("📊 Equity Protegido", f"{equity_protegido:.1f}%")
 
             with col_prot2:
@@ -1389,19 +1906,17 @@ def tabla_resumen_section():
             st.info("ℹ️ No hay socios con protección antidilución configurada.")
 
     # Resumen de derechos pro-rata
-    if mostrar_proteccion and 'derechos_prorata' in df.columns:
+    if mostrar_proteccion:
         st.markdown("### 🎯 Resumen de Derechos Pro-rata")
 
-        socios_con_prorata = df[df.get('derechos_prorata', False) == True]
+        socios_con_prorata = df[df['derechos_prorata']]
 
         if not socios_con_prorata.empty:
             col_prorata1, col_prorata2 = st.columns(2)
 
             with col_prorata1:
                 st.metric("👥 Socios con Derechos", len(socios_con_prorata))
-                equity_con_derechos = (socios_con_prorata['acciones_ordinarias'] +
-                                     socios_con_prorata['acciones_preferenciales'] +
-                                     socios_con_prorata['stock_options']).sum()
+                equity_con_derechos = socios_con_prorata['equity_acciones'].sum()
                 st.metric("📊 Equity con Derechos", f"{equity_con_derechos:.1f}%")
 
             with col_prorata2:
@@ -1414,105 +1929,17 @@ def tabla_resumen_section():
 
 def tabla_ejecutiva(df, mostrar_proteccion):
     """Vista ejecutiva con métricas clave"""
-    tabla_exec = df[['nombre', 'categoria', 'rol']].copy()
-
-    # Calcular equity total incluyendo alternativas colombianas
-    tabla_exec['Equity Total %'] = (
-        df['acciones_ordinarias'] +
-        df['acciones_preferenciales'] +
-        df['stock_options'] +
-        (df['phantom_equity'] if 'phantom_equity' in df.columns else 0) +
-        (df['acciones_vesting'] if 'acciones_vesting' in df.columns else 0)
-    ).round(1)
-
-    # Mostrar tipo principal de equity
-    def determinar_tipo_equity(row):
-        if row.get('acciones_ordinarias', 0) > 0:
-            return "🗳️ Ordinarias"
-        elif row.get('phantom_equity', 0) > 0:
-            return "👻 Phantom"
-        elif row.get('profit_sharing', 0) > 0:
-            return "💰 Profit Share"
-        elif row.get('warrants', 0) > 0:
-            return "📜 Warrants"
-        elif row.get('acciones_vesting', 0) > 0:
-            return "📈 Acc. Vesting"
-        elif row.get('stock_options', 0) > 0:
-            return "📈 Options"
-        else:
-            return "❌ Ninguno"
-
-    tabla_exec['Tipo Equity'] = df.apply(determinar_tipo_equity, axis=1)
-    tabla_exec['Vesting'] = df['vesting_total'].astype(str) + 'a / ' + df['cliff_period'].astype(str) + 'm'
-    tabla_exec['Aportes'] = df['aporte_inicial'].apply(lambda x: f"${x:,.0f}")
-
-    if mostrar_proteccion and 'proteccion_antidilucion' in df.columns:
-        tabla_exec['Protección Anti-D'] = df.get('proteccion_antidilucion', False).apply(
-            lambda x: "🛡️ Sí" if x else "❌ No"
-        )
-
-    if mostrar_proteccion and 'derechos_prorata' in df.columns:
-        tabla_exec['Derechos Pro-rata'] = df.get('derechos_prorata', False).apply(
-            lambda x: "🎯 Sí" if x else "❌ No"
-        )
-
+    tabla_exec = construir_tabla_ejecutiva(df, mostrar_proteccion)
     st.dataframe(tabla_exec, use_container_width=True, hide_index=True)
 
 def tabla_resumida(df, mostrar_proteccion):
     """Vista resumida con información esencial"""
-    tabla_res = df[['nombre', 'categoria', 'dedicacion']].copy()
-    tabla_res['Ordinarias %'] = df['acciones_ordinarias'].round(1)
-    tabla_res['Phantom %'] = df['phantom_equity'].round(1) if 'phantom_equity' in df.columns else 0
-    tabla_res['Profit Share %'] = df['profit_sharing'].round(1) if 'profit_sharing' in df.columns else 0
-    tabla_res['Total %'] = (df['acciones_ordinarias'] +
-                           df['acciones_preferenciales'] +
-                           df['stock_options'] +
-                           (df['phantom_equity'] if 'phantom_equity' in df.columns else 0) +
-                           (df['acciones_vesting'] if 'acciones_vesting' in df.columns else 0)).round(1)
-    tabla_res['Salario'] = df['salario'].apply(lambda x: f"${x:,.0f}")
-
-    if mostrar_proteccion and 'proteccion_antidilucion' in df.columns:
-        tabla_res['Protección Anti-D'] = df.get('tipo_proteccion', 'Sin protección')
-
-    if mostrar_proteccion and 'derechos_prorata' in df.columns:
-        tabla_res['Derechos Pro-rata'] = df.get('tipo_derechos_prorata', 'Sin derechos')
-
+    tabla_res = construir_tabla_resumida(df, mostrar_proteccion)
     st.dataframe(tabla_res, use_container_width=True, hide_index=True)
 
 def tabla_completa(df, mostrar_proteccion):
     """Vista completa con toda la información"""
-    tabla_comp = df[['nombre', 'categoria', 'rol', 'dedicacion']].copy()
-    tabla_comp['Ordinarias %'] = df['acciones_ordinarias'].round(1)
-    tabla_comp['Preferenciales %'] = df['acciones_preferenciales'].round(1)
-    tabla_comp['Options %'] = df['stock_options'].round(1)
-    tabla_comp['Phantom %'] = df['phantom_equity'].round(1) if 'phantom_equity' in df.columns else 0
-    tabla_comp['Profit Share %'] = df['profit_sharing'].round(1) if 'profit_sharing' in df.columns else 0
-    tabla_comp['Warrants %'] = df['warrants'].round(1) if 'warrants' in df.columns else 0
-    tabla_comp['Acc. Vesting %'] = df['acciones_vesting'].round(1) if 'acciones_vesting' in df.columns else 0
-    tabla_comp['Total %'] = (df['acciones_ordinarias'] +
-                            df['acciones_preferenciales'] +
-                            df['stock_options'] +
-                            (df['phantom_equity'] if 'phantom_equity' in df.columns else 0) +
-                            (df['profit_sharing'] if 'profit_sharing' in df.columns else 0) +
-                            (df['warrants'] if 'warrants' in df.columns else 0) +
-                            (df['acciones_vesting'] if 'acciones_vesting' in df.columns else 0)).round(1)
-    tabla_comp['Vesting'] = df['vesting_total'].astype(str) + 'a'
-    tabla_comp['Cliff'] = df['cliff_period'].astype(str) + 'm'
-    tabla_comp['Aportes'] = df['aporte_inicial'].apply(lambda x: f"${x:,.0f}")
-    tabla_comp['Salario'] = df['salario'].apply(lambda x: f"${x:,.0f}")
-
-    if mostrar_proteccion and 'proteccion_antidilucion' in df.columns:
-        tabla_comp['Protección Anti-D'] = df.get('proteccion_antidilucion', False).apply(
-            lambda x: "🛡️ Activa" if x else "❌ Inactiva"
-        )
-        tabla_comp['Tipo Protección'] = df.get('tipo_proteccion', 'N/A')
-
-    if mostrar_proteccion and 'derechos_prorata' in df.columns:
-        tabla_comp['Derechos Pro-rata'] = df.get('derechos_prorata', False).apply(
-            lambda x: "🎯 Activos" if x else "❌ Inactivos"
-        )
-        tabla_comp['Tipo Pro-rata'] = df.get('tipo_derechos_prorata', 'N/A')
-
+    tabla_comp = construir_tabla_completa(df, mostrar_proteccion, obtener_consolidado_hoy())
     st.dataframe(tabla_comp, use_container_width=True, hide_index=True)
 
 def company_info_section():
@@ -1559,8 +1986,9 @@ def company_info_section():
             valor_por_accion = st.selectbox(
                 "💵 **Valor nominal por acción (COP)**",
                 [100, 500, 1000, 2000, 5000, 10000],
-                index=2,  # Default 1000
-                help="Recomendado: $1,000 COP (fácil cálculo, profesional)"
+                **por_defecto("ui_valor_por_accion", index=2),  # Default 1000
+                help="Recomendado: $1,000 COP (fácil cálculo, profesional)",
+                key="ui_valor_por_accion"
             )
 
             capital_autorizado = st.number_input(
@@ -1579,8 +2007,9 @@ def company_info_section():
 
             porcentaje_emision_inicial = st.slider(
                 "📈 **% del capital a emitir inicialmente**",
-                min_value=10, max_value=90, value=40, step=5,
-                help="Recomendado: 30-50% para equipo inicial"
+                min_value=10, max_value=90, step=5, **por_defecto("ui_porcentaje_emision", value=40),
+                help="Recomendado: 30-50% para equipo inicial",
+                key="ui_porcentaje_emision"
             )
 
             acciones_a_emitir = int(acciones_totales * porcentaje_emision_inicial / 100)
@@ -1604,8 +2033,8 @@ def company_info_section():
             st.markdown("**👥 CAPA 1 - Fundadores**")
             porcentaje_fundadores = st.slider(
                 "% para fundadores",
-                min_value=20, max_value=80, value=60, step=1,
-                key="fundadores_slider"
+                min_value=20, max_value=80, step=1, **por_defecto("ui_fundadores_slider", value=60),
+                key="ui_fundadores_slider"
             )
             acciones_fundadores = int(acciones_a_emitir * porcentaje_fundadores / 100)
             st.metric("Acciones", f"{acciones_fundadores:,}")
@@ -1615,8 +2044,8 @@ def company_info_section():
             st.markdown("**💼 CAPA 2 - Early Employees**")
             porcentaje_employees = st.slider(
                 "% para empleados iniciales",
-                min_value=1, max_value=40, value=25, step=1,
-                key="employees_slider"
+                min_value=1, max_value=40, step=1, **por_defecto("ui_employees_slider", value=25),
+                key="ui_employees_slider"
             )
             acciones_employees = int(acciones_a_emitir * porcentaje_employees / 100)
             st.metric("Acciones", f"{acciones_employees:,}")
@@ -1655,8 +2084,8 @@ def company_info_section():
         # Proyección de dilución
         st.markdown("#### 📈 **Proyección de Dilución Futura**")
 
-        if st.checkbox("🔮 **Ver proyección de rondas futuras**"):
-            mostrar_proyeccion_dilucion(acciones_totales, acciones_a_emitir, valor_por_accion)
+        if st.checkbox("🔮 **Ver proyección de rondas futuras**", key="ui_ver_proyeccion"):
+            mostrar_proyeccion_dilucion(acciones_totales, acciones_a_emitir, valor_por_accion, porcentaje_fundadores)
 
     # Guardar información actualizada
     st.session_state.company_info = {
@@ -1680,48 +2109,60 @@ def company_info_section():
         'costo_registro': costo_total_registro if country == 'Colombia' else 0
     }
 
-def mostrar_proyeccion_dilucion(acciones_totales, acciones_emitidas, valor_por_accion):
+def mostrar_proyeccion_dilucion(acciones_totales, acciones_emitidas, valor_por_accion, porcentaje_fundadores):
     """Mostrar proyección de dilución en futuras rondas"""
 
     st.markdown("##### 🎯 **Simulación de Rondas Futuras**")
+    st.caption("Agrega o elimina filas para modelar cualquier número de rondas.")
+
+    rondas_base = pd.DataFrame({
+        'Ronda': ['💡 Pre-Seed', '🌱 Seed', '🚀 Serie A'],
+        'Acciones a emitir': [
+            min(10000, acciones_totales // 4),
+            min(15000, acciones_totales // 3),
+            min(20000, acciones_totales // 2),
+        ],
+        'Precio por acción (COP)': [valor_por_accion * 2, valor_por_accion * 4, valor_por_accion * 12],
+    })
+    rondas_editadas = st.data_editor(
+        rondas_base,
+        num_rows="dynamic", hide_index=True, use_container_width=True,
+        column_config={
+            'Acciones a emitir': st.column_config.NumberColumn(min_value=0, step=1000, format="%d"),
+            'Precio por acción (COP)': st.column_config.NumberColumn(min_value=0, step=valor_por_accion, format="$%d"),
+        },
+        key="rondas_proyeccion"
+    )
+    rondas = [
+        {
+            'nombre': fila['Ronda'] if pd.notna(fila['Ronda']) else None,
+            'acciones': fila['Acciones a emitir'] if pd.notna(fila['Acciones a emitir']) else 0,
+            'precio': fila['Precio por acción (COP)'] if pd.notna(fila['Precio por acción (COP)']) else 0,
+        }
+        for fila in rondas_editadas.to_dict('records')
+    ]
+
+    # Participaciones actuales por socio y clase de acción (si hay socios registrados)
+    cap = obtener_cap_table() if st.session_state.socios else None
+    participaciones = cap.df[COLUMNAS_EQUITY].to_numpy() if cap is not None else None
 
-    # Pre-Seed
-    col_pre, col_seed, col_a = st.columns(3)
-
-    with col_pre:
-        st.markdown("**💡 Pre-Seed**")
-        max_pre_seed = acciones_totales//4
-        default_pre_seed = min(10000, max_pre_seed)
-        pre_seed_acciones = st.number_input("Acciones a emitir", 0, max_pre_seed, default_pre_seed, key="pre_seed")
-        pre_seed_precio = st.number_input("Precio por acción (COP)", valor_por_accion, valor_por_accion*10, valor_por_accion*2, key="pre_precio")
-        pre_seed_dilucion = (pre_seed_acciones / (acciones_emitidas + pre_seed_acciones)) * 100 if pre_seed_acciones > 0 else 0
-        st.metric("Dilución", f"{pre_seed_dilucion:.1f}%")
-        st.metric("Capital", f"${pre_seed_acciones * pre_seed_precio:,.0f}")
-
-    with col_seed:
-        st.markdown("**🌱 Seed**")
-        max_seed = acciones_totales//3
-        default_seed = min(15000, max_seed)
-        seed_acciones = st.number_input("Acciones a emitir", 0, max_seed, default_seed, key="seed")
-        seed_precio = st.number_input("Precio por acción (COP)", pre_seed_precio, pre_seed_precio*5, pre_seed_precio*2, key="seed_precio")
-        acciones_post_pre = acciones_emitidas + pre_seed_acciones
-        seed_dilucion = (seed_acciones / (acciones_post_pre + seed_acciones)) * 100 if seed_acciones > 0 else 0
-        st.metric("Dilución", f"{seed_dilucion:.1f}%")
-        st.metric("Capital", f"${seed_acciones * seed_precio:,.0f}")
-
-    with col_a:
-        st.markdown("**🚀 Serie A**")
-        max_serie_a = acciones_totales//2
-        default_serie_a = min(20000, max_serie_a)
-        a_acciones = st.number_input("Acciones a emitir", 0, max_serie_a, default_serie_a, key="serie_a")
-        a_precio = st.number_input("Precio por acción (COP)", seed_precio, seed_precio*5, seed_precio*3, key="a_precio")
-        acciones_post_seed = acciones_post_pre + seed_acciones
-        a_dilucion = (a_acciones / (acciones_post_seed + a_acciones)) * 100 if a_acciones > 0 else 0
-        st.metric("Dilución", f"{a_dilucion:.1f}%")
-        st.metric("Capital", f"${a_acciones * a_precio:,.0f}")
+    proyeccion = proyectar_rondas(acciones_emitidas, acciones_totales, rondas, participaciones)
+
+    if not proyeccion.rondas.empty:
+        tabla_rondas = proyeccion.rondas[[
+            'ronda', 'acciones_nuevas', 'precio_por_accion', 'capital', 'valoracion_pre_money',
+            'dilucion_ronda_%', 'dilucion_acumulada_%', 'acciones_totales', 'porcentaje_autorizado_usado'
+        ]].copy()
+        tabla_rondas.columns = ['Ronda', 'Acciones', 'Precio', 'Capital', 'Pre-money', 'Dilución %',
+                                'Dilución Acumulada %', 'Acciones Emitidas', '% Autorizado']
+        st.dataframe(tabla_rondas.round(1), use_container_width=True, hide_index=True)
+
+    ronda_excedida = proyeccion.ronda_agota_autorizado
+    if ronda_excedida:
+        st.error(f"❌ **{ronda_excedida}** supera el capital autorizado: habría que reformar estatutos antes de emitir.")
 
     # Resumen final
-    acciones_finales = acciones_emitidas + pre_seed_acciones + seed_acciones + a_acciones
+    acciones_finales = int(proyeccion.rondas['acciones_totales'].iloc[-1]) if len(proyeccion) else acciones_emitidas
     acciones_restantes = acciones_totales - acciones_finales
 
     st.markdown("##### 📊 **Resumen Final**")
@@ -1737,8 +2178,12 @@ def mostrar_proyeccion_dilucion(acciones_totales, acciones_emitidas, valor_por_a
         st.metric("🎯 % Aún Disponible", f"{100-porcentaje_usado:.1f}%")
 
     with col_final3:
-        dilucion_total_fundadores = ((pre_seed_dilucion + seed_dilucion + a_dilucion) / 100) * 60  # Asumiendo 60% inicial
-        st.metric("😱 Dilución Total Fundadores", f"{dilucion_total_fundadores:.1f}%")
+        # Los fundadores conservan su participación multiplicada por la retención acumulada
+        participacion_fundadores = porcentaje_fundadores * (1 - proyeccion.dilucion_total / 100)
+        dilucion_total_fundadores = porcentaje_fundadores - participacion_fundadores
+        st.metric("😱 Dilución Total Fundadores", f"{dilucion_total_fundadores:.1f}%",
+                  help=f"De {porcentaje_fundadores:.1f}% a {participacion_fundadores:.1f}% "
+                       f"(dilución relativa {proyeccion.dilucion_total:.1f}%)")
 
         if dilucion_total_fundadores > 40:
             st.error("❌ Dilución excesiva")
@@ -1747,6 +2192,139 @@ def mostrar_proyeccion_dilucion(acciones_totales, acciones_emitidas, valor_por_a
         else:
             st.success("✅ Dilución manejable")
 
+    if cap is not None and len(proyeccion):
+        with st.expander("👥 **Participación proyectada por socio y clase de acción**"):
+            final = proyeccion.participacion_final()
+            tabla_socios = cap.df[['nombre', 'categoria']].copy()
+            tabla_socios['Hoy %'] = cap.df['equity_total'].round(2)
+            for i, etiqueta in enumerate(['Ordinarias %', 'Preferenciales %', 'Options %', 'Phantom %', 'Vesting %']):
+                tabla_socios[etiqueta] = final[:, i].round(2)
+            tabla_socios['Final %'] = final.sum(axis=1).round(2)
+            st.dataframe(tabla_socios, use_container_width=True, hide_index=True)
+
+def pagina_socios(cap):
+    """Filtros, orden y paginación de la lista de socios; devuelve las posiciones de la página visible"""
+    col_lista1, col_lista2, col_lista3, col_lista4, col_lista5 = st.columns([3, 2, 2, 2, 2])
+    with col_lista1:
+        texto = st.text_input("🔎 Buscar por nombre o rol", key="ui_socios_busqueda")
+    with col_lista2:
+        categoria = st.selectbox("🏷️ Categoría", ['Todos'] + list(cap.por_categoria.index), key="ui_socios_categoria")
+    with col_lista3:
+        dedicacion = st.selectbox("⏰ Dedicación", ['Todos'] + DEDICACIONES, key="ui_socios_dedicacion")
+    with col_lista4:
+        proteccion = st.selectbox("🛡️ Protección", ['Todos', 'Protegidos', 'Sin protección'],
+                                  key="ui_socios_proteccion")
+    with col_lista5:
+        orden = st.selectbox("↕️ Ordenar por", list(ORDENES_SOCIOS), key="ui_socios_orden")
+
+    filtros = (
+        texto,
+        None if categoria == 'Todos' else categoria,
+        None if dedicacion == 'Todos' else dedicacion,
+        None if proteccion == 'Todos' else proteccion == 'Protegidos',
+        orden,
+    )
+    # Solo se recalcula si cambian los datos o los filtros: cambiar de página no depende del tamaño del equipo
+    posiciones = cache_cap_table().obtener_o_calcular(
+        ('lista_socios', huella_sesion()) + filtros,
+        lambda: filtrar_socios(cap.df, *filtros)
+    )
+
+    col_pag1, col_pag2, col_pag3 = st.columns([2, 2, 4])
+    with col_pag1:
+        tamano = st.selectbox("📄 Socios por página", TAMANOS_PAGINA_SOCIOS, key="ui_socios_tamano_pagina")
+    total_paginas = max(1, -(-len(posiciones) // tamano))
+    # Volver a la primera página al cambiar los filtros o el tamaño de página
+    if st.session_state.get('filtros_lista_socios') != filtros + (tamano,):
+        st.session_state.filtros_lista_socios = filtros + (tamano,)
+        st.session_state.ui_socios_pagina = 1
+    elif st.session_state.get('ui_socios_pagina', 1) > total_paginas:
+        st.session_state.ui_socios_pagina = total_paginas
+    with col_pag2:
+        numero = st.number_input(f"Página (de {total_paginas})", min_value=1, max_value=total_paginas, step=1,
+                                 key="ui_socios_pagina")
+    desde = (numero - 1) * tamano
+    pagina = posiciones[desde:desde + tamano]
+    with col_pag3:
+        st.write("")
+        if len(posiciones):
+            st.caption(f"Mostrando {desde + 1:,}–{desde + len(pagina):,} de {len(posiciones):,} socios"
+                       + (f" (filtrados de {len(cap.df):,})" if len(posiciones) < len(cap.df) else ""))
+        else:
+            st.caption(f"Ningún socio coincide con los filtros ({len(cap.df):,} registrados)")
+    return pagina
+
+def aplicar_edicion_masiva(cambios):
+    """Validar y aplicar cambios {posición: {campo: valor}}: todos o ninguno"""
+    resultado = preparar_edicion(st.session_state.socios, cambios)
+    if not resultado.valido:
+        st.error(f"❌ {len(resultado.errores):,} errores: no se aplicó ningún cambio")
+        nombres = st.session_state.socios.columna('nombre')
+        errores = pd.DataFrame(
+            [(nombres[posicion] if posicion < len(nombres) else f"#{posicion + 1}", campo, mensaje)
+             for posicion, campo, mensaje in resultado.errores[:MAXIMO_ERRORES_VISIBLES]],
+            columns=['Socio', 'Campo', 'Error']
+        )
+        st.dataframe(errores, use_container_width=True, hide_index=True)
+        return
+    if not len(resultado):
+        st.info("ℹ️ Los valores nuevos son iguales a los actuales: no hay nada que aplicar.")
+        return
+    actualizar_socios(resultado.registros)
+    st.toast(f"✅ {len(resultado):,} socios actualizados")
+    st.rerun()
+
+def edicion_masiva(cap):
+    """Grilla tipo hoja de cálculo y operaciones en lote sobre muchos socios"""
+    if not st.toggle("🧮 **Edición masiva**", key="ui_edicion_masiva",
+                     help="Editar varios socios a la vez; los cambios se validan y aplican juntos"):
+        return
+
+    col_masiva1, col_masiva2 = st.columns([2, 3])
+    with col_masiva1:
+        categoria = st.selectbox("🏷️ Socios a editar", ['Todos'] + list(cap.por_categoria.index),
+                                 key="ui_masiva_categoria")
+    filtros = ('', None if categoria == 'Todos' else categoria, None, None, 'Orden de registro')
+    posiciones = cache_cap_table().obtener_o_calcular(
+        ('lista_socios', huella_sesion()) + filtros,
+        lambda: filtrar_socios(cap.df, *filtros)
+    )
+    with col_masiva2:
+        st.write("")
+        st.caption(f"{len(posiciones):,} socios • los cambios se aplican todos juntos o ninguno si alguno no es válido")
+
+    tab_grilla, tab_lote = st.tabs(["📝 Grilla", "⚡ Operación en lote"])
+
+    with tab_grilla:
+        vista = cap.df[COLUMNAS_EDITABLES].iloc[posiciones].reset_index(drop=True)
+        vista = vista.astype({c: object for c in ['rol', 'categoria', 'dedicacion', 'vesting_schedule']})
+        # La clave cambia con los datos y el filtro: tras aplicar, la grilla vuelve a partir de los valores guardados
+        clave_editor = f"editor_masivo_{st.session_state.socios_version}_{categoria}"
+        with st.form("form_edicion_masiva"):
+            st.data_editor(vista, key=clave_editor, num_rows="fixed", hide_index=True, use_container_width=True,
+                           column_config=COLUMNAS_GRILLA_MASIVA)
+            aplicar = st.form_submit_button("💾 **Aplicar cambios**", type="primary")
+        if aplicar:
+            filas_editadas = st.session_state[clave_editor]['edited_rows']
+            aplicar_edicion_masiva({int(posiciones[int(fila)]): valores for fila, valores in filas_editadas.items()})
+
+    with tab_lote:
+        with st.form("form_edicion_lote"):
+            col_lote1, col_lote2 = st.columns(2)
+            with col_lote1:
+                campo = st.selectbox("Campo", COLUMNAS_EDITABLES[1:],
+                                     format_func=lambda c: COLUMNAS_GRILLA_MASIVA[c]['label'])
+            with col_lote2:
+                valor = st.text_input("Nuevo valor", help="Números con punto decimal, sí/no para casillas y fechas AAAA-MM-DD")
+            aplicar_lote = st.form_submit_button(f"⚡ **Aplicar a {len(posiciones):,} socios**", type="primary")
+        if aplicar_lote:
+            try:
+                cambios = cambios_en_lote(posiciones, campo, valor)
+            except ErrorCampo as e:
+                st.error(f"❌ {COLUMNAS_GRILLA_MASIVA[campo]['label']}: {e}")
+            else:
+                aplicar_edicion_masiva(cambios)
+
 def socios_management_section():
     st.markdown('<h2 class="section-header">👥 Gestión de Socios</h2>', unsafe_allow_html=True)
     
@@ -1786,7 +2364,7 @@ def socios_management_section():
         with col_edit1:
             if st.button("💾 **Guardar Cambios**", type="primary", use_container_width=True):
                 if datos_formulario['nombre'] and datos_formulario['equity_total'] > 0:
-                    st.session_state.socios[socio_index] = datos_formulario
+                    actualizar_socio(socio_index, datos_formulario)
                     st.session_state.edit_mode = False
                     st.session_state.editing_socio = None
                     st.success(f"✅ Cambios guardados para {datos_formulario['nombre']}!")
@@ -1810,7 +2388,7 @@ def socios_management_section():
             
             if st.button("➕ **Agregar Socio**", type="primary", use_container_width=True):
                 if datos_formulario['nombre'] and datos_formulario['equity_total'] > 0:
-                    st.session_state.socios.append(datos_formulario)
+                    agregar_socio(datos_formulario)
                     st.success(f"🎉 ¡{datos_formulario['nombre']} agregado exitosamente!")
                     st.balloons()
                     st.rerun()
@@ -1821,10 +2399,15 @@ def socios_management_section():
     if st.session_state.socios:
         st.markdown('<h3 class="section-header">📋 Socios Registrados</h3>', unsafe_allow_html=True)
         
-        # Mostrar resumen visual
-        for i, socio in enumerate(st.session_state.socios):
-            equity_total = (socio['acciones_ordinarias'] + socio['acciones_preferenciales'] + socio['stock_options'] +
-                          socio.get('phantom_equity', 0) + socio.get('acciones_vesting', 0))
+        cap = obtener_cap_table()
+        if not st.session_state.edit_mode:
+            edicion_masiva(cap)
+        pagina = pagina_socios(cap)
+        equity_totales = cap.df['equity_total'].to_numpy()
+        for i in pagina:
+            i = int(i)
+            socio = st.session_state.socios[i]
+            equity_total = equity_totales[i]
             
             # Destacar si está en modo edición
             is_editing = st.session_state.edit_mode and st.session_state.editing_socio == i
@@ -1859,7 +2442,7 @@ def socios_management_section():
                                 st.rerun()
                         with col_btn2:
                             if st.button(f"🗑️", key=f"delete_{i}", help=f"Eliminar {socio['nombre']}"):
-                                st.session_state.socios.pop(i)
+                                eliminar_socio(i)
                                 st.success(f"✅ {socio['nombre']} eliminado!")
                                 st.rerun()
                     else:
@@ -1880,6 +2463,98 @@ def socios_management_section():
         if st.button("🎯 **¿Quieres ver un ejemplo?** Importa datos de muestra"):
             st.info("💡 Ve a la pestaña **'Export/Import'** y carga el archivo **'ejemplo_startup.json'** para ver una startup completa!")
 
+    if len(st.session_state.libro_eventos):
+        historial_cap_table()
+
+def cap_table_en(libro, fecha):
+    """Equity total por socio en una fecha del historial (None si no había socios)"""
+    socios_fecha = libro.socios_en(fecha)
+    if not socios_fecha:
+        return None
+    vista = calcular_cap_table(socios_fecha).df[['nombre', 'categoria', 'equity_total']]
+    vista = vista.sort_values('equity_total', ascending=False)
+    vista.columns = ['Socio', 'Categoría', 'Equity Total %']
+    return vista.round(2)
+
+def memo_historial(clave, calcular):
+    """Vista del historial memoizada en la sesión hasta que el libro registre otro evento"""
+    libro = st.session_state.libro_eventos
+    version = (id(libro), len(libro))
+    memo = st.session_state.get('historial_memo')
+    if memo is None or memo[0] != version:
+        memo = (version, {})
+        st.session_state.historial_memo = memo
+    if clave not in memo[1]:
+        memo[1][clave] = calcular()
+    return memo[1][clave]
+
+def historial_cap_table():
+    """Historial de eventos, cap table en una fecha y movimientos de equity"""
+    libro = st.session_state.libro_eventos
+    hoy = datetime.now().date()
+
+    with st.expander("📜 **Historial del Cap Table**"):
+        st.caption(f"{len(libro):,} eventos registrados • {libro.n_snapshots} estados compactados")
+
+        col_hist1, col_hist2 = st.columns(2)
+        with col_hist1:
+            fecha = st.date_input("📅 Cap table al", key="ui_historial_fecha", **por_defecto("ui_historial_fecha", value=hoy))
+            vista = memo_historial(('cap_table', fecha), lambda: cap_table_en(libro, fecha))
+            if vista is not None:
+                st.dataframe(vista, use_container_width=True, hide_index=True)
+            else:
+                st.info("ℹ️ No había socios en esa fecha.")
+
+        with col_hist2:
+            rango = st.date_input("🔍 Cambios entre", key="ui_historial_rango",
+                                  **por_defecto("ui_historial_rango", value=(hoy - timedelta(days=30), hoy)))
+            if len(rango) == 2:
+                cambios = memo_historial(('cambios', rango), lambda: libro.cambios_entre(*rango))
+                if len(cambios):
+                    cambios = cambios.drop(columns=['id']).round(2)
+                    cambios.columns = ['Socio', 'Cambio', 'Equity Antes %', 'Equity Después %', 'Variación']
+                    st.dataframe(cambios, use_container_width=True, hide_index=True)
+                else:
+                    st.info("ℹ️ Sin cambios en ese rango.")
+
+                eventos = memo_historial(('eventos', rango), lambda: libro.tabla_eventos(libro.eventos_entre(*rango)))
+                eventos = eventos.set_axis(['#', 'Fecha', 'Evento', 'Detalle'], axis=1)
+                st.dataframe(eventos.tail(MAXIMO_ERRORES_VISIBLES), use_container_width=True, hide_index=True)
+
+        if st.session_state.socios:
+            st.markdown("**🔁 Emitir o transferir equity**")
+            nombres = [f"{i + 1}. {n}" for i, n in enumerate(st.session_state.socios.columna('nombre'))]
+            clases = {
+                'acciones_ordinarias': "🗳️ Ordinarias",
+                'acciones_preferenciales': "👑 Preferenciales",
+                'stock_options': "📈 Stock Options",
+                'phantom_equity': "👻 Phantom Equity",
+                'acciones_vesting': "⏳ Acciones con Vesting",
+                'profit_sharing': "💰 Profit Sharing",
+                'warrants': "📜 Warrants",
+            }
+            with st.form("movimiento_equity"):
+                col_mov1, col_mov2, col_mov3, col_mov4 = st.columns(4)
+                with col_mov1:
+                    origen = st.selectbox("Desde", [None] + list(range(len(nombres))),
+                                          format_func=lambda i: "➕ Nueva emisión" if i is None else nombres[i])
+                with col_mov2:
+                    destino = st.selectbox("Hacia", range(len(nombres)), format_func=lambda i: nombres[i])
+                with col_mov3:
+                    campo = st.selectbox("Clase", list(clases), format_func=clases.get)
+                with col_mov4:
+                    cantidad = st.number_input("Cantidad (%)", min_value=0.0, max_value=100.0, value=1.0, step=0.1)
+                if st.form_submit_button("Registrar movimiento"):
+                    if origen == destino:
+                        st.error("❌ El origen y el destino deben ser distintos")
+                    else:
+                        try:
+                            mover_equity(origen, destino, campo, cantidad)
+                            st.success("✅ Movimiento registrado en el historial")
+                            st.rerun()
+                        except ValueError as e:
+                            st.error(f"❌ {e}")
+
 def equity_analysis_section():
     st.markdown('<h2 class="section-header">📈 Análisis de Equity</h2>', unsafe_allow_html=True)
     
@@ -1888,14 +2563,15 @@ def equity_analysis_section():
         return
     
     # Calcular totales
-    df = pd.DataFrame(st.session_state.socios)
-    
-    total_ordinarias = df['acciones_ordinarias'].sum()
-    total_preferenciales = df['acciones_preferenciales'].sum()
-    total_options = df['stock_options'].sum()
-    total_phantom = df['phantom_equity'].sum() if 'phantom_equity' in df.columns else 0
-    total_vesting = df['acciones_vesting'].sum() if 'acciones_vesting' in df.columns else 0
-    total_equity = total_ordinarias + total_preferenciales + total_options + total_phantom + total_vesting
+    cap = obtener_cap_table()
+    df = cap.df
+
+    total_ordinarias = cap.totales['acciones_ordinarias']
+    total_preferenciales = cap.totales['acciones_preferenciales']
+    total_options = cap.totales['stock_options']
+    total_phantom = cap.totales['phantom_equity']
+    total_vesting = cap.totales['acciones_vesting']
+    total_equity = cap.totales['equity_total']
     
     # Métricas principales
     col1, col2, col3, col4, col5 = st.columns(5)
@@ -1924,69 +2600,54 @@ def equity_analysis_section():
     
     with col_chart1:
         st.markdown("**📊 Distribución por Socio (Equity Total)**")
-        df['equity_total'] = (df['acciones_ordinarias'] + df['acciones_preferenciales'] + df['stock_options'] +
-                             (df['phantom_equity'] if 'phantom_equity' in df.columns else 0) +
-                             (df['acciones_vesting'] if 'acciones_vesting' in df.columns else 0))
-        fig_pie = px.pie(df, values='equity_total', names='nombre',
-                        title="Distribución de Equity Total")
-        st.plotly_chart(fig_pie, use_container_width=True)
+        with medir('grafico_distribucion_equity', 'grafico'):
+            porciones = cache_cap_table().obtener_o_calcular(
+                ('distribucion_socios', huella_sesion(), MAXIMO_PORCIONES_GRAFICO),
+                lambda: distribucion_por_socio(df, MAXIMO_PORCIONES_GRAFICO)
+            )
+            fig_pie = figura_torta('distribucion_equity', porciones, "Distribución de Equity Total")
+            st.plotly_chart(fig_pie, use_container_width=True)
+        if len(df) > MAXIMO_PORCIONES_GRAFICO:
+            st.caption(f"Se muestran los {MAXIMO_PORCIONES_GRAFICO - 1} socios con más equity; "
+                       "el resto se agrupa en 'Otros'.")
     
     with col_chart2:
         st.markdown("**📈 Distribución por Tipo de Acción**")
-        equity_types = {
-            'Acciones Ordinarias': total_ordinarias,
-            'Phantom Equity': total_phantom,
-            'Acciones con Vesting': total_vesting,
-            'Stock Options': total_options,
-            'Disponible': max(0, 100 - total_equity)
-        }
-        fig_pie2 = px.pie(values=list(equity_types.values()), names=list(equity_types.keys()),
-                         title="Distribución por Tipo de Equity")
-        st.plotly_chart(fig_pie2, use_container_width=True)
+        with medir('grafico_tipos_equity', 'grafico'):
+            fig_pie2 = figura_torta('tipos_equity', distribucion_por_tipo(cap.totales), "Distribución por Tipo de Equity")
+            st.plotly_chart(fig_pie2, use_container_width=True)
     
     # Análisis por categoría
     st.markdown("**🏷️ Análisis por Categoría**")
-    category_analysis = df.groupby('categoria').agg({
-        'acciones_ordinarias': 'sum',
-        'acciones_preferenciales': 'sum',
-        'stock_options': 'sum',
-        **{col: 'sum' for col in ['phantom_equity', 'acciones_vesting'] if col in df.columns},
-        'nombre': 'count'
-    }).round(2)
-
-    # Renombrar columnas dinámicamente
-    new_columns = ['Ordinarias %', 'Preferenciales %', 'Options %']
-    if 'phantom_equity' in df.columns:
-        new_columns.append('Phantom %')
-    if 'acciones_vesting' in df.columns:
-        new_columns.append('Vesting %')
-    new_columns.append('Cantidad')
-
-    category_analysis.columns = new_columns
-
-    # Calcular total dinámicamente
-    total_cols = [col for col in category_analysis.columns if col.endswith('%') and col != 'Total %']
-    category_analysis['Total %'] = category_analysis[total_cols].sum(axis=1)
+    category_analysis = construir_analisis_categorias(cap)
     st.dataframe(category_analysis, use_container_width=True)
     
+    cronograma_vesting(cap)
+
     # Simulación de dilución
     st.markdown('<h3 class="section-header">💧 Simulador de Dilución</h3>', unsafe_allow_html=True)
 
     col_sim1, col_sim2, col_sim3 = st.columns(3)
 
     with col_sim1:
-        nueva_emision = st.number_input("📈 Nueva emisión (%)", min_value=0.0, max_value=50.0, value=20.0, step=1.0)
+        nueva_emision = st.number_input("📈 Nueva emisión (%)", min_value=0.0, max_value=50.0, step=1.0,
+                                        key="ui_nueva_emision", **por_defecto("ui_nueva_emision", value=20.0))
     with col_sim2:
-        tipo_emision = st.selectbox("🏷️ Tipo de emisión", ['Inversores', 'Pool empleados', 'Mixto'])
+        tipo_emision = st.selectbox("🏷️ Tipo de emisión", ['Inversores', 'Pool empleados', 'Mixto'],
+                                    key="ui_tipo_emision")
     with col_sim3:
         if st.button("🧮 Calcular Dilución"):
             calcular_dilucion(df, nueva_emision)
 
+    simulador_antidilucion(cap)
+
+    simulador_waterfall(cap)
+
     # Simulador de Derechos Pro-rata
     st.markdown('<h3 class="section-header">🎯 Simulador de Derechos Pro-rata</h3>', unsafe_allow_html=True)
 
     # Verificar si hay socios con derechos pro-rata
-    socios_con_prorata = df[df.get('derechos_prorata', False) == True] if 'derechos_prorata' in df.columns else pd.DataFrame()
+    socios_con_prorata = df[df['derechos_prorata']]
 
     if not socios_con_prorata.empty:
         st.info(f"📊 **{len(socios_con_prorata)} socios tienen derechos pro-rata configurados**")
@@ -2000,15 +2661,17 @@ def equity_analysis_section():
             monto_recaudar = st.number_input(
                 "💰 **Monto a recaudar (USD)**",
                 min_value=10000, max_value=10000000,
-                value=500000, step=50000,
-                help="¿Cuánto dinero quiere recaudar la empresa?"
+                step=50000, **por_defecto("ui_monto_recaudar", value=500000),
+                help="¿Cuánto dinero quiere recaudar la empresa?",
+                key="ui_monto_recaudar"
             )
 
             valoracion_pre_money = st.number_input(
                 "📊 **Valoración pre-money (USD)**",
                 min_value=100000, max_value=50000000,
-                value=2000000, step=100000,
-                help="¿Cuál es la valoración de la empresa ANTES de la nueva inversión?"
+                step=100000, **por_defecto("ui_valoracion_pre_money", value=2000000),
+                help="¿Cuál es la valoración de la empresa ANTES de la nueva inversión?",
+                key="ui_valoracion_pre_money"
             )
 
             # Calcular valoración post-money y porcentaje de dilución
@@ -2025,50 +2688,66 @@ def equity_analysis_section():
 
             incluir_en_prorata = st.multiselect(
                 "¿Qué tipo de emisión es?",
-                [
-                    "Emisiones para empleados (stock options)",
-                    "Conversión de deuda en acciones",
-                    "Emisiones de acciones preferenciales",
-                    "Fusiones y adquisiciones",
-                    "Spin-offs o escisiones"
-                ],
-                help="Selecciona si esta emisión tiene exclusiones para algunos socios"
+                TIPOS_EMISION_PRORATA,
+                help="Selecciona si esta emisión tiene exclusiones para algunos socios",
+                key="ui_tipos_emision_prorata"
             )
 
-            # Determinar qué socios pueden ejercer
-            socios_elegibles = socios_con_prorata.copy()
-
-            # Filtrar por exclusiones
-            for _, socio in socios_elegibles.iterrows():
-                exclusiones = socio.get('exclusiones_prorata', [])
-                for exclusion in incluir_en_prorata:
-                    if exclusion in exclusiones:
-                        socios_elegibles = socios_elegibles.drop(socio.name)
-                        break
-
-            # Filtrar por participación mínima
-            for _, socio in socios_elegibles.iterrows():
-                equity_total = (socio['acciones_ordinarias'] + socio['acciones_preferenciales'] + socio['stock_options'] +
-                              socio.get('phantom_equity', 0) + socio.get('acciones_vesting', 0))
-                participacion_minima = socio.get('participacion_minima_prorata', 1.0)
-                if equity_total < participacion_minima:
-                    socios_elegibles = socios_elegibles.drop(socio.name)
+            # Determinar qué socios pueden ejercer (exclusiones y participación mínima)
+            elegibilidad = evaluar_elegibilidad_prorata(socios_con_prorata, incluir_en_prorata)
+            socios_elegibles = socios_con_prorata[elegibilidad['elegible']]
 
             st.metric("✅ Socios elegibles", len(socios_elegibles))
 
+            excluidos = elegibilidad[~elegibilidad['elegible']]
+            if not excluidos.empty:
+                with st.expander(f"🚫 Socios excluidos ({len(excluidos)})"):
+                    tabla_excluidos = socios_con_prorata.loc[excluidos.index, ['nombre', 'categoria']].copy()
+                    tabla_excluidos['Motivo'] = excluidos['motivo'].map(DESCRIPCION_MOTIVOS)
+                    st.dataframe(tabla_excluidos, use_container_width=True, hide_index=True)
+
             if len(socios_elegibles) > 0:
                 porcentaje_ejercicio = st.slider(
                     "💪 **¿Qué % de socios ejercerán sus derechos?**",
-                    min_value=0, max_value=100, value=80, step=10,
-                    help="En la realidad, no todos los socios ejercen sus derechos"
+                    min_value=0, max_value=100, step=10, **por_defecto("ui_porcentaje_ejercicio", value=80),
+                    help="En la realidad, no todos los socios ejercen sus derechos",
+                    key="ui_porcentaje_ejercicio"
                 )
 
+                col_mc1, col_mc2 = st.columns(2)
+                with col_mc1:
+                    n_simulaciones = st.selectbox(
+                        "🎲 Simulaciones Monte Carlo", [1_000, 10_000, 100_000], **por_defecto("ui_n_simulaciones_prorata", index=2),
+                        format_func=lambda n: f"{n:,}", key="ui_n_simulaciones_prorata"
+                    )
+                with col_mc2:
+                    semilla = st.number_input(
+                        "🌱 Semilla", min_value=0, step=1, **por_defecto("ui_semilla_prorata", value=42),
+                        help="La misma semilla reproduce exactamente la simulación",
+                        key="ui_semilla_prorata"
+                    )
+
+                with st.expander("🎚️ Probabilidad de ejercicio por socio"):
+                    probabilidades_base = pd.DataFrame({
+                        'Socio': socios_elegibles['nombre'],
+                        'Prob. Ejercicio %': float(porcentaje_ejercicio),
+                    })
+                    probabilidades_editadas = st.data_editor(
+                        probabilidades_base,
+                        column_config={
+                            'Prob. Ejercicio %': st.column_config.NumberColumn(min_value=0, max_value=100, step=5)
+                        },
+                        disabled=['Socio'], hide_index=True, use_container_width=True,
+                        key="probabilidades_prorata"
+                    )
+                probabilidades = probabilidades_editadas['Prob. Ejercicio %'].fillna(porcentaje_ejercicio).to_numpy() / 100
+
         # Botón de simulación
         if st.button("🚀 **Simular Emisión con Derechos Pro-rata**", type="primary"):
             if len(socios_elegibles) > 0:
                 simular_emision_prorata(
-                    df, socios_elegibles, monto_recaudar,
-                    valoracion_pre_money, porcentaje_ejercicio
+                    socios_elegibles, monto_recaudar, valoracion_pre_money,
+                    probabilidades, n_simulaciones, int(semilla)
                 )
             else:
                 st.warning("⚠️ No hay socios elegibles para ejercer derechos pro-rata en este tipo de emisión.")
@@ -2088,60 +2767,32 @@ def equity_analysis_section():
             6. Regresa aquí para simular emisiones
             """)
 
-def simular_emision_prorata(df, socios_elegibles, monto_recaudar, valoracion_pre_money, porcentaje_ejercicio):
-    """Simular emisión de acciones con derechos pro-rata"""
+    espacio_escenarios(cap)
+
+@cronometrado
+def simular_emision_prorata(socios_elegibles, monto_recaudar, valoracion_pre_money, probabilidades,
+                            n_simulaciones, semilla):
+    """Simular por Monte Carlo la emisión de acciones con derechos pro-rata"""
     st.markdown("### 🚀 **Resultados de la Simulación Pro-rata**")
 
     # Calcular parámetros básicos
     valoracion_post_money = valoracion_pre_money + monto_recaudar
     porcentaje_nueva_emision = (monto_recaudar / valoracion_post_money) * 100
 
-    # Crear tabla de resultados
-    resultados = []
-
-    total_ejercido = 0
-    total_no_ejercido = 0
-
-    for _, socio in socios_elegibles.iterrows():
-        equity_actual = socio['acciones_ordinarias'] + socio['acciones_preferenciales'] + socio['stock_options']
-
-        # Calcular derecho pro-rata
-        derecho_porcentaje = equity_actual * (porcentaje_nueva_emision / 100)
-        derecho_monto = (equity_actual / 100) * monto_recaudar
-
-        # Simular si ejerce o no (basado en el porcentaje de ejercicio)
-        import random
-        random.seed(hash(socio['nombre']))  # Para consistencia en la simulación
-        ejerce = random.random() < (porcentaje_ejercicio / 100)
+    simulacion = simular_montecarlo_prorata(
+        socios_elegibles['equity_acciones'].to_numpy(), probabilidades, monto_recaudar,
+        porcentaje_nueva_emision, n_simulaciones=n_simulaciones, semilla=semilla
+    )
+    resumen = simulacion.resumen()
+    capital = resumen['capital_insiders']
+    brecha = resumen['brecha_externa']
+    total_no_ejercido = brecha['media']
+    porcentaje_ejercido = resumen['porcentaje_ejercido']
 
-        if ejerce:
-            equity_final = equity_actual  # Mantiene su porcentaje
-            dilución = 0
-            costo = derecho_monto
-            status = "✅ Ejerció"
-            total_ejercido += derecho_monto
-        else:
-            # Sufre dilución
-            factor_dilucion = 100 / (100 + porcentaje_nueva_emision)
-            equity_final = equity_actual * factor_dilucion
-            dilución = equity_actual - equity_final
-            costo = 0
-            status = "❌ No ejerció"
-            total_no_ejercido += derecho_monto
-
-        resultados.append({
-            'Socio': socio['nombre'],
-            'Categoria': socio['categoria'],
-            'Equity Inicial %': round(equity_actual, 2),
-            'Derecho ($)': f"${derecho_monto:,.0f}",
-            'Status': status,
-            'Equity Final %': round(equity_final, 2),
-            'Dilución %': round(dilución, 2),
-            'Costo ($)': f"${costo:,.0f}" if costo > 0 else "N/A"
-        })
+    st.caption(f"🎲 {n_simulaciones:,} simulaciones · semilla {semilla}")
 
     # Mostrar tabla de resultados
-    df_resultados = pd.DataFrame(resultados)
+    df_resultados = construir_tabla_simulacion_prorata(socios_elegibles, simulacion)
     st.dataframe(df_resultados, use_container_width=True, hide_index=True)
 
     # Métricas de resumen
@@ -2149,19 +2800,30 @@ def simular_emision_prorata(df, socios_elegibles, monto_recaudar, valoracion_pre
     col_res1, col_res2, col_res3, col_res4 = st.columns(4)
 
     with col_res1:
-        st.metric("💰 Total ejercido", f"${total_ejercido:,.0f}")
+        st.metric("💰 Total ejercido (media)", f"${capital['media']:,.0f}",
+                  help=f"P5: ${capital['p5']:,.0f} · P50: ${capital['p50']:,.0f} · P95: ${capital['p95']:,.0f}")
 
     with col_res2:
-        st.metric("💸 Disponible para externos", f"${total_no_ejercido:,.0f}")
+        st.metric("💸 Disponible para externos (media)", f"${brecha['media']:,.0f}",
+                  help=f"P5: ${brecha['p5']:,.0f} · P50: ${brecha['p50']:,.0f} · P95: ${brecha['p95']:,.0f}")
 
     with col_res3:
-        socios_que_ejercieron = len([r for r in resultados if "✅" in r['Status']])
-        st.metric("✅ Socios que ejercieron", f"{socios_que_ejercieron}/{len(resultados)}")
+        st.metric("✅ Socios que ejercen (media)", f"{resumen['socios_que_ejercen']:.1f}/{len(simulacion.equity_actual)}")
 
     with col_res4:
-        porcentaje_ejercido = (total_ejercido / monto_recaudar) * 100 if monto_recaudar > 0 else 0
         st.metric("📊 % Ejercido", f"{porcentaje_ejercido:.1f}%")
 
+    # Distribución del capital aportado por los socios actuales
+    conteos, bordes = np.histogram(simulacion.capital_insiders, bins=40)
+    with medir('grafico_simulacion_prorata', 'grafico'):
+        import plotly.graph_objects as go
+        fig_hist = go.Figure(go.Bar(x=(bordes[:-1] + bordes[1:]) / 2, y=conteos, width=np.diff(bordes)))
+        fig_hist.update_layout(
+            title="Distribución del capital aportado por socios actuales",
+            xaxis_title="Capital ejercido (USD)", yaxis_title="Simulaciones", height=350
+        )
+        st.plotly_chart(fig_hist, use_container_width=True)
+
     # Análisis de impacto
     st.markdown("### 📈 **Análisis de Impacto**")
 
@@ -2197,19 +2859,274 @@ def simular_emision_prorata(df, socios_elegibles, monto_recaudar, valoracion_pre
            - Ofrecer pagos diferidos o por cuotas
         """)
 
+def cronograma_vesting(cap):
+    """Equity consolidado del equipo mes a mes"""
+    st.markdown('<h3 class="section-header">⏳ Cronograma de Vesting</h3>', unsafe_allow_html=True)
+
+    matriz = obtener_matriz_vesting()
+    hoy = datetime.now().date()
+
+    # Curvas por socio si son pocos, por categoría si son muchos
+    if len(cap.df) <= 12:
+        curvas = pd.DataFrame(matriz.equity_consolidado, index=matriz.nombres)
+    else:
+        curvas = matriz.curvas_por_categoria()
+    with medir('grafico_cronograma_vesting', 'grafico'):
+        import plotly.graph_objects as go
+        fig_vesting = go.Figure()
+        for nombre, valores in zip(curvas.index, curvas.to_numpy()):
+            fig_vesting.add_trace(go.Scatter(x=matriz.meses, y=valores, mode='lines', line_shape='hv', name=str(nombre)))
+        fig_vesting.add_vline(x=pd.Timestamp(hoy).timestamp() * 1000, line_dash="dash", annotation_text="Hoy")
+        fig_vesting.update_layout(
+            title="Equity consolidado por mes", xaxis_title="Mes", yaxis_title="Equity consolidado (%)", height=400
+        )
+        st.plotly_chart(fig_vesting, use_container_width=True)
+
+    col_vest1, col_vest2, col_vest3 = st.columns(3)
+    total_vesting = float(matriz.equity.sum())
+    consolidado = float(matriz.consolidado_hoy.sum())
+    with col_vest1:
+        st.metric("⏳ Equity sujeto a vesting", f"{total_vesting:.1f}%")
+    with col_vest2:
+        st.metric("✅ Consolidado hoy", f"{consolidado:.1f}%")
+    with col_vest3:
+        st.metric("🔒 Pendiente por consolidar", f"{total_vesting - consolidado:.1f}%")
+
+    with st.expander("📅 **Consultar consolidación en una fecha**"):
+        fecha_consulta = st.date_input(
+            "Fecha", min_value=matriz.meses[0].date(), max_value=matriz.meses[-1].date(),
+            **por_defecto("ui_fecha_vesting", value=hoy),
+            key="ui_fecha_vesting"
+        )
+        consulta = matriz.en(fecha_consulta).round(2)
+        consulta.columns = ['Socio', '% Consolidado', 'Equity Consolidado %', 'Equity Pendiente %']
+        st.dataframe(consulta, use_container_width=True, hide_index=True)
+
+def simulador_antidilucion(cap):
+    """Rondas con precio y ajustes antidilución de los socios protegidos"""
+    st.markdown('<h3 class="section-header">🛡️ Simulador Antidilución por Rondas</h3>', unsafe_allow_html=True)
+
+    socios_protegidos = int(cap.df['proteccion_antidilucion'].sum())
+    if socios_protegidos == 0:
+        st.info("ℹ️ Ningún socio tiene protección antidilución: las rondas diluyen a todos por igual.")
+
+    col_ad1, col_ad2 = st.columns([1, 2])
+    with col_ad1:
+        valoracion_referencia = st.number_input(
+            "📊 **Valoración de referencia (USD)**",
+            min_value=10000, step=100000,
+            **por_defecto("ui_valoracion_referencia",
+                          value=max(int(st.session_state.company_info.get('valuation', 0) or 0), 2000000)),
+            help="Valoración a la que se fijó el precio de conversión original de los socios",
+            key="ui_valoracion_referencia"
+        )
+        st.metric("🛡️ Socios protegidos", socios_protegidos)
+
+    with col_ad2:
+        rondas_base = pd.DataFrame({
+            'Ronda': ['Seed', 'Serie A'],
+            'Monto (USD)': [500000, 1000000],
+            'Pre-money (USD)': [3000000, 1500000],
+            'Fecha': [datetime.now().date(), datetime.now().date() + timedelta(days=365)],
+        })
+        rondas_editadas = st.data_editor(
+            rondas_base,
+            num_rows="dynamic", hide_index=True, use_container_width=True,
+            column_config={
+                'Monto (USD)': st.column_config.NumberColumn(min_value=0, step=50000, format="$%d"),
+                'Pre-money (USD)': st.column_config.NumberColumn(min_value=0, step=100000, format="$%d"),
+                'Fecha': st.column_config.DateColumn(),
+            },
+            key="rondas_antidilucion"
+        )
+
+    rondas = [
+        {
+            'nombre': str(fila['Ronda']) if pd.notna(fila['Ronda']) else '',
+            'monto': float(fila['Monto (USD)']) if pd.notna(fila['Monto (USD)']) else 0.0,
+            'valoracion_pre_money': float(fila['Pre-money (USD)']) if pd.notna(fila['Pre-money (USD)']) else 0.0,
+            'fecha': fila['Fecha'].isoformat() if pd.notna(fila['Fecha']) else None,
+        }
+        for fila in rondas_editadas.to_dict('records')
+    ]
+    resultado = obtener_rondas_antidilucion(rondas, valoracion_referencia)
+
+    if resultado.rondas.empty:
+        st.info("ℹ️ Agrega al menos una ronda con monto y valoración pre-money.")
+        return
+
+    resumen_rondas = resultado.rondas.copy()
+    resumen_rondas.columns = ['Ronda', 'Precio por acción', 'Acciones nuevas', 'Acciones de ajuste',
+                              'Socios ajustados', 'Acciones totales']
+    st.dataframe(resumen_rondas.round(2), use_container_width=True, hide_index=True)
+
+    if resultado.ajustes.empty:
+        st.success("✅ Ninguna ronda activa la protección antidilución (sin rondas a la baja sobre el umbral o protecciones vencidas).")
+    else:
+        ajustes = resultado.ajustes.copy()
+        ajustes.columns = ['Ronda', 'Socio', 'Mecanismo', 'Descuento %', 'Precio conversión anterior',
+                           'Precio conversión nuevo', 'Acciones adicionales']
+        st.markdown("**🛡️ Ajustes aplicados:**")
+        st.dataframe(ajustes.round(2), use_container_width=True, hide_index=True)
+
+    # Cap table post-rondas comparado con el actual
+    cap_post = resultado.cap_table.vista()
+    comparacion = cap_post.df[['nombre', 'categoria']].copy()
+    comparacion['Equity Actual %'] = pd.Series(cap.df['equity_acciones'].to_numpy()).reindex(comparacion.index).fillna(0).round(2)
+    comparacion['Equity Post-rondas %'] = cap_post.df['equity_acciones'].round(2)
+    comparacion['Cambio %'] = (comparacion['Equity Post-rondas %'] - comparacion['Equity Actual %']).round(2)
+    with st.expander("📋 **Cap table post-rondas**", expanded=True):
+        st.dataframe(comparacion, use_container_width=True, hide_index=True)
+        st.dataframe(construir_analisis_categorias(cap_post), use_container_width=True)
+
+def simulador_waterfall(cap):
+    """Distribución de una salida (venta de la empresa) entre los socios"""
+    st.markdown('<h3 class="section-header">💸 Waterfall de Salida</h3>', unsafe_allow_html=True)
+
+    valoracion_actual = max(int(st.session_state.company_info.get('valuation', 0) or 0), 2000000)
+
+    col_wf1, col_wf2, col_wf3 = st.columns(3)
+    with col_wf1:
+        valor_maximo = st.number_input(
+            "📈 **Salida máxima a graficar (USD)**",
+            min_value=100000, step=1000000, **por_defecto("ui_salida_maxima", value=valoracion_actual * 10),
+            key="ui_salida_maxima"
+        )
+    with col_wf2:
+        multiplo_preferencia = st.selectbox(
+            "🥇 Preferencia de liquidación", [1.0, 1.5, 2.0, 3.0],
+            format_func=lambda m: f"{m:g}x", key="ui_multiplo_preferencia",
+            help="Múltiplo de la inversión que cobran primero las acciones preferenciales"
+        )
+    with col_wf3:
+        participativas = st.checkbox(
+            "➕ Preferenciales participativas", key="ui_preferenciales_participativas",
+            help="Si se marca, cobran la preferencia Y además participan del remanente"
+        )
+
+    waterfall = obtener_waterfall(valor_maximo, valoracion_actual, multiplo_preferencia, participativas)
+
+    # Curva de pagos: por socio si son pocos, por categoría si son muchos
+    if len(cap.df) <= 12:
+        curvas = pd.DataFrame(waterfall.pagos, index=waterfall.nombres)
+    else:
+        curvas = waterfall.curvas_por_categoria()
+    with medir('grafico_waterfall', 'grafico'):
+        import plotly.graph_objects as go
+        fig_curvas = go.Figure()
+        for nombre, pagos in zip(curvas.index, curvas.to_numpy()):
+            fig_curvas.add_trace(go.Scatter(x=waterfall.salidas, y=pagos, mode='lines', name=str(nombre)))
+        fig_curvas.update_layout(
+            title="¿Cuánto recibe cada uno según el valor de salida?",
+            xaxis_title="Valor de salida (USD)", yaxis_title="Pago (USD)", height=450
+        )
+        st.plotly_chart(fig_curvas, use_container_width=True)
+
+    # ¿Quién recibe qué a $X?
+    valor_salida = st.slider(
+        "🎯 **¿Quién recibe qué con una salida de...? (USD)**",
+        min_value=0, max_value=int(valor_maximo),
+        **por_defecto("ui_valor_salida", value=min(valoracion_actual * 3, int(valor_maximo))),
+        step=max(int(valor_maximo) // 200, 1), key="ui_valor_salida"
+    )
+    distribucion = waterfall.distribucion_en(valor_salida)
+    distribucion.columns = ['Socio', 'Categoria', 'Pago Total', 'Preferencia', 'No Consolidado',
+                            'Consolidado', '% de la Salida']
+    for columna in ['Pago Total', 'Preferencia', 'No Consolidado', 'Consolidado']:
+        distribucion[columna] = distribucion[columna].map(lambda x: f"${x:,.0f}")
+    distribucion['% de la Salida'] = distribucion['% de la Salida'].round(1)
+    st.dataframe(distribucion, use_container_width=True, hide_index=True)
+
+    if waterfall.convierte[waterfall.indice_salida(valor_salida)]:
+        st.info("ℹ️ A este valor las preferenciales convierten a ordinarias: les paga más que su preferencia.")
+
 def calcular_dilucion(df, nueva_emision):
     st.markdown("**📊 Efectos de la Dilución:**")
 
-    factor_dilucion = 100 / (100 + nueva_emision)
-
-    df_diluido = df.copy()
-    df_diluido['equity_actual'] = df['acciones_ordinarias'] + df['acciones_preferenciales'] + df['stock_options']
-    df_diluido['equity_post_dilucion'] = df_diluido['equity_actual'] * factor_dilucion
-    df_diluido['perdida_equity'] = df_diluido['equity_actual'] - df_diluido['equity_post_dilucion']
+    df_diluido = calcular_dilucion_df(df, nueva_emision)
 
     cols_show = ['nombre', 'equity_actual', 'equity_post_dilucion', 'perdida_equity']
     st.dataframe(df_diluido[cols_show].round(2), use_container_width=True)
 
+@cronometrado
+def obtener_escenarios(cap, escenarios):
+    """Resultado de cada escenario memoizado por sus parámetros; los que faltan se evalúan juntos"""
+    cache = cache_cap_table()
+    huella = huella_sesion()
+    resultados = {nombre: cache.obtener(('escenario', huella, parametros)) for nombre, parametros in escenarios.items()}
+    pendientes = list(dict.fromkeys(escenarios[nombre] for nombre, r in resultados.items() if r is None))
+    if pendientes:
+        nuevos = dict(zip(pendientes, evaluar_escenarios(cap.df, pendientes)))
+        for parametros, resultado in nuevos.items():
+            cache.guardar(('escenario', huella, parametros), resultado)
+        resultados = {nombre: r if r is not None else nuevos[escenarios[nombre]] for nombre, r in resultados.items()}
+    return resultados
+
+def espacio_escenarios(cap):
+    """Planes de financiación con nombre, evaluados en lote y comparados socio por socio"""
+    st.markdown('<h3 class="section-header">🧪 Espacio de Escenarios</h3>', unsafe_allow_html=True)
+    st.caption("Cada fila es una ronda; las filas con el mismo nombre forman un escenario de varias rondas. "
+               "El pool de empleados no da derechos pro-rata.")
+
+    with st.form("form_escenarios"):
+        tabla = st.data_editor(
+            pd.DataFrame(st.session_state.escenarios, columns=COLUMNAS_ESCENARIOS),
+            column_config=COLUMNAS_GRILLA_ESCENARIOS, num_rows="dynamic", hide_index=True,
+            use_container_width=True, key=f"editor_escenarios_{st.session_state.escenarios_version}"
+        )
+        aplicar = st.form_submit_button("🧮 Comparar escenarios", type="primary")
+    if aplicar:
+        filas = []
+        for fila in tabla.to_dict('records'):
+            nombre = fila.get('escenario')
+            if isinstance(nombre, str) and nombre.strip():
+                filas.append(dict(
+                    {campo: 0.0 if pd.isna(fila.get(campo)) else float(fila[campo]) for campo in COLUMNAS_ESCENARIOS[1:]},
+                    escenario=nombre.strip()
+                ))
+        reemplazar_escenarios(filas)
+
+    escenarios = agrupar_escenarios(st.session_state.escenarios)
+    if not escenarios:
+        st.info("ℹ️ Agrega al menos una ronda con nombre de escenario para compararlos.")
+        return
+    resultados = obtener_escenarios(cap, escenarios)
+
+    resumen = tabla_resumen_escenarios(resultados)
+    resumen.columns = ['Rondas', 'Capital Total', 'Post-money Final', 'Dilución sin Pro-rata %',
+                       'Equity Fundadores %', 'Capital Socios Actuales', 'Capital Externo']
+    for columna in ['Capital Total', 'Post-money Final', 'Capital Socios Actuales', 'Capital Externo']:
+        resumen[columna] = resumen[columna].map(lambda x: f"${x:,.0f}")
+    st.markdown("**📋 Resumen por escenario**")
+    st.dataframe(resumen.round(2), use_container_width=True)
+
+    deltas = tabla_deltas_escenarios(cap.df, resultados)
+    st.markdown("**👥 Equity final y cambio por socio (Δ en puntos porcentuales)**")
+    if len(deltas) > MAXIMO_SOCIOS_ESCENARIOS:
+        st.caption(f"Se muestran los {MAXIMO_SOCIOS_ESCENARIOS} socios con más equity de {len(deltas):,}; "
+                   "el CSV trae todos.")
+    visibles = deltas.nlargest(MAXIMO_SOCIOS_ESCENARIOS, 'equity_actual', keep='first')
+    st.dataframe(visibles.round(2), use_container_width=True, hide_index=True)
+
+    col_esc1, col_esc2 = st.columns(2)
+    with col_esc1:
+        st.download_button(
+            label="⬇️ Descargar comparación (CSV)",
+            data=cache_cap_table().obtener_o_calcular(
+                ('escenarios_csv', huella_sesion(), tuple(escenarios.items())),
+                lambda: deltas.to_csv(index=False)
+            ),
+            file_name=f"escenarios_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
+            mime="text/csv"
+        )
+    with col_esc2:
+        persistencia = st.session_state.persistencia
+        if persistencia is None:
+            st.caption("Vincula la empresa a la base local (💾 Export/Import) para guardar los escenarios.")
+        elif st.button(f"💾 Guardar escenarios en {persistencia.nombre}"):
+            guardar_escenarios_empresa()
+            st.success(f"✅ {len(escenarios)} escenarios guardados")
+
 def claude_prompt_section():
     st.markdown('<h2 class="section-header">📋 Generador de Prompt para Claude</h2>', unsafe_allow_html=True)
     
@@ -2228,163 +3145,202 @@ def claude_prompt_section():
             'Estatutos corporativos', 'Protección anti-dilución', 'Derechos de voto',
             'Transferencia de acciones', 'Valoración de salida', 'Pool de empleados',
             'Estrategia de inversión', 'Aspectos fiscales', 'Cumplimiento legal'
-        ], default=['Estructura de vesting', 'Cláusulas de salida', 'Pacto de socios'])
+        ], key="ui_areas_focus",
+           **por_defecto("ui_areas_focus", default=['Estructura de vesting', 'Cláusulas de salida', 'Pacto de socios']))
     
     with col_config2:
         urgencia = st.selectbox("⚡ Nivel de urgencia", [
             'Exploratoria', 'Planificación', 'Implementación urgente', 'Crisis/Conflicto'
-        ])
+        ], key="ui_urgencia")
         detalle_nivel = st.selectbox("📊 Nivel de detalle", [
             'Resumen ejecutivo', 'Análisis detallado', 'Implementación completa'
-        ])
+        ], key="ui_detalle_nivel")
+        presupuesto_tokens = st.number_input(
+            "🧮 Presupuesto de tokens", min_value=1000, max_value=200000, step=1000,
+            **por_defecto("ui_presupuesto_prompt", value=PRESUPUESTO_PROMPT),
+            help="Si el detalle de todos los socios no cabe, se resumen por categoría con los de mayor equity",
+            key="ui_presupuesto_prompt"
+        )
     
     # Problemas específicos
     st.markdown("**🚨 Problemas o Preocupaciones Específicas:**")
     problemas_especificos = st.text_area(
         "Describe cualquier problema actual o preocupación específica",
         height=100,
-        placeholder="Ej: Uno de los cofundadores quiere reducir su dedicación, necesitamos atraer inversión, hay conflictos sobre la distribución actual..."
+        placeholder="Ej: Uno de los cofundadores quiere reducir su dedicación, necesitamos atraer inversión, hay conflictos sobre la distribución actual...",
+        key="ui_problemas_especificos"
     )
     
     # Objetivos
     objetivos = st.text_area(
         "🎯 Objetivos principales de la consultoría",
         height=100,
-        placeholder="Ej: Estructurar documentos legales, preparar para ronda de inversión, resolver conflictos entre socios..."
+        placeholder="Ej: Estructurar documentos legales, preparar para ronda de inversión, resolver conflictos entre socios...",
+        key="ui_objetivos"
     )
     
     if st.button("🤖 Generar Prompt para Claude", type="primary"):
-        prompt = generar_prompt_claude(areas_focus, urgencia, detalle_nivel, problemas_especificos, objetivos)
+        resultado = generar_prompt_claude(
+            areas_focus, urgencia, detalle_nivel, problemas_especificos, objetivos, presupuesto_tokens
+        )
         
         st.markdown('<div class="success-box">', unsafe_allow_html=True)
         st.markdown("### 🤖 Prompt Generado para Claude:")
         st.markdown('</div>', unsafe_allow_html=True)
         
-        st.code(prompt, language="text")
+        st.caption(f"≈ {resultado.tokens:,} tokens estimados")
+        if resultado.resumido:
+            st.info(f"ℹ️ Los {resultado.total_socios:,} socios no caben en el presupuesto: se resumen por categoría "
+                    f"con el detalle de los {resultado.socios_detallados} de mayor equity.")
+        st.code(resultado.texto, language="text")
         
         # Botón para copiar
         st.markdown("**📋 Copia este prompt y úsalo en una nueva conversación con Claude**")
 
-def generar_prompt_claude(areas_focus, urgencia, detalle_nivel, problemas_especificos, objetivos):
-    # Preparar datos de la empresa
-    company_data = st.session_state.company_info
-    socios_data = st.session_state.socios
-    
-    # Calcular métricas
-    df = pd.DataFrame(socios_data)
-    total_equity = (df['acciones_ordinarias'] + df['acciones_preferenciales'] + df['stock_options']).sum()
-    
-    prompt = f"""Actúa como un experto consultor en estructuración de startups y derecho corporativo. Necesito tu análisis y recomendaciones para la siguiente startup:
-
-## 📊 INFORMACIÓN DE LA EMPRESA:
-- **Nombre**: {company_data.get('name', 'No especificado')}
-- **Etapa**: {company_data.get('stage', 'No especificado')}
-- **Sector**: {company_data.get('sector', 'No especificado')}
-- **País**: {company_data.get('country', 'No especificado')}
-- **Capital Autorizado**: ${company_data.get('capital_autorizado', 0):,} COP
-- **Capital Suscrito**: ${company_data.get('capital_suscrito', 0):,} COP
-- **Valoración Actual**: ${company_data.get('valuation', 0):,} USD
-- **Busca Inversión**: {'Sí' if company_data.get('busca_inversion', False) else 'No'}
-
-## 👥 ESTRUCTURA DE SOCIOS ACTUAL:
-**Total Equity Asignado**: {total_equity:.1f}%
-**Equity Disponible**: {100-total_equity:.1f}%
-
-"""
-    
-    # Agregar detalles de cada socio
-    for i, socio in enumerate(socios_data, 1):
-        proteccion_info = ""
-        if socio.get('proteccion_antidilucion', False):
-            proteccion_info = f"""
-- **Protección Antidilución**: {socio.get('tipo_proteccion', 'No especificado')}
-  - Porcentaje protegido: {socio.get('porcentaje_proteccion', 0)}%
-  - Umbral activación: {socio.get('umbral_activacion', 0)}% descuento
-  - Duración: {socio.get('duracion_proteccion', 'No especificado')}"""
-        else:
-            proteccion_info = "\n- **Protección Antidilución**: No configurada"
-
-        prorata_info = ""
-        if socio.get('derechos_prorata', False):
-            exclusiones_str = ", ".join(socio.get('exclusiones_prorata', []))
-            prorata_info = f"""
-- **Derechos Pro-rata**: {socio.get('tipo_derechos_prorata', 'No especificado')}
-  - Participación mínima: {socio.get('participacion_minima_prorata', 0)}%
-  - Plazo ejercicio: {socio.get('plazo_ejercicio_prorata', 'No especificado')}
-  - Transferible: {'Sí' if socio.get('transferibilidad_derechos', False) else 'No'}
-  - Exclusiones: {exclusiones_str if exclusiones_str else 'Ninguna'}"""
-        else:
-            prorata_info = "\n- **Derechos Pro-rata**: No configurados"
-
-        prompt += f"""
-### Socio {i}: {socio['nombre']}
-- **Rol**: {socio['rol']} ({socio['categoria']})
-- **Dedicación**: {socio['dedicacion']}
-- **Equity Total**: {socio['acciones_ordinarias'] + socio['acciones_preferenciales'] + socio['stock_options']:.1f}%
-  - Ordinarias: {socio['acciones_ordinarias']:.1f}%
-  - Preferenciales: {socio['acciones_preferenciales']:.1f}%
-  - Stock Options: {socio['stock_options']:.1f}%
-- **Vesting**: {socio['vesting_total']} años, cliff {socio['cliff_period']} meses
-- **Aporte Inicial**: ${socio['aporte_inicial']:,} COP
-- **Salario**: ${socio['salario']:,} COP/mes{proteccion_info}{prorata_info}
-"""
-    
-    prompt += f"""
-
-## 🎯 ÁREAS DE ENFOQUE PRIORITARIAS:
-{chr(10).join([f'- {area}' for area in areas_focus])}
-
-## 🚨 PROBLEMAS/PREOCUPACIONES ESPECÍFICAS:
-{problemas_especificos if problemas_especificos else 'No se especificaron problemas particulares.'}
-
-## 🎯 OBJETIVOS PRINCIPALES:
-{objetivos if objetivos else 'Estructuración general y mejores prácticas.'}
-
-## 📋 SOLICITUD ESPECÍFICA:
-Por favor proporciona un análisis {detalle_nivel.lower()} con nivel de urgencia {urgencia.lower()} que incluya:
-
-### 1. 🔍 ANÁLISIS DE LA ESTRUCTURA ACTUAL:
-- Evaluación de la distribución de equity
-- Identificación de problemas potenciales
-- Análisis de la estructura de vesting
-- Evaluación del balance fundadores vs empleados vs inversores
-
-### 2. ⚖️ RECOMENDACIONES LEGALES:
-- **Estatutos**: Cláusulas específicas a incluir para {company_data.get('country', 'Colombia')}
-- **Pacto de Socios**: Elementos críticos a documentar
-- **Vesting**: Estructura recomendada y cláusulas de protección
-- **Cláusulas de Salida**: Mecanismos de salida, drag-along, tag-along, etc.
-
-### 3. 📄 DOCUMENTOS NECESARIOS:
-- Lista priorizada de documentos legales a crear/modificar
-- Timeline de implementación
-- Costos estimados
-
-### 4. 🚀 ESTRATEGIA DE CRECIMIENTO:
-- Preparación para futuras rondas de inversión
-- Estructura de pool para empleados
-- Mecanismos de incentivos
+@cronometrado
+def generar_prompt_claude(areas_focus, urgencia, detalle_nivel, problemas_especificos, objetivos, presupuesto_tokens):
+    """Prompt dentro del presupuesto; la sección de socios se memoiza por datos y presupuesto"""
+    socios = st.session_state.socios
+    cap = obtener_cap_table()
+    huella = huella_sesion()
+
+    def seccion_socios(presupuesto):
+        return cache_cap_table().obtener_o_calcular(
+            ('prompt_socios', huella, presupuesto),
+            lambda: socios_prompt(socios, cap, presupuesto)
+        )
 
-### 5. ⚠️ RIESGOS Y MITIGACIÓN:
-- Identificación de riesgos principales
-- Estrategias de mitigación
-- Señales de alerta temprana
+    return generar_prompt(
+        st.session_state.company_info, socios, cap, areas_focus, urgencia, detalle_nivel, problemas_especificos,
+        objetivos, presupuesto_tokens=presupuesto_tokens, seccion_socios=seccion_socios
+    )
 
-### 6. 📅 PLAN DE ACCIÓN:
-- Pasos inmediatos (próximas 2 semanas)
-- Mediano plazo (1-3 meses)
-- Largo plazo (6+ meses)
+def portafolio_section():
+    st.markdown('<h2 class="section-header">🗂️ Portafolio de Empresas</h2>', unsafe_allow_html=True)
+    st.caption("Analiza a la vez todas las exportaciones JSON de un directorio. "
+               "Solo se vuelven a leer los archivos que cambiaron desde la última carga.")
 
-## 📝 FORMATO DE RESPUESTA:
-- Usa secciones claras con headers
-- Incluye ejemplos de cláusulas cuando sea relevante
-- Proporciona justificaciones para cada recomendación
-- Señala aspectos específicos del derecho {company_data.get('country', 'colombiano')}
-- Incluye templates o formatos sugeridos donde aplique
+    st.caption(f"Raíz del portafolio (EQUITY_PORTAFOLIO): `{RAIZ_PORTAFOLIO}`")
 
-¡Gracias por tu análisis experto!"""
+    col_port1, col_port2, col_port3 = st.columns([3, 2, 1])
+    with col_port1:
+        directorio = st.text_input(
+            "📁 Subdirectorio", key="ui_portafolio_directorio",
+            help="Relativo a la raíz del portafolio; vacío para la raíz"
+        )
+    with col_port2:
+        patron = st.text_input("🔎 Archivos", key="ui_portafolio_patron",
+                               **por_defecto("ui_portafolio_patron", value=PATRON_POR_DEFECTO))
+    with col_port3:
+        st.write("")
+        st.write("")
+        cargar = st.button("🔄 Cargar", type="primary", use_container_width=True)
+
+    if cargar:
+        try:
+            with st.spinner("Analizando exportaciones..."):
+                st.session_state.portafolio = cargar_portafolio(RAIZ_PORTAFOLIO, directorio, patron)
+        except ErrorPortafolio as e:
+            st.error(f"❌ {e}")
+            return
+
+    portafolio = st.session_state.get('portafolio')
+    if portafolio is None:
+        st.info("ℹ️ Indica el directorio con las exportaciones y presiona **Cargar**.")
+        return
+    if not len(portafolio):
+        st.warning("⚠️ No se encontraron archivos con ese patrón.")
+        return
 
-    return prompt
+    st.caption(f"{len(portafolio)} archivos • {portafolio.reanalizados} leídos de nuevo, "
+               f"{len(portafolio) - portafolio.reanalizados} desde el caché")
+
+    totales = portafolio.totales()
+    col_met1, col_met2, col_met3, col_met4 = st.columns(4)
+    with col_met1:
+        st.metric("🏢 Empresas", totales['empresas'])
+    with col_met2:
+        st.metric("👥 Socios", f"{totales['socios']:,}")
+    with col_met3:
+        st.metric("🆓 Pool disponible promedio", f"{totales['equity_disponible_promedio']:.1f}%")
+    with col_met4:
+        st.metric("💰 Aportes totales", f"${totales['aporte_inicial']:,.0f}")
+
+    resumen = portafolio.resumen().round(2)
+    resumen.columns = ['Empresa', 'Archivo', 'Socios', 'Equity Asignado %', 'Pool Disponible %',
+                       'Equity Protegido %', 'Aporte Inicial', 'Registros Inválidos']
+    st.dataframe(resumen, use_container_width=True, hide_index=True)
+
+    por_categoria = portafolio.equity_por_categoria()
+    if not por_categoria.empty:
+        with medir('grafico_portafolio', 'grafico'):
+            import plotly.express as px
+            fig_portafolio = px.bar(
+                por_categoria.reset_index(names='Empresa').melt(id_vars='Empresa', var_name='Categoría', value_name='Equity %'),
+                x='Empresa', y='Equity %', color='Categoría', title="Equity por categoría en cada empresa"
+            )
+            st.plotly_chart(fig_portafolio, use_container_width=True)
+
+    exposicion = portafolio.exposicion_proteccion()
+    if not exposicion.empty:
+        st.markdown("**🛡️ Exposición a protección antidilución (equity protegido %)**")
+        st.dataframe(exposicion.round(2), use_container_width=True)
+
+    if portafolio.errores:
+        st.warning(f"⚠️ {len(portafolio.errores)} archivos no se pudieron leer")
+        st.dataframe(pd.DataFrame(portafolio.errores, columns=['Archivo', 'Error']),
+                     use_container_width=True, hide_index=True)
+
+def mapeo_columnas(uploaded_file, formato):
+    """Selector del campo de socio para cada columna de una hoja de cálculo"""
+    memo = st.session_state.get('encabezados_memo')
+    if memo is None or memo[0] != uploaded_file.file_id:
+        uploaded_file.seek(0)
+        encabezados = leer_encabezados(uploaded_file, formato)
+        memo = (uploaded_file.file_id, encabezados, sugerir_mapeo(encabezados))
+        st.session_state.encabezados_memo = memo
+    _, encabezados, sugerido = memo
+
+    campos = [None] + list(ESQUEMA_SOCIO)
+    mapeo = {}
+    with st.expander(f"🧭 Asignación de columnas ({len(encabezados)} columnas)", expanded=True):
+        st.caption("Campo del socio que contiene cada columna del archivo. Los campos sin columna se completan "
+                   "con los valores sugeridos de la categoría (cliff, vesting, protección y pro-rata).")
+        columnas = st.columns(3)
+        for i, encabezado in enumerate(encabezados):
+            with columnas[i % 3]:
+                clave = f"ui_mapeo_{uploaded_file.file_id}_{i}"
+                mapeo[encabezado] = st.selectbox(
+                    encabezado, campos, **por_defecto(clave, index=campos.index(sugerido.get(encabezado))),
+                    format_func=lambda campo: '— Ignorar —' if campo is None else campo,
+                    key=clave
+                )
+    return mapeo
+
+@cronometrado
+def leer_importacion(uploaded_file, mapeo=None):
+    """Importar y validar el archivo una sola vez por archivo subido y mapeo (con barra de progreso)"""
+    clave = (uploaded_file.file_id, None if mapeo is None else tuple(mapeo.items()))
+    memo = st.session_state.get('importacion_memo')
+    if memo is not None and memo[0] == clave:
+        return memo[1]
+
+    barra = st.progress(0.0, text="Leyendo archivo...")
+
+    def al_progresar(fraccion, registros):
+        barra.progress(fraccion or 0.0, text=f"Validando socios... {registros:,} registros")
+
+    uploaded_file.seek(0)
+    formato = formato_tabular(uploaded_file.name)
+    if uploaded_file.name.lower().endswith(EXTENSION_SNAPSHOT):
+        resultado = cargar_snapshot(uploaded_file.getvalue()).a_importacion()
+    elif formato is not None:
+        resultado = importar_tabla(uploaded_file, formato, mapeo, al_progresar=al_progresar)
+    else:
+        resultado = importar_json(uploaded_file, al_progresar=al_progresar)
+    barra.empty()
+    st.session_state.importacion_memo = (clave, resultado)
+    return resultado
 
 def export_import_section():
     st.markdown('<h2 class="section-header">💾 Export/Import de Datos</h2>', unsafe_allow_html=True)
@@ -2395,17 +3351,18 @@ def export_import_section():
     if st.session_state.socios or st.session_state.company_info:
         export_data = {
             'company_info': st.session_state.company_info,
-            'socios': st.session_state.socios,
-            'export_date': datetime.now().isoformat()
+            'socios': st.session_state.socios.to_records(),
+            'export_date': datetime.now().isoformat(),
+            'eventos': st.session_state.libro_eventos.eventos_desde(0)
         }
         
-        col_exp1, col_exp2 = st.columns(2)
+        col_exp1, col_exp2, col_exp3 = st.columns(3)
         
         with col_exp1:
             if st.button("📄 Exportar como JSON"):
                 st.download_button(
                     label="⬇️ Descargar configuración",
-                    data=json.dumps(export_data, indent=2, ensure_ascii=False),
+                    data=json.dumps(export_data, indent=2, ensure_ascii=False, default=str),
                     file_name=f"startup_equity_{datetime.now().strftime('%Y%m%d_%H%M')}.json",
                     mime="application/json"
                 )
@@ -2413,7 +3370,7 @@ def export_import_section():
         with col_exp2:
             if st.button("📊 Exportar como CSV"):
                 if st.session_state.socios:
-                    df = pd.DataFrame(st.session_state.socios)
+                    df = st.session_state.socios.to_frame()
                     csv = df.to_csv(index=False)
                     st.download_button(
                         label="⬇️ Descargar CSV",
@@ -2421,32 +3378,56 @@ def export_import_section():
                         file_name=f"socios_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
                         mime="text/csv"
                     )
+        
+        with col_exp3:
+            if st.button("🗜️ Exportar como Snapshot"):
+                # Binario columnar comprimido: mucho más liviano que el JSON en cap tables grandes
+                cap = obtener_cap_table()
+                tablas = {
+                    'cap_table': cap.df[['nombre', 'categoria'] + COLUMNAS_DERIVADAS],
+                    'por_categoria': cap.por_categoria,
+                }
+                st.download_button(
+                    label="⬇️ Descargar snapshot",
+                    data=snapshot_en_bytes(export_data, tablas),
+                    file_name=f"startup_equity_{datetime.now().strftime('%Y%m%d_%H%M')}{EXTENSION_SNAPSHOT}",
+                    mime="application/zip"
+                )
     else:
         st.info("ℹ️ No hay datos para exportar. Agrega información de la empresa y socios primero.")
     
     # Importar datos
     st.markdown("### 📥 Importar Configuración")
     
-    uploaded_file = st.file_uploader("📁 Seleccionar archivo JSON", type=['json'])
+    uploaded_file = st.file_uploader(
+        "📁 Seleccionar archivo JSON, snapshot o planilla (CSV/Excel)",
+        type=['json', EXTENSION_SNAPSHOT[1:], 'csv', 'xlsx']
+    )
     
     if uploaded_file is not None:
         try:
-            import_data = json.load(uploaded_file)
+            formato = formato_tabular(uploaded_file.name)
+            # En planillas los socios reemplazan a los actuales; la información de la empresa se mantiene
+            mapeo = mapeo_columnas(uploaded_file, formato) if formato is not None else None
+            import_data = leer_importacion(uploaded_file, mapeo)
             
             col_imp1, col_imp2 = st.columns(2)
             
             with col_imp1:
                 st.markdown("**📋 Datos a importar:**")
-                st.write(f"- Información empresa: {'✅' if 'company_info' in import_data else '❌'}")
-                st.write(f"- Socios: {len(import_data.get('socios', []))} registros")
-                st.write(f"- Fecha exportación: {import_data.get('export_date', 'No disponible')}")
+                st.write(f"- Información empresa: {'✅' if import_data.company_info is not None else '❌'}")
+                st.write(f"- Socios: {len(import_data.socios)} válidos de {import_data.total_registros} registros")
+                st.write(f"- Fecha exportación: {import_data.campos.get('export_date', 'No disponible')}")
+                st.write(f"- Historial: {len(import_data.campos.get('eventos') or []):,} eventos")
             
             with col_imp2:
                 if st.button("📥 Importar Datos", type="primary"):
-                    if 'company_info' in import_data:
-                        st.session_state.company_info = import_data['company_info']
-                    if 'socios' in import_data:
-                        st.session_state.socios = import_data['socios']
+                    if import_data.company_info is not None:
+                        st.session_state.company_info = import_data.company_info
+                    if 'socios' in import_data.campos or import_data.total_registros:
+                        reemplazar_socios(import_data.socios, libro_importado(import_data))
+                    # El almacén importado pasa a la sesión: no reutilizarlo desde la memoria
+                    st.session_state.pop('importacion_memo', None)
                     
                     # Resetear modo edición al importar
                     st.session_state.edit_mode = False
@@ -2456,16 +3437,76 @@ def export_import_section():
                     st.rerun()
                 
                 if st.button("🗑️ Limpiar Datos Actuales", type="secondary"):
-                    st.session_state.socios = []
+                    reemplazar_socios([])
                     st.session_state.company_info = {}
                     st.session_state.edit_mode = False
                     st.session_state.editing_socio = None
                     st.success("✅ Datos limpiados!")
                     st.rerun()
+
+            if import_data.total_errores:
+                st.warning(f"⚠️ **{import_data.registros_invalidos} registros con errores** no se importarán. "
+                           "Corrígelos en el archivo y vuelve a subirlo para incluirlos.")
+                errores = pd.DataFrame(import_data.errores)
+                errores.columns = ['Registro', 'Campo', 'Error']
+                st.dataframe(errores.head(MAXIMO_ERRORES_VISIBLES), use_container_width=True, hide_index=True)
+                if import_data.total_errores > MAXIMO_ERRORES_VISIBLES:
+                    st.caption(f"Mostrando {MAXIMO_ERRORES_VISIBLES} de {import_data.total_errores:,} errores.")
+                st.download_button(
+                    label=("⬇️ Descargar todos los errores (CSV)" if len(errores) == import_data.total_errores
+                           else f"⬇️ Descargar los primeros {len(errores):,} errores (CSV)"),
+                    data=errores.to_csv(index=False),
+                    file_name="errores_importacion.csv",
+                    mime="text/csv"
+                )
                     
-        except Exception as e:
+        except (ErrorImportacion, ErrorSnapshot) as e:
             st.error(f"❌ Error al importar archivo: {str(e)}")
 
+    # Base local
+    st.markdown("### 🗄️ Empresas Guardadas")
+    st.caption("Base SQLite local: los cambios de la empresa vinculada se guardan automáticamente.")
+
+    repositorio = repositorio_local()
+    empresas = repositorio.listar_empresas()
+    persistencia = st.session_state.persistencia
+    col_bd1, col_bd2 = st.columns(2)
+
+    with col_bd1:
+        if len(empresas):
+            etiquetas = {
+                fila.id: f"{fila.nombre} ({fila.socios} socios • {fila.actualizada[:16].replace('T', ' ')})"
+                for fila in empresas.itertuples()
+            }
+            empresa_id = st.selectbox("🏢 Empresa", list(etiquetas), format_func=etiquetas.get)
+            if st.button("📂 Cargar empresa"):
+                try:
+                    vincular_empresa(empresa_id)
+                except KeyError:
+                    st.error("❌ Esa empresa ya no existe en la base local (otra sesión la eliminó)")
+                else:
+                    st.session_state.edit_mode = False
+                    st.session_state.editing_socio = None
+                    st.success("✅ Empresa cargada")
+                    st.rerun()
+        else:
+            st.info("ℹ️ Aún no hay empresas guardadas.")
+
+    with col_bd2:
+        nombre_guardado = persistencia.nombre if persistencia is not None else st.session_state.company_info.get('name', '')
+        nombre = st.text_input("📝 Guardar como", value=nombre_guardado)
+        if st.button("💾 Guardar y vincular", type="primary"):
+            if nombre.strip():
+                guardar_empresa_actual(nombre.strip())
+                st.success(f"✅ Guardada como '{nombre.strip()}'. Los cambios siguientes se guardan solos.")
+                st.rerun()
+            else:
+                st.error("❌ Escribe un nombre para la empresa")
+        if persistencia is not None and st.button("🔌 Desvincular"):
+            sincronizar_persistencia()
+            st.session_state.persistencia = None
+            st.rerun()
+
     # Información útil
     st.markdown("### 📚 Información Útil")
     
@@ -0,0 +1,49 @@
+"""Datos de prueba compartidos: una empresa pequeña con todas las clases de equity"""
+import pytest
+
+from equity_engine import VALORES_POR_DEFECTO, calcular_cap_table
+
+
+def socio(nombre, categoria, **campos):
+    """Socio con los valores por defecto del formulario y los campos indicados"""
+    return dict(VALORES_POR_DEFECTO, **dict({'nombre': nombre, 'categoria': categoria, 'fecha_ingreso': '2022-01-15'}, **campos))
+
+
+@pytest.fixture
+def socios():
+    return [
+        socio('Ana', 'Fundador Principal', acciones_ordinarias=45.0, vesting_total=4, cliff_period=12,
+              acceleration=True, derechos_prorata=True, tipo_derechos_prorata='Derechos Completos (todas las emisiones)'),
+        socio('Beto', 'Co-fundador', acciones_ordinarias=25.0, immediate_vest=25.0,
+              vesting_schedule='Trimestral', derechos_prorata=True),
+        socio('Fondo Semilla', 'Advisor', acciones_preferenciales=15.0, warrants=2.0,
+              proteccion_antidilucion=True, tipo_proteccion='Full Ratchet (Máxima protección)', porcentaje_proteccion=100,
+              duracion_proteccion='Permanente', derechos_prorata=True),
+        socio('Carla', 'Early Employee', stock_options=5.0, acciones_vesting=1.0, fecha_ingreso='2024-03-01'),
+        socio('Dani', 'Consultor', phantom_equity=2.0, profit_sharing=3.0, fecha_ingreso='2023-06-10'),
+    ]
+
+
+@pytest.fixture
+def cap(socios):
+    return calcular_cap_table(socios)
+
+
+@pytest.fixture
+def registros(socios):
+    """Socios completos, como los produce el formulario (con un campo extra de otra versión)"""
+    registros = [dict(s) for s in socios]
+    registros[2]['exclusiones_prorata'] = ['Emisiones para empleados (stock options)', 'Conversión de deuda en acciones']
+    registros[3]['campo_nuevo'] = {'origen': 'v2'}
+    return registros
+
+
+@pytest.fixture
+def export_data(registros):
+    """Diccionario del export JSON de la empresa de prueba"""
+    return {
+        'company_info': {'nombre_empresa': 'Acme SpA', 'valoracion_actual': 4_000_000},
+        'socios': registros,
+        'export_date': '2026-01-01T10:00:00',
+        'eventos': [],
+    }
@@ -0,0 +1,110 @@
+from datetime import date
+
+import pytest
+
+from conftest import socio
+from equity_engine import calcular_cap_table
+from equity_engine.antidilucion import (
+    TIPO_FULL_RATCHET,
+    TIPO_WEIGHTED_AVERAGE,
+    aplicar_rondas_antidilucion,
+    duracion_en_meses,
+    tipo_proteccion_normalizado,
+)
+
+# Base de 1M de acciones sobre una valoración de 1M: precio de conversión original 1.0
+VALORACION = 1_000_000
+BASE = 1_000_000
+
+# Ronda a la baja: 200k sobre un pre-money de 500k -> 0.5 por acción (descuento del 50%)
+RONDA_BAJA = {'nombre': 'Serie A', 'monto': 200_000, 'valoracion_pre_money': 500_000, 'fecha': '2025-01-01'}
+
+
+def cap_table(umbral=0.0, duracion='3 años'):
+    proteccion = {'proteccion_antidilucion': True, 'porcentaje_proteccion': 100, 'umbral_activacion': umbral,
+                  'duracion_proteccion': duracion, 'fecha_ingreso': '2024-01-01'}
+    return calcular_cap_table([
+        socio('Ana', 'Fundador Principal', acciones_ordinarias=80.0),
+        socio('Fondo FR', 'Advisor', acciones_preferenciales=10.0,
+              tipo_proteccion='Full Ratchet (Máxima protección)', **proteccion),
+        socio('Fondo WA', 'Advisor', acciones_preferenciales=10.0,
+              tipo_proteccion='Weighted Average Broad (Protección balanceada)', **proteccion),
+    ]).df
+
+
+def aplicar(df, rondas):
+    return aplicar_rondas_antidilucion(df, rondas, VALORACION, BASE, fecha_referencia=date(2025, 1, 1))
+
+
+def test_textos_del_formulario():
+    assert tipo_proteccion_normalizado('Full Ratchet (Máxima protección)') == TIPO_FULL_RATCHET
+    assert tipo_proteccion_normalizado('Weighted Average Broad (Protección balanceada)') == TIPO_WEIGHTED_AVERAGE
+    assert duracion_en_meses('3 años') == 36
+    assert duracion_en_meses('18 meses') == 18
+    assert duracion_en_meses('Sin protección') == 0
+    assert duracion_en_meses('Permanente') is None
+
+
+def test_precios_de_conversion_en_ronda_a_la_baja():
+    resultado = aplicar(cap_table(), [RONDA_BAJA])
+    ajustes = resultado.ajustes.set_index('nombre')
+
+    # Full Ratchet: el precio baja al de la ronda
+    assert ajustes.loc['Fondo FR', 'precio_conversion_nuevo'] == pytest.approx(0.5)
+    assert ajustes.loc['Fondo FR', 'acciones_adicionales'] == pytest.approx(100_000)
+
+    # Weighted Average Broad: CP2 = CP1 * (A + monto / CP1) / (A + monto / precio_ronda)
+    esperado = 1.0 * (BASE + 200_000 / 1.0) / (BASE + 200_000 / 0.5)
+    assert ajustes.loc['Fondo WA', 'precio_conversion_nuevo'] == pytest.approx(esperado)
+    assert ajustes.loc['Fondo WA', 'acciones_adicionales'] == pytest.approx(100_000 * (1 / esperado - 1))
+
+    assert ajustes['descuento_%'].tolist() == pytest.approx([50.0, 50.0])
+    assert 'Ana' not in ajustes.index
+
+    ronda = resultado.rondas.iloc[0]
+    assert ronda['precio_por_accion'] == pytest.approx(0.5)
+    assert ronda['acciones_nuevas'] == pytest.approx(400_000)
+
+
+def test_cap_table_post_ronda_suma_cien():
+    resultado = aplicar(cap_table(), [RONDA_BAJA])
+    cap = resultado.cap_table
+    assert cap.totales['equity_total_completo'] == pytest.approx(100.0)
+    assert 'Inversor Serie A' in set(cap.df['nombre'])
+
+
+def test_full_ratchet_acumula_rondas_sucesivas():
+    primera = aplicar(cap_table(), [RONDA_BAJA])
+    acciones = primera.rondas.iloc[0]['acciones_totales']
+    segunda = {'nombre': 'Serie B', 'monto': 100_000, 'valoracion_pre_money': 0.25 * acciones, 'fecha': '2025-06-01'}
+
+    resultado = aplicar(cap_table(), [RONDA_BAJA, segunda])
+    fr = resultado.ajustes[resultado.ajustes['nombre'] == 'Fondo FR']
+    assert fr['precio_conversion_nuevo'].tolist() == pytest.approx([0.5, 0.25])
+    # Total de ajuste 100k * (1 / 0.25 - 1) = 300k, del que 100k ya se emitió en la primera ronda
+    assert fr['acciones_adicionales'].tolist() == pytest.approx([100_000, 200_000])
+
+
+def test_sin_ajuste_en_ronda_al_alza():
+    resultado = aplicar(cap_table(), [dict(RONDA_BAJA, valoracion_pre_money=2_000_000)])
+    assert resultado.ajustes.empty
+    assert resultado.rondas.iloc[0]['socios_ajustados'] == 0
+
+
+def test_sin_ajuste_bajo_el_umbral():
+    resultado = aplicar(cap_table(umbral=60.0), [RONDA_BAJA])
+    assert resultado.ajustes.empty
+
+
+def test_sin_ajuste_con_proteccion_vencida():
+    # Ingreso 2024-01-01 con 3 años de protección: una ronda a mediados de 2027 ya no la activa
+    resultado = aplicar(cap_table(), [dict(RONDA_BAJA, fecha='2027-06-01')])
+    assert resultado.ajustes.empty
+
+    resultado = aplicar(cap_table(duracion='Permanente'), [dict(RONDA_BAJA, fecha='2027-06-01')])
+    assert len(resultado.ajustes) == 2
+
+
+def test_valoracion_de_referencia_invalida():
+    with pytest.raises(ValueError):
+        aplicar_rondas_antidilucion(cap_table(), [RONDA_BAJA], 0)
@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+from equity_engine import CacheLRU, calcular_cap_table, huella_datos, huella_serie
+from equity_engine.store import SociosStore
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'startup_equity_manager.py')
+
+
+def test_huella_distingue_socios_y_empresa(registros, export_data):
+    info = export_data['company_info']
+    base = huella_datos(SociosStore.from_records(registros), info)
+    assert huella_datos(SociosStore.from_records(registros), dict(info)) == base
+    assert huella_datos(SociosStore.from_records(registros), dict(info, valoracion_actual=1)) != base
+    assert huella_datos(SociosStore.from_records(registros[:-1]), info) != base
+    assert huella_datos(SociosStore.from_records([dict(registros[0], salario=1)] + registros[1:]), info) != base
+
+
+def test_huella_serie(cap):
+    serie = cap.df.set_index('nombre')['equity_total']
+    assert huella_serie(serie.copy()) == huella_serie(serie)
+    assert huella_serie(serie.rename('otra')) != huella_serie(serie)
+    assert huella_serie(serie.rename(index={'Ana': 'Eva'})) != huella_serie(serie)
+    assert huella_serie(serie + 0.5) != huella_serie(serie)
+
+
+def test_entradas_que_no_caben_no_se_guardan():
+    cache = CacheLRU(presupuesto_bytes=100)
+    cache.guardar('chica', 1, tamano=60)
+    assert cache.guardar('grande', 2, tamano=500) == 2
+    assert 'grande' not in cache and 'chica' in cache
+    cache.guardar('otra', 3, tamano=60)
+    assert 'chica' not in cache and 'otra' in cache
+    assert cache.estadisticas()['omitidas'] == 1
+
+
+def test_vista_no_modifica_el_cap_table_cacheado(registros):
+    cache = CacheLRU()
+    cacheado = cache.obtener_o_calcular('cap', lambda: calcular_cap_table(registros))
+    original = cacheado.df.copy()
+
+    vista = cache.obtener_o_calcular('cap', lambda: None).vista()
+    vista.df['columna_de_la_vista'] = 1
+    vista.df.loc[0, 'equity_total'] = 99.0
+    vista.df['nombre'] = vista.df['nombre'].str.upper()
+    vista.totales['socios'] = 0
+
+    assert cache.obtener('cap') is cacheado
+    assert list(cacheado.df.columns) == list(original.columns)
+    assert cacheado.df.equals(original)
+    assert cacheado.totales['socios'] == len(registros)
+
+
+def test_sesiones_no_comparten_entradas(registros, export_data):
+    testing = pytest.importorskip('streamlit.testing.v1')
+
+    def sesion(socios, company_info):
+        at = testing.AppTest.from_file(APP, default_timeout=60)
+        at.session_state['socios'] = socios
+        at.session_state['company_info'] = company_info
+        at.session_state['seccion_activa'] = '📋 Tabla Resumen'
+        return at
+
+    def metricas(at):
+        at.run()
+        assert not at.exception
+        return {m.label: m.value for m in at.metric}
+
+    info = export_data['company_info']
+    otra = [dict(registros[0], nombre='Solo', acciones_ordinarias=10.0)]
+    a = sesion([dict(r) for r in registros], info)
+    b = sesion(otra, dict(info, nombre_empresa='Otra SpA'))
+    c = sesion([dict(r) for r in registros], dict(info, valoracion_actual=1))
+
+    metricas_a = metricas(a)
+    assert metricas(b)['👥 Total Socios'] == '1'
+    assert metricas(b)['📊 Equity Asignado'] == '10.0%'
+    assert metricas(c) == metricas_a
+    # Al volver a la primera sesión sigue viendo sus propios datos
+    assert metricas(a) == metricas_a
+    assert metricas_a['👥 Total Socios'] == str(len(registros))
@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from equity_engine import (
+    CATEGORIAS,
+    DEDICACIONES,
+    ETIQUETA_OTROS,
+    ORDENES_SOCIOS,
+    agrupar_porciones,
+    calcular_cap_table,
+    calcular_dilucion_df,
+    distribucion_por_socio,
+    filtrar_socios,
+)
+
+from conftest import socio
+
+
+def test_columnas_derivadas_y_totales(cap):
+    df = cap.df.set_index('nombre')
+    assert df.loc['Fondo Semilla', 'equity_acciones'] == pytest.approx(15.0)
+    assert df.loc['Fondo Semilla', 'equity_total'] == pytest.approx(15.0)
+    assert df.loc['Fondo Semilla', 'equity_total_completo'] == pytest.approx(17.0)
+    assert df.loc['Dani', 'equity_total'] == pytest.approx(2.0)
+
+    assert cap.totales['equity_acciones'] == pytest.approx(90.0)
+    assert cap.totales['equity_total'] == pytest.approx(93.0)
+    assert cap.totales['equity_total_completo'] == pytest.approx(98.0)
+    assert cap.totales['equity_disponible'] == pytest.approx(7.0)
+    assert cap.por_categoria['cantidad'].sum() == len(cap)
+    assert cap.por_categoria['equity_total'].sum() == pytest.approx(cap.totales['equity_total'])
+
+
+def test_campos_faltantes_toman_el_valor_por_defecto():
+    cap = calcular_cap_table([
+        {'nombre': 'Ana', 'acciones_ordinarias': 60.0, 'immediate_vest': 25.0},
+        {'nombre': 'Beto', 'stock_options': 10.0},
+    ])
+    beto = cap.df.iloc[1]
+    assert beto['acciones_ordinarias'] == 0.0
+    assert beto['immediate_vest'] == 0.0
+    assert cap.totales['equity_total'] == pytest.approx(70.0)
+
+
+def test_dilucion(cap):
+    df = calcular_dilucion_df(cap.df, 25.0).set_index('nombre')
+    assert df.loc['Ana', 'equity_post_dilucion'] == pytest.approx(45.0 * 100 / 125)
+    assert df.loc['Ana', 'perdida_equity'] == pytest.approx(45.0 - 36.0)
+
+
+def test_agrupar_porciones_conserva_el_total():
+    valores = pd.Series(np.random.default_rng(5).random(40) * 3, index=[f's{i}' for i in range(40)])
+    agrupados = agrupar_porciones(valores, maximo=6)
+    assert len(agrupados) == 6
+    assert agrupados.index[-1] == ETIQUETA_OTROS
+    assert agrupados.sum() == pytest.approx(valores.sum())
+    # Las porciones que se muestran son las mayores, de mayor a menor
+    assert agrupados.iloc[:5].tolist() == valores.nlargest(5).tolist()
+    assert agrupados[ETIQUETA_OTROS] == pytest.approx(valores.sum() - valores.nlargest(5).sum())
+
+
+def test_agrupar_porciones_suma_etiquetas_repetidas():
+    valores = pd.Series([10.0, 5.0, 2.0], index=['Ana', 'Beto', 'Ana'])
+    assert agrupar_porciones(valores).to_dict() == {'Ana': 12.0, 'Beto': 5.0}
+    assert agrupar_porciones(valores, maximo=1).to_dict() == {ETIQUETA_OTROS: 17.0}
+
+
+def test_distribucion_por_socio(cap):
+    assert distribucion_por_socio(cap.df).to_dict() == cap.df.set_index('nombre')['equity_total'].to_dict()
+    agrupada = distribucion_por_socio(cap.df, maximo=3)
+    assert agrupada.to_dict() == pytest.approx({'Ana': 45.0, 'Beto': 25.0, ETIQUETA_OTROS: 23.0})
+
+
+def filtrar_fila_a_fila(df, texto='', categoria=None, dedicacion=None, proteccion=None, orden='Orden de registro'):
+    """Los mismos filtros recorriendo los socios uno por uno"""
+    texto = texto.strip().lower()
+    filas = [
+        (i, s) for i, s in enumerate(df.to_dict('records'))
+        if (not texto or texto in s['nombre'].lower() or texto in s['rol'].lower())
+        and (not categoria or s['categoria'] == categoria)
+        and (not dedicacion or s['dedicacion'] == dedicacion)
+        and (proteccion is None or s['proteccion_antidilucion'] == proteccion)
+    ]
+    columna, ascendente = ORDENES_SOCIOS[orden]
+    if columna is not None:
+        clave = (lambda fila: fila[1][columna].lower()) if columna == 'nombre' else (lambda fila: fila[1][columna])
+        # sorted es estable también con reverse: los empates conservan el orden de registro
+        filas = sorted(filas, key=clave, reverse=not ascendente)
+    return [i for i, _ in filas]
+
+
+def test_filtrar_socios_coincide_con_el_filtro_fila_a_fila():
+    rng = np.random.default_rng(8)
+    nombres = ['Ana', 'beto', 'Álvaro', 'Carla', 'ana maría', 'Dani']
+    socios = [
+        socio(f'{nombres[i % 6]} {i}', str(rng.choice(CATEGORIAS)),
+              rol=str(rng.choice(['CTO', 'Empleado', 'Advisor'])), dedicacion=str(rng.choice(DEDICACIONES)),
+              acciones_ordinarias=float(rng.choice([0.0, 0.5, 1.0])), aporte_inicial=int(rng.choice([0, 1000])),
+              proteccion_antidilucion=bool(rng.random() < 0.3))
+        for i in range(60)
+    ]
+    df = calcular_cap_table(socios).df
+    casos = [{}, {'texto': ' ANA '}, {'texto': 'cto'}, {'texto': 'nadie'}, {'categoria': CATEGORIAS[2]},
+             {'dedicacion': DEDICACIONES[0], 'proteccion': True}, {'proteccion': False, 'texto': 'a'}]
+    for filtros in casos:
+        for orden in ORDENES_SOCIOS:
+            esperado = filtrar_fila_a_fila(df, orden=orden, **filtros)
+            assert filtrar_socios(df, orden=orden, **filtros).tolist() == esperado, (filtros, orden)
+
+
+def test_filtrar_socios_sin_filtros_es_el_orden_de_registro(cap):
+    assert filtrar_socios(cap.df).tolist() == list(range(len(cap)))
+    assert cap.df['nombre'].iloc[filtrar_socios(cap.df, orden='Mayor equity')].tolist() == [
+        'Ana', 'Beto', 'Fondo Semilla', 'Carla', 'Dani'
+    ]
@@ -0,0 +1,62 @@
+import json
+import os
+
+import pytest
+
+from equity_engine.cli import main, nombres_salida
+
+ARGUMENTOS = ['--simulaciones', '1000', '--fecha', '2026-01-01']
+
+
+def escribir(ruta, export_data):
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    ruta.write_text(json.dumps(export_data, ensure_ascii=False), encoding='utf-8')
+    return str(ruta)
+
+
+def test_nombres_salida():
+    assert nombres_salida(['x/ej.json', 'x/otro.json']) == ['ej', 'otro']
+    assert nombres_salida(['x/ej.json', 'x/a/ej.json', 'y.json']) == ['ej', 'a__ej', 'y']
+    assert nombres_salida(['x/ej.json', 'x/ej.json']) == ['ej', 'ej-2']
+
+
+def test_archivos_con_el_mismo_nombre_no_se_pisan(tmp_path, export_data, capsys):
+    otra = dict(export_data, company_info={'nombre_empresa': 'Otra SpA'}, socios=export_data['socios'][:2])
+    rutas = [escribir(tmp_path / 'x' / 'ej.json', export_data), escribir(tmp_path / 'x' / 'a' / 'ej.json', otra)]
+    salida = tmp_path / 'out'
+
+    assert main(rutas + ['-o', str(salida)] + ARGUMENTOS) == 0
+    assert '2 de 2 archivos procesados' in capsys.readouterr().out
+    assert sorted(os.listdir(salida)) == ['a__ej.resultados.json', 'ej.resultados.json']
+
+    primero = json.loads((salida / 'ej.resultados.json').read_text(encoding='utf-8'))
+    segundo = json.loads((salida / 'a__ej.resultados.json').read_text(encoding='utf-8'))
+    assert primero['company_info'] == export_data['company_info']
+    assert segundo['company_info'] == {'nombre_empresa': 'Otra SpA'}
+    assert primero['totales']['socios'] == 5 and isinstance(primero['totales']['socios'], int)
+    assert segundo['totales']['socios'] == 2
+    assert len(primero['tablas']['tabla_completa']) == 5
+
+
+@pytest.mark.parametrize('formato, archivo', [('csv', 'tabla_completa.csv'), ('json', None)])
+def test_formatos(tmp_path, export_data, formato, archivo):
+    ruta = escribir(tmp_path / 'empresa.json', export_data)
+    assert main([ruta, '-o', str(tmp_path / 'out'), '-f', formato] + ARGUMENTOS) == 0
+    if archivo:
+        resumen = json.loads((tmp_path / 'out' / 'empresa' / 'resumen.json').read_text(encoding='utf-8'))
+        assert (tmp_path / 'out' / 'empresa' / archivo).exists()
+        assert resumen['totales']['socios'] == 5
+    else:
+        assert (tmp_path / 'out' / 'empresa.resultados.json').exists()
+
+
+def test_archivo_danado_no_detiene_el_lote(tmp_path, export_data, capsys):
+    buena = escribir(tmp_path / 'buena.json', export_data)
+    danada = tmp_path / 'danada.json'
+    danada.write_text('{"socios": [', encoding='utf-8')
+
+    assert main([str(danada), buena, '-o', str(tmp_path / 'out')] + ARGUMENTOS) == 1
+    salida = capsys.readouterr()
+    assert 'danada.json' in salida.err
+    assert '1 de 2 archivos procesados' in salida.out
+    assert (tmp_path / 'out' / 'buena.resultados.json').exists()
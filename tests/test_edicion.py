@@ -0,0 +1,70 @@
+import pytest
+
+from equity_engine import COLUMNAS_EQUITY, ErrorCampo, SociosStore, cambios_en_lote, preparar_edicion
+
+
+@pytest.fixture
+def store(registros):
+    # Como los guarda el formulario: con su equity_total calculado
+    return SociosStore.from_records(
+        [dict(r, equity_total=sum(r[c] for c in COLUMNAS_EQUITY)) for r in registros]
+    )
+
+
+def test_filas_sin_cambios_se_omiten(store):
+    resultado = preparar_edicion(store, {
+        0: {'nombre': 'Ana', 'acciones_ordinarias': 45.0},
+        # Mismos valores escritos de otra forma
+        1: {'acciones_ordinarias': '25', 'vesting_total': 4.0, 'derechos_prorata': 'sí'},
+        3: {},
+    })
+    assert resultado.valido
+    assert len(resultado) == 0
+
+
+def test_celdas_editadas_se_convierten_al_tipo_del_campo(store):
+    resultado = preparar_edicion(store, {
+        2: {'cliff_period': '6', 'vesting_total': 3.0, 'acceleration': 'x', 'fecha_ingreso': ' 2023-02-01 '},
+        3: {'stock_options': '7.5', 'aporte_inicial': '1,000'},
+    })
+    assert resultado.valido
+    assert sorted(resultado.registros) == [2, 3]
+    fondo = resultado.registros[2]
+    assert (fondo['cliff_period'], fondo['vesting_total'], fondo['acceleration'], fondo['fecha_ingreso']) == (
+        6, 3, True, '2023-02-01'
+    )
+    assert type(fondo['cliff_period']) is int and type(fondo['vesting_total']) is int
+    carla = resultado.registros[3]
+    assert carla['stock_options'] == 7.5
+    assert carla['aporte_inicial'] == 1000
+    assert carla['equity_total'] == pytest.approx(8.5)
+    # Los campos no editados quedan como estaban
+    assert {k: v for k, v in carla.items() if k not in ('stock_options', 'aporte_inicial', 'equity_total')} == {
+        k: v for k, v in store[3].items() if k not in ('stock_options', 'aporte_inicial', 'equity_total')
+    }
+
+
+def test_un_error_invalida_todo_el_lote(store):
+    resultado = preparar_edicion(store, {
+        0: {'acciones_ordinarias': 50.0},
+        1: {'vesting_total': 2.5},
+        4: {'phantom_equity': 0.0},
+    })
+    assert not resultado.valido
+    assert [(posicion, campo) for posicion, campo, _ in resultado.errores] == [(1, 'vesting_total'), (4, 'equity_total')]
+
+
+def test_filas_eliminadas(store):
+    cambios = {4: {'rol': 'Advisor'}}
+    store.pop(4)
+    resultado = preparar_edicion(store, cambios)
+    assert resultado.errores == [(4, '', "el socio ya no existe")]
+    assert preparar_edicion(store, {-1: {'rol': 'Advisor'}}).errores == [(-1, '', "el socio ya no existe")]
+
+
+def test_cambios_en_lote():
+    assert cambios_en_lote([3, 1], 'cliff_period', '12') == {3: {'cliff_period': 12}, 1: {'cliff_period': 12}}
+    with pytest.raises(ErrorCampo):
+        cambios_en_lote([0], 'cliff_period', '12.5')
+    with pytest.raises(ErrorCampo):
+        cambios_en_lote([0], 'exclusiones_prorata', [])
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from equity_engine import calcular_dilucion_df
+from equity_engine.escenarios import agrupar_escenarios, evaluar_escenarios, normalizar_rondas
+from equity_engine.prorata import evaluar_elegibilidad_prorata, simular_montecarlo_prorata
+
+# Seed de 500k sobre 2M pre-money: se emite a inversores el 20% del post-money
+SEED = {'monto_recaudar': 500_000, 'valoracion_pre_money': 2_000_000, 'pool_empleados': 0.0,
+        'probabilidad_ejercicio': 0.0}
+
+
+def evaluar(cap, *escenarios):
+    return evaluar_escenarios(cap.df, [normalizar_rondas(rondas) for rondas in escenarios])
+
+
+def test_elegibles_de_la_empresa_de_prueba(cap):
+    elegible = evaluar_elegibilidad_prorata(cap.df, [])['elegible']
+    assert cap.df['nombre'][elegible].tolist() == ['Ana', 'Beto', 'Fondo Semilla']
+
+
+def test_una_ronda_sin_prorata_coincide_con_la_dilucion_simple(cap):
+    resultado, = evaluar(cap, [SEED])
+    esperado = calcular_dilucion_df(cap.df, 20.0)['equity_post_dilucion'].to_numpy()
+    np.testing.assert_allclose(resultado.equity_final, esperado)
+    assert resultado.resumen['dilucion_sin_prorata_%'] == pytest.approx((1 - 100 / 120) * 100)
+    assert resultado.resumen['post_money_final'] == pytest.approx(2_500_000)
+
+
+def test_ejercicio_completo_conserva_la_participacion_de_los_elegibles(cap):
+    resultado, = evaluar(cap, [dict(SEED, probabilidad_ejercicio=1.0)])
+    equity = cap.df['equity_acciones'].to_numpy()
+    elegible = evaluar_elegibilidad_prorata(cap.df, [])['elegible'].to_numpy()
+    np.testing.assert_allclose(resultado.equity_final[elegible], equity[elegible])
+    np.testing.assert_allclose(resultado.equity_final[~elegible], equity[~elegible] * 100 / 120)
+    assert resultado.resumen['equity_fundadores_%'] == pytest.approx(45.0 + 25.0)
+
+
+def test_rondas_con_pool(cap):
+    ronda = dict(SEED, pool_empleados=10.0, probabilidad_ejercicio=0.5)
+    resultado, = evaluar(cap, [ronda, ronda])
+    f_inversion, f_pool = 100 / 120, 100 / 110
+    retencion_sin = (f_inversion * f_pool) ** 2
+    retencion_con = ((f_inversion + 0.5 * (1 - f_inversion)) * f_pool) ** 2
+    final = dict(zip(cap.df['nombre'], resultado.equity_final))
+    assert final['Carla'] == pytest.approx(5.0 * retencion_sin)
+    assert final['Ana'] == pytest.approx(45.0 * retencion_con)
+    assert resultado.resumen['capital_total'] == pytest.approx(1_000_000)
+
+
+def test_capital_esperado_de_los_socios_coincide_con_montecarlo(cap):
+    resultado, = evaluar(cap, [dict(SEED, probabilidad_ejercicio=0.8)])
+    # Ana, Beto y el fondo (85% del cap table) ejercen su derecho con probabilidad 0.8
+    esperado = 85 / 100 * 500_000 * 0.8
+    assert resultado.resumen['capital_insiders_esperado'] == pytest.approx(esperado)
+    assert resultado.resumen['capital_externo_esperado'] == pytest.approx(500_000 - esperado)
+
+    simulacion = simular_montecarlo_prorata([45.0, 25.0, 15.0], 0.8, 500_000, 20.0, n_simulaciones=200_000, semilla=7)
+    assert simulacion.derecho_monto.sum() == pytest.approx(85 / 100 * 500_000)
+    assert simulacion.capital_insiders.mean() == pytest.approx(esperado, rel=0.01)
+    np.testing.assert_allclose(simulacion.tasa_ejercicio, 0.8, atol=0.01)
+
+
+def test_segunda_ronda_usa_la_participacion_tras_la_primera(cap):
+    ronda = dict(SEED, probabilidad_ejercicio=0.5)
+    resultado, = evaluar(cap, [ronda, ronda])
+    retencion_con = 100 / 120 + 0.5 * (1 - 100 / 120)
+    esperado = 85 / 100 * 500_000 * 0.5 * (1 + retencion_con)
+    assert resultado.resumen['capital_insiders_esperado'] == pytest.approx(esperado)
+
+
+def test_escenarios_de_distinto_largo_se_evaluan_igual_que_por_separado(cap):
+    corto = [dict(SEED, probabilidad_ejercicio=0.3)]
+    largo = [SEED, dict(SEED, pool_empleados=5.0, probabilidad_ejercicio=0.9)]
+    juntos = evaluar(cap, corto, largo, [])
+    for resultado, rondas in zip(juntos, (corto, largo)):
+        solo, = evaluar(cap, rondas)
+        np.testing.assert_allclose(resultado.equity_final, solo.equity_final)
+        assert resultado.resumen == pytest.approx(solo.resumen)
+    # Sin rondas no hay dilución
+    np.testing.assert_allclose(juntos[2].equity_final, cap.df['equity_acciones'])
+
+
+def test_agrupar_escenarios():
+    filas = [
+        dict(SEED, escenario='A'),
+        dict(SEED, escenario=' B ', probabilidad_ejercicio=3.0),
+        dict(SEED, escenario='A', monto_recaudar=None),
+        dict(SEED, escenario=''),
+    ]
+    escenarios = agrupar_escenarios(filas)
+    assert list(escenarios) == ['A', 'B']
+    assert escenarios['A'] == ((500_000.0, 2_000_000.0, 0.0, 0.0), (0.0, 2_000_000.0, 0.0, 0.0))
+    # La probabilidad se acota a 1
+    assert escenarios['B'] == ((500_000.0, 2_000_000.0, 0.0, 1.0),)
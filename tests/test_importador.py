@@ -0,0 +1,88 @@
+import io
+import json
+
+import pytest
+
+from equity_engine import ErrorImportacion, importar_json, importador, iterar_json
+
+
+def a_bytes(datos):
+    return io.BytesIO(json.dumps(datos, ensure_ascii=False).encode('utf-8'))
+
+
+def test_importar_json_ida_y_vuelta(export_data):
+    archivo = a_bytes(export_data)
+    resultado = importar_json(archivo, tamano_bloque=256)
+
+    assert resultado.valido
+    assert resultado.company_info == export_data['company_info']
+    assert resultado.campos['export_date'] == export_data['export_date']
+    assert resultado.socios.to_records() == export_data['socios']
+
+
+@pytest.mark.parametrize('tamano_bloque', [1, 7, 64])
+def test_registros_que_cruzan_bloques(export_data, tamano_bloque):
+    # Nombres con caracteres de varios bytes y números partidos entre bloques
+    export_data['socios'][0]['nombre'] = 'Añá Peña 🚀'
+    export_data['socios'][1]['acciones_ordinarias'] = 25.123456789
+    export_data['socios'] = export_data['socios'] * 5
+    resultado = importar_json(a_bytes(export_data), tamano_lote=3, tamano_bloque=tamano_bloque)
+
+    assert resultado.valido
+    assert resultado.total_registros == 25
+    assert resultado.socios.to_records() == export_data['socios']
+    assert resultado.company_info == export_data['company_info']
+
+
+def test_arreglo_de_socios_sin_envoltorio(registros):
+    resultado = importar_json(a_bytes(registros), tamano_bloque=16)
+    assert resultado.socios.to_records() == registros
+    assert resultado.company_info is None
+
+
+@pytest.mark.parametrize('tamano_bloque', [32, 64 * 1024])
+def test_registro_demasiado_grande(registros, tamano_bloque):
+    registros[1]['notas'] = 'x' * 2_000
+    assert len(list(iterar_json(a_bytes(registros), tamano_bloque, maximo_registro=4_000))) == 5
+    eventos = iterar_json(a_bytes(registros), tamano_bloque, maximo_registro=1_500)
+    assert next(eventos) == ('socio', 0, registros[0])
+    # Se rechaza tanto si cierra dentro del búfer como si sigue abierto al llegar al límite
+    with pytest.raises(ErrorImportacion, match='de más de 1,500 caracteres'):
+        next(eventos)
+
+
+def test_registro_que_no_cierra_no_lee_todo_el_archivo(registros):
+    # Una comilla sin cerrar: el resto del archivo parece parte del mismo texto
+    contenido = ('[{"nombre": "Roto, "categoria": "Employee"}, ' + json.dumps(registros * 200)[1:]).encode('utf-8')
+    archivo = io.BytesIO(contenido)
+    with pytest.raises(ErrorImportacion, match='registro inválido o de más de 1,500 caracteres'):
+        list(iterar_json(archivo, tamano_bloque=64, maximo_registro=1_500))
+    assert archivo.tell() < len(contenido) / 10
+
+
+def test_registros_invalidos_se_reportan_y_los_validos_se_importan(registros):
+    registros[1]['categoria'] = 'Inversor'
+    registros[3]['vesting_total'] = 'cuatro'
+    registros.insert(2, 'no es un socio')
+    resultado = importar_json(a_bytes({'socios': registros}), tamano_bloque=64)
+
+    assert not resultado.valido
+    assert resultado.total_registros == 6
+    assert resultado.registros_invalidos == 3
+    assert [(e['indice'], e['campo']) for e in resultado.errores] == [(1, 'categoria'), (2, ''), (4, 'vesting_total')]
+    assert resultado.socios.columna('nombre').tolist() == ['Ana', 'Fondo Semilla', 'Dani']
+
+
+def test_errores_acotados(monkeypatch, registros):
+    monkeypatch.setattr(importador, 'MAXIMO_ERRORES', 3)
+    resultado = importar_json(a_bytes([{'categoria': 'Inversor'}] * 10 + registros))
+
+    assert resultado.registros_invalidos == 10
+    assert resultado.total_errores == 20
+    assert len(resultado.errores) == 3
+    assert len(resultado.socios) == len(registros)
+
+
+def test_json_truncado():
+    with pytest.raises(ErrorImportacion, match='JSON inválido'):
+        importar_json(io.BytesIO(b'{"socios": [{"nombre": "Ana"'))
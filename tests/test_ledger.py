@@ -0,0 +1,35 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from equity_engine import LibroEventos
+
+
+def test_libro_eventos_ida_y_vuelta(registros):
+    libro = LibroEventos(intervalo_snapshot=2)
+    ids = libro.importacion(registros[:3], fecha=datetime(2025, 1, 1))
+    nuevo = libro.alta(registros[3], fecha=datetime(2025, 2, 1))
+    libro.emision(ids[0], 'acciones_ordinarias', 5.0, fecha=datetime(2025, 3, 1))
+    libro.transferencia(ids[0], nuevo, 'acciones_ordinarias', 2.0, fecha=datetime(2025, 4, 1))
+    libro.baja(ids[1], fecha=datetime(2025, 5, 1))
+
+    copia = LibroEventos.desde_eventos(json.loads(json.dumps(libro.eventos_desde(0))), intervalo_snapshot=2)
+    assert copia.ids() == libro.ids()
+    for fecha in ('2025-01-01', '2025-03-15', '2025-12-31'):
+        assert copia.socios_en(fecha).to_records() == libro.socios_en(fecha).to_records()
+    assert copia.socio(ids[0])['acciones_ordinarias'] == pytest.approx(45.0 + 5.0 - 2.0)
+
+    # Los ids nuevos siguen después de los del historial
+    assert copia.alta(registros[4]) == libro.alta(registros[4])
+
+
+def test_libro_eventos_invalido():
+    libro = LibroEventos()
+    libro.importacion([{'nombre': 'Ana'}])
+    libro.alta({'nombre': 'Beto'})
+    eventos = libro.eventos_desde(0)
+    with pytest.raises(ValueError):
+        LibroEventos.desde_eventos(eventos[1:])
+    with pytest.raises(ValueError):
+        LibroEventos.desde_eventos([dict(eventos[0], tipo='desconocido')])
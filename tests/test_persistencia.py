@@ -0,0 +1,84 @@
+import pytest
+
+from equity_engine import ErrorConflicto, RepositorioSQLite, SesionPersistente
+
+
+@pytest.fixture
+def repositorio(tmp_path):
+    repositorio = RepositorioSQLite(tmp_path / 'equity.db')
+    yield repositorio
+    repositorio.cerrar()
+
+
+@pytest.fixture
+def empresa_id(repositorio, registros, export_data):
+    empresa_id, _, _ = repositorio.guardar_empresa('Acme', export_data['company_info'], registros)
+    return empresa_id
+
+
+def test_guardar_y_cargar_empresa(repositorio, empresa_id, registros, export_data):
+    assert repositorio.cargar_empresa(empresa_id) == ('Acme', export_data['company_info'])
+    # La primera carga decodifica el JSON de cada socio; la segunda usa la copia columnar
+    for _ in range(2):
+        ids, socios = repositorio.cargar_socios(empresa_id)
+        assert socios.to_records() == registros
+        assert ids == repositorio.ids_socios(empresa_id)
+    assert repositorio.contar_socios(empresa_id, categoria='Co-fundador') == 1
+    assert [r['nombre'] for _, r in repositorio.iterar_socios(empresa_id, tamano=2)] == [r['nombre'] for r in registros]
+    assert repositorio.listar_empresas()['socios'].tolist() == [len(registros)]
+
+
+def test_sesion_sincroniza_altas_ediciones_y_bajas(repositorio, empresa_id, registros):
+    sesion, _, socios = SesionPersistente.abrir(repositorio, empresa_id)
+    esperado = socios.to_records()
+
+    sesion.alta(dict(registros[0], nombre='Eva'))
+    sesion.edicion(1, dict(registros[1], acciones_ordinarias=20.0))
+    sesion.baja(3)
+    # Una alta aún no escrita también se puede editar
+    sesion.edicion(len(sesion.ids) - 1, dict(registros[0], nombre='Eva', acciones_ordinarias=1.0))
+    assert sesion.sincronizar()
+    assert not sesion.sincronizar()
+
+    esperado.append(dict(registros[0], nombre='Eva', acciones_ordinarias=1.0))
+    esperado[1]['acciones_ordinarias'] = 20.0
+    del esperado[3]
+    ids, socios = repositorio.cargar_socios(empresa_id)
+    assert socios.to_records() == esperado
+    assert sesion.ids == ids
+    assert all(i > 0 for i in ids)
+
+
+def test_sesion_guarda_el_historial(repositorio, empresa_id, registros):
+    sesion, _, _ = SesionPersistente.abrir(repositorio, empresa_id)
+    id_socio = sesion.libro.ids()[0]
+    sesion.libro.emision(id_socio, 'acciones_ordinarias', 5.0)
+    sesion.sincronizar({'nombre_empresa': 'Acme SpA', 'valoracion_actual': 5_000_000})
+
+    reabierta, company_info, _ = SesionPersistente.abrir(repositorio, empresa_id)
+    assert company_info['valoracion_actual'] == 5_000_000
+    assert reabierta.libro.eventos_desde(0) == sesion.libro.eventos_desde(0)
+    assert reabierta.libro.socio(id_socio)['acciones_ordinarias'] == pytest.approx(registros[0]['acciones_ordinarias'] + 5.0)
+
+
+def test_conflicto_entre_sesiones(repositorio, empresa_id, registros):
+    primera, _, _ = SesionPersistente.abrir(repositorio, empresa_id)
+    segunda, _, _ = SesionPersistente.abrir(repositorio, empresa_id)
+    primera.edicion(0, dict(registros[0], acciones_ordinarias=40.0))
+    primera.sincronizar()
+
+    segunda.edicion(0, dict(registros[0], acciones_ordinarias=50.0))
+    with pytest.raises(ErrorConflicto):
+        segunda.sincronizar()
+    # Los cambios de la segunda sesión no pisaron los de la primera y siguen pendientes
+    assert repositorio.cargar_socios(empresa_id)[1].to_records()[0]['acciones_ordinarias'] == 40.0
+    assert len(segunda.pendientes) == 1
+
+
+def test_conflicto_si_la_fila_ya_no_existe(repositorio, empresa_id, registros):
+    ids, _, version = repositorio.cargar_socios_versionados(empresa_id)
+    _, version = repositorio.aplicar_cambios(empresa_id, [('baja', ids[0])], version)
+    with pytest.raises(ErrorConflicto, match='ya no existe'):
+        repositorio.aplicar_cambios(empresa_id, [('edicion', ids[0], registros[0])], version)
+    # La transacción fallida no cambió la versión
+    assert repositorio.aplicar_cambios(empresa_id, [], version) == ({}, version + 1)
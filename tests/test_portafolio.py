@@ -0,0 +1,82 @@
+import json
+import os
+
+import pytest
+
+from equity_engine import calcular_cap_table
+from equity_engine.portafolio import ErrorPortafolio, cargar_portafolio
+
+
+def escribir(ruta, datos):
+    ruta.write_text(json.dumps(datos, ensure_ascii=False), encoding='utf-8')
+
+
+@pytest.fixture
+def directorio(tmp_path, export_data):
+    escribir(tmp_path / 'startup_equity_acme.json', dict(export_data, company_info={'name': 'Acme'}))
+    # Una segunda empresa con el mismo nombre y solo los dos fundadores
+    escribir(tmp_path / 'startup_equity_otra.json', dict(export_data, company_info={'name': 'Acme'},
+                                                          socios=export_data['socios'][:2]))
+    (tmp_path / 'startup_equity_rota.json').write_text('{"socios": [', encoding='utf-8')
+    (tmp_path / 'otro_archivo.json').write_text('{}', encoding='utf-8')
+    return tmp_path
+
+
+def test_agregados_del_portafolio(directorio, registros):
+    portafolio = cargar_portafolio(directorio, procesos=1)
+    assert len(portafolio) == 3
+    assert [archivo for archivo, _ in portafolio.errores] == ['startup_equity_rota.json']
+
+    resumen = portafolio.resumen()
+    assert resumen['empresa'].tolist() == ['Acme (startup_equity_acme.json)', 'Acme (startup_equity_otra.json)']
+    assert resumen['socios'].tolist() == [5, 2]
+
+    cap = calcular_cap_table(registros)
+    por_categoria = portafolio.equity_por_categoria()
+    assert por_categoria.iloc[0].to_dict() == pytest.approx(cap.por_categoria['equity_total'].to_dict())
+    # Las categorías que una empresa no tiene quedan en 0
+    assert por_categoria.iloc[1].sum() == pytest.approx(45.0 + 25.0)
+    assert por_categoria.iloc[1]['Advisor'] == 0.0
+    assert portafolio.exposicion_proteccion().iloc[0].to_dict() == {'Full Ratchet (Máxima protección)': 15.0}
+
+    totales = portafolio.totales()
+    assert totales['empresas'] == 2
+    assert totales['socios'] == 7
+    assert totales['archivos_con_error'] == 1
+    assert totales['equity_disponible_promedio'] == pytest.approx(((100 - cap.totales['equity_total']) + 30.0) / 2)
+
+
+def test_cache_solo_reanaliza_lo_que_cambio(directorio, export_data):
+    primera = cargar_portafolio(directorio, procesos=1)
+    assert primera.reanalizados == 3
+    segunda = cargar_portafolio(directorio, procesos=1)
+    assert segunda.reanalizados == 0
+    assert segunda.resumen().equals(primera.resumen())
+    assert segunda.equity_por_categoria().equals(primera.equity_por_categoria())
+
+    ruta = directorio / 'startup_equity_otra.json'
+    escribir(ruta, dict(export_data, company_info={'name': 'Otra'}))
+    os.utime(ruta, ns=(0, 0))
+    tercera = cargar_portafolio(directorio, procesos=1)
+    assert tercera.reanalizados == 1
+    assert tercera.resumen()['empresa'].tolist() == ['Acme', 'Otra']
+
+
+def test_rutas_fuera_de_la_raiz(directorio):
+    (directorio / 'sub').mkdir()
+    assert len(cargar_portafolio(directorio, 'sub', procesos=1)) == 0
+    for subdirectorio in ('..', '/tmp', 'sub/../..'):
+        with pytest.raises(ErrorPortafolio):
+            cargar_portafolio(directorio, subdirectorio)
+    for patron in ('../*.json', 'sub/*.json', '.equity_portafolio.json', ''):
+        with pytest.raises(ErrorPortafolio):
+            cargar_portafolio(directorio, patron=patron)
+
+
+def test_procesos_dan_el_mismo_resultado(tmp_path, export_data):
+    for i in range(4):
+        escribir(tmp_path / f'startup_equity_{i}.json', dict(export_data, socios=export_data['socios'][i:]))
+    en_procesos = cargar_portafolio(tmp_path, procesos=2, ruta_cache=str(tmp_path / 'a.cache'))
+    en_serie = cargar_portafolio(tmp_path, procesos=1, ruta_cache=str(tmp_path / 'b.cache'))
+    assert en_procesos.resumen().equals(en_serie.resumen())
+    assert en_procesos.equity_por_categoria().equals(en_serie.equity_por_categoria())
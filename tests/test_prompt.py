@@ -0,0 +1,72 @@
+import re
+
+import numpy as np
+import pytest
+
+from equity_engine import calcular_cap_table, estimar_tokens, generar_prompt, socios_prompt
+from equity_engine.sintetico import generar_company_info, generar_socios
+
+SOLICITUD = (['Estructura de equity', 'Vesting'], 'Alta', 'Detallado', 'Dilución en la Serie A', '')
+
+
+def test_prompt_con_el_detalle_de_todos_los_socios(socios, cap):
+    company_info = {'name': 'Acme SpA', 'country': 'Chile', 'capital_autorizado': 1_000_000}
+    resultado = generar_prompt(company_info, socios, cap, *SOLICITUD)
+    texto = resultado.texto
+
+    assert not resultado.resumido
+    assert resultado.tokens <= 8000
+    assert texto.startswith("Actúa como un experto consultor")
+    assert '- **Nombre**: Acme SpA' in texto and '- **Capital Autorizado**: $1,000,000 COP' in texto
+    assert f"**Total Equity Asignado**: {cap.totales['equity_acciones']:.1f}%" in texto
+    assert re.findall(r'### Socio (\d+): (.+)', texto) == [(str(i), s['nombre']) for i, s in enumerate(socios, 1)]
+    assert '- **Protección Antidilución**: Full Ratchet (Máxima protección)' in texto
+    assert '- Estructura de equity\n- Vesting' in texto and 'Dilución en la Serie A' in texto
+    # Sin objetivos se usa el texto por defecto; el país de la empresa reemplaza a Colombia
+    assert 'Estructuración general y mejores prácticas.' in texto
+    assert 'Señala aspectos específicos del derecho Chile' in texto
+
+
+def test_prompt_resumido_dentro_del_presupuesto():
+    socios = generar_socios(2_000, semilla=4)
+    cap = calcular_cap_table(socios)
+    resultado = generar_prompt(generar_company_info(4), socios, cap, *SOLICITUD, presupuesto_tokens=6000)
+    texto = resultado.texto
+
+    assert resultado.resumido
+    assert 0 < resultado.socios_detallados <= 25
+    assert resultado.tokens <= 6000
+    # Cada socio está en el resumen por categoría
+    filas = re.findall(r'^\| (.+?) \| ([\d,]+) \| ([\d.]+) \|', texto, re.MULTILINE)
+    assert sum(int(cantidad.replace(',', '')) for _, cantidad, _ in filas) == len(socios)
+    assert {categoria for categoria, _, _ in filas} == set(cap.por_categoria.index)
+
+    # Se detallan los de mayor equity y el resto se menciona con su equity total
+    equity = cap.df['equity_acciones'].to_numpy()
+    orden = np.argsort(-equity, kind='stable')
+    detallados = [int(i) for i, _ in re.findall(r'### Socio (\d+): (.+)', texto)]
+    assert detallados == [int(p) + 1 for p in orden[:resultado.socios_detallados]]
+    restantes = equity[orden[resultado.socios_detallados:]].sum()
+    assert f"Los otros {len(socios) - resultado.socios_detallados:,} socios suman {restantes:.1f}%" in texto
+
+
+def test_seccion_de_socios_reutilizable(socios, cap):
+    memo = {}
+
+    def seccion_socios(presupuesto):
+        memo[presupuesto] = socios_prompt(socios, cap, presupuesto)
+        return memo[presupuesto]
+
+    directo = generar_prompt({}, socios, cap, *SOLICITUD)
+    memoizado = generar_prompt({}, socios, cap, *SOLICITUD, seccion_socios=seccion_socios)
+    assert memoizado.texto == directo.texto
+    assert len(memo) == 1
+
+
+@pytest.mark.parametrize('presupuesto', [0, 50])
+def test_presupuesto_minimo(socios, cap, presupuesto):
+    # El resumen por categoría se incluye siempre, aunque no quepa en el presupuesto
+    texto, detallados = socios_prompt(socios, cap, presupuesto)
+    assert detallados == 0
+    assert texto.startswith('### Resumen por categoría (5 socios)')
+    assert estimar_tokens(texto) > presupuesto
@@ -0,0 +1,144 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from equity_engine import TIPOS_EMISION_PRORATA, calcular_cap_table, prorata
+from equity_engine.prorata import (
+    MOTIVO_ELEGIBLE,
+    MOTIVO_EXCLUSION,
+    MOTIVO_PARTICIPACION_MINIMA,
+    MOTIVO_SIN_DERECHOS,
+    PERCENTILES,
+    evaluar_elegibilidad_prorata,
+    mascara_exclusiones,
+    simular_montecarlo_prorata,
+)
+
+from conftest import socio
+
+EMPLEADOS, DEUDA = TIPOS_EMISION_PRORATA[:2]
+
+
+def motivo_fila_a_fila(df, tipos_emision):
+    """Reglas de la sección pro-rata original, socio por socio"""
+    motivos = []
+    for _, s in df.iterrows():
+        equity_total = (s['acciones_ordinarias'] + s['acciones_preferenciales'] + s['stock_options'] +
+                        s.get('phantom_equity', 0) + s.get('acciones_vesting', 0))
+        if not s['derechos_prorata']:
+            motivos.append(MOTIVO_SIN_DERECHOS)
+        elif any(exclusion in s.get('exclusiones_prorata', []) for exclusion in tipos_emision):
+            motivos.append(MOTIVO_EXCLUSION)
+        elif equity_total < s.get('participacion_minima_prorata', 1.0):
+            motivos.append(MOTIVO_PARTICIPACION_MINIMA)
+        else:
+            motivos.append(MOTIVO_ELEGIBLE)
+    return motivos
+
+
+@pytest.fixture
+def cap_variado():
+    """Socios con todas las combinaciones de derechos, exclusiones y participación mínima"""
+    rng = np.random.default_rng(3)
+    socios = []
+    for i in range(120):
+        exclusiones = [t for t in TIPOS_EMISION_PRORATA if rng.random() < 0.3]
+        socios.append(socio(
+            f'Socio {i}', 'Employee',
+            acciones_ordinarias=float(rng.choice([0.0, 0.5, 1.0, 2.0])),
+            phantom_equity=float(rng.choice([0.0, 0.5])),
+            warrants=float(rng.choice([0.0, 5.0])),
+            derechos_prorata=bool(rng.random() < 0.7),
+            participacion_minima_prorata=float(rng.choice([0.0, 1.0, 2.0])),
+            exclusiones_prorata=exclusiones,
+        ))
+    return calcular_cap_table(socios)
+
+
+def test_motivos_coinciden_con_las_reglas_fila_a_fila(cap_variado):
+    df = cap_variado.df
+    for n in (0, 1, 2, len(TIPOS_EMISION_PRORATA)):
+        for tipos in itertools.combinations(TIPOS_EMISION_PRORATA, n):
+            resultado = evaluar_elegibilidad_prorata(df, list(tipos))
+            esperado = motivo_fila_a_fila(df, tipos)
+            assert resultado['motivo'].tolist() == esperado
+            assert resultado['elegible'].tolist() == [m == MOTIVO_ELEGIBLE for m in esperado]
+    # La muestra ejercita todos los códigos
+    assert set(motivo_fila_a_fila(df, [EMPLEADOS])) == {
+        MOTIVO_ELEGIBLE, MOTIVO_SIN_DERECHOS, MOTIVO_EXCLUSION, MOTIVO_PARTICIPACION_MINIMA
+    }
+
+
+def test_prioridad_de_los_motivos():
+    socios = [
+        socio('Sin derechos', 'Employee', acciones_ordinarias=0.1, participacion_minima_prorata=1.0,
+              exclusiones_prorata=[EMPLEADOS]),
+        socio('Excluido', 'Employee', acciones_ordinarias=0.1, derechos_prorata=True,
+              participacion_minima_prorata=1.0, exclusiones_prorata=[EMPLEADOS]),
+        socio('Bajo minimo', 'Employee', acciones_ordinarias=0.1, derechos_prorata=True,
+              participacion_minima_prorata=1.0, exclusiones_prorata=[DEUDA]),
+        # Los warrants no cuentan para la participación mínima
+        socio('Con warrants', 'Employee', warrants=5.0, derechos_prorata=True, participacion_minima_prorata=1.0),
+        socio('Justo en el minimo', 'Employee', acciones_ordinarias=1.0, derechos_prorata=True,
+              participacion_minima_prorata=1.0),
+    ]
+    resultado = evaluar_elegibilidad_prorata(calcular_cap_table(socios).df, [EMPLEADOS])
+    assert resultado['motivo'].tolist() == [
+        MOTIVO_SIN_DERECHOS, MOTIVO_EXCLUSION, MOTIVO_PARTICIPACION_MINIMA,
+        MOTIVO_PARTICIPACION_MINIMA, MOTIVO_ELEGIBLE,
+    ]
+
+
+def test_mascara_por_combinacion_de_exclusiones():
+    exclusiones = np.empty(6, dtype=object)
+    exclusiones[:] = [[EMPLEADOS], [DEUDA, EMPLEADOS], [], None, (DEUDA,), [EMPLEADOS]]
+    np.testing.assert_array_equal(mascara_exclusiones(exclusiones, [EMPLEADOS]),
+                                  [True, True, False, False, False, True])
+    np.testing.assert_array_equal(mascara_exclusiones(exclusiones, [DEUDA, TIPOS_EMISION_PRORATA[4]]),
+                                  [False, True, False, False, True, False])
+    assert not mascara_exclusiones(exclusiones, []).any()
+    assert mascara_exclusiones(np.empty(0, dtype=object), [EMPLEADOS]).shape == (0,)
+
+
+def simular(monkeypatch, lote, n_simulaciones=1_001, semilla=11):
+    monkeypatch.setattr(prorata, 'DECISIONES_POR_LOTE', lote)
+    return simular_montecarlo_prorata([45.0, 25.0, 15.0, 0.5], [0.9, 0.5, 0.2, 1.0], 500_000, 20.0,
+                                      n_simulaciones=n_simulaciones, semilla=semilla)
+
+
+def test_montecarlo_no_depende_del_tamano_del_lote(monkeypatch):
+    # Un solo lote frente a lotes de 2 y de 250 simulaciones (el último incompleto)
+    completa = simular(monkeypatch, 10**9)
+    for lote in (8, 1_000):
+        por_lotes = simular(monkeypatch, lote)
+        np.testing.assert_array_equal(por_lotes.capital_insiders, completa.capital_insiders)
+        np.testing.assert_array_equal(por_lotes.tasa_ejercicio, completa.tasa_ejercicio)
+        assert por_lotes.resumen() == completa.resumen()
+
+
+def test_montecarlo_coincide_con_las_decisiones_sorteadas(monkeypatch):
+    simulacion = simular(monkeypatch, 8)
+    probabilidades = np.array([0.9, 0.5, 0.2, 1.0])
+    ejerce = np.random.default_rng(11).random((1_001, 4)) < probabilidades
+    np.testing.assert_allclose(simulacion.capital_insiders, ejerce @ simulacion.derecho_monto)
+    np.testing.assert_allclose(simulacion.tasa_ejercicio, ejerce.mean(axis=0))
+
+    resumen = simulacion.resumen()
+    for percentil, valor in zip(PERCENTILES, np.percentile(simulacion.capital_insiders, PERCENTILES)):
+        assert resumen['capital_insiders'][f'p{percentil}'] == pytest.approx(valor)
+
+    # Percentiles del equity final de cada socio frente a la distribución empírica
+    equity_final = np.where(ejerce, simulacion.equity_actual, simulacion.equity_diluido)
+    for percentil in PERCENTILES:
+        np.testing.assert_allclose(
+            simulacion.equity_final_percentil(percentil),
+            np.percentile(equity_final, percentil, axis=0, method='inverted_cdf'),
+        )
+    np.testing.assert_allclose(simulacion.equity_final_media, equity_final.mean(axis=0))
+
+
+def test_montecarlo_sin_simulaciones_ni_socios():
+    assert len(simular_montecarlo_prorata([10.0], 0.5, 1_000, 20.0, n_simulaciones=0, semilla=1)) == 0
+    vacia = simular_montecarlo_prorata([], 0.5, 1_000, 20.0, n_simulaciones=10, semilla=1)
+    np.testing.assert_array_equal(vacia.capital_insiders, np.zeros(10))
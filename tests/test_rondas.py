@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from equity_engine import proyectar_rondas
+
+RONDAS = [
+    {'nombre': 'Seed', 'acciones': 250_000, 'precio': 2.0},
+    {'nombre': 'Serie A', 'acciones': 250_000, 'precio': 4.0},
+    {'nombre': 'Serie B', 'acciones': 500_000, 'precio': 10.0},
+]
+
+
+def test_retencion_acumulada_compone_cada_ronda():
+    proyeccion = proyectar_rondas(1_000_000, 5_000_000, RONDAS)
+    np.testing.assert_allclose(proyeccion.retencion_acumulada, [1_000 / 1_250, 1_000 / 1_500, 1_000 / 2_000])
+    tabla = proyeccion.rondas
+    np.testing.assert_allclose(tabla['dilucion_ronda_%'], [20.0, 250 / 1_500 * 100, 25.0])
+    np.testing.assert_allclose(tabla['dilucion_acumulada_%'], [20.0, 100 / 3, 50.0])
+    np.testing.assert_allclose(tabla['valoracion_pre_money'], [2_000_000, 5_000_000, 15_000_000])
+    np.testing.assert_allclose(tabla['capital'], [500_000, 1_000_000, 5_000_000])
+    assert proyeccion.dilucion_total == pytest.approx(50.0)
+    assert proyeccion.ronda_agota_autorizado is None
+
+
+def test_rondas_sin_acciones_no_diluyen():
+    proyeccion = proyectar_rondas(1_000_000, 5_000_000, [{'nombre': 'Puente', 'acciones': 0, 'precio': 3.0},
+                                                        {'acciones': -10, 'precio': None}])
+    np.testing.assert_allclose(proyeccion.retencion_acumulada, [1.0, 1.0])
+    assert proyeccion.rondas['ronda'].tolist() == ['Puente', 'Ronda 2']
+    assert proyeccion.dilucion_total == 0.0
+    assert proyectar_rondas(1_000, 1_000, []).dilucion_total == 0.0
+
+
+def test_primera_ronda_que_supera_el_capital_autorizado():
+    proyeccion = proyectar_rondas(1_000_000, 1_600_000, RONDAS)
+    assert proyeccion.rondas['excede_autorizado'].tolist() == [False, False, True]
+    np.testing.assert_allclose(proyeccion.rondas['acciones_disponibles'], [350_000, 100_000, -400_000])
+    np.testing.assert_allclose(proyeccion.rondas['porcentaje_autorizado_usado'], [1_250 / 16, 1_500 / 16, 125.0])
+    assert proyeccion.ronda_agota_autorizado == 'Serie B'
+    # Sin capital autorizado el porcentaje usado no está definido
+    assert proyectar_rondas(1_000_000, 0, RONDAS).rondas['porcentaje_autorizado_usado'].isna().all()
+
+
+def test_ruta_por_socio_y_clase():
+    # 2 socios x 3 clases en % de las acciones emitidas hoy
+    participaciones = np.array([[40.0, 10.0, 0.0], [0.0, 5.0, 2.5]])
+    proyeccion = proyectar_rondas(1_000_000, 5_000_000, RONDAS, participaciones)
+    assert proyeccion.ruta.shape == (2, 3, len(RONDAS) + 1)
+    np.testing.assert_array_equal(proyeccion.ruta[..., 0], participaciones)
+    for i, retencion in enumerate(proyeccion.retencion_acumulada, start=1):
+        np.testing.assert_allclose(proyeccion.ruta[..., i], participaciones * retencion)
+    np.testing.assert_allclose(proyeccion.participacion_final(), participaciones / 2)
+    assert proyectar_rondas(1_000_000, 5_000_000, RONDAS).participacion_final() is None
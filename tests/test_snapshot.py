@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from equity_engine.snapshot import ErrorSnapshot, cargar_snapshot, snapshot_en_bytes  # noqa: E402
+
+
+def test_snapshot_ida_y_vuelta(export_data):
+    simulacion = pd.DataFrame({'salida': np.linspace(0, 1e7, 11), 'pago': np.arange(11, dtype=np.float64)})
+    snapshot = cargar_snapshot(snapshot_en_bytes(export_data, {'waterfall': simulacion}))
+
+    assert snapshot.a_exportacion() == export_data
+    assert snapshot.tablas == ['waterfall']
+    pd.testing.assert_frame_equal(snapshot.leer_tabla('waterfall'), simulacion)
+
+    importacion = snapshot.a_importacion()
+    assert importacion.company_info == export_data['company_info']
+    assert importacion.socios.to_records() == export_data['socios']
+
+
+@pytest.mark.parametrize('corte', [0, 10, 100, -50])
+def test_snapshot_corrupto(export_data, corte):
+    datos = snapshot_en_bytes(export_data)
+    with pytest.raises(ErrorSnapshot):
+        cargar_snapshot(datos[:corte]).a_exportacion()
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from equity_engine.store import SociosStore
+
+
+def test_store_ida_y_vuelta(registros):
+    store = SociosStore.from_records(registros)
+    assert len(store) == len(registros)
+    assert store.to_records() == registros
+    assert SociosStore.from_frame(store.to_frame(), store.extras()).to_records() == registros
+
+
+def test_store_completa_campos_faltantes():
+    store = SociosStore.from_records([
+        {'nombre': 'Ana', 'acciones_ordinarias': 60.0, 'immediate_vest': 25.0},
+        {'nombre': 'Beto'},
+    ])
+    beto = store.to_records()[1]
+    assert beto['acciones_ordinarias'] == 0.0
+    assert beto['immediate_vest'] == 0.0
+    assert beto['vesting_schedule'] == 'Mensual'
+    assert not np.isnan(store.to_frame()['acciones_ordinarias']).any()
+
+
+def test_escrituras_no_modifican_el_dataframe_entregado(registros):
+    store = SociosStore.from_records(registros)
+    df = store.to_frame()
+    salarios = df['salario'].to_numpy().copy()
+
+    store[0] = dict(registros[0], salario=9_000_000, nombre='Ana María')
+    store.append(dict(registros[1], nombre='Nuevo'))
+    store.pop(1)
+
+    assert df['salario'].tolist() == salarios.tolist()
+    assert df['nombre'].tolist() == [r['nombre'] for r in registros]
+    assert [r['nombre'] for r in store][:2] == ['Ana María', 'Fondo Semilla']
+    assert store[0]['salario'] == 9_000_000
+
+
+def test_escritura_solo_copia_las_columnas_que_cambian(registros):
+    store = SociosStore.from_records(registros)
+    df = store.to_frame()
+
+    store[0] = dict(registros[0], salario=1_000)
+    assert not np.shares_memory(store._numericos['salario'], df['salario'].to_numpy())
+    assert np.shares_memory(store._numericos['acciones_ordinarias'], df['acciones_ordinarias'].to_numpy())
+
+    # Agregar al final escribe filas fuera de las vistas: no copia nada
+    store.append(registros[1])
+    assert np.shares_memory(store._numericos['acciones_ordinarias'], df['acciones_ordinarias'].to_numpy())
+    assert len(df) == len(registros)
+
+
+@pytest.mark.parametrize('campo', ['salario', 'cliff_period', 'porcentaje_proteccion'])
+def test_campos_enteros_rechazan_decimales(registros, campo):
+    store = SociosStore.from_records(registros)
+    with pytest.raises(ValueError, match=campo):
+        store.append(dict(registros[0], **{campo: 12.5}))
+    with pytest.raises(ValueError, match=campo):
+        store[0] = dict(registros[0], **{campo: 12.5})
+    assert len(store) == len(registros)
+    assert store[0] == registros[0]
+
+    with pytest.raises(ValueError, match=campo):
+        SociosStore.from_records([dict(r, **{campo: 0.5}) for r in registros] * 20)
+
+    store.append(dict(registros[0], **{campo: 12.0}))
+    assert store[-1][campo] == 12 and isinstance(store[-1][campo], int)
@@ -0,0 +1,77 @@
+import io
+
+import pandas as pd
+import pytest
+
+from equity_engine import SociosStore, importar_tabla, sugerir_mapeo, tabular
+
+
+def csv_de(socios, **opciones):
+    return io.BytesIO(SociosStore.from_records(socios).to_frame().to_csv(index=False, **opciones).encode('utf-8'))
+
+
+@pytest.mark.parametrize('filas_por_bloque', [2, 1000])
+def test_csv_exportado_ida_y_vuelta(socios, filas_por_bloque):
+    socios[2]['exclusiones_prorata'] = ['Emisiones para empleados (stock options)']
+    resultado = importar_tabla(csv_de(socios), '.csv', filas_por_bloque=filas_por_bloque)
+    assert resultado.valido
+    assert resultado.total_registros == len(socios)
+    assert resultado.socios.to_records() == socios
+
+
+@pytest.mark.parametrize('calamine', [True, False])
+def test_excel_ida_y_vuelta(monkeypatch, socios, calamine):
+    if calamine:
+        pytest.importorskip('python_calamine')
+    pytest.importorskip('openpyxl')
+    monkeypatch.setattr(tabular, 'CALAMINE_DISPONIBLE', calamine)
+    archivo = io.BytesIO()
+    SociosStore.from_records(socios).to_frame().astype({'exclusiones_prorata': str}).to_excel(archivo, index=False)
+    archivo.seek(0)
+    resultado = importar_tabla(archivo, '.xlsx')
+    assert resultado.valido
+    assert resultado.socios.to_records() == socios
+
+
+def test_encabezados_de_planilla_y_valores_sugeridos():
+    contenido = (
+        "Nombre Completo;Categoría;Fecha de Ingreso;Ordinarias %;Cliff (meses);Pro-rata;Sueldo\n"
+        "Ana;Fundador Principal;2022-01-15;45,5;;sí;1.500.000\n"
+        "Beto;Advisor;2023-03-01;0,5;3;;\n"
+    ).encode('utf-8')
+    columnas = ['Nombre Completo', 'Categoría', 'Fecha de Ingreso', 'Ordinarias %', 'Cliff (meses)', 'Pro-rata', 'Sueldo']
+    mapeo = sugerir_mapeo(columnas)
+    assert mapeo == dict(zip(columnas, ['nombre', 'categoria', 'fecha_ingreso', 'acciones_ordinarias',
+                                        'cliff_period', 'derechos_prorata', 'salario']))
+
+    ana, beto = importar_tabla(io.BytesIO(contenido), '.csv', mapeo).socios.to_records()
+    assert (ana['acciones_ordinarias'], ana['salario'], ana['equity_total']) == (45.5, 1_500_000, 45.5)
+    # Cliff y vesting sugeridos por categoría; el preset pro-rata de fundadores
+    assert (ana['cliff_period'], ana['vesting_total']) == (12, 4)
+    assert ana['tipo_derechos_prorata'] == 'Derechos Completos (todas las emisiones)'
+    assert (beto['cliff_period'], beto['vesting_total']) == (3, 2)
+    assert not beto['derechos_prorata']
+    assert beto['tipo_derechos_prorata'] == 'Sin derechos pro-rata'
+
+
+def test_filas_invalidas_se_reportan_con_su_numero_de_fila():
+    contenido = (
+        "nombre,categoria,cliff_period,fecha_ingreso\n"
+        "Ana,Fundador Principal,12,2022-01-15\n"
+        ",Employee,12,2022-01-15\n"
+        "Carla,Inversor,1.5,2022-01-15\n"
+        "Dani,Employee,6,15/01/2022\n"
+    ).encode('utf-8')
+    resultado = importar_tabla(io.BytesIO(contenido), '.csv', filas_por_bloque=2)
+    assert resultado.registros_invalidos == 3
+    assert [(e['indice'], e['campo']) for e in resultado.errores] == [
+        (3, 'nombre'), (4, 'categoria'), (4, 'cliff_period'), (5, 'fecha_ingreso')
+    ]
+    assert resultado.socios.columna('nombre').tolist() == ['Ana']
+
+
+def test_mapeo_sin_nombre_o_repetido(socios):
+    with pytest.raises(tabular.ErrorImportacion, match='nombre'):
+        importar_tabla(csv_de(socios), '.csv', {'rol': 'rol'})
+    with pytest.raises(tabular.ErrorImportacion, match='varias columnas'):
+        importar_tabla(csv_de(socios), '.csv', {'nombre': 'nombre', 'rol': 'nombre'})
@@ -0,0 +1,87 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import socio
+from equity_engine import calcular_cap_table
+from equity_engine.vesting import calcular_matriz_vesting, equity_consolidado_en, fraccion_consolidada
+
+
+def un_socio(**campos):
+    """Cap table de un socio con 4 años de vesting mensual, cliff de 12 meses e ingreso 2024-01-15"""
+    campos = dict({'acciones_ordinarias': 10.0, 'fecha_ingreso': '2024-01-15'}, **campos)
+    return calcular_cap_table([socio('Ana', 'Fundador Principal', **campos)]).df
+
+
+def fraccion(df, fecha, en_salida=False):
+    return float(fraccion_consolidada(df, fecha, en_salida)[0])
+
+
+@pytest.mark.parametrize('fecha, esperado', [
+    (date(2024, 6, 1), 0.0),
+    (date(2025, 1, 14), 0.0),
+    (date(2025, 1, 15), 12 / 48),
+    (date(2025, 2, 15), 13 / 48),
+    (date(2026, 1, 15), 24 / 48),
+    (date(2028, 1, 15), 1.0),
+    (date(2031, 1, 1), 1.0),
+])
+def test_cronograma_mensual_con_cliff(fecha, esperado):
+    assert fraccion(un_socio(), fecha) == pytest.approx(esperado)
+
+
+@pytest.mark.parametrize('cronograma, fecha, esperado', [
+    ('Trimestral', date(2025, 3, 20), 12 / 48),
+    ('Trimestral', date(2025, 4, 15), 15 / 48),
+    ('Semestral', date(2025, 12, 20), 18 / 48),
+    ('Anual', date(2025, 12, 20), 12 / 48),
+    ('Anual', date(2026, 1, 15), 24 / 48),
+])
+def test_consolida_al_cerrar_cada_periodo(cronograma, fecha, esperado):
+    assert fraccion(un_socio(vesting_schedule=cronograma), fecha) == pytest.approx(esperado)
+
+
+def test_consolidacion_inmediata():
+    df = un_socio(immediate_vest=25.0)
+    assert fraccion(df, date(2024, 6, 1)) == pytest.approx(0.25)
+    assert fraccion(df, date(2026, 1, 15)) == pytest.approx(0.25 + 0.75 * 0.5)
+
+
+def test_aceleracion_solo_en_salida():
+    df = un_socio(acceleration=True)
+    assert fraccion(df, date(2024, 6, 1)) == pytest.approx(0.0)
+    assert fraccion(df, date(2024, 6, 1), en_salida=True) == pytest.approx(1.0)
+    assert fraccion(un_socio(), date(2024, 6, 1), en_salida=True) == pytest.approx(0.0)
+
+
+def test_matriz_vesting(cap):
+    matriz = calcular_matriz_vesting(cap.df, fecha_referencia=date(2026, 1, 1))
+
+    # Preferenciales y warrants no están sujetos a vesting
+    equity = dict(zip(matriz.nombres, matriz.equity))
+    assert equity['Fondo Semilla'] == pytest.approx(0.0)
+    assert equity['Carla'] == pytest.approx(6.0)
+
+    # Desde el mes del primer ingreso hasta que consolidan todos; Carla aún no ingresa en 2022
+    assert matriz.meses[0] == pd.Timestamp(2022, 1, 1)
+    np.testing.assert_allclose(matriz.porcentaje[:, -1], 1.0)
+    assert matriz.en(date(2022, 6, 1)).set_index('nombre').loc['Carla', 'porcentaje_consolidado'] == 0.0
+
+    # La columna de un mes coincide con fraccion_consolidada al cierre de ese mes
+    tabla = matriz.en(date(2025, 3, 10)).set_index('nombre')
+    esperado = fraccion_consolidada(cap.df, date(2025, 3, 31)) * 100
+    np.testing.assert_allclose(tabla['porcentaje_consolidado'], esperado)
+    assert tabla.loc['Carla', 'equity_consolidado'] == pytest.approx(6.0 * 12 / 48)
+
+    np.testing.assert_allclose(matriz.consolidado_hoy, fraccion_consolidada(cap.df, date(2026, 1, 1)) * matriz.equity)
+
+
+
+def test_equity_consolidado_en_coincide_con_la_matriz(cap):
+    consolidado = equity_consolidado_en(cap.df, date(2026, 1, 1))
+    matriz = calcular_matriz_vesting(cap.df, fecha_referencia=date(2026, 1, 1))
+    pd.testing.assert_series_equal(consolidado, matriz.consolidado_hoy)
+    # Carla: 6 puntos con vesting, 22 meses completos de 48 al 2026-01-01
+    assert dict(zip(cap.df['nombre'], consolidado))['Carla'] == pytest.approx(6.0 * 22 / 48)
@@ -0,0 +1,73 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from equity_engine.waterfall import calcular_waterfall
+
+VALORACION = 4_000_000
+SALIDAS = np.linspace(0, 50_000_000, 501)
+
+# 15% preferenciales con preferencia 1x sobre 4M = 600k; 80 unidades comunes (sin profit sharing),
+# 2 de ellas son warrants del mismo fondo
+PREFERENCIA = 600_000
+COMUNES = 80.0
+UNIDADES = 95.0
+
+
+@pytest.mark.parametrize('participativas', [False, True])
+@pytest.mark.parametrize('multiplo', [1.0, 2.0])
+def test_pagos_suman_cada_salida(cap, participativas, multiplo):
+    resultado = calcular_waterfall(cap.df, SALIDAS, VALORACION, multiplo, participativas, date(2026, 1, 1))
+    np.testing.assert_allclose(resultado.pagos.sum(axis=0), SALIDAS, rtol=1e-12, atol=1e-6)
+    assert (resultado.pagos >= -1e-9).all()
+
+
+def test_salida_menor_a_la_preferencia_es_toda_del_inversor(cap):
+    resultado = calcular_waterfall(cap.df, [300_000], VALORACION, fecha_salida=date(2026, 1, 1))
+    tabla = resultado.distribucion_en(300_000).set_index('nombre')
+    assert tabla.loc['Fondo Semilla', 'pago_total'] == pytest.approx(300_000)
+    assert tabla.loc['Fondo Semilla', 'pago_preferencia'] == pytest.approx(300_000)
+    assert tabla.drop('Fondo Semilla')['pago_total'].abs().max() == pytest.approx(0)
+
+
+def test_no_participativas_cobran_preferencia_o_convierten(cap):
+    salidas = [2_000_000, 10_000_000]
+    resultado = calcular_waterfall(cap.df, salidas, VALORACION, fecha_salida=date(2026, 1, 1))
+    fondo = list(resultado.nombres).index('Fondo Semilla')
+    ana = list(resultado.nombres).index('Ana')
+
+    # 2M: cobra la preferencia y el resto se reparte entre las 80 unidades comunes
+    assert not resultado.convierte[0]
+    assert resultado.pagos_preferencia[fondo, 0] == pytest.approx(PREFERENCIA)
+    assert resultado.pagos[fondo, 0] == pytest.approx(PREFERENCIA + 2 / COMUNES * (2_000_000 - PREFERENCIA))
+    assert resultado.pagos[ana, 0] == pytest.approx(45 / COMUNES * (2_000_000 - PREFERENCIA))
+
+    # 10M: su parte as-converted (15/95) supera la preferencia y convierte
+    assert resultado.convierte[1]
+    assert resultado.pagos[fondo, 1] == pytest.approx(17 / UNIDADES * 10_000_000)
+    assert resultado.pagos_preferencia[:, 1].sum() == pytest.approx(0)
+
+
+def test_participativas_cobran_preferencia_y_participan(cap):
+    resultado = calcular_waterfall(cap.df, [2_000_000], VALORACION, participativas=True,
+                                   fecha_salida=date(2026, 1, 1))
+    fondo = list(resultado.nombres).index('Fondo Semilla')
+    assert resultado.pagos[fondo, 0] == pytest.approx(PREFERENCIA + 17 / UNIDADES * (2_000_000 - PREFERENCIA))
+
+
+def test_profit_sharing_no_cobra_en_la_salida(cap):
+    resultado = calcular_waterfall(cap.df, [UNIDADES * 100_000], VALORACION, fecha_salida=date(2026, 1, 1))
+    tabla = resultado.distribucion_en(UNIDADES * 100_000).set_index('nombre')
+    # Dani solo cobra por sus 2 unidades de phantom equity, no por el 3% de profit sharing
+    assert tabla.loc['Dani', 'pago_total'] == pytest.approx(2 * 100_000)
+
+
+def test_pago_no_consolidado_sin_aceleracion(cap):
+    # Carla (ingreso 2024-03-01, cliff 12, 4 años) tiene 25% consolidado al cumplir un año
+    resultado = calcular_waterfall(cap.df, [UNIDADES * 100_000], VALORACION, fecha_salida=date(2025, 3, 1))
+    tabla = resultado.distribucion_en(UNIDADES * 100_000).set_index('nombre')
+    assert tabla.loc['Carla', 'pago_total'] == pytest.approx(6 * 100_000)
+    assert tabla.loc['Carla', 'pago_no_consolidado'] == pytest.approx(6 * 0.75 * 100_000)
+    # Ana tiene aceleración: todo consolida al salir
+    assert tabla.loc['Ana', 'pago_no_consolidado'] == pytest.approx(0)